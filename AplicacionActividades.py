@@ -11,6 +11,7 @@ from datetime import datetime
 
 # Importar utilidades de datos externalizadas
 from data_utils import *
+from acelerador import filtrar_registros, calcular_estadisticas
 
 # Intentar importar FPDF solo si se desea habilitar PDF
 PDF_AVAILABLE = False
@@ -734,7 +735,7 @@ class AplicacionActividades:
         total_user = len(df_user)
         
         # Calcular actividades cumplidas y pendientes
-        cumplidas = len(df_user[df_user["CUMPLIDO"] == "Sí"])
+        cumplidas = calcular_estadisticas(df_user["CUMPLIDO"]).get("Sí", 0)
         pendientes = total_user - cumplidas
         
         # Actualizar etiquetas
@@ -796,9 +797,8 @@ class AplicacionActividades:
             messagebox.showinfo("Filtro", "No hay registros para filtrar")
             return
         
-        # Filtrar por fecha de cumplimiento (insensible a mayúsculas/minúsculas)
-        # Convertir ambas fechas a string para comparación
-        df_filtrado = df[df["FECHA ATENCIÓN"].astype(str).str.contains(fecha_filtro, na=False)]
+        # Filtrar por fecha de cumplimiento (comparada como texto)
+        df_filtrado = filtrar_registros(df, {"FECHA ATENCIÓN": fecha_filtro})
         
         # Insertar resultados filtrados
         for _, row in df_filtrado.iterrows():
@@ -0,0 +1,193 @@
+"""
+Filtrar, buscar, contar y ordenar DataFrames de registros con la extensión Rust
+actividades_rust (src/lib.rs, se compila con `maturin develop --release`) cuando
+está instalada; si no, o con ACELERADOR_RUST=0, con las mismas operaciones
+vectorizadas de pandas que ya usaban data_utils y export_service.
+
+Las dos rutas devuelven lo mismo: las filas del DataFrame original (con su índice
+y tipos) o un dict {valor: cantidad}; test_acelerador.py las compara cuando la
+extensión está instalada. Un valor vacío (NaN/None/NaT) no coincide con ningún
+filtro y ordena al final, como en pandas.
+
+Para medir ambas rutas (la de Rust incluye pasar las filas a dicts de texto):
+    python acelerador.py [número de registros]
+"""
+
+import sys
+import time
+
+from config import ACELERADOR_RUST
+from utils import ModuloDiferido
+
+pd = ModuloDiferido("pandas")
+
+try:
+    import actividades_rust
+except ImportError:
+    actividades_rust = None
+
+RUST_DISPONIBLE = actividades_rust is not None and ACELERADOR_RUST
+
+# Clave con la posición de la fila en los dicts que recibe la extensión
+_POSICION = '#'
+
+
+def _textos(serie):
+    """Texto de cada valor, el mismo que comparan ambas rutas; None si está vacío"""
+    return serie.astype(str).astype(object).where(serie.notna(), None)
+
+
+# =============================================================================
+# PANDAS
+# =============================================================================
+
+def _contiene(serie, valor):
+    return _textos(serie).str.lower().str.contains(valor.lower(), regex=False, na=False)
+
+
+def _filtrar_pandas(df, filtros):
+    mascara = pd.Series(True, index=df.index)
+    for campo, valor in filtros.items():
+        mascara &= _contiene(df[campo], valor) if campo in df.columns else False
+    return df[mascara]
+
+
+def _buscar_pandas(df, termino, campos):
+    mascara = pd.Series(False, index=df.index)
+    for campo in campos:
+        if campo in df.columns:
+            mascara |= _contiene(df[campo], termino)
+    return df[mascara]
+
+
+def _contar_pandas(serie):
+    # Las columnas categóricas incluyen con 0 las categorías que no aparecen
+    conteo = serie.value_counts()
+    return {str(valor): int(veces) for valor, veces in conteo[conteo > 0].items()}
+
+
+def _ordenar_pandas(df, campos, ascendente):
+    return df.sort_values(by=list(campos), ascending=ascendente, kind='stable', na_position='last')
+
+
+# =============================================================================
+# EXTENSIÓN RUST
+# =============================================================================
+
+def _registros(df, columnas):
+    """Filas como dicts {columna: texto} con su posición; los valores vacíos se omiten"""
+    registros = [{_POSICION: str(i)} for i in range(len(df))]
+    for columna in columnas:
+        if columna not in df.columns:
+            continue
+        for registro, valor in zip(registros, _textos(df[columna]).tolist()):
+            if valor is not None:
+                registro[columna] = valor
+    return registros
+
+
+def _filas(df, registros):
+    return df.iloc[[int(registro[_POSICION]) for registro in registros]]
+
+
+def _filtrar_rust(df, filtros):
+    return _filas(df, actividades_rust.filtrar_registros(_registros(df, filtros), dict(filtros)))
+
+
+def _buscar_rust(df, termino, campos):
+    campos = list(campos)
+    return _filas(df, actividades_rust.buscar_registros_avanzado(_registros(df, campos), termino, campos))
+
+
+def _contar_rust(serie):
+    conteo = actividades_rust.calcular_estadisticas(_registros(serie.to_frame('valor'), ['valor']), 'valor')
+    return dict(sorted(conteo.items(), key=lambda par: (-par[1], par[0])))
+
+
+def _ordenar_rust(df, campos, ascendente):
+    # Ordenar de forma estable por cada campo, del último al primero, equivale a ordenar
+    # por todos; la extensión ordena un vacío como "", así que esas filas se apartan al final
+    sentidos = ascendente if isinstance(ascendente, (list, tuple)) else [ascendente] * len(campos)
+    for campo, sentido in reversed(list(zip(campos, sentidos))):
+        registros = _registros(df, [campo])
+        vacios = [registro for registro in registros if campo not in registro]
+        con_valor = [registro for registro in registros if campo in registro]
+        df = _filas(df, actividades_rust.ordenar_registros(con_valor, campo, sentido) + vacios)
+    return df
+
+
+# =============================================================================
+# DESPACHO
+# =============================================================================
+
+def filtrar_registros(df, filtros):
+    """Filas en las que cada columna de `filtros` contiene su valor (sin distinguir mayúsculas)"""
+    if RUST_DISPONIBLE and len(df):
+        return _filtrar_rust(df, filtros)
+    return _filtrar_pandas(df, filtros)
+
+
+def buscar_registros_avanzado(df, termino, campos):
+    """Filas en las que alguna de `campos` contiene `termino` (sin distinguir mayúsculas)"""
+    if RUST_DISPONIBLE and len(df):
+        return _buscar_rust(df, termino, campos)
+    return _buscar_pandas(df, termino, campos)
+
+
+def calcular_estadisticas(serie):
+    """{valor: cantidad de filas} de una columna, de mayor a menor cantidad"""
+    if RUST_DISPONIBLE and len(serie):
+        return _contar_rust(serie)
+    return _contar_pandas(serie)
+
+
+def ordenar_registros(df, campos, ascendente=True):
+    """Filas ordenadas por una o varias columnas; los empates conservan el orden original"""
+    campos = [campos] if isinstance(campos, str) else list(campos)
+    if RUST_DISPONIBLE and len(df):
+        return _ordenar_rust(df, campos, ascendente)
+    return _ordenar_pandas(df, campos, ascendente)
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def _medir(funcion, repeticiones=5):
+    """Mejor tiempo de varias ejecuciones, en ms"""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor * 1000
+
+
+def benchmark(n=20000):
+    """Tiempos por función de la ruta pandas y de la extensión (si está instalada)"""
+    actividades = ["Soporte técnico", "Capacitación", "Gestión predial", "Instalación de red", "Reunión"]
+    df = pd.DataFrame({
+        "USUARIO": pd.Categorical([f"usuario{i % 7}" for i in range(n)]),
+        "TIPO DE ACTIVIDAD": pd.Categorical([actividades[i % len(actividades)] for i in range(n)]),
+        "FECHA": pd.to_datetime([f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d} 08:00:00" for i in range(n)]),
+        "DEPENDENCIA": ["ALCALDÍA" if i % 3 else "Secretaría de Hacienda" for i in range(n)],
+        "DESCRIPCIÓN": [f"Revisión de impresora {i}" if i % 5 == 0 else f"Equipo {i}" for i in range(n)],
+    })
+    casos = {
+        "filtrar": (_filtrar_pandas, _filtrar_rust, (df, {"DEPENDENCIA": "hacienda", "TIPO DE ACTIVIDAD": "soporte"})),
+        "buscar": (_buscar_pandas, _buscar_rust, (df, "IMPRESORA", ["DESCRIPCIÓN", "DEPENDENCIA"])),
+        "estadisticas": (_contar_pandas, _contar_rust, (df["TIPO DE ACTIVIDAD"],)),
+        "ordenar": (_ordenar_pandas, _ordenar_rust, (df, ["TIPO DE ACTIVIDAD", "FECHA"], True)),
+    }
+    print(f"{n} registros · extensión Rust: {'sí' if actividades_rust else 'no instalada'}")
+    print(f"{'función':14} {'pandas ms':>10} {'rust ms':>10} {'aceleración':>12}")
+    for nombre, (pandas, rust, argumentos) in casos.items():
+        t_pandas = _medir(lambda: pandas(*argumentos))
+        t_rust = _medir(lambda: rust(*argumentos)) if actividades_rust else None
+        rust_txt = f"{t_rust:10.2f}" if t_rust is not None else f"{'-':>10}"
+        aceleracion = f"{t_pandas / t_rust:11.1f}x" if t_rust else f"{'-':>12}"
+        print(f"{nombre:14} {t_pandas:10.2f} {rust_txt} {aceleracion}")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -1,5 +1,8 @@
 
-from flask import Flask, request, redirect, url_for, session, render_template_string, send_file, make_response
+from flask import (
+    Flask, request, redirect, url_for, session, render_template_string, send_file,
+    make_response, Response, stream_with_context, jsonify
+)
 import os
 import json
 from datetime import datetime
@@ -13,13 +16,23 @@ from database import (
     cargar_ubicaciones, guardar_ubicaciones,
     cargar_tipos_solicitud, guardar_tipos_solicitud,
     cargar_medios_solicitud, guardar_medios_solicitud,
-    cargar_registros, guardar_registro, eliminar_registro, actualizar_registro,
-    obtener_configuracion_usuario, guardar_configuracion_usuario
+    obtener_registros_recientes, guardar_registro, eliminar_registro, actualizar_registro,
+    obtener_configuracion_usuario, guardar_configuracion_usuario, obtener_versiones_datos
 )
 from activity_service import agregar_actividad_personal, eliminar_actividad_personal
 from export_service import (
-    exportar_registros_filtrados, obtener_estadisticas_exportacion,
-    generar_informe_template
+    obtener_estadisticas_exportacion, obtener_estadisticas_versionadas, generar_csv_stream
+)
+from export_cache import obtener_informe
+from compression import es_comprimible, codificacion_para, comprimir, comprimir_stream
+from static_assets import resolver
+from eventos import bus, generar_sse
+from records_api import usuario_api, parametros_api, generar_ndjson_stream, MIMETYPE_NDJSON
+from busqueda import parametros_busqueda, buscar
+from autocompletar import parametros_autocompletar, autocompletar
+from report_batch import generar_lote_zip, nombre_lote, TIPOS_REPORTE
+from export_jobs import (
+    enviar_exportacion, obtener_trabajo, purgar_expirados, puede_ver, estado_publico, ESTADO_LISTO
 )
 from html_utils import (
     generar_opciones_actividades, generar_opciones_ubicaciones,
@@ -27,14 +40,17 @@ from html_utils import (
     generar_opciones_usuarios, generar_gestion_usuarios,
     generar_gestion_actividades_globales, generar_gestion_actividades_personales,
     generar_gestion_ubicaciones, generar_gestion_tipos_solicitud,
-    generar_gestion_medios_solicitud, generar_tabla_registros_recientes
+    generar_gestion_medios_solicitud, generar_tabla_registros_recientes,
+    generar_formulario_lote, generar_tabla_usuarios_stats, json_script
 )
+from utils import fecha_de_filtro
 from templates import (
     LOGIN_TEMPLATE, MAIN_TEMPLATE, GESTION_TEMPLATE,
     EXPORTAR_TEMPLATE, ESTADISTICAS_TEMPLATE
 )
 
-app = Flask(__name__)
+# static/ lo sirve la ruta /static/ de abajo (nombres con huella y cache inmutable)
+app = Flask(__name__, static_folder=None)
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", os.urandom(24))
 
 # =============================================================================
@@ -57,6 +73,33 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# =============================================================================
+# COMPRESIÓN DE RESPUESTAS
+# =============================================================================
+
+@app.after_request
+def comprimir_respuesta(response):
+    """Comprime HTML/JSON/CSV con gzip o brotli según Accept-Encoding"""
+    if response.status_code < 200 or response.status_code in (204, 206, 304) \
+            or 'Content-Encoding' in response.headers or request.method == 'HEAD':
+        return response
+
+    tamano = None if response.is_streamed else response.content_length
+    codificacion = codificacion_para(request.headers.get('Accept-Encoding'), response.mimetype, tamano)
+    if es_comprimible(response.mimetype):
+        response.vary.add('Accept-Encoding')
+    if codificacion is None:
+        return response
+
+    if response.is_streamed:
+        # Exportaciones por bloques: se comprimen a medida que se generan
+        response.response = comprimir_stream(response.response, codificacion)
+        response.headers.pop('Content-Length', None)
+    else:
+        response.set_data(comprimir(response.get_data(), codificacion))
+    response.headers['Content-Encoding'] = codificacion
+    return response
+
 # =============================================================================
 # RUTAS PRINCIPALES
 # =============================================================================
@@ -81,8 +124,8 @@ def index():
             alertas = '<div class="alert alert-info alert-dismissible fade show">🗑️ Registro eliminado<button type="button" class="btn-close" data-bs-dismiss="alert"></button></div>'
         
         # Cargar datos
-        df = cargar_registros(usuario_actual)
-        tabla_html = generar_tabla_registros_recientes(df, usuario_actual)
+        registros = obtener_registros_recientes(usuario_actual)
+        tabla_html = generar_tabla_registros_recientes(registros, usuario_actual)
         
         return render_template_string(MAIN_TEMPLATE.format(
             usuario_actual=usuario_actual,
@@ -354,9 +397,11 @@ def estadisticas():
     usuario_actual = session.get('usuario')
     if not usuario_actual: return redirect(url_for('index'))
     
-    fecha_inicio = request.args.get('fecha_inicio', '').strip() or None
-    fecha_fin = request.args.get('fecha_fin', '').strip() or None
+    fecha_inicio = fecha_de_filtro(request.args.get('fecha_inicio', ''))
+    fecha_fin = fecha_de_filtro(request.args.get('fecha_fin', ''))
 
+    # Versiones antes de calcular: un cambio concurrente llega luego como delta, no se pierde
+    versiones = obtener_versiones_datos(usuario_actual)
     stats = obtener_estadisticas_exportacion(usuario_actual, fecha_inicio, fecha_fin)
     
     # Calcular promedio
@@ -374,19 +419,7 @@ def estadisticas():
     
     # Tabla usuarios
     user_list = stats.get('usuarios', [])
-    tabla_stats = ""
-    for u in user_list:
-        admin_badge = '<span class="badge bg-soft-primary text-primary">Admin</span>' if u['usuario'] == 'admin' else ""
-        tabla_stats += f"""
-        <tr>
-            <td><span class="fw-bold">{u['usuario']}</span> {admin_badge}</td>
-            <td class="text-center"><span class="badge bg-light text-dark">{u['total']}</span></td>
-            <td class="text-center">{u['cumplimiento']}</td>
-            <td class="small text-muted">{u['ultima']}</td>
-        </tr>
-        """
-    if not tabla_stats:
-        tabla_stats = "<tr><td colspan='4' class='text-center text-muted'>No hay datos disponibles</td></tr>"
+    tabla_stats = generar_tabla_usuarios_stats(user_list)
         
     return render_template_string(ESTADISTICAS_TEMPLATE.format(
         usuario_actual=usuario_actual,
@@ -395,14 +428,83 @@ def estadisticas():
         fecha_min=fecha_inicio if fecha_inicio else fecha_min,
         fecha_max=fecha_fin if fecha_fin else stats.get('fecha_max', 'N/A'),
         promedio_diario=promedio,
-        data_actividades=json.dumps(stats.get('chart_actividades', {'labels': [], 'data': []})),
-        data_cumplimiento=json.dumps(stats.get('chart_cumplimiento', {'labels': [], 'data': []})),
-        data_linea=json.dumps(stats.get('chart_linea', {'labels': [], 'data': []})),
+        data_actividades=json_script(stats.get('chart_actividades', {'labels': [], 'data': []})),
+        data_cumplimiento=json_script(stats.get('chart_cumplimiento', {'labels': [], 'data': []})),
+        data_linea=json_script(stats.get('chart_linea', {'labels': [], 'data': []})),
         tabla_usuarios_stats=tabla_stats,
+        data_usuarios=json_script(user_list),
+        data_versiones=json_script(versiones),
         val_fecha_inicio=fecha_inicio or "",
-        val_fecha_fin=fecha_fin or ""
+        val_fecha_fin=fecha_fin or "",
+        filtro=json_script({'inicio': fecha_inicio or '', 'fin': fecha_fin or ''})
     ))
 
+@app.route('/estadisticas/datos')
+def estadisticas_datos():
+    """Estadísticas en JSON para resincronizar el dashboard (204 si la versión no cambió)"""
+    usuario_actual = session.get('usuario')
+    if not usuario_actual:
+        return jsonify({'error': 'No autorizado'}), 401
+    stats = obtener_estadisticas_versionadas(
+        usuario_actual,
+        fecha_de_filtro(request.args.get('fecha_inicio', '')),
+        fecha_de_filtro(request.args.get('fecha_fin', '')),
+        request.args.get('version')
+    )
+    if stats is None:
+        return '', 204
+    return jsonify(stats)
+
+@app.route('/eventos')
+def eventos_sse():
+    """Server-Sent Events del bus (deltas del dashboard). Cada stream ocupa un hilo del servidor"""
+    usuario_actual = session.get('usuario')
+    if not usuario_actual:
+        return jsonify({'error': 'No autorizado'}), 401
+    ultimo_id = request.headers.get('Last-Event-ID') or request.args.get('ultimo')
+    suscripcion = bus.suscribir_hilo(usuario_actual, ultimo_id)
+    if suscripcion is None:
+        # Sin cupo: el dashboard sigue solo con el sondeo de /estadisticas/datos
+        return Response('', status=503, headers={'Retry-After': '30'})
+    return Response(
+        generar_sse(suscripcion),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def _parametros_exportacion(usuario_actual):
+    """Lee el formulario de exportación, guarda los datos del contrato y resuelve los filtros"""
+    formato = request.form.get('formato', 'excel').strip()
+    tipo_reporte = request.form.get('tipo_reporte', 'detallado').strip()
+    usuario_filtro = request.form.get('usuario_filtro', usuario_actual).strip()
+    
+    contrato_data = {
+        'objeto': request.form.get('contrato_objeto', '').strip(),
+        'nro': request.form.get('contrato_nro', '').strip(),
+        'nombre': request.form.get('contrato_nombre', '').strip(),
+        'cedula': request.form.get('contrato_cedula', '').strip(),
+        'supervisor': request.form.get('contrato_supervisor', '').strip()
+    }
+    
+    # Guardar config
+    config = obtener_configuracion_usuario(usuario_actual)
+    config["datos_contrato"] = contrato_data
+    guardar_configuracion_usuario(usuario_actual, config)
+    
+    # Filtros
+    if usuario_actual != "admin":
+        usuario_filtro = usuario_actual
+    elif usuario_filtro == "Todos":
+        usuario_filtro = None
+    
+    filtros = {
+        'fecha_inicio': request.form.get('fecha_inicio', '').strip() or None,
+        'fecha_fin': request.form.get('fecha_fin', '').strip() or None,
+        'usuario': usuario_filtro,
+        'actividad': request.form.get('actividad', '').strip() or None
+    }
+    return filtros, formato, tipo_reporte, contrato_data
+
 @app.route('/exportar', methods=['GET', 'POST'])
 def exportar():
     usuario_actual = session.get('usuario')
@@ -448,6 +550,7 @@ def exportar():
             total_tipos_actividad=stats.get('total_tipos_actividad', 0),
             ultima_exportacion=stats.get('ultima_exportacion', 'Nunca'),
             filtro_usuario_html=filtro_usuario_html,
+            lote_html=generar_formulario_lote() if usuario_actual == "admin" else "",
             val_contrato_objeto=dc.get('objeto', ''),
             val_contrato_nro=dc.get('nro', ''),
             val_contrato_nombre=dc.get('nombre', ''),
@@ -456,85 +559,175 @@ def exportar():
         ))
         
     if request.method == 'POST':
-        import tempfile
-        import io
-        from export_final_service import generar_informe_final_resumen
-        
-        fecha_inicio = request.form.get('fecha_inicio', '').strip() or None
-        fecha_fin = request.form.get('fecha_fin', '').strip() or None
-        actividad = request.form.get('actividad', '').strip() or None
-        formato = request.form.get('formato', 'excel').strip()
-        tipo_reporte = request.form.get('tipo_reporte', 'detallado').strip()
-        usuario_filtro = request.form.get('usuario_filtro', usuario_actual).strip()
+        filtros, formato, tipo_reporte, contrato_data = _parametros_exportacion(usuario_actual)
         
-        contrato_data = {
-            'objeto': request.form.get('contrato_objeto', '').strip(),
-            'nro': request.form.get('contrato_nro', '').strip(),
-            'nombre': request.form.get('contrato_nombre', '').strip(),
-            'cedula': request.form.get('contrato_cedula', '').strip(),
-            'supervisor': request.form.get('contrato_supervisor', '').strip()
-        }
-        
-        # Guardar config
-        config = obtener_configuracion_usuario(usuario_actual)
-        config["datos_contrato"] = contrato_data
-        guardar_configuracion_usuario(usuario_actual, config)
+        # PDF: informe detallado con el formato de la plantilla, página por página
+        if formato == 'pdf':
+            from export_pdf import generar_pdf_stream    # fpdf solo se carga al exportar PDF
+            try:
+                stream = generar_pdf_stream(contrato_data=contrato_data, **filtros)
+            except RuntimeError as e:
+                return redirect(url_for('exportar', error=str(e)))
+            if stream is None:
+                return redirect(url_for('exportar', error='No hay datos para exportar'))
+            filename = f"Informe_detallado_{usuario_actual}_{datetime.now().strftime('%Y%m%d')}.pdf"
+            return Response(
+                stream_with_context(stream),
+                mimetype='application/pdf',
+                headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+            )
         
-        # Filtros
-        if usuario_actual != "admin":
-            usuario_filtro = usuario_actual
-        elif usuario_filtro == "Todos":
-            usuario_filtro = None
-            
-        df, _ = exportar_registros_filtrados(
-            fecha_inicio=fecha_inicio, fecha_fin=fecha_fin,
-            usuario=usuario_filtro, actividad=actividad
-        )
+        # Parquet: formato columnar para análisis, también por bloques
+        if formato == 'parquet':
+            from export_parquet import generar_parquet_stream, MIMETYPE_PARQUET
+            try:
+                stream = generar_parquet_stream(**filtros)
+            except RuntimeError as e:
+                return redirect(url_for('exportar', error=str(e)))
+            if stream is None:
+                return redirect(url_for('exportar', error='No hay datos para exportar'))
+            filename = f"exportacion_{usuario_actual}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.parquet"
+            return Response(
+                stream_with_context(stream),
+                mimetype=MIMETYPE_PARQUET,
+                headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+            )
         
-        if df.empty:
-            return redirect(url_for('exportar', error='No hay datos para exportar'))
-            
-        tmp_path = None
-        try:
-            suffix = '.xlsx' if formato == 'excel' else '.csv'
-            fd, tmp_path = tempfile.mkstemp(suffix=suffix)
-            os.close(fd)
-            
-            if formato == 'excel':
-                generado = False
-                if tipo_reporte == 'final':
-                    generado = generar_informe_final_resumen(df, tmp_path, contrato_data=contrato_data)
-                else:
-                    generado = generar_informe_template(df, tmp_path, contrato_data=contrato_data)
-                
-                if not generado:
-                     return redirect(url_for('exportar', error='No se pudo generar el archivo Excel'))
-                
-                filename = f"Informe_{tipo_reporte}_{usuario_actual}_{datetime.now().strftime('%Y%m%d')}.xlsx"
-                mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            else:
-                df.to_csv(tmp_path, index=False, encoding='utf-8')
-                filename = f"exportacion_{usuario_actual}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-                mimetype = 'text/csv'
-                
-            # Leer a memoria para enviar y borrar archivo
-            with open(tmp_path, 'rb') as f:
-                data = io.BytesIO(f.read())
-            
-            os.remove(tmp_path)
-            
-            return send_file(
-                data,
-                as_attachment=True,
-                download_name=filename,
-                mimetype=mimetype
+        # CSV: se transmite por bloques directamente desde la BD
+        if formato != 'excel':
+            stream = generar_csv_stream(**filtros)
+            if stream is None:
+                return redirect(url_for('exportar', error='No hay datos para exportar'))
+            filename = f"exportacion_{usuario_actual}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            return Response(
+                stream_with_context(stream),
+                mimetype='text/csv',
+                headers={'Content-Disposition': f'attachment; filename="{filename}"'}
             )
             
+        # Excel: se sirve desde el cache de informes si ya se generó con los mismos datos
+        try:
+            ruta = obtener_informe(filtros, tipo_reporte, contrato_data)
+        except (ValueError, RuntimeError) as e:
+            return redirect(url_for('exportar', error=str(e)))
         except Exception as e:
             logger.error(f"Error exportando: {e}")
-            if tmp_path and os.path.exists(tmp_path):
-                os.remove(tmp_path)
             return redirect(url_for('exportar', error='Error al procesar la exportación'))
+        
+        filename = f"Informe_{tipo_reporte}_{usuario_actual}_{datetime.now().strftime('%Y%m%d')}.xlsx"
+        return send_file(
+            ruta,
+            as_attachment=True,
+            download_name=filename,
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+
+# =============================================================================
+# EXPORTACIONES EN SEGUNDO PLANO
+# =============================================================================
+
+@app.route('/exportar/trabajos', methods=['POST'])
+@login_required
+def exportar_trabajo_nuevo():
+    usuario_actual = session['usuario']
+    filtros, formato, tipo_reporte, contrato_data = _parametros_exportacion(usuario_actual)
+    purgar_expirados()
+    trabajo = enviar_exportacion(usuario_actual, filtros, formato, tipo_reporte, contrato_data)
+    return jsonify(estado_publico(trabajo)), 202
+
+@app.route('/exportar/trabajo')
+@login_required
+def exportar_trabajo_estado():
+    trabajo = obtener_trabajo(request.args.get('id', ''))
+    if not trabajo or not puede_ver(trabajo, session['usuario']):
+        return jsonify({'error': 'Trabajo no encontrado'}), 404
+    return jsonify(estado_publico(trabajo))
+
+@app.route('/exportar/descargar')
+@login_required
+def exportar_trabajo_descargar():
+    trabajo = obtener_trabajo(request.args.get('id', ''))
+    if not trabajo or not puede_ver(trabajo, session['usuario']):
+        return redirect(url_for('exportar', error='La exportación no existe o ya expiró'))
+    if trabajo['estado'] != ESTADO_LISTO:
+        return redirect(url_for('exportar', error='La exportación aún no está lista'))
+    return send_file(
+        trabajo['ruta'],
+        as_attachment=True,
+        download_name=trabajo['filename'],
+        mimetype=trabajo['mimetype']
+    )
+
+@app.route('/exportar/lote', methods=['POST'])
+@admin_required
+def exportar_lote():
+    tipo_reporte = request.form.get('tipo_reporte', 'ambos').strip()
+    stream = generar_lote_zip(
+        usuarios=request.form.getlist('usuarios'),
+        fecha_inicio=request.form.get('fecha_inicio', '').strip() or None,
+        fecha_fin=request.form.get('fecha_fin', '').strip() or None,
+        tipos=TIPOS_REPORTE if tipo_reporte == 'ambos' else (tipo_reporte,)
+    )
+    return Response(
+        stream_with_context(stream),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename="{nombre_lote()}"'}
+    )
+
+# =============================================================================
+# RECURSOS ESTÁTICOS
+# =============================================================================
+
+@app.route('/static/<path:ruta>')
+def recurso_estatico(ruta):
+    """CSS, JS y fuentes de static/ (con huella de contenido → cache inmutable)"""
+    recurso = resolver(ruta)
+    if not recurso:
+        return "Recurso no encontrado", 404
+    archivo, content_type, cache_control = recurso
+    with open(archivo, 'rb') as f:
+        contenido = f.read()
+    return Response(contenido, content_type=content_type, headers={'Cache-Control': cache_control})
+
+# =============================================================================
+# API DE INTEGRACIÓN
+# =============================================================================
+
+@app.route('/api/registros')
+def api_registros():
+    """Registros en NDJSON con sincronización incremental (since_id / updated_since)"""
+    usuario = usuario_api(session.get('usuario'), request.headers.get('Authorization'))
+    if not usuario:
+        return jsonify({'error': 'No autorizado'}), 401
+    try:
+        parametros = parametros_api(usuario, request.args.get)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return Response(stream_with_context(generar_ndjson_stream(parametros)), mimetype=MIMETYPE_NDJSON)
+
+@app.route('/api/buscar')
+def api_buscar():
+    """Búsqueda por texto con relevancia, resaltado y paginación (?q=&pagina=&por_pagina=)"""
+    usuario = usuario_api(session.get('usuario'), request.headers.get('Authorization'))
+    if not usuario:
+        return jsonify({'error': 'No autorizado'}), 401
+    try:
+        parametros = parametros_busqueda(request.args.get)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(buscar(usuario, parametros))
+
+@app.route('/api/autocompletar')
+def api_autocompletar():
+    """Sugerencias de solicitante o dependencia por similitud (?campo=&q=&k=)"""
+    usuario = usuario_api(session.get('usuario'), request.headers.get('Authorization'))
+    if not usuario:
+        return jsonify({'error': 'No autorizado'}), 401
+    try:
+        parametros = parametros_autocompletar(request.args.get)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(autocompletar(parametros))
 
 # =============================================================================
 # INICIALIZACIÓN (Útil para Render/Gunicorn)
@@ -542,17 +735,68 @@ def exportar():
 
 from database import inicializar_usuarios, inicializar_config, inicializar_excel
 
+_inicializada = False
+
 def initialize_app():
+    """Crea/migra el esquema y la configuración; una sola vez por proceso"""
+    global _inicializada
+    if _inicializada:
+        return
     with app.app_context():
         try:
             inicializar_usuarios()
             inicializar_config()
             inicializar_excel()
+            _inicializada = True
             logger.info("Aplicación inicializada correctamente (Usuarios, Config, Excel)")
         except Exception as e:
             logger.error(f"Error durante la inicialización de la aplicación: {e}")
 
-# Llamar a la inicialización al importar el módulo (para Gunicorn)
+def precalentar():
+    """
+    Carga lo que los workers solo leen: librerías de exportación, plantillas Excel
+    procesadas, huellas de static/ y listas de consulta. Con preload_app se ejecuta
+    una vez en el master de gunicorn y los workers lo heredan copy-on-write.
+    """
+    from config import TEMPLATE_EXCEL, TEMPLATE_INFORME_FINAL
+    from static_assets import obtener_huellas
+    from database import (
+        cargar_actividades_globales, cargar_ubicaciones,
+        cargar_tipos_solicitud, cargar_medios_solicitud
+    )
+    from autocompletar import obtener_indice, CAMPOS_AUTOCOMPLETAR
+    try:
+        import pandas, openpyxl, export_pdf, export_parquet
+        from report_writer import obtener_plantilla
+        from export_final_service import OPCIONES_PLANTILLA_FINAL
+        for ruta, opciones in ((TEMPLATE_EXCEL, {}), (TEMPLATE_INFORME_FINAL, OPCIONES_PLANTILLA_FINAL)):
+            if os.path.exists(ruta):
+                obtener_plantilla(ruta, **opciones)
+        obtener_huellas()
+        cargar_usuarios()
+        cargar_actividades_globales()
+        cargar_ubicaciones()
+        cargar_tipos_solicitud()
+        cargar_medios_solicitud()
+        for campo in CAMPOS_AUTOCOMPLETAR:
+            obtener_indice(campo)
+        logger.info("Precalentamiento completo (librerías, plantillas, listas, autocompletado)")
+    except Exception as e:
+        # Sin precalentar cada worker carga lo suyo bajo demanda
+        logger.warning(f"Precalentamiento incompleto: {e}")
+
+def reiniciar_tras_fork():
+    """
+    Estado por proceso que no se hereda del master (hook post_fork de gunicorn).
+    La BD no necesita reinicio: cada operación abre y cierra su conexión, y el
+    master no deja ninguna abierta.
+    """
+    from export_jobs import reiniciar_tras_fork as reiniciar_trabajos
+    bus.reiniciar()
+    reiniciar_trabajos()
+
+# Llamar a la inicialización al importar el módulo (para Gunicorn).
+# Con preload_app (gunicorn_config.py) esto ocurre una sola vez, en el master.
 initialize_app()
 
 if __name__ == '__main__':
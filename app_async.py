@@ -0,0 +1,426 @@
+"""
+Servidor asyncio para los controladores de web_handlers.py.
+Alternativa a app_web.py para despliegues con muchos usuarios conectados a la vez:
+las conexiones ociosas (keep-alive), los clientes SSE y los de long-polling
+son corrutinas y no ocupan un hilo cada una. Los handlers de ROUTE_MAP, que
+consultan la BD o generan Excel de forma bloqueante, se ejecutan en un pool de
+hilos (WEB_HILOS) y escriben la respuesta al socket a través del event loop.
+
+Rutas propias del modo asyncio:
+  /eventos         → Server-Sent Events del bus de eventos (eventos.py)
+  /eventos/espera  → Long-polling: ?desde=<id>&timeout=<s>, responde JSON
+
+Uso:
+    python app_async.py [--host 0.0.0.0] [--puerto 8000] [--procesos N]
+Con --procesos > 1 (solo en sistemas con fork) los procesos comparten el socket.
+"""
+
+import os
+import sys
+import json
+import signal
+import asyncio
+import argparse
+import email.utils
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.client import HTTPMessage
+from urllib.parse import urlparse, parse_qs
+
+from config import (
+    logger, WEB_HILOS, WEB_KEEPALIVE_TIMEOUT, WEB_MAX_CUERPO_MB, WEB_DRENADO_TIMEOUT
+)
+from eventos import bus, formatear_sse, SSE_LATIDO
+from web_handlers import ROUTE_MAP, ROUTE_PREFIXES, usuario_de_cookies
+
+MAX_ENCABEZADOS = 100
+LONG_POLL_MAXIMO = 30      # segundos máximos de espera en /eventos/espera
+ESCRITURA_TIMEOUT = 60     # segundos que un handler espera a que el cliente lea
+
+
+class _SalidaAsync:
+    """wfile para los handlers: escribe en el StreamWriter desde el hilo del pool"""
+
+    def __init__(self, writer, loop):
+        self.writer = writer
+        self.loop = loop
+        self.closed = False
+
+    async def _escribir(self, datos):
+        self.writer.write(datos)
+        await self.writer.drain()
+
+    def write(self, datos):
+        # Espera al drain: un cliente lento frena al handler en vez de acumular memoria
+        asyncio.run_coroutine_threadsafe(self._escribir(bytes(datos)), self.loop).result(ESCRITURA_TIMEOUT)
+        return len(datos)
+
+    def flush(self):
+        pass
+
+
+class SolicitudAsync:
+    """
+    Expone la interfaz de BaseHTTPRequestHandler que usan los handlers
+    (path, headers, send_response/send_header/end_headers, send_error, wfile).
+    """
+
+    def __init__(self, metodo, path, version, headers, writer, loop, client_address):
+        self.command = metodo
+        self.path = path
+        self.request_version = version
+        # Sin HTTP/1.1 del cliente no se puede usar chunked
+        self.protocol_version = 'HTTP/1.1' if version == 'HTTP/1.1' else 'HTTP/1.0'
+        self.headers = headers
+        self.client_address = client_address
+        self.wfile = _SalidaAsync(writer, loop)
+        self.close_connection = version != 'HTTP/1.1' or 'close' in headers.get('Connection', '').lower()
+        self.respuesta_iniciada = False
+        self._encabezados = []
+
+    def send_response(self, code, message=None):
+        self.respuesta_iniciada = True
+        if message is None:
+            message = HTTPStatus(code).phrase if code in HTTPStatus._value2member_map_ else ''
+        self._encabezados = [f"{self.protocol_version} {code} {message}\r\n"]
+        self.send_header('Date', email.utils.formatdate(usegmt=True))
+
+    def send_header(self, nombre, valor):
+        self._encabezados.append(f"{nombre}: {valor}\r\n")
+        if nombre.lower() == 'connection' and str(valor).lower() == 'close':
+            self.close_connection = True
+
+    def end_headers(self):
+        if self.close_connection:
+            self._encabezados.append("Connection: close\r\n")
+        self._encabezados.append("\r\n")
+        self.wfile.write("".join(self._encabezados).encode('latin-1'))
+        self._encabezados = []
+
+    def send_error(self, code, message=None):
+        cuerpo = f"<html><body><h1>{code}</h1><p>{message or ''}</p></body></html>".encode('utf-8')
+        self.send_response(code, message if message and message.isascii() else None)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+
+def _ejecutar_handler(handler_class, solicitud, metodo, params, post_data):
+    """Corre un handler de ROUTE_MAP (en un hilo del pool)"""
+    try:
+        handler = handler_class(solicitud)
+        if metodo == 'GET':
+            handler.get(params)
+        else:
+            handler.post(params, post_data)
+    except (ConnectionError, TimeoutError):
+        solicitud.close_connection = True
+    except Exception as e:
+        logger.exception(f"Error atendiendo {metodo} {solicitud.path}: {e}")
+        solicitud.close_connection = True
+        if not solicitud.respuesta_iniciada:
+            try:
+                solicitud.send_error(500, "Error interno del servidor")
+            except (ConnectionError, TimeoutError, OSError):
+                pass
+
+
+class ServidorAsync:
+    """Servidor HTTP/1.1 con keep-alive sobre asyncio"""
+
+    def __init__(self, hilos=WEB_HILOS, max_cuerpo=WEB_MAX_CUERPO_MB * 1024 * 1024,
+                 keepalive=WEB_KEEPALIVE_TIMEOUT):
+        self.pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='async-handler')
+        self.max_cuerpo = max_cuerpo
+        self.keepalive = keepalive
+        self.drenando = asyncio.Event()
+        self.server = None
+        self._tareas = {}           # tarea de conexión → 'ociosa', 'ocupada' o 'stream'
+        self.rutas_async = {
+            '/eventos': self._eventos_sse,
+            '/eventos/espera': self._eventos_espera,
+        }
+
+    async def iniciar(self, host='127.0.0.1', puerto=8000, sock=None):
+        if sock is not None:
+            self.server = await asyncio.start_server(self._conexion, sock=sock)
+        else:
+            self.server = await asyncio.start_server(self._conexion, host, puerto, reuse_address=True)
+        return self.server
+
+    @property
+    def puerto(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    # --- conexiones -----------------------------------------------------------
+
+    async def _conexion(self, reader, writer):
+        tarea = asyncio.current_task()
+        direccion = writer.get_extra_info('peername') or ('', 0)
+        try:
+            while not self.drenando.is_set():
+                self._tareas[tarea] = 'ociosa'
+                try:
+                    solicitud = await asyncio.wait_for(self._leer_solicitud(reader, writer, direccion), self.keepalive)
+                except asyncio.TimeoutError:
+                    break
+                if solicitud is None:
+                    break
+                self._tareas[tarea] = 'ocupada'
+                mantener = await self._atender(*solicitud)
+                if not mantener:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.exception(f"Error en la conexión con {direccion[0]}: {e}")
+        finally:
+            self._tareas.pop(tarea, None)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def _leer_solicitud(self, reader, writer, direccion):
+        """Lee línea de solicitud, encabezados y cuerpo. None si el cliente cerró o es inválida"""
+        linea = await reader.readline()
+        if not linea:
+            return None
+        try:
+            metodo, path, version = linea.decode('latin-1').rstrip('\r\n').split(' ')
+        except ValueError:
+            await self._responder_simple(writer, 400, "Solicitud inválida")
+            return None
+
+        headers = HTTPMessage()
+        for _ in range(MAX_ENCABEZADOS + 1):
+            linea = await reader.readline()
+            if linea in (b'\r\n', b'\n', b''):
+                break
+            nombre, _, valor = linea.decode('latin-1').partition(':')
+            headers[nombre.strip()] = valor.strip()
+        else:
+            await self._responder_simple(writer, 431, "Demasiados encabezados")
+            return None
+
+        post_data = ""
+        if metodo == 'POST':
+            try:
+                longitud = int(headers.get('Content-Length', 0))
+            except ValueError:
+                await self._responder_simple(writer, 400, "Content-Length inválido")
+                return None
+            if longitud > self.max_cuerpo:
+                await self._responder_simple(writer, 413, "Solicitud demasiado grande")
+                return None
+            if longitud == 0 and 'chunked' in headers.get('Transfer-Encoding', '').lower():
+                await self._responder_simple(writer, 411, "Se requiere Content-Length")
+                return None
+            if 'continue' in headers.get('Expect', '').lower():
+                writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            post_data = (await reader.readexactly(longitud)).decode('utf-8') if longitud else ""
+
+        solicitud = SolicitudAsync(metodo, path, version, headers, writer, asyncio.get_running_loop(), direccion)
+        return solicitud, post_data
+
+    async def _responder_simple(self, writer, codigo, mensaje, cuerpo=b"", content_type='text/plain; charset=utf-8',
+                                cerrar=True):
+        encabezados = [f"HTTP/1.1 {codigo} {HTTPStatus(codigo).phrase}", f"Content-Type: {content_type}",
+                       f"Content-Length: {len(cuerpo)}"]
+        if cerrar:
+            encabezados.append("Connection: close")
+        writer.write(("\r\n".join(encabezados) + "\r\n\r\n").encode('latin-1') + cuerpo)
+        await writer.drain()
+        if codigo >= 400:
+            logger.warning(f"HTTP {codigo}: {mensaje}")
+
+    async def _atender(self, solicitud, post_data):
+        """Despacha la solicitud; retorna True si la conexión puede reutilizarse"""
+        parsed = urlparse(solicitud.path)
+        params = parse_qs(parsed.query)
+
+        ruta_async = self.rutas_async.get(parsed.path)
+        if ruta_async and solicitud.command == 'GET':
+            return await ruta_async(solicitud, params)
+
+        handler_class = ROUTE_MAP.get(parsed.path)
+        if handler_class is None:
+            handler_class = next((h for prefijo, h in ROUTE_PREFIXES.items() if parsed.path.startswith(prefijo)), None)
+        if handler_class is None or solicitud.command not in ('GET', 'POST'):
+            codigo = 404 if handler_class is None else 405
+            await self._responder_simple(solicitud.wfile.writer, codigo, "Página no encontrada" if codigo == 404
+                                         else "Método no permitido", cerrar=solicitud.close_connection)
+            return not solicitud.close_connection
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.pool, _ejecutar_handler, handler_class, solicitud,
+                                   solicitud.command, params, post_data)
+        return not solicitud.close_connection
+
+    # --- eventos (SSE y long-polling) ----------------------------------------
+
+    def _usuario(self, solicitud):
+        return usuario_de_cookies(solicitud.headers.get('Cookie'))
+
+    async def _eventos_sse(self, solicitud, params):
+        writer = solicitud.wfile.writer
+        usuario = self._usuario(solicitud)
+        if not usuario:
+            await self._responder_simple(writer, 401, "No autorizado", cerrar=False)
+            return True
+
+        # Un stream abierto no es una solicitud en curso: al apagar se corta sin esperar
+        self._tareas[asyncio.current_task()] = 'stream'
+        ultimo_id = solicitud.headers.get('Last-Event-ID') or params.get('ultimo', [None])[0]
+        suscripcion = bus.suscribir(usuario, ultimo_id)
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream; charset=utf-8\r\n"
+                     b"Cache-Control: no-cache\r\nX-Accel-Buffering: no\r\nConnection: close\r\n\r\n"
+                     b"retry: 3000\n\n")
+        try:
+            await writer.drain()
+            while not self.drenando.is_set() and not suscripcion.desbordada:
+                evento = await suscripcion.siguiente(SSE_LATIDO)
+                if evento is None:
+                    writer.write(b": ping\n\n")
+                else:
+                    writer.write(formatear_sse(evento))
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            suscripcion.cerrar()
+        # El stream no tiene longitud: se cierra la conexión
+        return False
+
+    async def _eventos_espera(self, solicitud, params):
+        writer = solicitud.wfile.writer
+        usuario = self._usuario(solicitud)
+        if not usuario:
+            await self._responder_simple(writer, 401, "No autorizado", cerrar=False)
+            return True
+        try:
+            timeout = min(float(params.get('timeout', [LONG_POLL_MAXIMO])[0]), LONG_POLL_MAXIMO)
+        except ValueError:
+            timeout = LONG_POLL_MAXIMO
+        desde = params.get('desde', [None])[0] or bus.ultimo_id()
+
+        eventos = bus.pendientes(usuario, desde)
+        if not eventos:
+            suscripcion = bus.suscribir(usuario, desde)
+            try:
+                espera = asyncio.ensure_future(suscripcion.siguiente(timeout))
+                drenado = asyncio.ensure_future(self.drenando.wait())
+                await asyncio.wait({espera, drenado}, return_when=asyncio.FIRST_COMPLETED)
+                drenado.cancel()
+                evento = espera.result() if espera.done() else None
+                espera.cancel()
+                if evento is not None:
+                    eventos = [evento]
+            finally:
+                suscripcion.cerrar()
+
+        cuerpo = json.dumps({
+            'eventos': [e.como_dict() for e in eventos],
+            'ultimo': eventos[-1].id if eventos else desde,
+        }, ensure_ascii=False, default=str).encode('utf-8')
+        await self._responder_simple(writer, 200, "", cuerpo, 'application/json', cerrar=solicitud.close_connection)
+        return not solicitud.close_connection
+
+    # --- apagado ------------------------------------------------------------------
+
+    async def apagar(self, timeout=WEB_DRENADO_TIMEOUT):
+        """Deja de aceptar, corta conexiones ociosas y streams, y espera las solicitudes en curso"""
+        self.drenando.set()
+        if self.server:
+            self.server.close()
+        for tarea, estado in list(self._tareas.items()):
+            if estado in ('ociosa', 'stream'):
+                tarea.cancel()
+        pendientes = list(self._tareas)
+        if pendientes:
+            _, sin_terminar = await asyncio.wait(pendientes, timeout=timeout)
+            if sin_terminar:
+                logger.warning(f"Apagado: {len(sin_terminar)} conexiones no terminaron en {timeout}s")
+                for tarea in sin_terminar:
+                    tarea.cancel()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        logger.info("Servidor asyncio detenido")
+
+
+async def _servir(sock):
+    servidor = ServidorAsync()
+    await servidor.iniciar(sock=sock)
+    parar = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for senal in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(senal, parar.set)
+        except (NotImplementedError, AttributeError):
+            pass  # Windows: Ctrl+C llega como KeyboardInterrupt
+    logger.info(f"Proceso {os.getpid()} atendiendo en el puerto {servidor.puerto}")
+    try:
+        await parar.wait()
+    finally:
+        await servidor.apagar()
+
+
+def _crear_socket(host, puerto):
+    import socket
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, puerto))
+    sock.listen(1024)
+    sock.setblocking(False)
+    return sock
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor asyncio del gestor de actividades")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=int(os.environ.get("PORT", 8000)))
+    parser.add_argument("--procesos", type=int, default=1, help="Procesos (uno por núcleo: %d)" % (os.cpu_count() or 1))
+    args = parser.parse_args(argv)
+
+    from database import inicializar_config, inicializar_excel, inicializar_usuarios
+    inicializar_usuarios()
+    inicializar_config()
+    inicializar_excel()
+
+    sock = _crear_socket(args.host, args.puerto)
+    print(f"✅ Servidor asyncio en http://{args.host}:{args.puerto} ({args.procesos} procesos, {WEB_HILOS} hilos c/u)")
+
+    hijos = []
+    if args.procesos > 1 and hasattr(os, 'fork'):
+        # Se bifurca antes de crear hilos o event loops; todos aceptan del mismo socket
+        for _ in range(args.procesos - 1):
+            pid = os.fork()
+            if pid == 0:
+                bus.reiniciar()
+                hijos = None
+                break
+            hijos.append(pid)
+    elif args.procesos > 1:
+        logger.warning("--procesos requiere fork; se usa un solo proceso")
+
+    try:
+        asyncio.run(_servir(sock))
+    except KeyboardInterrupt:
+        pass
+    if hijos:
+        for pid in hijos:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in hijos:
+            os.waitpid(pid, 0)
+        print("✅ Servidor detenido correctamente")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
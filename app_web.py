@@ -8,31 +8,100 @@ Arquitectura:
   database.py        → Inicialización y CRUD básico
   activity_service.py → Actividades personales
   export_service.py  → Exportación y reportes
+  report_writer.py   → Escritura streaming de informes Excel
+  export_cache.py    → Cache de informes generados
+  export_jobs.py     → Exportaciones en segundo plano
+  report_batch.py    → Informes de fin de mes en lote (zip)
+  export_parquet.py  → Exportación columnar (Parquet)
+  export_pdf.py      → Informe detallado en PDF
+  records_api.py     → API NDJSON de registros (sincronización incremental)
+  compression.py     → Compresión gzip/brotli de respuestas
+  static_assets.py   → Recursos estáticos con huella (static/)
   html_utils.py      → Generación de fragmentos HTML
   web_handlers.py    → Controladores de rutas
   utils.py           → Decoradores y cache
-  app_web.py         → Este archivo (servidor HTTP)
+  eventos.py         → Bus de eventos (SSE / long-polling)
+  app_web.py         → Este archivo (servidor HTTP con hilos)
+  app_async.py       → Servidor asyncio alternativo (SSE, muchas conexiones)
 """
 
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 
-from config import logger
+from config import (
+    logger, WEB_HILOS, WEB_COLA_MAXIMA, WEB_KEEPALIVE_TIMEOUT,
+    WEB_MAX_CUERPO_MB, WEB_DRENADO_TIMEOUT
+)
 from database import inicializar_config, inicializar_excel, inicializar_usuarios
-from web_handlers import ROUTE_MAP
+from web_handlers import ROUTE_MAP, ROUTE_PREFIXES
 
 
 class RequestHandler(BaseHTTPRequestHandler):
     """
     Handler HTTP principal.
     Actúa como enrutador delegando la lógica a clases en web_handlers.py.
+    Usa HTTP/1.1: la conexión se reutiliza entre solicitudes hasta que queda
+    ociosa WEB_KEEPALIVE_TIMEOUT segundos, el servidor necesita su hilo para
+    otra conexión o se está apagando.
     """
-    
+
+    protocol_version = 'HTTP/1.1'
+    timeout = WEB_KEEPALIVE_TIMEOUT
+    max_cuerpo = WEB_MAX_CUERPO_MB * 1024 * 1024
+
+    def setup(self):
+        super().setup()
+        self.server.registrar_conexion(self.connection)
+
+    def finish(self):
+        try:
+            super().finish()
+        finally:
+            self.server.liberar_conexion(self.connection)
+
+    def parse_request(self):
+        # Llegó una solicitud: la conexión deja de estar ociosa
+        self.server.marcar_ocupada(self.connection)
+        return super().parse_request()
+
+    def send_response(self, code, message=None):
+        self.respuesta_iniciada = True
+        super().send_response(code, message)
+
+    def handle_one_request(self):
+        self.respuesta_iniciada = False
+        try:
+            super().handle_one_request()
+        except (socket.timeout, ConnectionError):
+            self.close_connection = True
+        self.server.marcar_ociosa(self.connection)
+        if self.server.drenando:
+            self.close_connection = True
+
     def do_GET(self):
         self._dispatch('get')
 
     def do_POST(self):
-        content_length = int(self.headers.get('Content-Length', 0))
+        try:
+            content_length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            self.close_connection = True
+            self.send_error(400, "Content-Length inválido")
+            return
+        if content_length > self.max_cuerpo:
+            # No se lee el cuerpo: la conexión no se puede reutilizar
+            self.close_connection = True
+            self.send_error(413, "Solicitud demasiado grande")
+            return
+        if content_length == 0 and 'chunked' in self.headers.get('Transfer-Encoding', '').lower():
+            self.close_connection = True
+            self.send_error(411, "Se requiere Content-Length")
+            return
         post_data = self.rfile.read(content_length).decode('utf-8') if content_length > 0 else ""
         self._dispatch('post', post_data)
 
@@ -42,13 +111,27 @@ class RequestHandler(BaseHTTPRequestHandler):
         params = parse_qs(parsed_path.query)
 
         handler_class = ROUTE_MAP.get(path)
+        if handler_class is None:
+            handler_class = next((h for prefijo, h in ROUTE_PREFIXES.items() if path.startswith(prefijo)), None)
         
         if handler_class:
-            handler = handler_class(self)
-            if method == 'get':
-                handler.get(params)
-            else:
-                handler.post(params, post_data)
+            try:
+                handler = handler_class(self)
+                if method == 'get':
+                    handler.get(params)
+                else:
+                    handler.post(params, post_data)
+            except (ConnectionError, socket.timeout):
+                self.close_connection = True
+            except Exception as e:
+                logger.exception(f"Error atendiendo {method.upper()} {path}: {e}")
+                # La respuesta pudo quedar a medias: no se reutiliza la conexión
+                self.close_connection = True
+                if not self.respuesta_iniciada:
+                    try:
+                        self.send_error(500, "Error interno del servidor")
+                    except OSError:
+                        pass
         else:
             self.send_error(404, "Página no encontrada")
 
@@ -57,6 +140,129 @@ class RequestHandler(BaseHTTPRequestHandler):
         pass
 
 
+class ServidorConcurrente(HTTPServer):
+    """
+    HTTPServer que atiende cada conexión en un pool acotado de hilos.
+    Una conexión keep-alive ociosa retiene su hilo: si llega otra conexión con
+    todos los hilos ocupados se cierra la que lleva más tiempo ociosa, para que
+    las inactivas no dejen sin atender a las nuevas.
+    Si el pool y su cola (WEB_COLA_MAXIMA) están llenos responde 503 de inmediato.
+    apagar() deja de aceptar conexiones, cierra las ociosas y espera a que
+    terminen las solicitudes en curso (hasta WEB_DRENADO_TIMEOUT segundos).
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, direccion, handler_class=RequestHandler, hilos=WEB_HILOS, cola_maxima=WEB_COLA_MAXIMA):
+        super().__init__(direccion, handler_class)
+        self.hilos = hilos
+        self.pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='http')
+        self.cupos = threading.BoundedSemaphore(hilos + cola_maxima)
+        self.drenando = False
+        self._conexiones = {}          # socket → desde cuándo está ociosa (None si atiende una solicitud)
+        self._futuros = set()
+        self._lock = threading.Lock()
+
+    # --- seguimiento de conexiones -----------------------------------------
+
+    def registrar_conexion(self, conexion):
+        # Ocupada hasta terminar su primera respuesta: una conexión recién aceptada
+        # no es un keep-alive ocioso y no debe cerrarse para liberar su hilo
+        with self._lock:
+            self._conexiones[conexion] = None
+
+    def liberar_conexion(self, conexion):
+        with self._lock:
+            self._conexiones.pop(conexion, None)
+
+    def marcar_ocupada(self, conexion):
+        with self._lock:
+            if conexion in self._conexiones:
+                self._conexiones[conexion] = None
+
+    def marcar_ociosa(self, conexion):
+        with self._lock:
+            if conexion in self._conexiones:
+                self._conexiones[conexion] = time.monotonic()
+            if self.drenando:
+                self._cerrar_lectura(conexion)
+
+    @staticmethod
+    def _cerrar_lectura(conexion):
+        """Despierta al hilo bloqueado esperando la siguiente solicitud"""
+        try:
+            conexion.shutdown(socket.SHUT_RD)
+        except OSError:
+            pass
+
+    # --- atención de conexiones --------------------------------------------
+
+    def process_request(self, request, client_address):
+        if self.drenando or not self.cupos.acquire(blocking=False):
+            self._rechazar(request)
+            return
+        with self._lock:
+            if len(self._futuros) >= self.hilos:
+                self._liberar_hilo_ocioso()
+            futuro = self.pool.submit(self._atender, request, client_address)
+            self._futuros.add(futuro)
+        futuro.add_done_callback(self._terminado)
+
+    def _liberar_hilo_ocioso(self):
+        """Cierra la conexión keep-alive que lleva más tiempo ociosa (con _lock tomado)"""
+        ociosas = [(desde, id(c), c) for c, desde in self._conexiones.items() if desde is not None]
+        if ociosas:
+            _, _, conexion = min(ociosas)
+            self._conexiones[conexion] = None
+            self._cerrar_lectura(conexion)
+
+    def _terminado(self, futuro):
+        with self._lock:
+            self._futuros.discard(futuro)
+
+    def _atender(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.cupos.release()
+
+    def _rechazar(self, request):
+        try:
+            request.sendall(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\n"
+                            b"Retry-After: 5\r\nConnection: close\r\n\r\n")
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def handle_error(self, request, client_address):
+        logger.exception(f"Error en la conexión con {client_address[0]}")
+
+    def apagar(self, timeout=WEB_DRENADO_TIMEOUT):
+        """Apagado ordenado: drena las solicitudes en curso antes de cerrar"""
+        self.drenando = True
+        self.shutdown()            # detiene serve_forever (debe llamarse desde otro hilo)
+        self.server_close()        # deja de aceptar conexiones
+        with self._lock:
+            for conexion, ociosa_desde in self._conexiones.items():
+                if ociosa_desde is not None:
+                    self._cerrar_lectura(conexion)
+            pendientes = list(self._futuros)
+        terminados, sin_terminar = wait(pendientes, timeout=timeout)
+        if sin_terminar:
+            logger.warning(f"Apagado: {len(sin_terminar)} solicitudes no terminaron en {timeout}s")
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        logger.info(f"Servidor detenido: {len(terminados)} conexiones drenadas")
+
+
+def _senal_terminar(signum, frame):
+    # SIGTERM (systemd, docker) se trata igual que Ctrl+C
+    raise KeyboardInterrupt
+
+
 if __name__ == "__main__":
     inicializar_usuarios()
     inicializar_config()
@@ -67,14 +273,19 @@ if __name__ == "__main__":
     print("=" * 60)
     print("📋 GESTOR DE ACTIVIDADES - VERSIÓN MODULAR")
     print("=" * 60)
-    print(f"\n✅ Servidor iniciado en: http://localhost:{PORT}")
+    print(f"\n✅ Servidor iniciado en: http://localhost:{PORT} ({WEB_HILOS} hilos)")
     print("\n🌐 Abre tu navegador y ve a: http://localhost:8000")
     print("\n⚠️  Presiona Ctrl+C para detener el servidor\n")
     print("=" * 60)
     
-    server = HTTPServer(('localhost', PORT), RequestHandler)
+    server = ServidorConcurrente(('localhost', PORT))
+    signal.signal(signal.SIGTERM, _senal_terminar)
+    hilo = threading.Thread(target=server.serve_forever, name='http-accept')
+    hilo.start()
     try:
-        server.serve_forever()
+        while hilo.is_alive():
+            hilo.join(0.5)
     except KeyboardInterrupt:
-        print("\n\n✅ Servidor detenido correctamente")
-        server.shutdown()
+        print("\n\n⏳ Terminando solicitudes en curso...")
+        server.apagar()
+        print("✅ Servidor detenido correctamente")
@@ -0,0 +1,156 @@
+"""
+Autocompletado de solicitante y dependencia a partir de los valores ya registrados.
+Un índice de trigramas en memoria (por campo) devuelve en pocos milisegundos los
+valores más parecidos a lo escrito, tolerando tildes, mayúsculas y errores de tipeo.
+Las grafías que solo difieren en tildes o mayúsculas se agrupan bajo la más usada,
+para no seguir sembrando duplicados que fragmentan las estadísticas.
+"""
+
+import heapq
+import math
+import threading
+from collections import Counter, defaultdict
+
+from config import AUTOCOMPLETAR_LIMITE, AUTOCOMPLETAR_LIMITE_MAXIMO
+from database import frecuencias_valores, obtener_versiones_datos, cargar_ubicaciones
+from utils import plegar_texto, palabras_plegadas
+
+CAMPOS_AUTOCOMPLETAR = ('solicitante', 'dependencia')
+
+# Parte mínima de los trigramas de la consulta que debe tener un valor para sugerirse
+SIMILITUD_MINIMA = 0.6
+
+
+def trigramas(palabras, abierta=False):
+    """
+    Trigramas de una lista de palabras plegadas, cada una rellenada con espacios
+    ("  ana " → "  a", " an", "ana", "na "). Con `abierta` la última palabra no lleva
+    relleno final: el usuario aún la está escribiendo y debe coincidir como prefijo.
+    """
+    resultado = set()
+    for i, palabra in enumerate(palabras):
+        final = "" if abierta and i == len(palabras) - 1 else " "
+        relleno = f"  {palabra}{final}"
+        resultado.update(relleno[j:j + 3] for j in range(len(relleno) - 2))
+    return resultado
+
+
+class IndiceTrigramas:
+    """Índice invertido trigrama → valores, construido desde {valor: frecuencia}"""
+
+    def __init__(self, frecuencias):
+        grupos = defaultdict(Counter)
+        for valor, veces in frecuencias.items():
+            texto = ' '.join(str(valor).split())
+            if texto:
+                grupos[plegar_texto(texto)][texto] += veces
+
+        self.valores = []        # (grafía más usada, frecuencia total, forma plegada, trigramas)
+        self.postings = defaultdict(list)
+        for plegado, grafias in grupos.items():
+            mostrado = min(grafias, key=lambda g: (-grafias[g], g))
+            posicion = len(self.valores)
+            propios = frozenset(trigramas(palabras_plegadas(plegado)))
+            self.valores.append((mostrado, sum(grafias.values()), plegado, propios))
+            for trigrama in propios:
+                self.postings[trigrama].append(posicion)
+
+    def __len__(self):
+        return len(self.valores)
+
+    def buscar(self, texto, limite=AUTOCOMPLETAR_LIMITE):
+        """Hasta `limite` sugerencias [{'valor', 'frecuencia'}], la más parecida primero"""
+        palabras = palabras_plegadas(texto)
+        if not palabras:
+            return []
+        consulta = trigramas(palabras, abierta=True)
+        # Quien comparta `minimo` trigramas aparece en alguna de las n - minimo + 1
+        # listas más cortas: basta recorrer esas para reunir los candidatos
+        minimo = math.ceil(SIMILITUD_MINIMA * len(consulta))
+        listas = sorted((self.postings.get(t, ()) for t in consulta), key=len)
+        posiciones = set()
+        for lista in listas[:len(consulta) - minimo + 1]:
+            posiciones.update(lista)
+
+        prefijo = ' '.join(palabras)
+        candidatos = []
+        for posicion in posiciones:
+            valor, frecuencia, plegado, propios = self.valores[posicion]
+            similitud = len(consulta & propios) / len(consulta)
+            if plegado.startswith(prefijo):
+                similitud += 1
+            elif similitud < SIMILITUD_MINIMA:
+                continue
+            candidatos.append((-similitud, -frecuencia, valor))
+        return [{'valor': valor, 'frecuencia': -frecuencia}
+                for _, frecuencia, valor in heapq.nsmallest(limite, candidatos)]
+
+
+# =============================================================================
+# ÍNDICES POR CAMPO (reconstruidos cuando cambian los datos)
+# =============================================================================
+
+_indices = {}
+_lock = threading.Lock()
+
+
+def _version_campo(campo):
+    """Identifica el contenido actual: versiones de datos (+ ubicaciones configuradas)"""
+    version = tuple(sorted(obtener_versiones_datos().items()))
+    if campo == 'dependencia':
+        return version, tuple(cargar_ubicaciones())
+    return version
+
+
+def obtener_indice(campo):
+    """Índice del campo, reutilizado mientras no cambien los registros"""
+    if campo not in CAMPOS_AUTOCOMPLETAR:
+        raise ValueError(f"campo debe ser uno de: {', '.join(CAMPOS_AUTOCOMPLETAR)}")
+    version = _version_campo(campo)
+    with _lock:
+        guardado = _indices.get(campo)
+        if guardado and guardado[0] == version:
+            return guardado[1]
+    frecuencias = frecuencias_valores(campo)
+    if campo == 'dependencia':
+        # Las ubicaciones configuradas se sugieren aunque nadie las haya usado aún
+        for ubicacion in version[1]:
+            frecuencias.setdefault(ubicacion, 0)
+    indice = IndiceTrigramas(frecuencias)
+    with _lock:
+        _indices[campo] = (version, indice)
+    return indice
+
+
+def parametros_autocompletar(obtener):
+    """
+    Valida campo, q y k. `obtener(nombre)` devuelve el valor o None.
+    Lanza ValueError con un mensaje para el cliente si algún parámetro es inválido.
+    """
+    campo = obtener('campo') or ''
+    if campo not in CAMPOS_AUTOCOMPLETAR:
+        raise ValueError(f"campo debe ser uno de: {', '.join(CAMPOS_AUTOCOMPLETAR)}")
+    limite = AUTOCOMPLETAR_LIMITE
+    if obtener('k'):
+        try:
+            limite = int(obtener('k'))
+        except ValueError:
+            raise ValueError("k debe ser un número entero")
+        if limite < 1:
+            raise ValueError("k debe ser mayor que cero")
+    return {'campo': campo, 'texto': obtener('q') or '', 'limite': min(limite, AUTOCOMPLETAR_LIMITE_MAXIMO)}
+
+
+def autocompletar(parametros):
+    """Sugerencias listas para JSON"""
+    indice = obtener_indice(parametros['campo'])
+    return {
+        'campo': parametros['campo'],
+        'sugerencias': indice.buscar(parametros['texto'], parametros['limite']),
+    }
+
+
+def reiniciar():
+    """Descarta los índices (tras un fork o al cambiar de base de datos)"""
+    with _lock:
+        _indices.clear()
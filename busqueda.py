@@ -0,0 +1,70 @@
+"""
+Búsqueda de registros por texto para la web y las integraciones.
+Consulta el índice de texto completo de la base (FTS5 en SQLite, tsvector + GIN en
+PostgreSQL) sobre descripción, solicitante, observaciones y dependencia; devuelve
+los resultados por relevancia, paginados y con las coincidencias resaltadas.
+"""
+
+import html
+import math
+
+from config import BUSQUEDA_POR_PAGINA, BUSQUEDA_POR_PAGINA_MAXIMO
+from database import buscar_registros_texto, terminos_busqueda, MARCA_INICIO, MARCA_FIN
+
+
+def _entero_positivo(valor, nombre, defecto):
+    if not valor:
+        return defecto
+    try:
+        numero = int(valor)
+    except ValueError:
+        raise ValueError(f"{nombre} debe ser un número entero")
+    if numero < 1:
+        raise ValueError(f"{nombre} debe ser mayor que cero")
+    return numero
+
+
+def parametros_busqueda(obtener):
+    """
+    Valida q, pagina y por_pagina. `obtener(nombre)` devuelve el valor o None.
+    Lanza ValueError con un mensaje para el cliente si algún parámetro es inválido.
+    """
+    texto = (obtener('q') or '').strip()
+    if not terminos_busqueda(texto):
+        raise ValueError("q debe contener al menos una palabra")
+    return {
+        'texto': texto,
+        'pagina': _entero_positivo(obtener('pagina'), 'pagina', 1),
+        'por_pagina': min(_entero_positivo(obtener('por_pagina'), 'por_pagina', BUSQUEDA_POR_PAGINA),
+                          BUSQUEDA_POR_PAGINA_MAXIMO),
+    }
+
+
+def resaltar_html(texto):
+    """Texto resaltado por la BD → HTML escapado con <mark> en las coincidencias"""
+    return html.escape(texto or '').replace(MARCA_INICIO, '<mark>').replace(MARCA_FIN, '</mark>')
+
+
+def buscar(usuario, parametros):
+    """Página de resultados lista para JSON (un usuario que no es admin solo ve los suyos)"""
+    por_pagina = parametros['por_pagina']
+    total, filas = buscar_registros_texto(
+        parametros['texto'], usuario, limite=por_pagina, desplazamiento=(parametros['pagina'] - 1) * por_pagina
+    )
+    resultados = []
+    for fila in filas:
+        resaltado = fila.pop('resaltado')
+        fila['fecha'] = str(fila['fecha'] or '')
+        fila['fecha_atencion'] = str(fila['fecha_atencion'] or '')
+        fila['puntaje'] = round(fila['puntaje'], 4)
+        # Solo las columnas donde hubo coincidencias
+        fila['resaltado'] = {c: resaltar_html(v) for c, v in resaltado.items() if v and MARCA_INICIO in v}
+        resultados.append(fila)
+    return {
+        'q': parametros['texto'],
+        'pagina': parametros['pagina'],
+        'por_pagina': por_pagina,
+        'total': total,
+        'paginas': math.ceil(total / por_pagina),
+        'resultados': resultados,
+    }
@@ -0,0 +1,139 @@
+"""
+Compresión de respuestas HTTP (gzip y, si está instalado, brotli).
+Compartido por la app Flask y por el servidor de app_web.py: negociación con
+Accept-Encoding, umbral de tamaño, compresión incremental para las exportaciones
+por bloques y un cache de cuerpos ya comprimidos para las páginas que se repiten.
+"""
+
+import zlib
+import hashlib
+import threading
+from collections import OrderedDict
+
+from config import COMPRESION_MIN_BYTES, COMPRESION_NIVEL, COMPRESION_CACHE_ENTRADAS
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+TIPOS_COMPRIMIBLES = (
+    'text/html', 'text/csv', 'text/css', 'text/plain', 'text/event-stream',
+    'text/javascript', 'application/json', 'application/x-ndjson', 'application/javascript',
+    'image/svg+xml',
+)
+
+# Calidad media de brotli: buena relación tamaño/CPU para contenido dinámico
+CALIDAD_BROTLI = 5
+
+_cache_comprimidos = OrderedDict()
+_lock_cache = threading.Lock()
+
+
+def es_comprimible(content_type):
+    """True si el tipo de contenido vale la pena comprimirlo (xlsx, zip, pdf y parquet ya lo están)"""
+    return (content_type or '').split(';')[0].strip().lower() in TIPOS_COMPRIMIBLES
+
+
+def elegir_codificacion(accept_encoding):
+    """
+    Elige 'br' o 'gzip' según el encabezado Accept-Encoding (respetando q=0).
+    Retorna None si el cliente no acepta ninguna de las dos.
+    """
+    aceptadas = {}
+    for parte in (accept_encoding or '').split(','):
+        nombre, _, parametros = parte.strip().partition(';')
+        nombre = nombre.strip().lower()
+        if not nombre:
+            continue
+        calidad = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith('q='):
+            try:
+                calidad = float(parametros[2:])
+            except ValueError:
+                calidad = 0.0
+        aceptadas[nombre] = calidad
+
+    comodin = aceptadas.get('*', 0.0)
+    candidatas = (['br'] if brotli else []) + ['gzip']
+    for codificacion in candidatas:
+        if aceptadas.get(codificacion, comodin) > 0:
+            return codificacion
+    return None
+
+
+def _comprimir_bytes(datos, codificacion):
+    if codificacion == 'br':
+        return brotli.compress(datos, quality=CALIDAD_BROTLI)
+    compresor = zlib.compressobj(COMPRESION_NIVEL, zlib.DEFLATED, 31)  # wbits 31 = formato gzip
+    return compresor.compress(datos) + compresor.flush()
+
+
+def comprimir(datos, codificacion):
+    """
+    Comprime un cuerpo completo. Los cuerpos idénticos (login, páginas sin cambios,
+    listas de opciones) se sirven desde un cache LRU indexado por su hash.
+    """
+    clave = (hashlib.sha1(datos).digest(), codificacion)
+    with _lock_cache:
+        comprimido = _cache_comprimidos.get(clave)
+        if comprimido is not None:
+            _cache_comprimidos.move_to_end(clave)
+            return comprimido
+
+    comprimido = _comprimir_bytes(datos, codificacion)
+    with _lock_cache:
+        _cache_comprimidos[clave] = comprimido
+        while len(_cache_comprimidos) > COMPRESION_CACHE_ENTRADAS:
+            _cache_comprimidos.popitem(last=False)
+    return comprimido
+
+
+def limpiar_cache_comprimidos():
+    with _lock_cache:
+        _cache_comprimidos.clear()
+
+
+def comprimir_stream(chunks, codificacion):
+    """
+    Comprime un iterador de bloques sin acumularlo. Cada bloque de entrada se
+    vacía con un flush de sincronización para que el cliente reciba datos a medida
+    que se generan.
+    """
+    if codificacion == 'br':
+        compresor = brotli.Compressor(quality=CALIDAD_BROTLI)
+        comprimir_bloque = lambda bloque: compresor.process(bloque) + compresor.flush()
+        terminar = compresor.finish
+    else:
+        compresor = zlib.compressobj(COMPRESION_NIVEL, zlib.DEFLATED, 31)
+        comprimir_bloque = lambda bloque: compresor.compress(bloque) + compresor.flush(zlib.Z_SYNC_FLUSH)
+        terminar = compresor.flush
+
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            salida = comprimir_bloque(chunk)
+            if salida:
+                yield salida
+        yield terminar()
+    finally:
+        cerrar = getattr(chunks, 'close', None)
+        if cerrar:
+            cerrar()
+
+
+def codificacion_para(accept_encoding, content_type, tamano=None):
+    """
+    Decide la codificación de una respuesta: None si el tipo no es comprimible,
+    si el cuerpo es menor que el umbral (tamano=None = stream de tamaño desconocido)
+    o si el cliente no acepta compresión.
+    """
+    if not es_comprimible(content_type):
+        return None
+    if tamano is not None and tamano < COMPRESION_MIN_BYTES:
+        return None
+    return elegir_codificacion(accept_encoding)
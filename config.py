@@ -89,6 +89,70 @@ DEFAULT_USERS = {
 _CACHE = {}
 _CACHE_TIMEOUT = 30  # segundos
 
+# =============================================================================
+# CONFIGURACIÓN DE EXPORTACIONES EN SEGUNDO PLANO
+# =============================================================================
+
+EXPORT_JOBS_DIR = os.path.join(BASE_DIR, "exportaciones")
+EXPORT_JOB_WORKERS = int(os.environ.get("EXPORT_JOB_WORKERS", 2))  # Trabajos simultáneos por proceso
+EXPORT_JOB_TTL = int(os.environ.get("EXPORT_JOB_TTL", 3600))        # segundos que se conserva el archivo
+EXPORT_JOB_LATIDO = int(os.environ.get("EXPORT_JOB_LATIDO", 10))   # segundos entre latidos de un trabajo activo
+
+# Cache de informes generados (direccionado por contenido, con desalojo LRU)
+EXPORT_CACHE_DIR = os.path.join(BASE_DIR, "cache_informes")
+EXPORT_CACHE_MAX_MB = int(os.environ.get("EXPORT_CACHE_MAX_MB", 200))
+EXPORT_CACHE_GRACIA = int(os.environ.get("EXPORT_CACHE_GRACIA", 600))  # segundos en que un informe recién usado no se desaloja
+
+# =============================================================================
+# API DE INTEGRACIÓN (NDJSON)
+# =============================================================================
+
+API_TOKEN = os.environ.get("API_TOKEN")          # Token Bearer para sistemas externos (lectura de todos los registros)
+API_LIMITE_MAXIMO = int(os.environ.get("API_LIMITE_MAXIMO", 50000))  # Registros máximos por solicitud
+
+# Búsqueda de registros por texto (/api/buscar)
+BUSQUEDA_POR_PAGINA = int(os.environ.get("BUSQUEDA_POR_PAGINA", 20))           # Resultados por página por defecto
+BUSQUEDA_POR_PAGINA_MAXIMO = int(os.environ.get("BUSQUEDA_POR_PAGINA_MAXIMO", 100))
+
+# Autocompletado de solicitante y dependencia (/api/autocompletar)
+AUTOCOMPLETAR_LIMITE = int(os.environ.get("AUTOCOMPLETAR_LIMITE", 8))                # Sugerencias por defecto
+AUTOCOMPLETAR_LIMITE_MAXIMO = int(os.environ.get("AUTOCOMPLETAR_LIMITE_MAXIMO", 20))
+
+# =============================================================================
+# EXTENSIÓN RUST (acelerador.py)
+# =============================================================================
+
+ACELERADOR_RUST = os.environ.get("ACELERADOR_RUST", "1") != "0"   # 0 fuerza las operaciones de pandas
+
+# =============================================================================
+# COMPRESIÓN DE RESPUESTAS
+# =============================================================================
+
+COMPRESION_MIN_BYTES = int(os.environ.get("COMPRESION_MIN_BYTES", 1024))  # Cuerpos menores se envían sin comprimir
+COMPRESION_NIVEL = int(os.environ.get("COMPRESION_NIVEL", 6))             # Nivel gzip (1-9)
+COMPRESION_CACHE_ENTRADAS = 64                                            # Cuerpos comprimidos que se conservan
+
+# =============================================================================
+# SERVIDOR HTTP AUTÓNOMO (app_web.py)
+# =============================================================================
+
+WEB_HILOS = int(os.environ.get("WEB_HILOS", min(32, (os.cpu_count() or 1) * 4)))  # Conexiones atendidas a la vez
+WEB_COLA_MAXIMA = int(os.environ.get("WEB_COLA_MAXIMA", 64))             # Conexiones en espera antes de responder 503
+WEB_KEEPALIVE_TIMEOUT = int(os.environ.get("WEB_KEEPALIVE_TIMEOUT", 5))  # segundos que se mantiene una conexión ociosa
+WEB_MAX_CUERPO_MB = int(os.environ.get("WEB_MAX_CUERPO_MB", 10))          # Tamaño máximo del cuerpo de un POST
+WEB_DRENADO_TIMEOUT = int(os.environ.get("WEB_DRENADO_TIMEOUT", 30))     # segundos para terminar solicitudes al apagar
+
+# El dashboard consulta /estadisticas/datos cada ESTADISTICAS_SONDEO segundos con la versión de
+# datos que conoce (204 si no cambió): es lo que le trae los cambios escritos en cualquier proceso.
+ESTADISTICAS_SONDEO = int(os.environ.get("ESTADISTICAS_SONDEO", 10))
+
+# Streams SSE simultáneos por proceso en los servidores con hilos (Flask, app_web.py): cada uno
+# ocupa un hilo y solo adelanta los cambios escritos en ese mismo proceso. Por defecto una cuarta
+# parte de los hilos de un worker de gunicorn (GUNICORN_THREADS, ver gunicorn_config.py); al
+# superarse se responde 503 y ese dashboard se queda solo con el sondeo.
+GUNICORN_THREADS = int(os.environ.get("GUNICORN_THREADS", 4))
+EVENTOS_MAX_HILOS = int(os.environ.get("EVENTOS_MAX_HILOS", max(1, GUNICORN_THREADS // 4)))
+
 # =============================================================================
 # CONFIGURACIÓN DE LOGGING
 # =============================================================================
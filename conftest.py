@@ -0,0 +1,84 @@
+"""
+Fixtures compartidas por las pruebas: bases SQLite temporales para no tocar actividades.db.
+"""
+
+import sqlite3
+
+import pytest
+
+import database
+import database_setup
+
+TABLA_ANTIGUA = '''
+CREATE TABLE registros (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, usuario TEXT, tipo_actividad TEXT, fecha TEXT,
+    dependencia TEXT, solicitante TEXT, tipo_solicitud TEXT, medio_solicitud TEXT,
+    descripcion TEXT, cumplido TEXT, fecha_atencion TEXT, observaciones TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+'''
+
+
+def _usar_bd(monkeypatch, db_file):
+    monkeypatch.setattr(database, "DB_FILE", db_file)
+    monkeypatch.setattr(database_setup, "DB_FILE", db_file)
+
+
+@pytest.fixture
+def bd_prueba(tmp_path, monkeypatch):
+    """
+    bd_prueba(n) crea el esquema actual en una base temporal con n registros
+    (usuario1/usuario2, 3 actividades, enero de 2024) y retorna su ruta.
+    """
+    def crear(n_registros=0):
+        db_file = str(tmp_path / "actividades_test.db")
+        _usar_bd(monkeypatch, db_file)
+        database_setup.init_db()
+        for i in range(n_registros):
+            database.guardar_registro({
+                "USUARIO": "usuario1" if i % 2 else "usuario2",
+                "TIPO DE ACTIVIDAD": f"Actividad {i % 3}",
+                "FECHA": f"2024-01-{(i % 28) + 1:02d} 08:00:00",
+                "DEPENDENCIA": "ALCALDÍA",
+                "SOLICITANTE": f"Solicitante {i}",
+                "TIPO DE SOLICITUD": "APOYO TECNOLÓGICO",
+                "MEDIO DE SOLICITUD": "E-MAIL",
+                "DESCRIPCIÓN": "Prueba",
+                "CUMPLIDO": "Sí",
+                "FECHA ATENCIÓN": "2024-01-31",
+                "OBSERVACIONES": ""
+            })
+        return db_file
+    return crear
+
+
+@pytest.fixture
+def bd_antigua(tmp_path, monkeypatch):
+    """
+    bd_antigua(n) crea una base con el esquema anterior a la normalización (tabla
+    registros con textos repetidos, sin migrar) con n registros, borra el de id n
+    (su id no debe reutilizarse tras migrar) y retorna su ruta.
+    """
+    def crear(n=0):
+        db_file = str(tmp_path / "antigua.db")
+        conn = sqlite3.connect(db_file)
+        conn.execute(TABLA_ANTIGUA)
+        conn.execute("CREATE TABLE listas_globales (id INTEGER PRIMARY KEY AUTOINCREMENT, tipo TEXT NOT NULL, "
+                     "valor TEXT NOT NULL, UNIQUE(tipo, valor))")
+        conn.execute("INSERT INTO listas_globales (tipo, valor) VALUES ('ubicacion', 'BIBLIOTECA')")
+        for i in range(n):
+            conn.execute(
+                "INSERT INTO registros (usuario, tipo_actividad, fecha, dependencia, solicitante, tipo_solicitud, "
+                "medio_solicitud, descripcion, cumplido, fecha_atencion, observaciones, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (f"usuario{i % 2}", f"Actividad {i % 3}", f"2024-01-{i % 28 + 1:02d} 08:00:00",
+                 None if i % 4 == 0 else "ALCALDÍA", f"Solicitante {i}", "APOYO TECNOLÓGICO", "",
+                 "Prueba", "Sí" if i % 2 else "No", "2024-01-31", None,
+                 "2024-01-01 08:00:00", f"2024-02-01 08:00:{i % 60:02d}")
+            )
+        conn.execute("DELETE FROM registros WHERE id = ?", (n,))
+        conn.commit()
+        conn.close()
+        _usar_bd(monkeypatch, db_file)
+        return db_file
+    return crear
@@ -21,6 +21,8 @@ from config import (
     ACTIVIDADES_DEFAULT, UBICACIONES_DEFAULT,
     TIPOS_SOLICITUD_DEFAULT, MEDIOS_SOLICITUD_DEFAULT
 )
+from utils import plegar_texto, palabras_plegadas
+from acelerador import filtrar_registros
 
 # Re-exportaciones para compatibilidad con AplicacionActividades.py
 OPCIONES_CUMPLIDA = ["Sí", "No", "En Proceso"]
@@ -168,13 +170,29 @@ def cargar_registros(usuario=None):
             messagebox.showerror("Error", f"Error al cargar registros: {str(e)}")
         return pd.DataFrame(columns=COLUMNAS)
 
+# Claves de búsqueda plegadas por fila, válidas mientras el Excel no cambie
+_CLAVES_BUSQUEDA = {}
+
+def _claves_busqueda(df, usuario):
+    """Una clave plegada (sin tildes ni mayúsculas) por fila; se recalcula solo si el archivo cambió"""
+    llave = (os.path.getmtime(FILE_NAME), usuario)
+    if llave not in _CLAVES_BUSQUEDA:
+        _CLAVES_BUSQUEDA.clear()
+        texto = df.fillna('').astype(str).agg(' | '.join, axis=1)
+        _CLAVES_BUSQUEDA[llave] = texto.map(plegar_texto)
+    return _CLAVES_BUSQUEDA[llave]
+
 def buscar_registros(termino, usuario=None):
-    """Busca registros por término"""
+    """Busca registros que contengan todas las palabras del término, sin distinguir mayúsculas ni tildes"""
     df = cargar_registros(usuario)
-    if df.empty:
+    palabras = palabras_plegadas(termino)
+    if df.empty or not palabras:
         return df
-    mask = df.astype(str).apply(lambda x: x.str.contains(termino, case=False, na=False)).any(axis=1)
-    return df[mask]
+    # Cada palabra filtra las claves que quedan (extensión Rust si está instalada)
+    claves = _claves_busqueda(df, usuario).to_frame('clave')
+    for palabra in palabras:
+        claves = filtrar_registros(claves, {'clave': palabra})
+    return df.loc[claves.index]
 
 def eliminar_registro(id_registro, usuario=None):
     """Elimina un registro por ID verificando permisos"""
@@ -5,22 +5,34 @@ Implementa la misma interfaz que database.py pero usando SQLite.
 """
 
 import os
+import re
 import json
 import sqlite3
-import pandas as pd
+from collections import namedtuple
+from datetime import datetime, timezone
 from config import (
     COLUMNAS, logger, ACTIVIDADES_DEFAULT, UBICACIONES_DEFAULT,
     TIPOS_SOLICITUD_DEFAULT, MEDIOS_SOLICITUD_DEFAULT,
     EXCEL_FILE, USERS_FILE, CONFIG_FILE, DB_FILE, DATABASE_URL
 )
-from utils import cache_decorator, medir_tiempo, clear_cache
+from utils import cache_decorator, medir_tiempo, clear_cache, ModuloDiferido, normalizar_fecha, palabras_plegadas
+from eventos import publicar
+from database_setup import (
+    CATALOGO_COLUMNAS, COLUMNAS_FECHA_REGISTROS, COLUMNAS_BUSQUEDA, COLUMNAS_CLAVE_BUSQUEDA,
+    SQL_FECHAS_RECHAZADAS, sql_vista_registros, normalizar_fechas, clave_busqueda, completar_claves_busqueda
+)
+
+# pandas se carga recién al leer registros como DataFrame (cargar_registros)
+pd = ModuloDiferido("pandas")
 
-# Intentar importar psycopg2 para PostgreSQL (Render)
-try:
-    import psycopg2
-    from psycopg2.extras import RealDictCursor
-except ImportError:
-    psycopg2 = None
+# psycopg2 solo se importa si hay PostgreSQL configurado (Render)
+psycopg2 = None
+if DATABASE_URL:
+    try:
+        import psycopg2
+        from psycopg2.extras import RealDictCursor
+    except ImportError:
+        psycopg2 = None
 
 # DB_NAME eliminado, usamos DB_FILE de config
 
@@ -65,20 +77,126 @@ def inicializar_tablas_postgres():
         cursor.execute("CREATE TABLE IF NOT EXISTS actividades_personales (username TEXT, actividad TEXT, UNIQUE(username, actividad));")
         cursor.execute("CREATE TABLE IF NOT EXISTS configuracion_usuario (username TEXT, clave TEXT, valor TEXT, PRIMARY KEY (username, clave));")
         cursor.execute("CREATE TABLE IF NOT EXISTS listas_globales (tipo TEXT, valor TEXT, UNIQUE(tipo, valor));")
-        # Tabla registros (SERIAL reemplaza a AUTOINCREMENT)
+        cursor.execute("CREATE TABLE IF NOT EXISTS version_datos (usuario TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0);")
+        # Registros normalizados: textos de catálogo como id + vista registros (ver database_setup)
+        cursor.execute("CREATE TABLE IF NOT EXISTS catalogo (id SERIAL PRIMARY KEY, tipo TEXT NOT NULL, valor TEXT NOT NULL, UNIQUE(tipo, valor));")
+        cursor.execute(
+            "SELECT table_type FROM information_schema.tables "
+            "WHERE table_schema = current_schema() AND table_name = 'registros'"
+        )
+        fila = cursor.fetchone()
+        if fila and fila[0] == 'BASE TABLE':
+            cursor.execute("ALTER TABLE registros ADD COLUMN IF NOT EXISTS created_at TIMESTAMP DEFAULT now();")
+            cursor.execute("ALTER TABLE registros ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT now();")
+            _normalizar_registros_postgres(cursor)
+        # SERIAL reemplaza a AUTOINCREMENT
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS registros (
+            CREATE TABLE IF NOT EXISTS registros_datos (
                 id SERIAL PRIMARY KEY,
-                usuario TEXT, tipo_actividad TEXT, fecha TIMESTAMP, dependencia TEXT,
-                solicitante TEXT, tipo_solicitud TEXT, medio_solicitud TEXT,
-                descripcion TEXT, cumplido TEXT, fecha_atencion TEXT, observaciones TEXT
+                usuario TEXT, tipo_actividad_id INTEGER REFERENCES catalogo(id), fecha TIMESTAMP,
+                dependencia_id INTEGER REFERENCES catalogo(id), solicitante TEXT,
+                tipo_solicitud_id INTEGER REFERENCES catalogo(id), medio_solicitud_id INTEGER REFERENCES catalogo(id),
+                descripcion TEXT, cumplido TEXT, fecha_atencion TIMESTAMP, observaciones TEXT,
+                created_at TIMESTAMP DEFAULT now(), updated_at TIMESTAMP DEFAULT now()
             );
         """)
+        cursor.execute(SQL_FECHAS_RECHAZADAS)
+        _convertir_fechas_postgres(cursor)
+        cursor.execute(sql_vista_registros("CREATE OR REPLACE VIEW"))
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_registros_updated_at ON registros_datos (updated_at, id);")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_registros_fecha ON registros_datos (fecha);")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_registros_usuario_fecha ON registros_datos (usuario, fecha);")
+        _crear_busqueda_postgres(cursor)
+        _crear_clave_busqueda_postgres(cursor)
+        cursor.execute("CREATE TABLE IF NOT EXISTS registros_eliminados (id INTEGER PRIMARY KEY, usuario TEXT, eliminado_at TIMESTAMP DEFAULT now());")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_eliminados_fecha ON registros_eliminados (eliminado_at, id);")
         conn.commit()
         conn.close()
     except Exception as e:
         logger.error(f"Error inicializando tablas Postgres: {e}")
 
+def _normalizar_registros_postgres(cursor):
+    """
+    Migra la tabla registros de Postgres al esquema normalizado: llena el catálogo, la
+    renombra a registros_datos (conserva ids, secuencia e índices) y cambia cada texto
+    de catálogo por su id.
+    """
+    tipos = ", ".join(f"'{tipo}'" for tipo in CATALOGO_COLUMNAS.values())
+    cursor.execute(f"INSERT INTO catalogo (tipo, valor) SELECT tipo, valor FROM listas_globales "
+                   f"WHERE tipo IN ({tipos}) ON CONFLICT DO NOTHING;")
+    cursor.execute("INSERT INTO catalogo (tipo, valor) SELECT 'actividad', actividad "
+                   "FROM actividades_personales WHERE actividad IS NOT NULL ON CONFLICT DO NOTHING;")
+    cursor.execute("ALTER TABLE registros RENAME TO registros_datos;")
+    for columna, tipo in CATALOGO_COLUMNAS.items():
+        cursor.execute(f"INSERT INTO catalogo (tipo, valor) SELECT DISTINCT '{tipo}', {columna} "
+                       f"FROM registros_datos WHERE {columna} IS NOT NULL ON CONFLICT DO NOTHING;")
+        cursor.execute(f"ALTER TABLE registros_datos ADD COLUMN {columna}_id INTEGER REFERENCES catalogo(id);")
+        cursor.execute(f"UPDATE registros_datos r SET {columna}_id = c.id FROM catalogo c "
+                       f"WHERE c.tipo = '{tipo}' AND c.valor = r.{columna};")
+        cursor.execute(f"ALTER TABLE registros_datos DROP COLUMN {columna};")
+    logger.info("Tabla registros de Postgres migrada al esquema normalizado")
+
+def _convertir_fechas_postgres(cursor):
+    """Columnas de fecha guardadas como TEXT → TIMESTAMP, normalizando antes los valores"""
+    for columna in COLUMNAS_FECHA_REGISTROS:
+        cursor.execute(
+            "SELECT data_type FROM information_schema.columns WHERE table_schema = current_schema() "
+            "AND table_name = 'registros_datos' AND column_name = %s", (columna,)
+        )
+        fila = cursor.fetchone()
+        if not fila or fila[0] != 'text':
+            continue
+        cursor.execute(f"SELECT id, %s, {columna} FROM registros_datos WHERE {columna} IS NOT NULL", (columna,))
+        normalizadas, rechazadas = normalizar_fechas(cursor, cursor.fetchall(), marcador='%s')
+        # La vista depende de la columna: se recrea después
+        cursor.execute("DROP VIEW IF EXISTS registros;")
+        cursor.execute(f"ALTER TABLE registros_datos ALTER COLUMN {columna} TYPE TIMESTAMP USING {columna}::timestamp;")
+        logger.info(f"Columna {columna} convertida a TIMESTAMP: {normalizadas} normalizadas, {rechazadas} rechazadas")
+
+def _crear_busqueda_postgres(cursor):
+    """
+    Búsqueda de texto completo: columna tsvector con índice GIN, calculada por un
+    trigger (la dependencia se toma del catálogo, algo que una columna generada no permite)
+    """
+    cursor.execute("ALTER TABLE registros_datos ADD COLUMN IF NOT EXISTS busqueda tsvector;")
+    cursor.execute("""
+        CREATE OR REPLACE FUNCTION registros_busqueda() RETURNS trigger AS $$
+        BEGIN
+            NEW.busqueda :=
+                setweight(to_tsvector('spanish', coalesce(NEW.solicitante, '')), 'A') ||
+                setweight(to_tsvector('spanish', coalesce(NEW.descripcion, '')), 'B') ||
+                setweight(to_tsvector('spanish', coalesce(
+                    (SELECT valor FROM catalogo WHERE id = NEW.dependencia_id), '')), 'B') ||
+                setweight(to_tsvector('spanish', coalesce(NEW.observaciones, '')), 'C');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    cursor.execute("DROP TRIGGER IF EXISTS registros_busqueda ON registros_datos;")
+    cursor.execute(
+        "CREATE TRIGGER registros_busqueda BEFORE INSERT OR UPDATE OF descripcion, solicitante, "
+        "observaciones, dependencia_id ON registros_datos FOR EACH ROW EXECUTE FUNCTION registros_busqueda();"
+    )
+    # Registros anteriores al índice: reasignar una columna indexada dispara el trigger
+    cursor.execute("UPDATE registros_datos SET descripcion = descripcion WHERE busqueda IS NULL;")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_registros_busqueda ON registros_datos USING GIN (busqueda);")
+
+def _crear_clave_busqueda_postgres(cursor):
+    """Clave de búsqueda plegada: columna, claves faltantes e índice GIN de pg_trgm para LIKE '%..%'"""
+    cursor.execute("ALTER TABLE registros_datos ADD COLUMN IF NOT EXISTS clave_busqueda TEXT;")
+    completar_claves_busqueda(cursor, marcador='%s')
+    # pg_trgm puede no estar permitido (sin privilegios): sin índice la búsqueda recorre la tabla
+    cursor.execute("SAVEPOINT indice_clave;")
+    try:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_registros_clave ON registros_datos USING GIN (clave_busqueda gin_trgm_ops);"
+        )
+        cursor.execute("RELEASE SAVEPOINT indice_clave;")
+    except Exception as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT indice_clave;")
+        logger.warning(f"Índice trigram no disponible en Postgres: {e}")
+
 # =============================================================================
 # FUNCIONES DE INICIALIZACIÓN (Stub para compatibilidad)
 # =============================================================================
@@ -373,16 +491,87 @@ def guardar_medios_solicitud(medios):
 # CRUD DE REGISTROS
 # =============================================================================
 
+# Mapeo de columnas SQL a nombres de Excel (en el mismo orden que COLUMNAS)
+COL_MAP = {
+    "id": "ID",
+    "usuario": "USUARIO",
+    "tipo_actividad": "TIPO DE ACTIVIDAD",
+    "fecha": "FECHA",
+    "dependencia": "DEPENDENCIA",
+    "solicitante": "SOLICITANTE",
+    "tipo_solicitud": "TIPO DE SOLICITUD",
+    "medio_solicitud": "MEDIO DE SOLICITUD",
+    "descripcion": "DESCRIPCIÓN",
+    "cumplido": "CUMPLIDO",
+    "fecha_atencion": "FECHA ATENCIÓN",
+    "observaciones": "OBSERVACIONES"
+}
+
+CAMPOS_POR_COLUMNA = {v: k for k, v in COL_MAP.items()}
+
+
+class Registro(namedtuple("Registro", COL_MAP)):
+    """
+    Fila de la tabla registros como tupla liviana (sin pandas).
+    Los campos son las columnas SQL en el orden de COLUMNAS; get() acepta
+    también los nombres de COLUMNAS ("TIPO DE ACTIVIDAD").
+    """
+    __slots__ = ()
+
+    @classmethod
+    def desde_fila(cls, fila):
+        """Desde una fila del cursor (sqlite3.Row o dict); NULL → '' igual que cargar_registros"""
+        return cls._make('' if fila[c] is None else fila[c] for c in COL_MAP)
+
+    def get(self, columna, default=''):
+        campo = CAMPOS_POR_COLUMNA.get(columna, columna)
+        return getattr(self, campo) if campo in self._fields else default
+
+# Columnas con pocos valores distintos repetidos en cada fila: se cargan como
+# categóricas (códigos enteros + un diccionario) sembradas con las listas globales
+COLUMNAS_FECHA = ('FECHA', 'FECHA ATENCIÓN')
+
+def _semillas_categorias():
+    return {
+        'USUARIO': [],
+        'TIPO DE ACTIVIDAD': cargar_actividades_globales(),
+        'DEPENDENCIA': cargar_ubicaciones(),
+        'TIPO DE SOLICITUD': cargar_tipos_solicitud(),
+        'MEDIO DE SOLICITUD': cargar_medios_solicitud(),
+        'CUMPLIDO': ['Sí', 'No'],
+    }
+
+def _columna_categorica(serie, semilla):
+    # Categorías en orden alfabético: sort_values sigue ordenando igual que con texto
+    categorias = sorted(set(semilla).union(serie.unique(), ['']), key=str)
+    return pd.Categorical(serie, categories=categorias)
+
+def _columna_fecha(serie):
+    """datetime64 si todos los valores no vacíos son fechas; si no, se deja el texto intacto"""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    vacios = serie.eq('')
+    # La base guarda las fechas en ISO 8601 (normalizar_fecha): sin inferir formatos fila a fila
+    fechas = pd.to_datetime(serie.mask(vacios), errors='coerce', format='ISO8601')
+    if fechas.isna().sum() > vacios.sum():
+        return serie
+    return fechas
+
+def _tipar_registros(df):
+    """Convierte las columnas repetitivas a categóricas y las fechas a datetime64"""
+    for col, semilla in _semillas_categorias().items():
+        df[col] = _columna_categorica(df[col], semilla)
+    for col in COLUMNAS_FECHA:
+        df[col] = _columna_fecha(df[col])
+    return df
+
 @medir_tiempo
-def cargar_registros(usuario=None):
+def cargar_registros(usuario=None, fecha_inicio=None, fecha_fin=None, actividad=None, texto=None):
     try:
         conn = get_db_connection()
-        query = "SELECT * FROM registros"
-        params = []
-        
-        if usuario and usuario != "admin":
-            query += " WHERE usuario = ?"
-            params.append(usuario)
+        # Los filtros se resuelven en SQL (índices de usuario y fecha)
+        where, params = _construir_filtros(usuario, fecha_inicio, fecha_fin, actividad, texto)
+        query = f"SELECT * FROM registros{where}"
             
         if DATABASE_URL:
             query = query.replace('?', '%s')
@@ -391,55 +580,353 @@ def cargar_registros(usuario=None):
         conn.close()
         
         # Mapeo de columnas SQL a nombres de Excel para compatibilidad
-        col_map = {
-            "id": "ID",
-            "usuario": "USUARIO",
-            "tipo_actividad": "TIPO DE ACTIVIDAD",
-            "fecha": "FECHA",
-            "dependencia": "DEPENDENCIA",
-            "solicitante": "SOLICITANTE",
-            "tipo_solicitud": "TIPO DE SOLICITUD",
-            "medio_solicitud": "MEDIO DE SOLICITUD",
-            "descripcion": "DESCRIPCIÓN",
-            "cumplido": "CUMPLIDO",
-            "fecha_atencion": "FECHA ATENCIÓN",
-            "observaciones": "OBSERVACIONES"
-        }
-        df.rename(columns=col_map, inplace=True)
+        df.rename(columns=COL_MAP, inplace=True)
         # Asegurar columnas faltantes
         for col in COLUMNAS:
             if col not in df.columns:
                 df[col] = ""
                 
-        return df.fillna('')
+        return _tipar_registros(df.fillna(''))
     except Exception as e:
         logger.error(f"Error cargando registros SQL: {e}")
         return pd.DataFrame(columns=COLUMNAS)
 
+def _limite_fecha(valor, final=False):
+    """
+    Límite de un filtro por fechas en formato canónico, comparable como texto igual
+    que como fecha: un día solo como inicio incluye todas sus horas; como fin equivale
+    a su medianoche ('2024-01-31' <= '2024-01-31 00:00:00' < '2024-01-31 08:00:00').
+    """
+    try:
+        limite = normalizar_fecha(valor)
+    except ValueError:
+        return valor
+    if limite is None:
+        return valor
+    if final and len(limite) == 10:
+        return f"{limite} 00:00:00"
+    if not final and limite.endswith(" 00:00:00"):
+        return limite[:10]
+    return limite
+
+def _construir_filtros(usuario=None, fecha_inicio=None, fecha_fin=None, actividad=None, texto=None):
+    """
+    Construye la cláusula WHERE y sus parámetros con la misma semántica de exportar_registros_filtrados.
+    texto: cada palabra (plegada, sin tildes ni mayúsculas) debe aparecer en la clave de búsqueda.
+    """
+    condiciones = []
+    params = []
+    if usuario and usuario != "admin":
+        condiciones.append("usuario = ?")
+        params.append(usuario)
+    if fecha_inicio:
+        condiciones.append("fecha >= ?")
+        params.append(_limite_fecha(fecha_inicio))
+    if fecha_fin:
+        condiciones.append("fecha <= ?")
+        params.append(_limite_fecha(fecha_fin, final=True))
+    if actividad and actividad != 'Todas':
+        condiciones.append("tipo_actividad = ?")
+        params.append(actividad)
+    palabras = palabras_plegadas(texto)
+    if palabras:
+        # La consulta se pliega una sola vez; el índice trigram resuelve los LIKE
+        indice = "id FROM registros_datos" if DATABASE_URL and psycopg2 else "rowid FROM registros_clave"
+        coincidencias = " AND ".join("clave_busqueda LIKE ?" for _ in palabras)
+        condiciones.append(f"id IN (SELECT {indice} WHERE {coincidencias})")
+        params.extend(f"%{p}%" for p in palabras)
+    where = f" WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    return where, params
+
+def iterar_registros(usuario=None, fecha_inicio=None, fecha_fin=None, actividad=None, chunk_size=500,
+                     orden=("tipo_actividad", "fecha"), texto=None):
+    """
+    Itera los registros filtrados en bloques de tuplas (en el orden de COLUMNAS).
+    Usa un cursor del lado del servidor en Postgres y fetchmany en SQLite,
+    de modo que nunca se materializa el resultado completo en memoria.
+    `orden` son columnas SQL de COL_MAP.
+    """
+    where, params = _construir_filtros(usuario, fecha_inicio, fecha_fin, actividad, texto)
+    orden = [c for c in orden if c in COL_MAP]
+    query = fix_query(
+        f"SELECT {', '.join(COL_MAP)} FROM registros{where} ORDER BY {', '.join(orden)}"
+    )
+    for bloque in _iterar_consulta(query, params, chunk_size, "iterar_registros"):
+        yield [tuple(fila[c] for c in COL_MAP) for fila in bloque]
+
+def iterar_filas(usuario=None, fecha_inicio=None, fecha_fin=None, actividad=None,
+                 orden=("id",), descendente=False, limite=None, chunk_size=500, texto=None):
+    """
+    Itera los registros filtrados uno a uno como Registro, directamente del cursor.
+    Para las rutas que solo muestran filas; los DataFrames quedan para análisis y exportación.
+    """
+    where, params = _construir_filtros(usuario, fecha_inicio, fecha_fin, actividad, texto)
+    direccion = " DESC" if descendente else ""
+    orden = [c + direccion for c in orden if c in COL_MAP]
+    query = f"SELECT {', '.join(COL_MAP)} FROM registros{where} ORDER BY {', '.join(orden)}"
+    if limite:
+        query += " LIMIT ?"
+        params.append(int(limite))
+    for bloque in _iterar_consulta(fix_query(query), params, chunk_size, "iterar_filas"):
+        for fila in bloque:
+            yield Registro.desde_fila(fila)
+
+@medir_tiempo
+def obtener_registros_recientes(usuario=None, limite=10):
+    """Últimos registros creados (el más reciente primero) para la página principal"""
+    try:
+        return list(iterar_filas(usuario, descendente=True, limite=limite, chunk_size=limite))
+    except Exception as e:
+        logger.error(f"Error cargando registros recientes: {e}")
+        return []
+
+def resumir_registros(usuario=None, fecha_inicio=None, fecha_fin=None, actividad=None, texto=None):
+    """Total, rango de fechas y usuarios distintos (hasta 2) de los registros filtrados, sin cargarlos"""
+    where, params = _construir_filtros(usuario, fecha_inicio, fecha_fin, actividad, texto)
+    try:
+        conn = get_db_connection()
+        cursor = get_cursor(conn)
+        cursor.execute(fix_query(
+            f"SELECT COUNT(*) AS total, MIN(fecha) AS fecha_min, MAX(fecha) AS fecha_max FROM registros{where}"
+        ), params)
+        resumen = dict(cursor.fetchone())
+        cursor.execute(fix_query(f"SELECT DISTINCT usuario FROM registros{where} LIMIT 2"), params)
+        resumen['usuarios'] = [fila['usuario'] for fila in cursor.fetchall()]
+        conn.close()
+        return resumen
+    except Exception as e:
+        logger.error(f"Error resumiendo registros SQL: {e}")
+        return {'total': 0, 'fecha_min': None, 'fecha_max': None, 'usuarios': []}
+
+def _iterar_consulta(query, params, chunk_size, nombre_cursor):
+    """Ejecuta una consulta y produce sus filas por bloques desde un cursor del lado del servidor"""
+    conn = get_db_connection()
+    try:
+        if DATABASE_URL and psycopg2 and isinstance(conn, psycopg2.extensions.connection):
+            # Cursor con nombre = cursor del lado del servidor
+            cursor = conn.cursor(name=nombre_cursor, cursor_factory=RealDictCursor)
+            cursor.itersize = chunk_size
+        else:
+            cursor = conn.cursor()
+        cursor.execute(query, params)
+        while True:
+            bloque = cursor.fetchmany(chunk_size)
+            if not bloque:
+                break
+            yield bloque
+        cursor.close()
+    finally:
+        conn.close()
+
+def _marca_tiempo():
+    """Marca de tiempo UTC con el mismo formato que CURRENT_TIMESTAMP"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+def iterar_cambios(usuario=None, since_id=None, updated_since=None, fecha_inicio=None, fecha_fin=None,
+                   actividad=None, limite=None, chunk_size=500, texto=None):
+    """
+    Itera como diccionarios (columnas SQL + updated_at) los registros creados o modificados
+    para sincronización incremental:
+      - since_id: registros con id > since_id, en orden de id.
+      - updated_since: registros con updated_at >= updated_since y los borrados desde esa
+        fecha ({"id": .., "eliminado": true, "updated_at": ..}), intercalados en un solo
+        orden (updated_at, id) y bajo el mismo límite.
+      - updated_since + since_id: cursor compuesto, lo que va estrictamente después de
+        (updated_at, id) = (updated_since, since_id). Es el updated_at y el id de la última
+        línea recibida, así una página llena nunca pierde borrados ni se repite aunque
+        muchas filas compartan el mismo segundo.
+    """
+    where, params = _construir_filtros(usuario, fecha_inicio, fecha_fin, actividad, texto)
+    condiciones = [where[len(" WHERE "):]] if where else []
+    limite_sql = f" LIMIT {int(limite)}" if limite else ""
+    columnas = list(COL_MAP) + ["updated_at"]
+
+    if not updated_since:
+        if since_id is not None:
+            condiciones.append("id > ?")
+            params.append(int(since_id))
+        where = f" WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        query = fix_query(f"SELECT {', '.join(columnas)} FROM registros{where} ORDER BY id{limite_sql}")
+        for bloque in _iterar_consulta(query, params, chunk_size, "iterar_cambios"):
+            yield [dict(zip(columnas, (fila[c] for c in columnas))) for fila in bloque]
+        return
+
+    def despues_del_cursor(columna_fecha):
+        if since_id is None:
+            return f"{columna_fecha} >= ?", [updated_since]
+        return f"({columna_fecha}, id) > (?, ?)", [updated_since, int(since_id)]
+
+    condicion, valores = despues_del_cursor("updated_at")
+    condiciones.append(condicion)
+    params += valores
+    borrados, valores = despues_del_cursor("eliminado_at")
+    borrados = [borrados]
+    if usuario and usuario != "admin":
+        borrados.append("usuario = ?")
+        valores.append(usuario)
+    params += valores
+
+    # Los borrados no tienen más columnas que id y fecha: el resto va en NULL
+    nulos = ", ".join(f"NULL AS {c}" for c in columnas[1:-1])
+    query = fix_query(
+        f"SELECT {', '.join(columnas)}, 0 AS eliminado FROM registros WHERE {' AND '.join(condiciones)} "
+        f"UNION ALL "
+        f"SELECT id, {nulos}, eliminado_at AS updated_at, 1 AS eliminado FROM registros_eliminados "
+        f"WHERE {' AND '.join(borrados)} "
+        f"ORDER BY updated_at, id{limite_sql}"
+    )
+    for bloque in _iterar_consulta(query, params, chunk_size, "iterar_cambios"):
+        yield [
+            {"id": fila["id"], "eliminado": True, "updated_at": fila["updated_at"]} if fila["eliminado"]
+            else dict(zip(columnas, (fila[c] for c in columnas)))
+            for fila in bloque
+        ]
+
+def _incrementar_version(cursor, *usuarios):
+    """Incrementa la versión de datos de los usuarios afectados (misma transacción que la escritura)"""
+    for usuario in {u for u in usuarios if u}:
+        cursor.execute(fix_query(
+            "INSERT INTO version_datos (usuario, version) VALUES (?, 1) "
+            "ON CONFLICT(usuario) DO UPDATE SET version = version_datos.version + 1"
+        ), (usuario,))
+
+def obtener_version_datos(usuario=None):
+    """
+    Versión de los registros de un usuario (o de todos si es None/admin).
+    Cambia con cada alta, edición o borrado; None si no se pudo consultar.
+    """
+    try:
+        conn = get_db_connection()
+        cursor = get_cursor(conn)
+        if usuario and usuario != "admin":
+            cursor.execute(fix_query("SELECT COALESCE(SUM(version), 0) AS version FROM version_datos WHERE usuario = ?"), (usuario,))
+        else:
+            cursor.execute("SELECT COALESCE(SUM(version), 0) AS version FROM version_datos")
+        version = cursor.fetchone()['version']
+        conn.close()
+        return int(version)
+    except Exception as e:
+        logger.error(f"Error consultando versión de datos: {e}")
+        return None
+
+def obtener_versiones_datos(usuario=None):
+    """{usuario: versión} de un usuario (o de todos si es None/admin); {} si no se pudo consultar"""
+    try:
+        conn = get_db_connection()
+        cursor = get_cursor(conn)
+        if usuario and usuario != "admin":
+            cursor.execute(fix_query("SELECT usuario, version FROM version_datos WHERE usuario = ?"), (usuario,))
+        else:
+            cursor.execute("SELECT usuario, version FROM version_datos")
+        versiones = {fila['usuario']: int(fila['version']) for fila in cursor.fetchall()}
+        conn.close()
+        return versiones
+    except Exception as e:
+        logger.error(f"Error consultando versiones de datos: {e}")
+        return {}
+
+def _leer_campos_estadisticas(cursor, id_registro):
+    """Campos del registro que alimentan el dashboard (usuario, actividad, cumplido, fecha)"""
+    cursor.execute(fix_query(
+        "SELECT usuario, tipo_actividad, cumplido, fecha FROM registros WHERE id = ?"
+    ), (id_registro,))
+    fila = cursor.fetchone()
+    return dict(fila) if fila else None
+
+def _versiones_usuarios(cursor, *usuarios):
+    usuarios = sorted({u for u in usuarios if u})
+    if not usuarios:
+        return {}
+    marcadores = ", ".join("?" for _ in usuarios)
+    cursor.execute(fix_query(f"SELECT usuario, version FROM version_datos WHERE usuario IN ({marcadores})"), usuarios)
+    return {fila['usuario']: int(fila['version']) for fila in cursor.fetchall()}
+
+def _publicar_cambio(anterior, nuevo, versiones):
+    """
+    Publica en el bus de eventos el delta de estadísticas de una escritura ya confirmada:
+    el registro anterior resta (-1) y el nuevo suma (+1). Las versiones permiten al
+    dashboard detectar cambios que no vio (p. ej. hechos en otro proceso).
+    """
+    cambios = []
+    for signo, fila in ((-1, anterior), (1, nuevo)):
+        if fila:
+            cambios.append({
+                'signo': signo,
+                'usuario': fila['usuario'],
+                'actividad': fila['tipo_actividad'],
+                'cumplido': fila['cumplido'],
+                'fecha': str(fila['fecha'] or ''),
+            })
+    if len(cambios) == 2 and {**cambios[0], 'signo': 1} == cambios[1]:
+        cambios = []    # Edición que no afecta las estadísticas
+    try:
+        publicar('estadisticas', {'versiones': versiones, 'cambios': cambios}, usuarios=list(versiones))
+    except Exception as e:
+        logger.warning(f"No se pudo publicar el cambio de estadísticas: {e}")
+
+def _id_catalogo(cursor, tipo, valor):
+    """Id de un valor del catálogo, agregándolo si es nuevo (None se mantiene como NULL)"""
+    if valor is None:
+        return None
+    consulta = fix_query("SELECT id FROM catalogo WHERE tipo = ? AND valor = ?")
+    cursor.execute(consulta, (tipo, valor))
+    fila = cursor.fetchone()
+    if fila is None:
+        cursor.execute(fix_query(
+            "INSERT INTO catalogo (tipo, valor) VALUES (?, ?) ON CONFLICT (tipo, valor) DO NOTHING"
+        ), (tipo, valor))
+        cursor.execute(consulta, (tipo, valor))
+        fila = cursor.fetchone()
+    return fila['id']
+
+def _columnas_datos(cursor, campos):
+    """
+    {columna de la vista registros: valor} → {columna de registros_datos: valor}
+    con ids de catálogo y fechas en formato canónico.
+    """
+    datos = {}
+    for columna, valor in campos.items():
+        if columna in COLUMNAS_FECHA_REGISTROS:
+            # ValueError si no es una fecha: la escritura se rechaza
+            datos[columna] = normalizar_fecha(valor)
+        elif columna in CATALOGO_COLUMNAS:
+            datos[f"{columna}_id"] = _id_catalogo(cursor, CATALOGO_COLUMNAS[columna], valor)
+        else:
+            datos[columna] = valor
+    return datos
+
+def _actualizar_clave_busqueda(cursor, id_registro):
+    """Recalcula la clave de búsqueda de un registro tras editarlo"""
+    cursor.execute(fix_query(f"SELECT {', '.join(COLUMNAS_CLAVE_BUSQUEDA)} FROM registros WHERE id = ?"), (id_registro,))
+    fila = cursor.fetchone()
+    cursor.execute(fix_query("UPDATE registros_datos SET clave_busqueda = ? WHERE id = ?"),
+                   (clave_busqueda(fila[c] for c in COLUMNAS_CLAVE_BUSQUEDA), id_registro))
+
 @medir_tiempo
 def guardar_registro(data):
     try:
         conn = get_db_connection()
         cursor = get_cursor(conn)
         
-        query = '''
-            INSERT INTO registros (
-                usuario, tipo_actividad, fecha, dependencia, solicitante,
-                tipo_solicitud, medio_solicitud, descripcion, cumplido,
-                fecha_atencion, observaciones
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            data.get("USUARIO"),
-            data.get("TIPO DE ACTIVIDAD"),
-            data.get("FECHA"),
-            data.get("DEPENDENCIA"),
-            data.get("SOLICITANTE"),
-            data.get("TIPO DE SOLICITUD"),
-            data.get("MEDIO DE SOLICITUD"),
-            data.get("DESCRIPCIÓN"),
-            data.get("CUMPLIDO"),
-            data.get("FECHA ATENCIÓN"),
-            data.get("OBSERVACIONES")
+        campos = {
+            "usuario": data.get("USUARIO"),
+            "tipo_actividad": data.get("TIPO DE ACTIVIDAD"),
+            "fecha": data.get("FECHA"),
+            "dependencia": data.get("DEPENDENCIA"),
+            "solicitante": data.get("SOLICITANTE"),
+            "tipo_solicitud": data.get("TIPO DE SOLICITUD"),
+            "medio_solicitud": data.get("MEDIO DE SOLICITUD"),
+            "descripcion": data.get("DESCRIPCIÓN"),
+            "cumplido": data.get("CUMPLIDO"),
+            "fecha_atencion": data.get("FECHA ATENCIÓN"),
+            "observaciones": data.get("OBSERVACIONES"),
+            "updated_at": _marca_tiempo()
+        }
+        campos["clave_busqueda"] = clave_busqueda(campos[c] for c in COLUMNAS_CLAVE_BUSQUEDA)
+        datos = _columnas_datos(cursor, campos)
+        query = (
+            f"INSERT INTO registros_datos ({', '.join(datos)}) VALUES ({', '.join('?' for _ in datos)})",
+            tuple(datos.values())
         )
         
         if DATABASE_URL:
@@ -451,9 +938,15 @@ def guardar_registro(data):
             # SQLite usa lastrowid
             cursor.execute(query[0], query[1])
             nuevo_id = cursor.lastrowid
-            
+        
+        _incrementar_version(cursor, data.get("USUARIO"))
+        versiones = _versiones_usuarios(cursor, data.get("USUARIO"))
         conn.commit()
         conn.close()
+        _publicar_cambio(None, {
+            'usuario': data.get("USUARIO"), 'tipo_actividad': data.get("TIPO DE ACTIVIDAD"),
+            'cumplido': data.get("CUMPLIDO"), 'fecha': datos['fecha']
+        }, versiones)
         return nuevo_id
     except Exception as e:
         logger.error(f"Error guardando registro SQL: {e}")
@@ -466,16 +959,23 @@ def eliminar_registro(id_registro, usuario):
         cursor = get_cursor(conn)
         
         # Verificar propiedad
-        if usuario != "admin":
-            cursor.execute(fix_query("SELECT usuario FROM registros WHERE id = ?"), (id_registro,))
-            row = cursor.fetchone()
-            if not row or row['usuario'] != usuario:
-                conn.close()
-                return False
-
-        cursor.execute(fix_query("DELETE FROM registros WHERE id = ?"), (id_registro,))
+        row = _leer_campos_estadisticas(cursor, id_registro)
+        if usuario != "admin" and (not row or row['usuario'] != usuario):
+            conn.close()
+            return False
+
+        cursor.execute(fix_query("DELETE FROM registros_datos WHERE id = ?"), (id_registro,))
+        if row:
+            _incrementar_version(cursor, row['usuario'])
+            cursor.execute(fix_query(
+                "INSERT INTO registros_eliminados (id, usuario, eliminado_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET eliminado_at = excluded.eliminado_at"
+            ), (id_registro, row['usuario'], _marca_tiempo()))
+            versiones = _versiones_usuarios(cursor, row['usuario'])
         conn.commit()
         conn.close()
+        if row:
+            _publicar_cambio(row, None, versiones)
         return True
     except Exception as e:
         logger.error(f"Error eliminando registro SQL: {e}")
@@ -488,8 +988,7 @@ def actualizar_registro(id_registro, data, usuario):
         cursor = get_cursor(conn)
         
         # Verificar propiedad
-        cursor.execute(fix_query("SELECT usuario FROM registros WHERE id = ?"), (id_registro,))
-        row = cursor.fetchone()
+        row = _leer_campos_estadisticas(cursor, id_registro)
         if not row:
             conn.close()
             return False
@@ -514,27 +1013,134 @@ def actualizar_registro(id_registro, data, usuario):
             "OBSERVACIONES": "observaciones"
         }
         
-        fields = []
-        values = []
+        campos = {}
         for key, value in data.items():
             if key in inv_col_map:
                 if key == 'USUARIO' and usuario != 'admin':
                     continue
-                fields.append(f"{inv_col_map[key]} = ?")
-                values.append(value)
+                campos[inv_col_map[key]] = value
         
-        if not fields:
+        if not campos:
             conn.close()
             return True
             
-        values.append(id_registro)
-        query = f"UPDATE registros SET {', '.join(fields)} WHERE id = ?"
+        cambia_clave = bool(set(campos) & set(COLUMNAS_CLAVE_BUSQUEDA))
+        campos["updated_at"] = _marca_tiempo()
+        campos = _columnas_datos(cursor, campos)
+        fields = [f"{columna} = ?" for columna in campos]
+        values = list(campos.values()) + [id_registro]
+        query = f"UPDATE registros_datos SET {', '.join(fields)} WHERE id = ?"
         query = fix_query(query)
 
         cursor.execute(query, values)
+        if cambia_clave:
+            _actualizar_clave_busqueda(cursor, id_registro)
+        nuevo_usuario = data.get('USUARIO') if usuario == 'admin' else None
+        _incrementar_version(cursor, row['usuario'], nuevo_usuario)
+        versiones = _versiones_usuarios(cursor, row['usuario'], nuevo_usuario)
+        nuevo = _leer_campos_estadisticas(cursor, id_registro)
         conn.commit()
         conn.close()
+        _publicar_cambio(row, nuevo, versiones)
         return True
     except Exception as e:
         logger.error(f"Error actualizando registro SQL: {e}")
         return False
+
+# =============================================================================
+# BÚSQUEDA DE TEXTO COMPLETO
+# =============================================================================
+
+# Marcas de las coincidencias en el texto resaltado: caracteres de control que no
+# aparecen en los datos, así el texto se puede escapar antes de convertirlas en HTML
+MARCA_INICIO = '\x02'
+MARCA_FIN = '\x03'
+
+# Peso de cada columna en la relevancia (bm25 de SQLite; en Postgres van en el tsvector)
+PESOS_BUSQUEDA = {'descripcion': 1.0, 'solicitante': 2.0, 'observaciones': 0.5, 'dependencia': 1.0}
+
+def terminos_busqueda(texto):
+    """Palabras de la consulta; los signos (comillas, operadores) se descartan"""
+    return re.findall(r"\w+", texto or '')
+
+def _consulta_texto(terminos):
+    """(FROM/WHERE, parámetro, puntaje, {columna: resaltado}) del motor activo; todos los términos como prefijos"""
+    if DATABASE_URL and psycopg2:
+        marcas = "'StartSel=' || chr(2) || ', StopSel=' || chr(3) || ', HighlightAll=true'"
+        return (
+            "FROM registros_datos d JOIN registros r ON r.id = d.id, to_tsquery('spanish', ?) q "
+            "WHERE d.busqueda @@ q",
+            " & ".join(f"{t}:*" for t in terminos),
+            "ts_rank(d.busqueda, q)",
+            {c: f"ts_headline('spanish', coalesce(r.{c}, ''), q, {marcas})" for c in COLUMNAS_BUSQUEDA},
+        )
+    pesos = ", ".join(str(PESOS_BUSQUEDA[c]) for c in COLUMNAS_BUSQUEDA)
+    return (
+        "FROM registros_fts JOIN registros r ON r.id = registros_fts.rowid WHERE registros_fts MATCH ?",
+        " ".join(f'"{t}"*' for t in terminos),
+        f"-bm25(registros_fts, {pesos})",
+        {c: f"highlight(registros_fts, {i}, char(2), char(3))" for i, c in enumerate(COLUMNAS_BUSQUEDA)},
+    )
+
+@medir_tiempo
+def buscar_registros_texto(texto, usuario=None, limite=20, desplazamiento=0):
+    """
+    Registros con todos los términos (como prefijos, sin distinguir mayúsculas) en la
+    descripción, el solicitante, las observaciones o la dependencia, del más relevante
+    al menos relevante. Devuelve (total, filas): cada fila es un dict con las columnas
+    de COL_MAP, 'puntaje' y 'resaltado' {columna: texto con MARCA_INICIO/MARCA_FIN}.
+    """
+    terminos = terminos_busqueda(texto)
+    if not terminos:
+        return 0, []
+    try:
+        desde, consulta, puntaje, resaltado = _consulta_texto(terminos)
+        params = [consulta]
+        if usuario and usuario != "admin":
+            desde += " AND r.usuario = ?"
+            params.append(usuario)
+
+        conn = get_db_connection()
+        cursor = get_cursor(conn)
+        cursor.execute(fix_query(f"SELECT COUNT(*) AS total {desde}"), params)
+        total = int(cursor.fetchone()['total'])
+        filas = []
+        if total > desplazamiento:
+            columnas = [f"r.{c}" for c in COL_MAP] + [f"{puntaje} AS puntaje"]
+            columnas += [f"{sql} AS resaltado_{c}" for c, sql in resaltado.items()]
+            cursor.execute(fix_query(
+                f"SELECT {', '.join(columnas)} {desde} ORDER BY puntaje DESC, r.id DESC LIMIT ? OFFSET ?"
+            ), params + [int(limite), int(desplazamiento)])
+            for fila in cursor.fetchall():
+                registro = {c: fila[c] for c in COL_MAP}
+                registro['puntaje'] = float(fila['puntaje'])
+                registro['resaltado'] = {c: fila[f"resaltado_{c}"] for c in resaltado}
+                filas.append(registro)
+        conn.close()
+        return total, filas
+    except Exception as e:
+        logger.error(f"Error buscando registros por texto: {e}")
+        return 0, []
+
+# =============================================================================
+# VALORES HISTÓRICOS (AUTOCOMPLETADO)
+# =============================================================================
+
+@medir_tiempo
+def frecuencias_valores(columna):
+    """{valor: veces usado} de una columna de registros (sin vacíos); {} si hubo error"""
+    if columna not in COL_MAP:
+        raise ValueError(f"Columna desconocida: {columna}")
+    try:
+        conn = get_db_connection()
+        cursor = get_cursor(conn)
+        cursor.execute(
+            f"SELECT {columna} AS valor, COUNT(*) AS veces FROM registros "
+            f"WHERE {columna} IS NOT NULL AND {columna} <> '' GROUP BY {columna}"
+        )
+        frecuencias = {fila['valor']: int(fila['veces']) for fila in cursor.fetchall()}
+        conn.close()
+        return frecuencias
+    except Exception as e:
+        logger.error(f"Error consultando valores de {columna}: {e}")
+        return {}
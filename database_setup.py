@@ -2,6 +2,300 @@
 import sqlite3
 import os
 from config import logger, DB_FILE
+from utils import normalizar_fecha, plegar_texto
+
+# =============================================================================
+# ESQUEMA NORMALIZADO DE REGISTROS
+# =============================================================================
+# registros_datos guarda la actividad, la dependencia y el tipo y medio de solicitud
+# como id de la tabla catalogo (cada texto se guarda una sola vez). La vista registros
+# vuelve a unir los textos con las mismas columnas que tenía la tabla original, así
+# las lecturas no cambian; las escrituras de la app van directo a registros_datos.
+
+# Columnas de registros guardadas como id del catálogo → tipo en catalogo (el mismo de listas_globales)
+CATALOGO_COLUMNAS = {
+    'tipo_actividad': 'actividad',
+    'dependencia': 'ubicacion',
+    'tipo_solicitud': 'tipo_solicitud',
+    'medio_solicitud': 'medio_solicitud',
+}
+
+# Columnas de la vista registros, en el orden de la tabla original
+COLUMNAS_REGISTROS = (
+    'id', 'usuario', 'tipo_actividad', 'fecha', 'dependencia', 'solicitante', 'tipo_solicitud',
+    'medio_solicitud', 'descripcion', 'cumplido', 'fecha_atencion', 'observaciones',
+    'created_at', 'updated_at'
+)
+
+# Columnas de fecha de registros_datos, guardadas en el formato canónico de utils.normalizar_fecha
+COLUMNAS_FECHA_REGISTROS = ('fecha', 'fecha_atencion')
+
+# Valores que no son fechas encontrados al normalizar: quedan en NULL y su texto original aquí
+SQL_FECHAS_RECHAZADAS = '''
+CREATE TABLE IF NOT EXISTS fechas_rechazadas (
+    registro_id INTEGER,
+    columna TEXT,
+    valor TEXT,
+    detectado_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (registro_id, columna)
+)
+'''
+
+SQL_CATALOGO = '''
+CREATE TABLE IF NOT EXISTS catalogo (
+    id INTEGER PRIMARY KEY,
+    tipo TEXT NOT NULL,
+    valor TEXT NOT NULL,
+    UNIQUE(tipo, valor)
+)
+'''
+
+SQL_REGISTROS_DATOS = '''
+CREATE TABLE IF NOT EXISTS registros_datos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    usuario TEXT,
+    tipo_actividad_id INTEGER REFERENCES catalogo(id),
+    fecha TEXT,
+    dependencia_id INTEGER REFERENCES catalogo(id),
+    solicitante TEXT,
+    tipo_solicitud_id INTEGER REFERENCES catalogo(id),
+    medio_solicitud_id INTEGER REFERENCES catalogo(id),
+    descripcion TEXT,
+    cumplido TEXT,
+    fecha_atencion TEXT,
+    observaciones TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    clave_busqueda TEXT,
+    FOREIGN KEY(usuario) REFERENCES usuarios(username)
+)
+'''
+
+
+def sql_vista_registros(crear="CREATE VIEW IF NOT EXISTS"):
+    """Definición de la vista registros (SQLite y PostgreSQL)"""
+    columnas, uniones = [], []
+    for columna in COLUMNAS_REGISTROS:
+        if columna in CATALOGO_COLUMNAS:
+            alias = f"c_{columna}"
+            columnas.append(f"{alias}.valor AS {columna}")
+            uniones.append(f"LEFT JOIN catalogo {alias} ON {alias}.id = r.{columna}_id")
+        else:
+            columnas.append(f"r.{columna}")
+    return f"{crear} registros AS SELECT {', '.join(columnas)} FROM registros_datos r {' '.join(uniones)}"
+
+
+def _id_en_catalogo(columna, fila):
+    return f"(SELECT id FROM catalogo WHERE tipo = '{CATALOGO_COLUMNAS[columna]}' AND valor = {fila}.{columna})"
+
+
+def _sql_triggers_registros():
+    """
+    Triggers INSTEAD OF de la vista: los scripts que escriben en registros con SQL
+    directo (migrate_excel_to_sqlite) siguen funcionando. No calculan la clave de
+    búsqueda ni la versión de datos: quien los use debe completarlas después.
+    """
+    altas = "".join(
+        f"INSERT OR IGNORE INTO catalogo (tipo, valor) SELECT '{tipo}', NEW.{columna} WHERE NEW.{columna} IS NOT NULL;\n"
+        for columna, tipo in CATALOGO_COLUMNAS.items()
+    )
+    datos = [f"{c}_id" if c in CATALOGO_COLUMNAS else c for c in COLUMNAS_REGISTROS]
+    valores = []
+    for columna in COLUMNAS_REGISTROS:
+        if columna in CATALOGO_COLUMNAS:
+            valores.append(_id_en_catalogo(columna, 'NEW'))
+        elif columna in ('created_at', 'updated_at'):
+            valores.append(f"COALESCE(NEW.{columna}, CURRENT_TIMESTAMP)")
+        else:
+            valores.append(f"NEW.{columna}")
+    asignaciones = [f"{d} = {v}" for d, v in zip(datos[1:], valores[1:])]
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS registros_insertar INSTEAD OF INSERT ON registros BEGIN\n{altas}"
+        f"INSERT INTO registros_datos ({', '.join(datos)}) VALUES ({', '.join(valores)});\nEND",
+        f"CREATE TRIGGER IF NOT EXISTS registros_actualizar INSTEAD OF UPDATE ON registros BEGIN\n{altas}"
+        f"UPDATE registros_datos SET {', '.join(asignaciones)} WHERE id = OLD.id;\nEND",
+        "CREATE TRIGGER IF NOT EXISTS registros_eliminar INSTEAD OF DELETE ON registros BEGIN\n"
+        "DELETE FROM registros_datos WHERE id = OLD.id;\nEND",
+    ]
+
+
+# =============================================================================
+# BÚSQUEDA DE TEXTO COMPLETO
+# =============================================================================
+# registros_fts es un índice FTS5 de contenido externo: guarda solo los términos y lee
+# el texto (para resaltar) de la vista registros. Los triggers de registros_datos lo
+# mantienen al día. unicode61 con remove_diacritics ignora mayúsculas y tildes.
+COLUMNAS_BUSQUEDA = ('descripcion', 'solicitante', 'observaciones', 'dependencia')
+
+
+def _valores_busqueda(fila):
+    """Valores indexados de una fila de registros_datos (NEW/OLD); la dependencia sale del catálogo"""
+    return ", ".join(
+        f"(SELECT valor FROM catalogo WHERE id = {fila}.{c}_id)" if c in CATALOGO_COLUMNAS else f"{fila}.{c}"
+        for c in COLUMNAS_BUSQUEDA
+    )
+
+
+def _crear_busqueda(cursor):
+    """Crea el índice FTS5 (indexando lo existente la primera vez) y sus triggers"""
+    columnas = ", ".join(COLUMNAS_BUSQUEDA)
+    nuevo = _tipo_objeto(cursor, 'registros_fts') is None
+    if nuevo:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE registros_fts USING fts5({columnas}, content='registros', "
+            f"content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+        )
+    borrar = f"INSERT INTO registros_fts (registros_fts, rowid, {columnas}) VALUES ('delete', OLD.id, {_valores_busqueda('OLD')});"
+    insertar = f"INSERT INTO registros_fts (rowid, {columnas}) VALUES (NEW.id, {_valores_busqueda('NEW')});"
+    indexadas = ", ".join(f"{c}_id" if c in CATALOGO_COLUMNAS else c for c in COLUMNAS_BUSQUEDA)
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS registros_fts_insertar AFTER INSERT ON registros_datos BEGIN\n{insertar}\nEND")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS registros_fts_eliminar AFTER DELETE ON registros_datos BEGIN\n{borrar}\nEND")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS registros_fts_actualizar AFTER UPDATE OF {indexadas} ON registros_datos "
+                   f"BEGIN\n{borrar}\n{insertar}\nEND")
+    if nuevo:
+        cursor.execute("INSERT INTO registros_fts (registros_fts) VALUES ('rebuild')")
+
+
+# Clave de búsqueda plegada (utils.plegar_texto) de cada registro, calculada al escribir:
+# las consultas se pliegan una vez y se comparan con LIKE contra la clave. En SQLite la
+# indexa registros_clave (FTS5 con tokenizador trigram, que resuelve LIKE '%..%'); en
+# Postgres un índice GIN de pg_trgm.
+COLUMNAS_CLAVE_BUSQUEDA = ('tipo_actividad', 'dependencia', 'solicitante', 'descripcion', 'observaciones')
+
+
+def clave_busqueda(valores):
+    """Clave de búsqueda de un registro a partir de los valores de COLUMNAS_CLAVE_BUSQUEDA"""
+    return ' | '.join(plegar_texto(v) for v in valores if v not in (None, ''))
+
+
+def completar_claves_busqueda(cursor, marcador='?'):
+    """Calcula la clave de los registros que no la tienen (anteriores a la columna o escritos por SQL directo)"""
+    columnas = ", ".join(f"r.{c}" for c in COLUMNAS_CLAVE_BUSQUEDA)
+    cursor.execute(f"SELECT r.id, {columnas} FROM registros r JOIN registros_datos d ON d.id = r.id "
+                   f"WHERE d.clave_busqueda IS NULL")
+    filas = cursor.fetchall()
+    for fila in filas:
+        cursor.execute(f"UPDATE registros_datos SET clave_busqueda = {marcador} WHERE id = {marcador}",
+                       (clave_busqueda(fila[1:]), fila[0]))
+    return len(filas)
+
+
+def _crear_indice_clave(cursor):
+    """Índice trigram de clave_busqueda con sus triggers; sin trigram, una vista con la misma forma"""
+    tipo = _tipo_objeto(cursor, 'registros_clave')
+    if tipo is None:
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE registros_clave USING fts5(clave_busqueda, content='registros_datos', "
+                           "content_rowid='id', tokenize='trigram')")
+            cursor.execute("INSERT INTO registros_clave (registros_clave) VALUES ('rebuild')")
+            tipo = 'table'
+        except sqlite3.OperationalError as e:
+            # SQLite < 3.34: mismo resultado recorriendo registros_datos
+            logger.warning(f"Índice trigram no disponible, la búsqueda por clave recorre la tabla: {e}")
+            cursor.execute("CREATE VIEW registros_clave (rowid, clave_busqueda) AS "
+                           "SELECT id, clave_busqueda FROM registros_datos")
+            return
+    if tipo != 'table':
+        return
+    borrar = "INSERT INTO registros_clave (registros_clave, rowid, clave_busqueda) VALUES ('delete', OLD.id, OLD.clave_busqueda);"
+    insertar = "INSERT INTO registros_clave (rowid, clave_busqueda) VALUES (NEW.id, NEW.clave_busqueda);"
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS registros_clave_insertar AFTER INSERT ON registros_datos BEGIN\n{insertar}\nEND")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS registros_clave_eliminar AFTER DELETE ON registros_datos BEGIN\n{borrar}\nEND")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS registros_clave_actualizar AFTER UPDATE OF clave_busqueda ON registros_datos "
+                   f"BEGIN\n{borrar}\n{insertar}\nEND")
+
+
+def normalizar_fechas(cursor, filas, marcador='?'):
+    """
+    Reescribe en formato canónico las fechas [(id, columna, valor)] de registros_datos.
+    Los valores que no son fechas quedan en NULL y se reportan en fechas_rechazadas.
+    Devuelve (normalizadas, rechazadas).
+    """
+    normalizadas = rechazadas = 0
+    for id_registro, columna, valor in filas:
+        try:
+            nuevo = normalizar_fecha(valor)
+            normalizadas += 1
+        except ValueError:
+            nuevo = None
+            rechazadas += 1
+            cursor.execute(
+                f"INSERT INTO fechas_rechazadas (registro_id, columna, valor) VALUES ({marcador}, {marcador}, {marcador}) "
+                f"ON CONFLICT (registro_id, columna) DO UPDATE SET valor = excluded.valor",
+                (id_registro, columna, str(valor))
+            )
+        cursor.execute(f"UPDATE registros_datos SET {columna} = {marcador} WHERE id = {marcador}", (nuevo, id_registro))
+    if rechazadas:
+        logger.warning(f"{rechazadas} fechas no reconocidas quedaron en NULL; "
+                       f"sus valores originales están en la tabla fechas_rechazadas")
+    return normalizadas, rechazadas
+
+
+def _fechas_no_canonicas(cursor):
+    """Fechas de registros_datos que no están en formato canónico (p. ej. 'nan', '' o dd/mm/aaaa)"""
+    dia = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]"
+    filas = []
+    for columna in COLUMNAS_FECHA_REGISTROS:
+        filas += cursor.execute(
+            f"SELECT id, '{columna}', {columna} FROM registros_datos WHERE {columna} IS NOT NULL "
+            f"AND NOT ({columna} GLOB '{dia}' OR {columna} GLOB '{dia} [0-9][0-9]:[0-9][0-9]:[0-9][0-9]')"
+        ).fetchall()
+    return filas
+
+
+def _tipo_objeto(cursor, nombre):
+    """'table', 'view' o None según lo que exista con ese nombre"""
+    fila = cursor.execute("SELECT type FROM sqlite_master WHERE name = ?", (nombre,)).fetchone()
+    return fila[0] if fila else None
+
+
+def _normalizar_registros(cursor):
+    """
+    Migra la tabla registros (con los textos repetidos en cada fila) a registros_datos:
+    llena el catálogo con las listas globales, las actividades personales y los valores
+    ya usados, copia los registros con sus ids y elimina la tabla (la reemplaza la vista).
+    Devuelve (registros migrados, valores en el catálogo).
+    """
+    # Tablas muy antiguas pueden no tener todas las columnas
+    existentes = {fila[1] for fila in cursor.execute("PRAGMA table_info(registros)")}
+    for columna in COLUMNAS_REGISTROS:
+        if columna not in existentes:
+            cursor.execute(f"ALTER TABLE registros ADD COLUMN {columna} TEXT")
+
+    tipos = ", ".join(f"'{tipo}'" for tipo in CATALOGO_COLUMNAS.values())
+    cursor.execute(f"INSERT OR IGNORE INTO catalogo (tipo, valor) SELECT tipo, valor FROM listas_globales "
+                   f"WHERE tipo IN ({tipos}) ORDER BY id")
+    cursor.execute("INSERT OR IGNORE INTO catalogo (tipo, valor) SELECT 'actividad', actividad "
+                   "FROM actividades_personales ORDER BY id")
+    for columna, tipo in CATALOGO_COLUMNAS.items():
+        cursor.execute(f"INSERT OR IGNORE INTO catalogo (tipo, valor) SELECT DISTINCT '{tipo}', {columna} "
+                       f"FROM registros WHERE {columna} IS NOT NULL ORDER BY {columna}")
+
+    datos, valores, uniones = [], [], []
+    for columna in COLUMNAS_REGISTROS:
+        if columna in CATALOGO_COLUMNAS:
+            alias = f"c_{columna}"
+            datos.append(f"{columna}_id")
+            valores.append(f"{alias}.id")
+            uniones.append(f"LEFT JOIN catalogo {alias} ON {alias}.tipo = '{CATALOGO_COLUMNAS[columna]}' "
+                           f"AND {alias}.valor = r.{columna}")
+        else:
+            datos.append(columna)
+            valores.append(f"r.{columna}")
+    cursor.execute(f"INSERT INTO registros_datos ({', '.join(datos)}) SELECT {', '.join(valores)} "
+                   f"FROM registros r {' '.join(uniones)} ORDER BY r.id")
+    migrados = cursor.rowcount
+
+    # Conservar el contador de AUTOINCREMENT: los ids de registros borrados no se reutilizan
+    secuencia = cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'registros'").fetchone()
+    cursor.execute("DROP TABLE registros")
+    if secuencia:
+        cursor.execute("DELETE FROM sqlite_sequence WHERE name = 'registros_datos'")
+        cursor.execute("INSERT INTO sqlite_sequence (name, seq) SELECT 'registros_datos', MAX(?, COALESCE(MAX(id), 0)) "
+                       "FROM registros_datos", (secuencia[0],))
+    catalogo = cursor.execute("SELECT COUNT(*) FROM catalogo").fetchone()[0]
+    return migrados, catalogo
+
 
 def init_db():
     """Inicializa la base de datos SQLite con las tablas necesarias"""
@@ -52,27 +346,72 @@ def init_db():
         )
         ''')
 
-        # Tabla de Registros (Actividades Realizadas)
+        # Catálogo y registros normalizados (ver sección ESQUEMA NORMALIZADO)
+        cursor.execute(SQL_CATALOGO)
+        cursor.execute(SQL_REGISTROS_DATOS)
+
+        migrados = None
+        if _tipo_objeto(cursor, 'registros') == 'table':
+            # Migración: bases creadas antes de la sincronización incremental no tienen updated_at
+            # (ALTER TABLE en SQLite no admite DEFAULT CURRENT_TIMESTAMP, se completa desde created_at)
+            columnas = [fila[1] for fila in cursor.execute("PRAGMA table_info(registros)")]
+            if 'updated_at' not in columnas:
+                cursor.execute("ALTER TABLE registros ADD COLUMN updated_at TIMESTAMP")
+                cursor.execute("UPDATE registros SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)")
+            # Migración: la tabla registros con textos repetidos pasa a registros_datos + catálogo
+            migrados = _normalizar_registros(cursor)
+
+        cursor.execute(sql_vista_registros("CREATE VIEW IF NOT EXISTS"))
+        for trigger in _sql_triggers_registros():
+            cursor.execute(trigger)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_registros_updated_at ON registros_datos (updated_at, id)")
+
+        # Fechas canónicas: los filtros por rango comparan texto ISO y usan estos índices
+        cursor.execute(SQL_FECHAS_RECHAZADAS)
+        normalizadas, rechazadas = normalizar_fechas(cursor, _fechas_no_canonicas(cursor))
+        if normalizadas or rechazadas:
+            logger.info(f"Fechas normalizadas: {normalizadas}, rechazadas: {rechazadas}")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_registros_fecha ON registros_datos (fecha)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_registros_usuario_fecha ON registros_datos (usuario, fecha)")
+
+        # Clave de búsqueda plegada: columna (bases anteriores), claves faltantes e índice
+        if 'clave_busqueda' not in [fila[1] for fila in cursor.execute("PRAGMA table_info(registros_datos)")]:
+            cursor.execute("ALTER TABLE registros_datos ADD COLUMN clave_busqueda TEXT")
+        completadas = completar_claves_busqueda(cursor)
+        if completadas:
+            logger.info(f"Claves de búsqueda calculadas: {completadas}")
+        _crear_indice_clave(cursor)
+
+        try:
+            _crear_busqueda(cursor)
+        except sqlite3.OperationalError as e:
+            # SQLite compilado sin FTS5: la app funciona, solo sin búsqueda por texto
+            logger.warning(f"Búsqueda de texto completo no disponible: {e}")
+
+        # Registros eliminados, para que las integraciones puedan sincronizar borrados
         cursor.execute('''
-        CREATE TABLE IF NOT EXISTS registros (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
+        CREATE TABLE IF NOT EXISTS registros_eliminados (
+            id INTEGER PRIMARY KEY,
             usuario TEXT,
-            tipo_actividad TEXT,
-            fecha TEXT,
-            dependencia TEXT,
-            solicitante TEXT,
-            tipo_solicitud TEXT,
-            medio_solicitud TEXT,
-            descripcion TEXT,
-            cumplido TEXT,
-            fecha_atencion TEXT,
-            observaciones TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(usuario) REFERENCES usuarios(username)
+            eliminado_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_eliminados_fecha ON registros_eliminados (eliminado_at, id)")
+
+        # Versión de los datos por usuario (se incrementa en cada escritura de registros)
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS version_datos (
+            usuario TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
         )
         ''')
 
         conn.commit()
+        if migrados is not None:
+            logger.info(f"Registros migrados al esquema normalizado: {migrados[0]} registros, "
+                        f"{migrados[1]} valores de catálogo")
+            # Recuperar el espacio de los textos repetidos de la tabla anterior
+            conn.execute("VACUUM")
         logger.info("Base de datos SQLite inicializada correctamente.")
         print(f"Base de datos {DB_FILE} creada con éxito.")
 
@@ -8,13 +8,14 @@ import os
 import json
 import sqlite3
 import pandas as pd
+import database
 from config import (
-    COLUMNAS, logger, ACTIVIDADES_DEFAULT, UBICACIONES_DEFAULT,
+    DB_FILE, COLUMNAS, logger, ACTIVIDADES_DEFAULT, UBICACIONES_DEFAULT,
     TIPOS_SOLICITUD_DEFAULT, MEDIOS_SOLICITUD_DEFAULT
 )
 from utils import cache_decorator, medir_tiempo, clear_cache
 
-DB_NAME = "actividades.db"
+DB_NAME = DB_FILE
 
 def get_db_connection():
     conn = sqlite3.connect(DB_NAME)
@@ -292,115 +293,14 @@ def cargar_registros(usuario=None):
         logger.error(f"Error cargando registros SQL: {e}")
         return pd.DataFrame(columns=COLUMNAS)
 
-@medir_tiempo
+# Las escrituras de registros pasan por database.py: además de la fila, mantienen la
+# clave de búsqueda, la versión de datos y los borrados que lee la API de cambios.
+
 def guardar_registro(data):
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO registros (
-                usuario, tipo_actividad, fecha, dependencia, solicitante,
-                tipo_solicitud, medio_solicitud, descripcion, cumplido,
-                fecha_atencion, observaciones
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            data.get("USUARIO"),
-            data.get("TIPO DE ACTIVIDAD"),
-            data.get("FECHA"),
-            data.get("DEPENDENCIA"),
-            data.get("SOLICITANTE"),
-            data.get("TIPO DE SOLICITUD"),
-            data.get("MEDIO DE SOLICITUD"),
-            data.get("DESCRIPCIÓN"),
-            data.get("CUMPLIDO"),
-            data.get("FECHA ATENCIÓN"),
-            data.get("OBSERVACIONES")
-        ))
-        
-        nuevo_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return nuevo_id
-    except Exception as e:
-        logger.error(f"Error guardando registro SQL: {e}")
-        return None
+    return database.guardar_registro(data)
 
-@medir_tiempo
 def eliminar_registro(id_registro, usuario):
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Verificar propiedad
-        if usuario != "admin":
-            cursor.execute("SELECT usuario FROM registros WHERE id = ?", (id_registro,))
-            row = cursor.fetchone()
-            if not row or row['usuario'] != usuario:
-                conn.close()
-                return False
-
-        cursor.execute("DELETE FROM registros WHERE id = ?", (id_registro,))
-        conn.commit()
-        conn.close()
-        return True
-    except Exception as e:
-        logger.error(f"Error eliminando registro SQL: {e}")
-        return False
+    return database.eliminar_registro(id_registro, usuario)
 
-@medir_tiempo
 def actualizar_registro(id_registro, data, usuario):
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Verificar propiedad
-        cursor.execute("SELECT usuario FROM registros WHERE id = ?", (id_registro,))
-        row = cursor.fetchone()
-        if not row:
-            conn.close()
-            return False
-            
-        if usuario != "admin" and row['usuario'] != usuario:
-            conn.close()
-            return False
-            
-        # Construir UPDATE dinámico
-        # Mapeo inverso de Excel a SQL
-        inv_col_map = {
-            "USUARIO": "usuario",
-            "TIPO DE ACTIVIDAD": "tipo_actividad",
-            "FECHA": "fecha",
-            "DEPENDENCIA": "dependencia",
-            "SOLICITANTE": "solicitante",
-            "TIPO DE SOLICITUD": "tipo_solicitud",
-            "MEDIO DE SOLICITUD": "medio_solicitud",
-            "DESCRIPCIÓN": "descripcion",
-            "CUMPLIDO": "cumplido",
-            "FECHA ATENCIÓN": "fecha_atencion",
-            "OBSERVACIONES": "observaciones"
-        }
-        
-        fields = []
-        values = []
-        for key, value in data.items():
-            if key in inv_col_map:
-                if key == 'USUARIO' and usuario != 'admin':
-                    continue
-                fields.append(f"{inv_col_map[key]} = ?")
-                values.append(value)
-        
-        if not fields:
-            conn.close()
-            return True
-            
-        values.append(id_registro)
-        query = f"UPDATE registros SET {', '.join(fields)} WHERE id = ?"
-        
-        cursor.execute(query, values)
-        conn.commit()
-        conn.close()
-        return True
-    except Exception as e:
-        logger.error(f"Error actualizando registro SQL: {e}")
-        return False
+    return database.actualizar_registro(id_registro, data, usuario)
@@ -0,0 +1,223 @@
+"""
+Bus de eventos en memoria para notificar a los clientes conectados (SSE y long-polling).
+Cualquier hilo puede publicar. Los suscriptores del servidor asyncio (app_async.py)
+reciben los eventos en su propio event loop sin bloquearlo; los servidores con
+hilos (Flask, app_web.py) usan suscripciones con una cola bloqueante, limitadas a
+EVENTOS_MAX_HILOS streams simultáneos porque cada uno ocupa un hilo.
+Los últimos eventos se conservan para que un cliente que se reconecta con
+Last-Event-ID reciba lo que se perdió.
+
+El bus es por proceso: solo entrega lo que se escribe en el mismo proceso, y con
+gunicorn (varios workers) una escritura atendida por otro worker nunca llega a estos
+suscriptores. Por eso el dashboard no depende de él: consulta la versión de datos
+por usuario (version_datos, /estadisticas/datos) cada ESTADISTICAS_SONDEO segundos,
+y el bus solo adelanta los cambios del propio proceso.
+"""
+
+import json
+import queue
+import asyncio
+import itertools
+import threading
+import uuid
+from collections import deque
+
+from config import EVENTOS_MAX_HILOS
+
+HISTORIAL_EVENTOS = 256
+COLA_SUSCRIPTOR = 100
+SSE_LATIDO = 15            # segundos entre comentarios ": ping" para mantener viva la conexión
+
+
+class Evento:
+    __slots__ = ('id', 'tipo', 'datos', 'usuarios')
+
+    def __init__(self, id, tipo, datos, usuarios):
+        self.id = id
+        self.tipo = tipo
+        self.datos = datos
+        self.usuarios = usuarios
+
+    def visible_para(self, usuario):
+        """Eventos sin destinatarios son públicos; admin ve todos"""
+        return self.usuarios is None or usuario == 'admin' or usuario in self.usuarios
+
+    def como_dict(self):
+        return {'id': self.id, 'tipo': self.tipo, 'datos': self.datos}
+
+
+class Suscripcion:
+    """Cola de eventos de un cliente, consumida desde el event loop donde se creó"""
+
+    def __init__(self, bus, usuario, loop):
+        self.bus = bus
+        self.usuario = usuario
+        self.loop = loop
+        self.cola = asyncio.Queue(maxsize=COLA_SUSCRIPTOR)
+        self.desbordada = False
+
+    def notificar(self, evento):
+        # Se llama desde el hilo que publica
+        self.loop.call_soon_threadsafe(self._entregar, evento)
+
+    def _entregar(self, evento):
+        # Se ejecuta en el event loop del suscriptor
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Cliente demasiado lento: se corta y recupera lo perdido al reconectarse
+            self.desbordada = True
+
+    async def siguiente(self, timeout):
+        """Próximo evento o None si pasa el timeout"""
+        try:
+            return await asyncio.wait_for(self.cola.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def cerrar(self):
+        self.bus._retirar(self)
+
+
+class SuscripcionHilo(Suscripcion):
+    """Variante para servidores con hilos: siguiente() bloquea el hilo que atiende el stream"""
+
+    def __init__(self, bus, usuario, cupo):
+        self.bus = bus
+        self.usuario = usuario
+        self.cupo = cupo
+        self.cola = queue.Queue(maxsize=COLA_SUSCRIPTOR)
+        self.desbordada = False
+        self.cerrada = False
+
+    def notificar(self, evento):
+        self._entregar(evento)
+
+    def _entregar(self, evento):
+        try:
+            self.cola.put_nowait(evento)
+        except queue.Full:
+            self.desbordada = True
+
+    def siguiente(self, timeout):
+        try:
+            return self.cola.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def cerrar(self):
+        if not self.cerrada:
+            self.cerrada = True
+            super().cerrar()
+            self.cupo.release()
+
+
+class BusEventos:
+
+    def __init__(self, historial=HISTORIAL_EVENTOS):
+        # Los ids llevan el identificador del proceso: un Last-Event-ID de otro proceso no se confunde
+        self.instancia = uuid.uuid4().hex[:8]
+        self._contador = itertools.count(1)
+        self._historial = deque(maxlen=historial)
+        self._suscripciones = set()
+        self._lock = threading.Lock()
+        self._cupos_hilos = threading.BoundedSemaphore(EVENTOS_MAX_HILOS)
+
+    def reiniciar(self):
+        """Tras un fork: el proceso hijo no hereda historial, suscripciones ni ids del padre"""
+        self.instancia = uuid.uuid4().hex[:8]
+        self._contador = itertools.count(1)
+        self._historial = deque(maxlen=self._historial.maxlen)
+        self._suscripciones = set()
+        self._lock = threading.Lock()
+        self._cupos_hilos = threading.BoundedSemaphore(EVENTOS_MAX_HILOS)
+
+    def publicar(self, tipo, datos, usuarios=None):
+        """Publica un evento (desde cualquier hilo). usuarios=None → visible para todos"""
+        with self._lock:
+            evento = Evento(f"{self.instancia}-{next(self._contador)}", tipo, datos,
+                            tuple(usuarios) if usuarios is not None else None)
+            self._historial.append(evento)
+            destinatarios = [s for s in self._suscripciones if evento.visible_para(s.usuario)]
+        for suscripcion in destinatarios:
+            try:
+                suscripcion.notificar(evento)
+            except RuntimeError:
+                # El loop del suscriptor ya se cerró
+                self._retirar(suscripcion)
+        return evento
+
+    def suscribir(self, usuario, ultimo_id=None):
+        """
+        Crea una suscripción en el event loop actual. Si ultimo_id es de este
+        proceso, encola primero los eventos posteriores que siguen en el historial.
+        """
+        return self._registrar(Suscripcion(self, usuario, asyncio.get_running_loop()), ultimo_id)
+
+    def suscribir_hilo(self, usuario, ultimo_id=None):
+        """Suscripción bloqueante; None si ya hay EVENTOS_MAX_HILOS streams con hilo abiertos"""
+        cupo = self._cupos_hilos
+        if not cupo.acquire(blocking=False):
+            return None
+        return self._registrar(SuscripcionHilo(self, usuario, cupo), ultimo_id)
+
+    def _registrar(self, suscripcion, ultimo_id):
+        with self._lock:
+            for evento in self._pendientes(suscripcion.usuario, ultimo_id):
+                suscripcion._entregar(evento)
+            self._suscripciones.add(suscripcion)
+        return suscripcion
+
+    def pendientes(self, usuario, ultimo_id):
+        """Eventos del historial visibles para el usuario y posteriores a ultimo_id"""
+        with self._lock:
+            return self._pendientes(usuario, ultimo_id)
+
+    def _pendientes(self, usuario, ultimo_id):
+        numero = self._numero(ultimo_id)
+        if numero is None:
+            return []
+        return [e for e in self._historial if self._numero(e.id) > numero and e.visible_para(usuario)]
+
+    def ultimo_id(self):
+        with self._lock:
+            return self._historial[-1].id if self._historial else f"{self.instancia}-0"
+
+    def _numero(self, evento_id):
+        instancia, _, numero = (evento_id or '').partition('-')
+        if instancia != self.instancia or not numero.isdigit():
+            return None
+        return int(numero)
+
+    def _retirar(self, suscripcion):
+        with self._lock:
+            self._suscripciones.discard(suscripcion)
+
+    @property
+    def suscriptores(self):
+        with self._lock:
+            return len(self._suscripciones)
+
+
+bus = BusEventos()
+
+
+def publicar(tipo, datos, usuarios=None):
+    return bus.publicar(tipo, datos, usuarios)
+
+
+def formatear_sse(evento):
+    """Evento en formato text/event-stream"""
+    datos = json.dumps(evento.datos, ensure_ascii=False, default=str)
+    return f"id: {evento.id}\nevent: {evento.tipo}\ndata: {datos}\n\n".encode('utf-8')
+
+
+def generar_sse(suscripcion, latido=SSE_LATIDO):
+    """Stream SSE bloqueante para servidores con hilos (cierra la suscripción al terminar)"""
+    try:
+        yield b"retry: 3000\n\n"
+        while not suscripcion.desbordada:
+            evento = suscripcion.siguiente(latido)
+            yield b": ping\n\n" if evento is None else formatear_sse(evento)
+    finally:
+        suscripcion.cerrar()
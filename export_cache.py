@@ -0,0 +1,137 @@
+"""
+Cache en disco de informes Excel generados, direccionado por contenido.
+La clave es un hash de los filtros, los datos del contrato, el tipo de reporte,
+la fecha de modificación de la plantilla y la versión de los datos, de modo que
+un informe se reutiliza mientras nada de eso cambie. El directorio tiene un
+tamaño máximo y se desalojan primero los informes usados hace más tiempo (LRU).
+Un informe usado hace menos de EXPORT_CACHE_GRACIA segundos no se desaloja: la
+ruta que entrega obtener_informe sigue existiendo mientras quien la pidió (send_file,
+los trabajos en segundo plano, el lote zip) la abre.
+"""
+
+import os
+import json
+import time
+import uuid
+import hashlib
+import tempfile
+from datetime import datetime
+
+from config import (
+    EXPORT_CACHE_DIR, EXPORT_CACHE_MAX_MB, EXPORT_CACHE_GRACIA,
+    TEMPLATE_EXCEL, TEMPLATE_INFORME_FINAL, logger
+)
+from database import obtener_version_datos
+
+EXTENSION = '.xlsx'
+
+
+def clave_informe(filtros, tipo_reporte, contrato_data):
+    """Hash del contenido del informe; None si no se puede determinar la versión de los datos"""
+    version = obtener_version_datos(filtros.get('usuario'))
+    if version is None:
+        return None
+    plantilla = TEMPLATE_INFORME_FINAL if tipo_reporte == 'final' else TEMPLATE_EXCEL
+    base = json.dumps({
+        'filtros': filtros,
+        'tipo_reporte': tipo_reporte,
+        'contrato': contrato_data,
+        'plantilla_mtime': os.path.getmtime(plantilla),
+        'version_datos': version,
+        # El pie del informe lleva el mes en que se genera
+        'periodo': datetime.now().strftime('%Y-%m')
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(base.encode('utf-8')).hexdigest()
+
+
+def _ruta(clave):
+    return os.path.join(EXPORT_CACHE_DIR, clave + EXTENSION)
+
+
+def buscar(clave):
+    """Ruta del informe cacheado o None; marca la entrada como usada recientemente"""
+    ruta = _ruta(clave)
+    try:
+        os.utime(ruta)
+    except OSError:
+        return None
+    return ruta
+
+
+def guardar(clave, ruta_generada):
+    """Mueve un informe recién generado al cache y aplica el límite de tamaño"""
+    os.makedirs(EXPORT_CACHE_DIR, exist_ok=True)
+    ruta = _ruta(clave)
+    os.replace(ruta_generada, ruta)
+    desalojar(conservar=ruta)
+    return ruta
+
+
+def desalojar(max_bytes=None, conservar=None):
+    """
+    Elimina los informes menos usados hasta que el cache quepa en el límite.
+    Los usados dentro del periodo de gracia se conservan aunque se exceda.
+    """
+    max_bytes = EXPORT_CACHE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+    en_uso_desde = time.time() - EXPORT_CACHE_GRACIA
+    try:
+        entradas = [
+            (e.stat().st_mtime, e.stat().st_size, e.path)
+            for e in os.scandir(EXPORT_CACHE_DIR)
+            if e.name.endswith(EXTENSION) and not e.name.startswith('.')  # .generando_* en curso
+        ]
+    except OSError:
+        return
+    total = sum(tamano for _, tamano, _ in entradas)
+    for usado, tamano, ruta in sorted(entradas):
+        if total <= max_bytes or usado >= en_uso_desde:
+            break
+        if ruta == conservar:
+            continue
+        try:
+            os.remove(ruta)
+            total -= tamano
+            logger.info(f"Informe desalojado del cache: {os.path.basename(ruta)}")
+        except OSError as e:
+            logger.error(f"No se pudo desalojar {ruta}: {e}")
+
+
+def obtener_informe(filtros, tipo_reporte='detallado', contrato_data=None):
+    """
+    Devuelve la ruta del informe Excel para estos parámetros, generándolo solo si no
+    está en cache. Lanza ValueError si no hay datos y RuntimeError si falla la generación.
+    """
+    from export_service import exportar_registros_filtrados, generar_informe_template
+    from export_final_service import generar_informe_final_resumen
+
+    clave = clave_informe(filtros, tipo_reporte, contrato_data)
+    if clave:
+        ruta = buscar(clave)
+        if ruta:
+            logger.info(f"Informe servido desde el cache: {clave[:12]}")
+            return ruta
+
+    df, _ = exportar_registros_filtrados(**filtros)
+    if df.empty:
+        raise ValueError('No hay datos para exportar')
+
+    os.makedirs(EXPORT_CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix=EXTENSION, dir=EXPORT_CACHE_DIR, prefix='.generando_')
+    os.close(fd)
+    try:
+        inicio = time.time()
+        if tipo_reporte == 'final':
+            generado = generar_informe_final_resumen(df, tmp_path, contrato_data=contrato_data)
+        else:
+            generado = generar_informe_template(df, tmp_path, contrato_data=contrato_data)
+        if not generado:
+            raise RuntimeError('No se pudo generar el archivo Excel')
+        logger.info(f"Informe generado en {time.time() - inicio:.2f}s")
+
+        # Sin versión de datos no es seguro reutilizarlo: se guarda con una clave única
+        # para que igual lo limite el desalojo LRU
+        return guardar(clave or uuid.uuid4().hex, tmp_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
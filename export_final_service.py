@@ -1,168 +1,120 @@
 import os
-import pandas as pd
-import openpyxl
-import copy
 from datetime import datetime
 from config import TEMPLATE_INFORME_FINAL, logger
 from utils import medir_tiempo
 
+# Plantilla final: encabezado en filas 1-6 y cabecera de tabla (10 columnas) en la fila 7
+OPCIONES_PLANTILLA_FINAL = {'filas_encabezado': 6, 'fila_estilo': 7, 'columnas_estilo': 10}
+
 @medir_tiempo
 def generar_informe_final_resumen(df, output_path, contrato_data=None):
     """
     Genera un informe concentrado contando actividades por tipo.
     Mantiene los encabezados institucionales de la plantilla.
     """
+    # openpyxl y pandas solo se cargan cuando se genera el informe
+    import pandas as pd
+    from openpyxl.styles import Alignment, Font
+    from report_writer import obtener_plantilla, InformeStreamWriter
+
     try:
         logger.info(f"Generando Informe Final Concentrado. Registros: {len(df)}")
         if not os.path.exists(TEMPLATE_INFORME_FINAL):
             logger.error(f"Plantilla no encontrada: {TEMPLATE_INFORME_FINAL}")
             return False
 
-        wb = openpyxl.load_workbook(TEMPLATE_INFORME_FINAL)
-        ws = wb.active
+        # Encabezado y estilos de cabecera (fila 7) se procesan una vez por proceso
+        plantilla = obtener_plantilla(TEMPLATE_INFORME_FINAL, **OPCIONES_PLANTILLA_FINAL)
+        writer = InformeStreamWriter(plantilla, col_fin=10)
         
         # 1. Agrupar y contar actividades
         if 'TIPO DE ACTIVIDAD' in df.columns:
-            resumen = df['TIPO DE ACTIVIDAD'].value_counts().reset_index()
+            resumen = df['TIPO DE ACTIVIDAD'].value_counts()
+            resumen = resumen[resumen > 0].reset_index()    # sin categorías vacías
             resumen.columns = ['Actividad', 'Cantidad']
         else:
             resumen = pd.DataFrame(columns=['Actividad', 'Cantidad'])
 
         # 2. Encabezados Institucionales (misma lógica que el detallado)
+        encabezado = {}
         if contrato_data:
             if contrato_data.get('nro'):
-                ws.cell(row=2, column=3, value=contrato_data['nro'].upper())
+                encabezado[(2, 3)] = contrato_data['nro'].upper()
             if contrato_data.get('objeto'):
-                ws.cell(row=3, column=3, value=contrato_data['objeto'].upper())
+                encabezado[(3, 3)] = contrato_data['objeto'].upper()
             
             nombre_contratista = contrato_data.get('nombre', '').upper()
             if not nombre_contratista:
                 usuarios = df['USUARIO'].unique() if 'USUARIO' in df.columns else []
                 nombre_contratista = usuarios[0].upper() if len(usuarios) == 1 else "VARIOS"
-            ws.cell(row=4, column=3, value=nombre_contratista)
+            encabezado[(4, 3)] = nombre_contratista
             
             if contrato_data.get('cedula'):
-                ws.cell(row=5, column=3, value=contrato_data['cedula'])
+                encabezado[(5, 3)] = contrato_data['cedula']
 
         # Rango de fechas (Fila 6)
         if not df.empty and 'FECHA' in df.columns:
             fechas_dt = pd.to_datetime(df['FECHA'], errors='coerce').dropna()
             if not fechas_dt.empty:
-                ws.cell(row=6, column=3,
-                        value=f"{fechas_dt.min().strftime('%d/%m/%Y')} al {fechas_dt.max().strftime('%d/%m/%Y')}")
-
-        # 3. Guardar estilos base de fila 7 (Cabecera) y fila 8 (Datos)
-        # En la plantilla V3, la fila 7 tiene "TIPO DE ACTIVIDAD" y "CANTIDAD"
-        header_styles = []
-        for col in range(1, 11):
-            cell = ws.cell(row=7, column=col)
-            header_styles.append({
-                'font': copy.copy(cell.font),
-                'border': copy.copy(cell.border),
-                'fill': copy.copy(cell.fill),
-                'alignment': copy.copy(cell.alignment)
-            })
+                encabezado[(6, 3)] = f"{fechas_dt.min().strftime('%d/%m/%Y')} al {fechas_dt.max().strftime('%d/%m/%Y')}"
 
-        # 4. Limpieza de área de datos (Filas 7 en adelante)
-        # Desenlazar celdas PRIMERO
-        merged_ranges = list(ws.merged_cells.ranges)
-        for merged_range in merged_ranges:
-            if merged_range.min_row >= 7:
-                try:
-                    ws.unmerge_cells(str(merged_range))
-                except Exception: pass
+        writer.escribir_encabezado(encabezado)
 
-        # Luego limpiar para reconstruir con los datos actuales
-        for row in ws.iter_rows(min_row=7, max_row=300, min_col=1, max_col=11):
-            for cell in row:
-                cell.value = None
+        # 3. Estilos de datos derivados de la cabecera de la plantilla (fila 7)
+        # En la plantilla V3, la fila 7 tiene "TIPO DE ACTIVIDAD" y "CANTIDAD"
+        header_styles = plantilla.estilos_fila
+        centrado = Alignment(horizontal='center', vertical='center')
+        estilos_dato = []
+        for c, clave in enumerate(header_styles, start=1):
+            _, border, _, alignment, _ = plantilla.estilos[clave]
+            estilos_dato.append(writer.registrar_estilo(
+                f"final_dato_{c}", border=border, alignment=centrado if c >= 8 else alignment
+            ))
+        _, border, _, alignment, _ = plantilla.estilos[header_styles[0]]
+        total_etiqueta = writer.registrar_estilo("final_total_etiqueta", font=Font(bold=True), border=border, alignment=alignment)
+        total_valor = writer.registrar_estilo(
+            "final_total", font=Font(bold=True), border=plantilla.estilos[header_styles[7]][1], alignment=centrado
+        )
+        combinar = [(1, 7), (8, 10)]
 
-        # 5. Escribir Cabecera de Tabla (Fila 7)
-        current_row = 7
-        ws.cell(row=current_row, column=1, value="TIPO DE ACTIVIDAD")
-        ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=7)
-        ws.cell(row=current_row, column=8, value="CANTIDAD")
-        ws.merge_cells(start_row=current_row, start_column=8, end_row=current_row, end_column=10)
-        
-        # Aplicar estilos de cabecera
-        for col_idx in range(1, 11):
-            cell = ws.cell(row=current_row, column=col_idx)
-            style = header_styles[col_idx-1]
-            cell.font = style['font']
-            cell.border = style['border']
-            cell.fill = style['fill']
-            cell.alignment = style['alignment']
+        # 4. Escribir Cabecera de Tabla (Fila 7)
+        cabecera = [(None, estilo) for estilo in header_styles]
+        cabecera[0] = ("TIPO DE ACTIVIDAD", header_styles[0])
+        cabecera[7] = ("CANTIDAD", header_styles[7])
+        writer.fila(cabecera, combinar=combinar)
         
-        current_row += 1
-        
-        # 6. Escribir Datos de Resumen
-        for _, r in resumen.iterrows():
-            # Actividad (A-G)
-            ws.cell(row=current_row, column=1, value=r['Actividad'])
-            ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=7)
-            # Cantidad (H-J)
-            ws.cell(row=current_row, column=8, value=r['Cantidad'])
-            ws.merge_cells(start_row=current_row, start_column=8, end_row=current_row, end_column=10)
-            
-            # Bordes y alineación para la fila de datos
-            for c in range(1, 11):
-                cell = ws.cell(row=current_row, column=c)
-                cell.border = header_styles[c-1]['border']
-                cell.alignment = header_styles[c-1]['alignment']
-                # Si es la columna de cantidad (H), centrar
-                if c >= 8:
-                    cell.alignment = openpyxl.styles.Alignment(horizontal='center', vertical='center')
-            
-            current_row += 1
+        # 5. Escribir Datos de Resumen
+        for actividad, cantidad in resumen.itertuples(index=False):
+            celdas = [(None, estilo) for estilo in estilos_dato]
+            celdas[0] = (actividad, estilos_dato[0])
+            celdas[7] = (int(cantidad), estilos_dato[7])
+            writer.fila(celdas, combinar=combinar)
             
         # Total General
-        ws.cell(row=current_row, column=1, value="TOTAL GENERAL DE ACTIVIDADES:").font = openpyxl.styles.Font(bold=True)
-        ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=7)
-        ws.cell(row=current_row, column=8, value=resumen['Cantidad'].sum()).font = openpyxl.styles.Font(bold=True)
-        ws.merge_cells(start_row=current_row, start_column=8, end_row=current_row, end_column=10)
-        
-        for c in range(1, 11):
-            cell = ws.cell(row=current_row, column=c)
-            cell.border = header_styles[c-1]['border']
-            cell.alignment = header_styles[c-1]['alignment']
-            if c >= 8:
-                cell.alignment = openpyxl.styles.Alignment(horizontal='center', vertical='center')
-
-        current_row += 1
+        celdas = [(None, estilo) for estilo in estilos_dato]
+        celdas[0] = ("TOTAL GENERAL DE ACTIVIDADES:", total_etiqueta)
+        celdas[7] = (int(resumen['Cantidad'].sum()), total_valor)
+        writer.fila(celdas, combinar=combinar)
         
-        # 7. Fecha e Informe (mismo estilo que el detallado)
+        # 6. Fecha e Informe (mismo estilo que el detallado)
         meses = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", 
                  "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
         ahora = datetime.now()
-        ws.cell(row=current_row, column=1, value="Fecha de informe:").font = openpyxl.styles.Font(bold=True)
-        ws.cell(row=current_row, column=2, value=f"{meses[ahora.month-1]} de {ahora.year}")
-        ws.merge_cells(start_row=current_row, start_column=2, end_row=current_row, end_column=10)
-        current_row += 1
+        writer.fila_pie("Fecha de informe:", f"{meses[ahora.month-1]} de {ahora.year}", estilo_valor=None)
         
         # Firmas
         if contrato_data:
-            start_firmas = current_row
             # Nombre Contratista
             if contrato_data.get('nombre'):
-                ws.cell(row=current_row, column=1, value="Elaborado por:").font = openpyxl.styles.Font(bold=True)
-                ws.cell(row=current_row, column=2, value=contrato_data['nombre'].upper())
-                ws.merge_cells(start_row=current_row, start_column=2, end_row=current_row, end_column=10)
-                current_row += 1
-                ws.cell(row=current_row, column=1, value="CONTRATISTA:").font = openpyxl.styles.Font(bold=True)
-                ws.merge_cells(start_row=current_row, start_column=2, end_row=current_row, end_column=10)
-                current_row += 1
+                writer.fila_pie("Elaborado por:", contrato_data['nombre'].upper(), estilo_valor=None)
+                writer.fila_pie("CONTRATISTA:", estilo_valor=None)
             
             # Supervisor
             if contrato_data.get('supervisor'):
-                ws.cell(row=current_row, column=1, value="Vo.Bo:").font = openpyxl.styles.Font(bold=True)
-                ws.cell(row=current_row, column=2, value=contrato_data['supervisor'].upper())
-                ws.merge_cells(start_row=current_row, start_column=2, end_row=current_row, end_column=10)
-                current_row += 1
-                ws.cell(row=current_row, column=1, value="SUPERVISOR:").font = openpyxl.styles.Font(bold=True)
-                ws.merge_cells(start_row=current_row, start_column=2, end_row=current_row, end_column=10)
-                current_row += 1
+                writer.fila_pie("Vo.Bo:", contrato_data['supervisor'].upper(), estilo_valor=None)
+                writer.fila_pie("SUPERVISOR:", estilo_valor=None)
 
-        wb.save(output_path)
+        writer.guardar(output_path)
         return True
     except Exception as e:
         logger.error(f"Error generando informe final: {e}")
@@ -0,0 +1,337 @@
+"""
+Trabajos de exportación en segundo plano.
+Las exportaciones grandes se generan en un pool acotado de hilos para no ocupar
+los hilos que atienden peticiones. El estado de cada trabajo se guarda en disco
+(junto al archivo generado) para que cualquier worker de gunicorn pueda consultarlo;
+el envío se serializa con un flock sobre ese directorio para que dos workers no
+generen el mismo archivo. Cada trabajo activo registra el pid de su worker y un
+latido periódico: si el worker muere, el trabajo se da por fallido en vez de
+retener a las solicitudes idénticas hasta que venza el TTL.
+"""
+
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:     # Windows: solo la exclusión entre hilos del mismo proceso
+    fcntl = None
+
+from config import EXPORT_JOBS_DIR, EXPORT_JOB_WORKERS, EXPORT_JOB_TTL, EXPORT_JOB_LATIDO, logger
+from eventos import publicar
+
+ESTADO_PENDIENTE = 'pendiente'
+ESTADO_EN_PROCESO = 'en_proceso'
+ESTADO_LISTO = 'listo'
+ESTADO_ERROR = 'error'
+ESTADOS_ACTIVOS = (ESTADO_PENDIENTE, ESTADO_EN_PROCESO)
+
+MIMETYPE_EXCEL = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Sin latido durante este tiempo, un trabajo activo se considera abandonado
+LATIDO_VENCIDO = EXPORT_JOB_LATIDO * 3
+
+_executor = None
+_lock = threading.Lock()
+_lock_estado = threading.Lock()
+_propios = {}               # id → trabajo activo de este proceso (reciben latido)
+_hilo_latidos = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=EXPORT_JOB_WORKERS, thread_name_prefix="exportacion")
+    return _executor
+
+
+def reiniciar_tras_fork():
+    """Los hilos del pool no sobreviven a un fork: el proceso hijo crea su propio pool"""
+    global _executor, _lock, _lock_estado, _hilo_latidos
+    _executor = None
+    _lock = threading.Lock()
+    _lock_estado = threading.Lock()
+    _propios.clear()
+    _hilo_latidos = None
+
+
+@contextmanager
+def _bloqueo_envios():
+    """Exclusión entre hilos y entre workers: flock sobre el directorio compartido de trabajos"""
+    os.makedirs(EXPORT_JOBS_DIR, exist_ok=True)
+    with _lock:
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(EXPORT_JOBS_DIR, os.O_RDONLY)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)        # cerrar libera el flock
+
+
+# =============================================================================
+# PERSISTENCIA DEL ESTADO
+# =============================================================================
+
+def _ruta_meta(job_id):
+    return os.path.join(EXPORT_JOBS_DIR, f"{job_id}.json")
+
+
+def _guardar_trabajo(trabajo, **cambios):
+    """Aplica los cambios y escribe el estado del trabajo de forma atómica"""
+    os.makedirs(EXPORT_JOBS_DIR, exist_ok=True)
+    # El hilo de latidos escribe el mismo dict: una escritura a la vez por proceso
+    with _lock_estado:
+        trabajo.update(cambios)
+        tmp = f"{_ruta_meta(trabajo['id'])}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(trabajo, f, ensure_ascii=False)
+        os.replace(tmp, _ruta_meta(trabajo['id']))
+
+
+def _actualizar(trabajo, **cambios):
+    _guardar_trabajo(trabajo, **cambios)
+    # Avisa a los clientes suscritos (SSE / long-polling en app_async.py)
+    publicar('trabajo', estado_publico(trabajo), usuarios=trabajo.get('solicitantes'))
+
+
+def obtener_trabajo(job_id):
+    """Lee el estado de un trabajo; None si no existe o expiró"""
+    if not job_id or not all(c in '0123456789abcdef' for c in job_id):
+        return None
+    try:
+        with open(_ruta_meta(job_id), 'r', encoding='utf-8') as f:
+            trabajo = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if _expirado(trabajo):
+        _eliminar_trabajo(trabajo)
+        return None
+    if trabajo['estado'] in ESTADOS_ACTIVOS and _abandonado(trabajo):
+        logger.warning(f"Trabajo de exportación {trabajo['id']} abandonado por el proceso {trabajo.get('pid')}")
+        _actualizar(trabajo, estado=ESTADO_ERROR, mensaje='La exportación se interrumpió, vuelva a solicitarla',
+                    terminado=time.time())
+    return trabajo
+
+
+def _proceso_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        pass                    # existe (de otro usuario) o no se puede comprobar
+    return True
+
+
+def _abandonado(trabajo, ahora=None):
+    """Trabajo activo cuyo worker murió (crash, reciclado por max_requests) o dejó de latir"""
+    if trabajo.get('pid') == os.getpid():
+        return trabajo['id'] not in _propios
+    if trabajo.get('pid') and not _proceso_vivo(trabajo['pid']):
+        return True
+    return (ahora or time.time()) - trabajo.get('latido', trabajo.get('creado', 0)) > LATIDO_VENCIDO
+
+
+def _expirado(trabajo, ahora=None):
+    ahora = ahora or time.time()
+    # Un trabajo activo más viejo que el TTL quedó huérfano (p. ej. se reinició el worker)
+    referencia = trabajo.get('terminado') or trabajo.get('creado', 0)
+    return ahora - referencia > EXPORT_JOB_TTL
+
+
+def _eliminar_trabajo(trabajo):
+    for ruta in (trabajo.get('ruta'), _ruta_meta(trabajo['id'])):
+        if ruta and os.path.exists(ruta):
+            try:
+                os.remove(ruta)
+            except OSError as e:
+                logger.error(f"No se pudo eliminar {ruta}: {e}")
+
+
+def _listar_trabajos():
+    if not os.path.isdir(EXPORT_JOBS_DIR):
+        return []
+    trabajos = []
+    for nombre in os.listdir(EXPORT_JOBS_DIR):
+        if nombre.endswith('.json'):
+            trabajo = obtener_trabajo(nombre[:-5])
+            if trabajo:
+                trabajos.append(trabajo)
+    return trabajos
+
+
+def purgar_expirados():
+    """Elimina archivos y estados de trabajos vencidos"""
+    _listar_trabajos()
+
+
+# =============================================================================
+# ENVÍO Y EJECUCIÓN
+# =============================================================================
+
+def clave_exportacion(filtros, formato, tipo_reporte, contrato_data):
+    """Hash de los parámetros que determinan el contenido del archivo"""
+    base = json.dumps(
+        {'filtros': filtros, 'formato': formato, 'tipo_reporte': tipo_reporte, 'contrato': contrato_data},
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(base.encode('utf-8')).hexdigest()
+
+
+def enviar_exportacion(solicitante, filtros, formato='excel', tipo_reporte='detallado', contrato_data=None):
+    """
+    Encola una exportación y retorna el estado del trabajo inmediatamente.
+    Si ya hay un trabajo activo con los mismos parámetros, se reutiliza.
+    `filtros` es un dict con fecha_inicio, fecha_fin, usuario y actividad.
+    """
+    clave = clave_exportacion(filtros, formato, tipo_reporte, contrato_data)
+    with _bloqueo_envios():
+        for trabajo in _listar_trabajos():
+            if trabajo['clave'] == clave and trabajo['estado'] in ESTADOS_ACTIVOS:
+                if solicitante not in trabajo['solicitantes']:
+                    _actualizar(trabajo, solicitantes=trabajo['solicitantes'] + [solicitante])
+                logger.info(f"Exportación duplicada, se reutiliza el trabajo {trabajo['id']}")
+                return trabajo
+
+        trabajo = {
+            'id': uuid.uuid4().hex,
+            'clave': clave,
+            'estado': ESTADO_PENDIENTE,
+            'progreso': 0,
+            'mensaje': 'En cola',
+            'solicitantes': [solicitante],
+            'filtros': filtros,
+            'formato': formato,
+            'tipo_reporte': tipo_reporte,
+            'contrato_data': contrato_data,
+            'creado': time.time(),
+            'pid': os.getpid(),
+            'latido': time.time(),
+            'terminado': None,
+            'ruta': None,
+            'filename': None,
+            'mimetype': None
+        }
+        _propios[trabajo['id']] = trabajo
+        _guardar_trabajo(trabajo)
+
+    _iniciar_latidos()
+    _get_executor().submit(_ejecutar, trabajo)
+    return trabajo
+
+
+def _iniciar_latidos():
+    """Un hilo por proceso renueva el latido de sus trabajos activos (también los que esperan en cola)"""
+    global _hilo_latidos
+    with _lock:
+        if _hilo_latidos is None or not _hilo_latidos.is_alive():
+            _hilo_latidos = threading.Thread(target=_latir, name="exportacion-latidos", daemon=True)
+            _hilo_latidos.start()
+
+
+def _latir():
+    while True:
+        time.sleep(EXPORT_JOB_LATIDO)
+        for trabajo in list(_propios.values()):
+            try:
+                _guardar_trabajo(trabajo, latido=time.time())
+            except OSError as e:
+                logger.error(f"No se pudo registrar el latido del trabajo {trabajo['id']}: {e}")
+
+
+def _ejecutar(trabajo):
+    """Genera el archivo del trabajo (se ejecuta en el pool)"""
+    try:
+        _actualizar(trabajo, estado=ESTADO_EN_PROCESO, progreso=10, mensaje='Consultando registros')
+        generar_archivo(trabajo, lambda progreso, mensaje: _actualizar(trabajo, progreso=progreso, mensaje=mensaje))
+        _actualizar(trabajo, estado=ESTADO_LISTO, progreso=100, mensaje='Listo para descargar', terminado=time.time())
+        logger.info(f"Trabajo de exportación {trabajo['id']} terminado")
+    except Exception as e:
+        if isinstance(e, ValueError):
+            logger.warning(f"Trabajo de exportación {trabajo['id']} sin resultado: {e}")
+        else:
+            logger.exception(f"Error en trabajo de exportación {trabajo['id']}: {e}")
+        if trabajo.get('ruta') and os.path.exists(trabajo['ruta']):
+            os.remove(trabajo['ruta'])
+        _actualizar(trabajo, estado=ESTADO_ERROR, mensaje=str(e) or 'Error al procesar la exportación',
+                    ruta=None, terminado=time.time())
+    finally:
+        _propios.pop(trabajo['id'], None)
+
+
+def generar_archivo(trabajo, reportar=None):
+    """Genera el xlsx/csv/parquet/pdf de un trabajo en EXPORT_JOBS_DIR y completa ruta, filename y mimetype"""
+    from export_service import generar_csv_stream
+    from export_parquet import generar_parquet_stream, MIMETYPE_PARQUET
+    from export_pdf import generar_pdf_stream
+    from export_cache import obtener_informe
+
+    reportar = reportar or (lambda progreso, mensaje: None)
+    filtros = trabajo['filtros']
+    solicitante = trabajo['solicitantes'][0]
+    os.makedirs(EXPORT_JOBS_DIR, exist_ok=True)
+
+    if trabajo['formato'] != 'excel':
+        if trabajo['formato'] == 'parquet':
+            stream, extension, mimetype = generar_parquet_stream(**filtros), 'parquet', MIMETYPE_PARQUET
+        elif trabajo['formato'] == 'pdf':
+            stream = generar_pdf_stream(contrato_data=trabajo['contrato_data'], **filtros)
+            extension, mimetype = 'pdf', 'application/pdf'
+        else:
+            stream, extension, mimetype = generar_csv_stream(**filtros), 'csv', 'text/csv'
+        if stream is None:
+            raise ValueError('No hay datos para exportar')
+        ruta = os.path.join(EXPORT_JOBS_DIR, f"{trabajo['id']}.{extension}")
+        trabajo['ruta'] = ruta
+        reportar(40, f'Escribiendo {extension.upper()}')
+        with open(ruta, 'wb') as f:
+            for bloque in stream:
+                f.write(bloque)
+        trabajo['filename'] = f"exportacion_{solicitante}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+        trabajo['mimetype'] = mimetype
+        return ruta
+
+    reportar(40, 'Generando informe')
+    ruta = os.path.join(EXPORT_JOBS_DIR, f"{trabajo['id']}.xlsx")
+    shutil.copyfile(obtener_informe(filtros, trabajo['tipo_reporte'], trabajo['contrato_data']), ruta)
+    trabajo['ruta'] = ruta
+
+    trabajo['filename'] = f"Informe_{trabajo['tipo_reporte']}_{solicitante}_{datetime.now().strftime('%Y%m%d')}.xlsx"
+    trabajo['mimetype'] = MIMETYPE_EXCEL
+    return ruta
+
+
+# =============================================================================
+# CONSULTA
+# =============================================================================
+
+def puede_ver(trabajo, usuario):
+    """Solo quienes enviaron el trabajo (o admin) pueden consultarlo y descargarlo"""
+    return usuario == 'admin' or usuario in trabajo.get('solicitantes', [])
+
+
+def estado_publico(trabajo):
+    """Datos del trabajo que se exponen al cliente"""
+    datos = {
+        'id': trabajo['id'],
+        'estado': trabajo['estado'],
+        'progreso': trabajo['progreso'],
+        'mensaje': trabajo['mensaje'],
+        'creado': datetime.fromtimestamp(trabajo['creado']).strftime('%Y-%m-%d %H:%M:%S'),
+        'estado_url': f"/exportar/trabajo?id={trabajo['id']}"
+    }
+    if trabajo['estado'] == ESTADO_LISTO:
+        datos['descarga_url'] = f"/exportar/descargar?id={trabajo['id']}"
+        datos['expira'] = datetime.fromtimestamp(trabajo['terminado'] + EXPORT_JOB_TTL).strftime('%Y-%m-%d %H:%M:%S')
+    return datos
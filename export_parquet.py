@@ -0,0 +1,149 @@
+"""
+Exportación columnar en Parquet para análisis.
+FECHA se guarda como timestamp, las columnas de catálogo como categóricas
+(diccionario) y cada mes queda en su propio row group, de modo que leer un
+rango de fechas solo toca los meses necesarios.
+
+Uso por línea de comandos:
+    python export_parquet.py --desde 2023-01-01 --hasta 2024-12-31 [-u usuario] [-o archivo.parquet]
+"""
+
+import sys
+import argparse
+import itertools
+from datetime import datetime
+
+import pandas as pd
+
+from config import COLUMNAS, logger
+from database import iterar_registros
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+PARQUET_CHUNK_SIZE = 5000
+MIMETYPE_PARQUET = 'application/vnd.apache.parquet'
+
+COLUMNAS_CATEGORICAS = ('DEPENDENCIA', 'TIPO DE SOLICITUD', 'MEDIO DE SOLICITUD')
+
+
+def _esquema():
+    campos = []
+    for col in COLUMNAS:
+        if col == 'ID':
+            tipo = pa.int64()
+        elif col == 'FECHA':
+            tipo = pa.timestamp('ms')
+        elif col in COLUMNAS_CATEGORICAS:
+            tipo = pa.dictionary(pa.int32(), pa.string())
+        else:
+            tipo = pa.string()
+        campos.append(pa.field(col, tipo))
+    return pa.schema(campos)
+
+
+def _tabla_mes(filas, esquema):
+    """Convierte las filas (tuplas en orden de COLUMNAS) de un mes a una tabla Arrow tipada"""
+    df = pd.DataFrame.from_records(filas, columns=COLUMNAS)
+    df['FECHA'] = pd.to_datetime(df['FECHA'], errors='coerce', format='mixed')
+    for col in COLUMNAS:
+        if col not in ('ID', 'FECHA'):
+            df[col] = df[col].astype('string')
+    for col in COLUMNAS_CATEGORICAS:
+        df[col] = df[col].astype('category')
+    return pa.Table.from_pandas(df, schema=esquema, preserve_index=False)
+
+
+def _filas_por_mes(bloques):
+    """Agrupa las filas ordenadas por fecha en listas de un mismo mes (AAAA-MM)"""
+    indice_fecha = COLUMNAS.index('FECHA')
+    filas = itertools.chain.from_iterable(bloques)
+    for _, grupo in itertools.groupby(filas, key=lambda f: str(f[indice_fecha] or '')[:7]):
+        yield list(grupo)
+
+
+class _SalidaStream:
+    """Destino de solo escritura para ParquetWriter: acumula bytes hasta que se retiran"""
+
+    def __init__(self):
+        self.partes = []
+        self.closed = False
+
+    def write(self, datos):
+        self.partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def retirar(self):
+        datos = b"".join(self.partes)
+        self.partes = []
+        return datos
+
+
+def generar_parquet_stream(fecha_inicio=None, fecha_fin=None, usuario=None, actividad=None,
+                           chunk_size=PARQUET_CHUNK_SIZE):
+    """
+    Genera la exportación Parquet como un iterador de bloques de bytes (un row group por mes).
+    Retorna None si no hay registros que exportar.
+    Lanza RuntimeError si pyarrow no está instalado.
+    """
+    if pa is None:
+        raise RuntimeError('La exportación Parquet requiere pyarrow')
+
+    bloques = iterar_registros(
+        usuario=usuario, fecha_inicio=fecha_inicio, fecha_fin=fecha_fin,
+        actividad=actividad, chunk_size=chunk_size, orden=("fecha", "id")
+    )
+    primero = next(bloques, None)
+    if primero is None:
+        return None
+
+    def _stream():
+        esquema = _esquema()
+        salida = _SalidaStream()
+        meses = 0
+        try:
+            with pq.ParquetWriter(salida, esquema, compression='zstd') as writer:
+                for filas in _filas_por_mes(itertools.chain([primero], bloques)):
+                    writer.write_table(_tabla_mes(filas, esquema), row_group_size=len(filas))
+                    meses += 1
+                    yield salida.retirar()
+            yield salida.retirar()
+            logger.info(f"Exportación Parquet generada: {meses} row groups (meses)")
+        finally:
+            bloques.close()
+
+    return _stream()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta los registros a Parquet (un row group por mes)")
+    parser.add_argument("--desde", dest="fecha_inicio", help="Fecha inicial (YYYY-MM-DD)")
+    parser.add_argument("--hasta", dest="fecha_fin", help="Fecha final (YYYY-MM-DD)")
+    parser.add_argument("-u", "--usuario", help="Usuario (por defecto, todos)")
+    parser.add_argument("-a", "--actividad", help="Tipo de actividad")
+    parser.add_argument("-o", "--salida", help="Archivo de salida")
+    args = parser.parse_args(argv)
+
+    stream = generar_parquet_stream(args.fecha_inicio, args.fecha_fin, args.usuario, args.actividad)
+    if stream is None:
+        print("⚠️ No hay datos para exportar")
+        return 1
+    salida = args.salida or f"registros_{datetime.now().strftime('%Y%m%d_%H%M%S')}.parquet"
+    with open(salida, "wb") as f:
+        for bloque in stream:
+            f.write(bloque)
+    print(f"✅ Exportación generada: {salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
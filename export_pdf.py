@@ -0,0 +1,300 @@
+"""
+Exportación del informe detallado en PDF.
+Reproduce la plantilla institucional (encabezado con datos del contrato, tabla con
+subtotales por actividad, total general y firmas) y se genera página por página:
+los registros se leen de la BD por bloques y cada página terminada se serializa
+y se envía al cliente, de modo que ni los datos ni el documento completos quedan en memoria.
+"""
+
+import itertools
+from datetime import datetime
+
+from config import TEMPLATE_EXCEL, COLUMNAS, logger
+from database import iterar_registros, resumir_registros
+from export_service import COLUMNAS_INFORME, MESES, valores_encabezado
+
+try:
+    from fpdf import FPDF
+except ImportError:
+    FPDF = None
+
+PDF_CHUNK_SIZE = 500
+
+# Geometría de la página (A4 horizontal, mm)
+MARGEN = 10
+ALTO_FILA = 6
+ALTO_ENCABEZADO = 7
+TAMANO_FUENTE = 7
+_COLUMNAS_EXCEL = 'ABCDEFGHI'
+
+
+class _MetricasInforme:
+    """Anchos de columna y rótulos tomados de la plantilla Excel (se calculan una vez)"""
+
+    def __init__(self, ancho_util):
+        from report_writer import obtener_plantilla
+        plantilla = obtener_plantilla(TEMPLATE_EXCEL)
+        anchos = [plantilla.anchos.get(letra, 10) for letra in _COLUMNAS_EXCEL]
+        escala = ancho_util / sum(anchos)
+        self.anchos = [a * escala for a in anchos]
+        self.rotulos_encabezado = {
+            fila: plantilla.celdas[(fila, 1)][0] or '' for fila in range(2, 7)
+        }
+        self.titulos = [plantilla.celdas[(7, col)][0] or nombre
+                        for col, (nombre, _) in enumerate(COLUMNAS_INFORME, start=1)]
+
+
+def _latin1(texto):
+    """Las fuentes base de fpdf solo admiten latin-1"""
+    return str(texto).encode('latin-1', 'replace').decode('latin-1')
+
+
+class _PDFPorPaginas(FPDF if FPDF else object):
+    """
+    FPDF que escribe cada página en el buffer de salida al terminarla.
+    Los objetos de página quedan numerados 3, 5, 7... igual que en FPDF, y el
+    árbol de páginas, las fuentes y el xref se escriben al cerrar el documento;
+    los desplazamientos se cuentan sobre todo lo ya entregado con retirar().
+    """
+
+    def __init__(self, metricas):
+        super().__init__(orientation='L', unit='mm', format='A4')
+        self.metricas = metricas
+        self.mostrar_titulos = False
+        self._bytes_emitidos = 0
+        self.set_margins(MARGEN, MARGEN, MARGEN)
+        self.set_auto_page_break(False)
+
+    # --- salida incremental -------------------------------------------------
+
+    def retirar(self):
+        """Devuelve y descarta lo acumulado en el buffer"""
+        datos = self.buffer.encode('latin-1')
+        self._bytes_emitidos += len(datos)
+        self.buffer = ''
+        return datos
+
+    def _posicion(self):
+        return self._bytes_emitidos + len(self.buffer)
+
+    def _newobj(self):
+        self.n += 1
+        self.offsets[self.n] = self._posicion()
+        self._out(str(self.n) + ' 0 obj')
+
+    def _endpage(self):
+        super()._endpage()
+        if self.page == 1:
+            self._putheader()
+        filtro = '/Filter /FlateDecode ' if self.compress else ''
+        contenido = self.pages[self.page]
+        if self.compress:
+            import zlib
+            contenido = zlib.compress(contenido.encode('latin-1'))
+        self._newobj()
+        self._out('<</Type /Page')
+        self._out('/Parent 1 0 R')
+        self._out('/Resources 2 0 R')
+        self._out('/Contents ' + str(self.n + 1) + ' 0 R>>')
+        self._out('endobj')
+        self._newobj()
+        self._out('<<' + filtro + '/Length ' + str(len(contenido)) + '>>')
+        self._putstream(contenido)
+        self._out('endobj')
+        # La página ya está en el buffer: se libera su contenido
+        self.pages[self.page] = ''
+
+    def _putpages(self):
+        # Las páginas ya se escribieron; solo falta el árbol de páginas (objeto 1)
+        self.offsets[1] = self._posicion()
+        self._out('1 0 obj')
+        self._out('<</Type /Pages')
+        self._out('/Kids [' + ''.join(f'{3 + 2 * i} 0 R ' for i in range(self.page)) + ']')
+        self._out('/Count ' + str(self.page))
+        self._out('/MediaBox [0 0 %.2f %.2f]' % (self.fh_pt, self.fw_pt))
+        self._out('>>')
+        self._out('endobj')
+
+    def _putresources(self):
+        self._putfonts()
+        self._putimages()
+        self.offsets[2] = self._posicion()
+        self._out('2 0 obj')
+        self._out('<<')
+        self._putresourcedict()
+        self._out('>>')
+        self._out('endobj')
+
+    def _enddoc(self):
+        self._putpages()
+        self._putresources()
+        self._newobj()
+        self._out('<<')
+        self._putinfo()
+        self._out('>>')
+        self._out('endobj')
+        self._newobj()
+        self._out('<<')
+        self._putcatalog()
+        self._out('>>')
+        self._out('endobj')
+        inicio_xref = self._posicion()
+        self._out('xref')
+        self._out('0 ' + str(self.n + 1))
+        self._out('0000000000 65535 f ')
+        for i in range(1, self.n + 1):
+            self._out('%010d 00000 n ' % self.offsets[i])
+        self._out('trailer')
+        self._out('<<')
+        self._puttrailer()
+        self._out('>>')
+        self._out('startxref')
+        self._out(inicio_xref)
+        self._out('%%EOF')
+        self.state = 3
+
+    # --- maquetación ----------------------------------------------------------
+
+    def header(self):
+        if self.mostrar_titulos:
+            self.fila_titulos()
+
+    def footer(self):
+        self.set_y(-MARGEN)
+        self.set_font('Arial', 'I', 7)
+        self.cell(0, 4, f'Página {self.page_no()}', 0, 0, 'R')
+
+    def asegurar_espacio(self, alto):
+        """Salta de página si la siguiente fila no cabe"""
+        if self.get_y() + alto > self.h - MARGEN - 4:
+            self.add_page()
+
+    def fila_titulos(self):
+        self.set_font('Arial', 'B', TAMANO_FUENTE)
+        self.set_fill_color(217, 217, 217)
+        for ancho, titulo in zip(self.metricas.anchos, self.metricas.titulos):
+            self.cell(ancho, ALTO_ENCABEZADO, _latin1(titulo), 1, 0, 'C', True)
+        self.ln()
+        self.set_font('Arial', '', TAMANO_FUENTE)
+
+    def encabezado(self, valores):
+        """Título y bloque de datos del contrato (filas 2-6 de la plantilla)"""
+        self.set_font('Arial', 'B', 12)
+        self.cell(0, 8, 'INFORME DE ACTIVIDADES', 0, 1, 'C')
+        ancho_rotulo = self.metricas.anchos[0] + self.metricas.anchos[1]
+        for fila, rotulo in self.metricas.rotulos_encabezado.items():
+            self.set_font('Arial', 'B', 8)
+            self.cell(ancho_rotulo, ALTO_FILA, _latin1(rotulo), 1, 0, 'L')
+            self.set_font('Arial', '', 8)
+            self.cell(0, ALTO_FILA, self._ajustar(valores.get((fila, 3), ''), self.w - 2 * MARGEN - ancho_rotulo), 1, 1, 'L')
+        self.ln(2)
+        self.fila_titulos()
+        self.mostrar_titulos = True
+
+    def _ajustar(self, valor, ancho):
+        """Recorta el texto para que quepa en una celda de una sola línea"""
+        texto = _latin1('' if valor is None else valor)
+        if self.get_string_width(texto) <= ancho - 2:
+            return texto
+        while texto and self.get_string_width(texto + '...') > ancho - 2:
+            texto = texto[:-1]
+        return texto + '...'
+
+    def fila_datos(self, valores):
+        self.asegurar_espacio(ALTO_FILA)
+        for ancho, valor in zip(self.metricas.anchos, valores):
+            self.cell(ancho, ALTO_FILA, self._ajustar(valor, ancho), 1, 0, 'L')
+        self.ln()
+
+    def fila_subtotal(self, etiqueta, conteo, total=False):
+        self.asegurar_espacio(ALTO_FILA)
+        self.set_font('Arial', 'B', TAMANO_FUENTE + (1 if total else 0))
+        self.cell(self.metricas.anchos[0], ALTO_FILA, etiqueta, 1, 0, 'L')
+        self.cell(sum(self.metricas.anchos[1:]), ALTO_FILA, str(conteo), 1, 1, 'L')
+        self.set_font('Arial', '', TAMANO_FUENTE)
+
+    def fila_pie(self, etiqueta, valor=''):
+        self.mostrar_titulos = False
+        self.asegurar_espacio(ALTO_FILA)
+        self.set_font('Arial', 'B', 8)
+        self.cell(self.metricas.anchos[0], ALTO_FILA, _latin1(etiqueta), 0, 0, 'L')
+        self.set_font('Arial', '', 8)
+        self.cell(0, ALTO_FILA, _latin1(valor or ''), 0, 1, 'L')
+
+
+def _valores_fila(fila, indices):
+    """Fila de la BD (orden de COLUMNAS) → celdas del informe (orden de COLUMNAS_INFORME)"""
+    valores = []
+    for (col, defecto), indice in zip(COLUMNAS_INFORME, indices):
+        valor = fila[indice]
+        if valor is None or valor == '':
+            valor = defecto
+        elif hasattr(valor, 'strftime'):
+            valor = valor.strftime('%Y-%m-%d')
+        valores.append(valor)
+    return valores
+
+
+def generar_pdf_stream(fecha_inicio=None, fecha_fin=None, usuario=None, actividad=None,
+                       contrato_data=None, chunk_size=PDF_CHUNK_SIZE):
+    """
+    Genera el informe detallado en PDF como un iterador de bloques de bytes (uno por página).
+    Retorna None si no hay registros. Lanza RuntimeError si fpdf no está instalado.
+    """
+    if FPDF is None:
+        raise RuntimeError('La exportación PDF requiere fpdf')
+
+    resumen = resumir_registros(usuario, fecha_inicio, fecha_fin, actividad)
+    if not resumen['total']:
+        return None
+
+    def _stream():
+        pdf = _PDFPorPaginas(_MetricasInforme(ancho_util=297 - 2 * MARGEN))
+        pdf.set_title('Informe de actividades')
+        pdf.add_page()
+        pdf.encabezado(valores_encabezado(
+            contrato_data, resumen['usuarios'], [resumen['fecha_min'], resumen['fecha_max']]
+        ))
+
+        indices = [COLUMNAS.index(col) for col, _ in COLUMNAS_INFORME]
+        indice_actividad = COLUMNAS.index('TIPO DE ACTIVIDAD')
+        bloques = iterar_registros(
+            usuario=usuario, fecha_inicio=fecha_inicio, fecha_fin=fecha_fin,
+            actividad=actividad, chunk_size=chunk_size
+        )
+        paginas = pdf.page
+        total = 0
+        try:
+            filas = itertools.chain.from_iterable(bloques)
+            for _, grupo in itertools.groupby(filas, key=lambda f: f[indice_actividad]):
+                conteo = 0
+                for fila in grupo:
+                    pdf.fila_datos(_valores_fila(fila, indices))
+                    conteo += 1
+                    if pdf.page != paginas:
+                        # Se cerró una página: enviarla
+                        paginas = pdf.page
+                        yield pdf.retirar()
+                pdf.fila_subtotal("ACTIVIDADES: ", conteo)
+                total += conteo
+        finally:
+            bloques.close()
+
+        pdf.fila_subtotal("TOTAL GENERAL", total, total=True)
+        ahora = datetime.now()
+        pdf.ln(4)
+        pdf.fila_pie("Fecha de informe:", f"{MESES[ahora.month - 1]} de {ahora.year}")
+        if contrato_data:
+            if contrato_data.get('nombre'):
+                pdf.ln(8)
+                pdf.fila_pie("Elaborado por:", contrato_data['nombre'].upper())
+                pdf.fila_pie("CONTRATISTA:")
+            if contrato_data.get('supervisor'):
+                pdf.ln(8)
+                pdf.fila_pie("Vo.Bo:", contrato_data['supervisor'].upper())
+                pdf.fila_pie("SUPERVISOR:")
+        pdf.close()
+        yield pdf.retirar()
+        logger.info(f"Informe PDF generado: {total} registros, {pdf.page} páginas")
+
+    return _stream()
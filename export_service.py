@@ -4,33 +4,43 @@ Separado de database.py para responsabilidad única.
 """
 
 import os
-import copy
-import pandas as pd
+import io
+import csv
+import itertools
 from datetime import datetime
-from config import TEMPLATE_EXCEL, logger
-from database import cargar_registros
-from utils import medir_tiempo
+from config import TEMPLATE_EXCEL, COLUMNAS, logger
+from database import cargar_registros, iterar_registros, obtener_versiones_datos
+from utils import medir_tiempo, ModuloDiferido
+from acelerador import calcular_estadisticas, ordenar_registros
+
+pd = ModuloDiferido("pandas")
+
+# Filas leídas de la BD por cada bloque enviado al cliente
+CSV_CHUNK_SIZE = 1000
+
+# Meses en español para la fecha de los informes
+MESES = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
+         "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
+
+
+def _como_fechas(serie):
+    """datetime64 sin volver a parsear: cargar_registros ya convierte las fechas canónicas"""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    return pd.to_datetime(serie, errors='coerce', format='ISO8601')
 
 
 @medir_tiempo
 def exportar_registros_filtrados(fecha_inicio=None, fecha_fin=None, usuario=None, actividad=None):
     """Exporta registros filtrados. Retorna (DataFrame, dict_estadísticas)"""
     try:
-        df = cargar_registros(usuario)
+        # Filtros resueltos en SQL sobre las fechas canónicas
+        df = cargar_registros(usuario, fecha_inicio, fecha_fin, actividad)
         if df.empty:
             return pd.DataFrame(), {}
         
-        # Parsear fechas
         if 'FECHA' in df.columns:
-            df['FECHA'] = pd.to_datetime(df['FECHA'], errors='coerce')
-        
-        # Aplicar filtros
-        if fecha_inicio:
-            df = df[df['FECHA'] >= pd.to_datetime(fecha_inicio)]
-        if fecha_fin:
-            df = df[df['FECHA'] <= pd.to_datetime(fecha_fin)]
-        if actividad and actividad != 'Todas' and 'TIPO DE ACTIVIDAD' in df.columns:
-            df = df[df['TIPO DE ACTIVIDAD'] == actividad]
+            df['FECHA'] = _como_fechas(df['FECHA'])
         
         # Agrupamiento y ordenamiento solicitado
         if not df.empty:
@@ -38,7 +48,7 @@ def exportar_registros_filtrados(fecha_inicio=None, fecha_fin=None, usuario=None
             if 'TIPO DE ACTIVIDAD' in df.columns: sort_cols.append('TIPO DE ACTIVIDAD')
             if 'FECHA' in df.columns: sort_cols.append('FECHA')
             if sort_cols:
-                df = df.sort_values(by=sort_cols)
+                df = ordenar_registros(df, sort_cols)
         
         stats = _calcular_estadisticas(df)
         return df, stats
@@ -47,6 +57,46 @@ def exportar_registros_filtrados(fecha_inicio=None, fecha_fin=None, usuario=None
         return pd.DataFrame(), {}
 
 
+def generar_csv_stream(fecha_inicio=None, fecha_fin=None, usuario=None, actividad=None,
+                       chunk_size=CSV_CHUNK_SIZE):
+    """
+    Genera la exportación CSV como un iterador de bloques de bytes.
+    Lee la BD por bloques y no usa archivos temporales, así la memoria
+    se mantiene constante sin importar el tamaño de la exportación.
+    Retorna None si no hay registros que exportar.
+    """
+    bloques = iterar_registros(
+        usuario=usuario, fecha_inicio=fecha_inicio, fecha_fin=fecha_fin,
+        actividad=actividad, chunk_size=chunk_size
+    )
+    # Leer el primer bloque antes de responder para poder informar "sin datos"
+    primero = next(bloques, None)
+    if primero is None:
+        return None
+
+    def _stream():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(COLUMNAS)
+        try:
+            for bloque in itertools.chain([primero], bloques):
+                writer.writerows(bloque)
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate(0)
+        finally:
+            # Libera la conexión si el cliente corta la descarga
+            bloques.close()
+
+    return _stream()
+
+
+def _contar(serie):
+    """value_counts sin las categorías que no aparecen (las columnas categóricas las incluyen con 0)"""
+    conteo = serie.value_counts()
+    return conteo[conteo > 0]
+
+
 def _calcular_estadisticas(df):
     """Calcula estadísticas básicas de un DataFrame"""
     if df.empty:
@@ -63,8 +113,7 @@ def _calcular_estadisticas(df):
                      ('TIPO DE SOLICITUD', 'conteo_por_solicitud'),
                      ('MEDIO DE SOLICITUD', 'conteo_por_medio')]:
         if col in df.columns:
-            counts = df[col].value_counts().to_dict()
-            stats[key] = {str(k): int(v) for k, v in counts.items()}
+            stats[key] = calcular_estadisticas(df[col])
     
     return stats
 
@@ -89,7 +138,7 @@ def obtener_estadisticas_exportacion(usuario=None, fecha_inicio=None, fecha_fin=
         'ultima_exportacion': 'Nunca',
         'chart_actividades': {'labels': [], 'data': []},
         'chart_cumplimiento': {'labels': [], 'data': []},
-        'chart_linea': {'labels': [], 'data': []},
+        'chart_linea': {'labels': [], 'data': [], 'fechas': []},
         'usuarios': []
     }
     
@@ -102,51 +151,53 @@ def obtener_estadisticas_exportacion(usuario=None, fecha_inicio=None, fecha_fin=
         if df.empty:
             return empty_result
         
-        # Parseo de fechas (exportar_registros_filtrados ya hace parte del proceso)
+        # exportar_registros_filtrados ya entrega FECHA como datetime64
         if 'FECHA' in df.columns:
-            df['FECHA_DT'] = pd.to_datetime(df['FECHA'], errors='coerce')
+            df['FECHA_DT'] = _como_fechas(df['FECHA'])
             df = df.dropna(subset=['FECHA_DT'])
         
         if df.empty:
             return empty_result
         
         # Gráfico: Actividades (Todas, según petición del usuario)
-        counts_act = df['TIPO DE ACTIVIDAD'].value_counts()
+        counts_act = _contar(df['TIPO DE ACTIVIDAD'])
         chart_actividades = {
             'labels': counts_act.index.tolist(),
             'data': counts_act.values.tolist()
         }
         
         # Gráfico: Cumplimiento
-        cumplimiento = df['CUMPLIDO'].value_counts() if 'CUMPLIDO' in df.columns else pd.Series()
+        cumplimiento = _contar(df['CUMPLIDO']) if 'CUMPLIDO' in df.columns else pd.Series()
         chart_cumplimiento = {
             'labels': cumplimiento.index.tolist(),
             'data': cumplimiento.values.tolist()
         }
         
         # Gráfico: Línea temporal
-        df_sorted = df.sort_values('FECHA_DT')
-        linea = df_sorted['FECHA_DT'].dt.date.value_counts().sort_index()
+        # normalize() agrupa por día sin convertir a objetos date de Python
+        linea = df['FECHA_DT'].dt.normalize().value_counts().sort_index()
         # Si hay demasiados días, mostrar los últimos 90 para no saturar
         if len(linea) > 90:
             linea = linea.tail(90)
             
         chart_linea = {
             'labels': [d.strftime('%d/%m') for d in linea.index],
-            'data': linea.values.tolist()
+            'data': linea.values.tolist(),
+            'fechas': [d.strftime('%Y-%m-%d') for d in linea.index]    # Para ubicar los deltas en vivo
         }
         
         # Estadística por usuario
         user_stats = []
         if 'USUARIO' in df.columns:
-            for user, group in df.groupby('USUARIO'):
+            for user, group in df.groupby('USUARIO', observed=True):
                 total_user = len(group)
-                cumplidos = len(group[group['CUMPLIDO'] == 'Sí'])
+                cumplidos = int((group['CUMPLIDO'] == 'Sí').sum())
                 porcentaje = f"{(cumplidos/total_user)*100:.1f}%" if total_user > 0 else "0%"
                 ultima = group['FECHA_DT'].max().strftime('%Y-%m-%d %H:%M') if not group.empty else "N/A"
                 user_stats.append({
                     'usuario': user,
                     'total': total_user,
+                    'cumplidos': cumplidos,
                     'cumplimiento': porcentaje,
                     'ultima': ultima
                 })
@@ -168,6 +219,20 @@ def obtener_estadisticas_exportacion(usuario=None, fecha_inicio=None, fecha_fin=
 
 
 @medir_tiempo
+def obtener_estadisticas_versionadas(usuario, fecha_inicio=None, fecha_fin=None, version=None):
+    """
+    Estadísticas del dashboard junto con las versiones de datos con que se calcularon.
+    version es la suma de versiones que ya tiene el cliente: si no cambió retorna None
+    y no se recalcula nada.
+    """
+    versiones = obtener_versiones_datos(usuario)
+    if version is not None and str(version) == str(sum(versiones.values())):
+        return None
+    stats = obtener_estadisticas_exportacion(usuario, fecha_inicio, fecha_fin)
+    stats['versiones'] = versiones
+    return stats
+
+
 def generar_reporte_excel(df, estadisticas, output_path):
     """Genera un archivo Excel con datos + estadísticas"""
     try:
@@ -194,199 +259,138 @@ def generar_reporte_excel(df, estadisticas, output_path):
         return False
 
 
+# Columnas de datos del informe detallado (A-I) y valor por defecto si faltan
+COLUMNAS_INFORME = [
+    ('TIPO DE ACTIVIDAD', ''), ('FECHA', ''), ('DEPENDENCIA', ''), ('SOLICITANTE', ''),
+    ('TIPO DE SOLICITUD', ''), ('MEDIO DE SOLICITUD', ''), ('CUMPLIDO', 'Sí'),
+    ('FECHA ATENCIÓN', ''), ('OBSERVACIONES', '')
+]
+
+
+def _formatear_fechas(serie):
+    """Convierte fechas a texto YYYY-MM-DD en bloque; los textos se dejan como están"""
+    tipo = pd.api.types.infer_dtype(serie, skipna=True)
+    if pd.api.types.is_datetime64_any_dtype(serie) or tipo in ('datetime', 'datetime64', 'date'):
+        return pd.to_datetime(serie, errors='coerce').dt.strftime('%Y-%m-%d').fillna('')
+    if tipo.startswith('mixed'):
+        return serie.map(lambda v: v.strftime('%Y-%m-%d') if hasattr(v, 'strftime') else v)
+    return serie
+
+
+def _preparar_filas_informe(df):
+    """
+    Calcula el cuerpo del informe detallado en una sola pasada vectorizada.
+    Retorna (filas, tamanos): las filas de datos ordenadas por actividad y fecha,
+    y el número de filas de cada actividad en ese orden (posiciones de los subtotales).
+    """
+    if df.empty:
+        return [], []
+    orden = [c for c in ('TIPO DE ACTIVIDAD', 'FECHA') if c in df.columns]
+    df_reporte = ordenar_registros(df, orden) if orden else df
+
+    columnas = {}
+    for col, defecto in COLUMNAS_INFORME:
+        if col not in df_reporte.columns:
+            columnas[col] = defecto
+        elif col in ('FECHA', 'FECHA ATENCIÓN'):
+            columnas[col] = _formatear_fechas(df_reporte[col])
+        else:
+            columnas[col] = df_reporte[col]
+    cuerpo = pd.DataFrame(columnas, index=df_reporte.index)
+
+    tamanos = cuerpo.groupby('TIPO DE ACTIVIDAD', sort=False, dropna=False, observed=True).size().tolist()
+    return cuerpo.to_numpy(dtype=object).tolist(), tamanos
+
+
+def valores_encabezado(contrato_data, usuarios, fechas):
+    """
+    Valores del encabezado del informe detallado {(fila, col): valor}:
+    datos del contrato (filas 2-5) y rango de fechas (fila 6, columna 3).
+    `usuarios` son los usuarios distintos del informe y `fechas` las fechas (o su mínimo y máximo).
+    """
+    encabezado = {}
+    if contrato_data:
+        if contrato_data.get('nro'):
+            encabezado[(2, 3)] = contrato_data['nro'].upper()
+        if contrato_data.get('objeto'):
+            encabezado[(3, 3)] = contrato_data['objeto'].upper()
+        
+        # El nombre se pone en la fila 4 por defecto si no hay contrato_data['nombre']
+        nombre_contratista = contrato_data.get('nombre', '').upper()
+        if not nombre_contratista:
+            nombre_contratista = usuarios[0].upper() if len(usuarios) == 1 else "VARIOS"
+        
+        encabezado[(4, 3)] = nombre_contratista
+        
+        if contrato_data.get('cedula'):
+            encabezado[(5, 3)] = contrato_data['cedula']
+
+    # Rango de fechas (Fila 6)
+    fechas_dt = pd.to_datetime(pd.Series(fechas, dtype=object), errors='coerce').dropna()
+    if not fechas_dt.empty:
+        encabezado[(6, 3)] = f"{fechas_dt.min().strftime('%d/%m/%Y')} al {fechas_dt.max().strftime('%d/%m/%Y')}"
+    return encabezado
+
+
 @medir_tiempo
 def generar_informe_template(df, output_path, contrato_data=None):
-    """Genera informe usando la plantilla Excel institucional"""
+    """
+    Genera informe usando la plantilla Excel institucional.
+    Las filas se escriben en modo write-only con estilos compartidos,
+    por lo que la memoria no crece con el número de registros y no hay límite de filas.
+    """
     try:
-        import openpyxl
-        from config import TEMPLATE_EXCEL
-        logger.info(f"DEBUG: generar_informe_template usando plantilla IMPORTADA: {TEMPLATE_EXCEL}")
+        from report_writer import obtener_plantilla, InformeStreamWriter
         if not os.path.exists(TEMPLATE_EXCEL):
             logger.error(f"Plantilla no encontrada: {TEMPLATE_EXCEL}")
             return False
             
         try:
-            wb = openpyxl.load_workbook(TEMPLATE_EXCEL)
-            ws = wb.active
-            logger.info("Plantilla cargada correctamente")
+            # Encabezado y estilos se procesan una vez por proceso (cache invalidado por mtime)
+            plantilla = obtener_plantilla(TEMPLATE_EXCEL)
         except Exception as e:
             logger.error(f"Error al cargar el libro de Excel: {e}")
             return False
         
-        # Encabezados: Datos del Contrato (Filas 2-5, Columna 3)
-        if contrato_data:
-            if contrato_data.get('nro'):
-                ws.cell(row=2, column=3, value=contrato_data['nro'].upper())
-            if contrato_data.get('objeto'):
-                ws.cell(row=3, column=3, value=contrato_data['objeto'].upper())
-            
-            # El nombre se pone en la fila 4 por defecto si no hay contrato_data['nombre']
-            nombre_contratista = contrato_data.get('nombre', '').upper()
-            if not nombre_contratista:
-                usuarios = df['USUARIO'].unique() if 'USUARIO' in df.columns else []
-                nombre_contratista = usuarios[0].upper() if len(usuarios) == 1 else "VARIOS"
-            
-            ws.cell(row=4, column=3, value=nombre_contratista)
-            
-            if contrato_data.get('cedula'):
-                ws.cell(row=5, column=3, value=contrato_data['cedula'])
-
-        # Rango de fechas (Fila 6)
-        if not df.empty and 'FECHA' in df.columns:
-            fechas_dt = pd.to_datetime(df['FECHA'], errors='coerce').dropna()
-            if not fechas_dt.empty:
-                ws.cell(row=6, column=3,
-                        value=f"{fechas_dt.min().strftime('%d/%m/%Y')} al {fechas_dt.max().strftime('%d/%m/%Y')}")
+        writer = InformeStreamWriter(plantilla)
+        
+        usuarios = df['USUARIO'].unique() if 'USUARIO' in df.columns else []
+        fechas = df['FECHA'] if 'FECHA' in df.columns else []
+        encabezado = valores_encabezado(contrato_data, usuarios, fechas)
         
-        # Guardar estilos base de fila 8
-        base_styles = []
-        for col in range(1, 10):
-            cell = ws.cell(row=8, column=col)
-            base_styles.append({
-                'font': copy.copy(cell.font),
-                'border': copy.copy(cell.border),
-                'fill': copy.copy(cell.fill),
-                'alignment': copy.copy(cell.alignment),
-                'number_format': cell.number_format
-            })
+        writer.escribir_encabezado(encabezado)
         
-        # Diccionario de meses en español
-        meses = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", 
-                 "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
         ahora = datetime.now()
-        mes_actual = meses[ahora.month - 1]
+        mes_actual = MESES[ahora.month - 1]
         anio_actual = ahora.year
-
-        # Limpiar filas 8 en adelante (hasta 200 para seguridad)
-        for row_idx in range(8, 200):
-            for col_idx in range(1, 11):
-                ws.cell(row=row_idx, column=col_idx, value=None)
-        
-        # Desenlazar celdas desde la fila 8 en adelante
-        merged_ranges = list(ws.merged_cells.ranges)
-        for merged_range in merged_ranges:
-            if merged_range.min_row >= 8:
-                try:
-                    ws.unmerge_cells(str(merged_range))
-                except Exception:
-                    pass
         
-        # Escribir datos con cortes por actividad
-        current_row = 8
-        ultima_actividad = None
-        conteo_actividad = 0
-        total_general = 0
-        
-        # Asegurar ordenamiento para el reporte
-        df_reporte = df.copy()
-        if 'TIPO DE ACTIVIDAD' in df_reporte.columns:
-            df_reporte = df_reporte.sort_values(by=['TIPO DE ACTIVIDAD', 'FECHA'])
-
-        for _, row in df_reporte.iterrows():
-            actividad_actual = row.get('TIPO DE ACTIVIDAD', '')
-            
-            # Si cambia la actividad, mostrar subtotal de la anterior
-            if ultima_actividad is not None and actividad_actual != ultima_actividad:
-                ws.cell(row=current_row, column=1, value="ACTIVIDADES: ")
-                # Fusionar celdas de columna 2 a 8 para el conteo
-                ws.cell(row=current_row, column=2, value=conteo_actividad).font = openpyxl.styles.Font(bold=True)
-                ws.merge_cells(start_row=current_row, start_column=2, end_row=current_row, end_column=9)
-                ws.cell(row=current_row, column=2).alignment = openpyxl.styles.Alignment(horizontal='left', vertical='center')
-                
-                for c in range(1, 10):
-                    ws.cell(row=current_row, column=c).border = copy.copy(base_styles[c-1]['border'])
-                current_row += 1
-                conteo_actividad = 0
-            
-            fecha = row.get('FECHA', '')
-            if hasattr(fecha, 'strftime'):
-                fecha = fecha.strftime('%Y-%m-%d')
-            
-            fecha_atencion = row.get('FECHA ATENCIÓN', '')
-            if hasattr(fecha_atencion, 'strftime'):
-                fecha_atencion = fecha_atencion.strftime('%Y-%m-%d')
+        # Filas de datos y cortes por actividad calculados de antemano (vectorizado)
+        filas, tamanos = _preparar_filas_informe(df)
+        inicio = 0
+        for tamano in tamanos:
+            for fila in filas[inicio:inicio + tamano]:
+                writer.fila_datos(fila)
+            writer.fila_subtotal("ACTIVIDADES: ", tamano)
+            inicio += tamano
             
-            valores = [
-                actividad_actual, fecha,
-                row.get('DEPENDENCIA', ''), row.get('SOLICITANTE', ''),
-                row.get('TIPO DE SOLICITUD', ''), row.get('MEDIO DE SOLICITUD', ''),
-                row.get('CUMPLIDO', 'Sí'), fecha_atencion,
-                row.get('OBSERVACIONES', '')
-            ]
-            
-            for col_idx, valor in enumerate(valores, start=1):
-                cell = ws.cell(row=current_row, column=col_idx, value=valor)
-                if col_idx <= len(base_styles):
-                    style = base_styles[col_idx - 1]
-                    cell.font = copy.copy(style['font'])
-                    cell.border = copy.copy(style['border'])
-                    cell.fill = copy.copy(style['fill'])
-                    cell.alignment = copy.copy(style['alignment'])
-                    cell.number_format = style['number_format']
-            
-            ultima_actividad = actividad_actual
-            conteo_actividad += 1
-            total_general += 1
-            current_row += 1
-            
-            if current_row > 2000: break # Limite de seguridad
-            
-        # Último subtotal y Gran Total
-        if ultima_actividad:
-            ws.cell(row=current_row, column=1, value="ACTIVIDADES: ")
-            ws.cell(row=current_row, column=2, value=conteo_actividad).font = openpyxl.styles.Font(bold=True)
-            ws.merge_cells(start_row=current_row, start_column=2, end_row=current_row, end_column=9)
-            ws.cell(row=current_row, column=2).alignment = openpyxl.styles.Alignment(horizontal='left', vertical='center')
-            
-            for c in range(1, 10):
-                ws.cell(row=current_row, column=c).border = copy.copy(base_styles[c-1]['border'])
-
-            current_row += 1
-            
-            ws.cell(row=current_row, column=1, value="TOTAL GENERAL").font = openpyxl.styles.Font(bold=True, size=11)
-            ws.cell(row=current_row, column=2, value=total_general).font = openpyxl.styles.Font(bold=True, size=11)
-            ws.merge_cells(start_row=current_row, start_column=2, end_row=current_row, end_column=9)
-            ws.cell(row=current_row, column=2).alignment = openpyxl.styles.Alignment(horizontal='left', vertical='center')
-            
-            for c in range(1, 10):
-                ws.cell(row=current_row, column=c).border = copy.copy(base_styles[c-1]['border'])
-
-            current_row += 1
+        # Gran Total
+        if filas:
+            writer.fila_subtotal("TOTAL GENERAL", len(filas), total=True)
+        
         # Fecha de informe
-        ws.cell(row=current_row, column=1, value="Fecha de informe:").font = openpyxl.styles.Font(bold=True)
-        ws.cell(row=current_row, column=2, value=f"{mes_actual} de {anio_actual}")
-        ws.merge_cells(start_row=current_row, start_column=2, end_row=current_row, end_column=9)
-        ws.cell(row=current_row, column=2).alignment = openpyxl.styles.Alignment(horizontal='left', vertical='center')
-        current_row += 1
+        writer.fila_pie("Fecha de informe:", f"{mes_actual} de {anio_actual}")
+        
         # Sección de firmas / Datos finales
-
         if contrato_data:
             if contrato_data.get('nombre'):
-                ws.cell(row=current_row, column=1, value="Elaborado por:").font = openpyxl.styles.Font(bold=True)
-                ws.cell(row=current_row, column=2, value=contrato_data['nombre'].upper())
-                ws.merge_cells(start_row=current_row, start_column=2, end_row=current_row, end_column=9)
-                ws.cell(row=current_row, column=2).alignment = openpyxl.styles.Alignment(horizontal='left', vertical='center')
-                current_row += 1
-                ws.cell(row=current_row, column=1, value="CONTRATISTA:").font = openpyxl.styles.Font(bold=True)
-                ws.merge_cells(start_row=current_row, start_column=2, end_row=current_row, end_column=9)
-                ws.cell(row=current_row, column=2).alignment = openpyxl.styles.Alignment(horizontal='left', vertical='center')
-                current_row += 1                
+                writer.fila_pie("Elaborado por:", contrato_data['nombre'].upper())
+                writer.fila_pie("CONTRATISTA:")
             if contrato_data.get('supervisor'):
-                ws.cell(row=current_row, column=1, value="Vo.Bo:").font = openpyxl.styles.Font(bold=True)
-                ws.cell(row=current_row, column=2, value=contrato_data['supervisor'].upper())
-                ws.merge_cells(start_row=current_row, start_column=2, end_row=current_row, end_column=9)
-                ws.cell(row=current_row, column=2).alignment = openpyxl.styles.Alignment(horizontal='left', vertical='center')
-                current_row += 1
-                ws.cell(row=current_row, column=1, value="SUPERVISOR:").font = openpyxl.styles.Font(bold=True)
-                ws.merge_cells(start_row=current_row, start_column=2, end_row=current_row, end_column=9)
-                ws.cell(row=current_row, column=2).alignment = openpyxl.styles.Alignment(horizontal='left', vertical='center')
-                current_row += 1
-            
-            current_row += 1
-
+                writer.fila_pie("Vo.Bo:", contrato_data['supervisor'].upper())
+                writer.fila_pie("SUPERVISOR:")
 
         try:
-            wb.save(output_path)
+            writer.guardar(output_path)
             logger.info(f"Informe guardado exitosamente en: {output_path}")
             return True
         except Exception as e:
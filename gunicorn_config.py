@@ -1,12 +1,61 @@
 
 # Gunicorn configuration file
+#
+# Modo producción con preload_app: el master importa app.py una sola vez
+# (esquema/migraciones), precalienta librerías, plantillas y listas de consulta,
+# y los workers lo heredan por fork compartiendo esas páginas de memoria
+# copy-on-write. Cada worker se recicla tras max_requests (+ jitter) solicitudes.
+import gc
+import os
 import multiprocessing
 
-bind = "0.0.0.0:8000"
-workers = 2  # Adjust based on available resources
-threads = 4
-timeout = 120
+
+def _cpus_disponibles():
+    """Núcleos asignados al proceso (respeta cpusets de contenedores)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+
+bind = os.environ.get("GUNICORN_BIND", f"0.0.0.0:{os.environ.get('PORT', 8000)}")
 worker_class = "gthread"
+
+# Workers por núcleo para el CPU (pandas, openpyxl) y hilos para la espera de E/S.
+# WEB_CONCURRENCY es la variable estándar de Render/Heroku para fijarlo a mano.
+workers = int(os.environ.get("WEB_CONCURRENCY", min(_cpus_disponibles() * 2 + 1, 8)))
+# config.py reparte los mismos hilos: EVENTOS_MAX_HILOS (streams SSE por worker) es una cuarta parte
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") != "0"
+
+# Reciclar workers acota el crecimiento de memoria; el jitter evita que todos
+# se reinicien a la vez
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", max_requests // 10))
+
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
 loglevel = "info"
 accesslog = "-"  # Log to stdout
 errorlog = "-"   # Log to stderr
+
+
+def when_ready(server):
+    """Master listo, antes de crear workers: precalentar y congelar el heap"""
+    if not preload_app:
+        return
+    from app import precalentar
+    precalentar()
+    # Los objetos ya creados salen del recolector: el GC de los workers no los
+    # recorre ni toca sus contadores, así sus páginas siguen compartidas
+    gc.freeze()
+    server.log.info(f"Master precalentado: {workers} workers x {threads} hilos")
+
+
+def post_fork(server, worker):
+    """En cada worker recién creado: descartar el estado por proceso heredado"""
+    if preload_app:
+        from app import reiniciar_tras_fork
+        reiniciar_tras_fork()
@@ -7,9 +7,16 @@ from database import (
     cargar_actividades, cargar_actividades_globales, cargar_ubicaciones, 
     cargar_tipos_solicitud, cargar_medios_solicitud, cargar_usuarios
 )
+import json
+
 from activity_service import obtener_actividades_personales
 from utils import medir_tiempo
 
+def json_script(valor):
+    """JSON para incrustar en un <script>: '<' escapado para que un valor no pueda cerrar la etiqueta"""
+    return json.dumps(valor).replace('<', '\\u003c')
+
+
 # =============================================================================
 # GENERACIÓN DE OPTIONS PARA SELECTS
 # =============================================================================
@@ -48,6 +55,56 @@ def generar_opciones_usuarios():
     usuarios = cargar_usuarios().get("usuarios", [])
     return _generar_opciones(usuarios)
 
+def generar_formulario_lote():
+    """Genera el formulario de informes en lote para fin de mes (solo admin)"""
+    usuarios = [u for u in cargar_usuarios().get("usuarios", []) if u != "admin"]
+    return f"""
+    <div class="card mb-4">
+        <div class="card-header">
+            <h5 class="mb-0"><i class="fas fa-file-archive"></i> Informes de fin de mes en lote</h5>
+        </div>
+        <div class="card-body">
+            <form method="POST" action="/exportar/lote">
+                <div class="row">
+                    <div class="col-md-3">
+                        <div class="mb-3">
+                            <label class="form-label">Fecha Inicio</label>
+                            <input type="date" class="form-control" name="fecha_inicio">
+                        </div>
+                    </div>
+                    <div class="col-md-3">
+                        <div class="mb-3">
+                            <label class="form-label">Fecha Fin</label>
+                            <input type="date" class="form-control" name="fecha_fin">
+                        </div>
+                    </div>
+                    <div class="col-md-3">
+                        <div class="mb-3">
+                            <label class="form-label">Contratistas (vacío = todos)</label>
+                            <select class="form-select" name="usuarios" multiple size="4">
+                                {_generar_opciones(usuarios)}
+                            </select>
+                        </div>
+                    </div>
+                    <div class="col-md-3">
+                        <div class="mb-3">
+                            <label class="form-label">Reportes</label>
+                            <select class="form-select" name="tipo_reporte">
+                                <option value="ambos">Detallado y Final</option>
+                                <option value="detallado">Solo Detallado</option>
+                                <option value="final">Solo Final</option>
+                            </select>
+                        </div>
+                    </div>
+                </div>
+                <button type="submit" class="btn btn-secondary">
+                    <i class="fas fa-download"></i> Generar zip
+                </button>
+            </form>
+        </div>
+    </div>
+    """
+
 # =============================================================================
 # GENERACIÓN DE INTERFACES DE GESTIÓN
 # =============================================================================
@@ -261,16 +318,13 @@ def generar_gestion_actividades_personales(usuario_actual):
 
 
 @medir_tiempo
-def generar_tabla_registros_recientes(df, usuario_actual):
-    """Genera el HTML para la tabla de registros recientes con acciones"""
-    if df.empty:
+def generar_tabla_registros_recientes(registros, usuario_actual):
+    """Genera el HTML para la tabla de registros recientes (lista de Registro) con acciones"""
+    if not registros:
         return '<tr><td colspan="7" class="text-center text-muted">No hay registros recientes</td></tr>'
     
-    # Tomar los últimos 10
-    df_recientes = df.tail(10).iloc[::-1]
-    
     html = ""
-    for _, row in df_recientes.iterrows():
+    for row in registros:
         id_reg = row.get('ID', '')
         es_propietario = (row.get('USUARIO') == usuario_actual) or (usuario_actual == "admin")
         
@@ -296,4 +350,21 @@ def generar_tabla_registros_recientes(df, usuario_actual):
             <td class="text-end">{acciones}</td>
         </tr>
         """
-    return html
\ No newline at end of file
+    return html
+
+def generar_tabla_usuarios_stats(user_list):
+    """Filas de la tabla 'Resumen por Ejecutivo'; data-usuario permite actualizarlas en vivo"""
+    tabla_stats = ""
+    for u in user_list:
+        admin_badge = '<span class="badge bg-soft-primary text-primary">Admin</span>' if u['usuario'] == 'admin' else ""
+        tabla_stats += f"""
+        <tr data-usuario="{u['usuario']}">
+            <td><span class="fw-bold">{u['usuario']}</span> {admin_badge}</td>
+            <td class="text-center"><span class="badge bg-light text-dark stat-total">{u['total']}</span></td>
+            <td class="text-center stat-cumplimiento">{u['cumplimiento']}</td>
+            <td class="small text-muted stat-ultima">{u['ultima']}</td>
+        </tr>
+        """
+    if not tabla_stats:
+        tabla_stats = "<tr class='sin-datos'><td colspan='4' class='text-center text-muted'>No hay datos disponibles</td></tr>"
+    return tabla_stats
@@ -6,6 +6,16 @@ import os
 from config import (
     CONFIG_FILE, USERS_FILE, EXCEL_FILE, logger, DB_FILE
 )
+from database_setup import completar_claves_busqueda
+from utils import normalizar_fecha
+
+
+def _fecha_excel(valor):
+    """Fecha canónica; si no se reconoce se guarda el texto y init_db la reporta en fechas_rechazadas"""
+    try:
+        return normalizar_fecha(valor)
+    except ValueError:
+        return str(valor)
 
 def migrate_data():
     if not os.path.exists(DB_FILE):
@@ -66,10 +76,11 @@ def migrate_data():
             df.columns = [c.upper().strip() for c in df.columns]
             
             registros_count = 0
+            usuarios_migrados = set()
             for _, row in df.iterrows():
                 try:
-                    fecha = str(row.get('FECHA', ''))
-                    fecha_atencion = str(row.get('FECHA ATENCIÓN', ''))
+                    fecha = _fecha_excel(row.get('FECHA'))
+                    fecha_atencion = _fecha_excel(row.get('FECHA ATENCIÓN'))
                     
                     cursor.execute('''
                         INSERT INTO registros (
@@ -91,9 +102,20 @@ def migrate_data():
                         row.get('OBSERVACIONES', '')
                     ))
                     registros_count += 1
+                    if pd.notna(row.get('USUARIO', 'admin')):
+                        usuarios_migrados.add(row.get('USUARIO', 'admin'))
                 except Exception as e:
                     print(f"Error insertando fila: {e}")
 
+            # El trigger de la vista no calcula la clave de búsqueda ni avisa a las
+            # caches que dependen de version_datos: se hace aquí, en la misma transacción
+            completar_claves_busqueda(cursor)
+            for usuario in usuarios_migrados:
+                cursor.execute(
+                    "INSERT INTO version_datos (usuario, version) VALUES (?, 1) "
+                    "ON CONFLICT(usuario) DO UPDATE SET version = version_datos.version + 1", (usuario,)
+                )
+
             print(f"Propagados {registros_count} registros.")
 
         conn.commit()
@@ -1,6 +1,35 @@
-import pytest
 import actividades_rust
 
+REGISTROS = [
+    {"ID": "1", "TIPO DE ACTIVIDAD": "Soporte técnico", "FECHA": "2024-01-02"},
+    {"ID": "2", "TIPO DE ACTIVIDAD": "Capacitación", "FECHA": "2024-01-01"},
+    {"ID": "3", "TIPO DE ACTIVIDAD": "SOPORTE"},
+]
 
-def test_sum_as_string():
-    assert actividades_rust.sum_as_string(1, 1) == "2"
+
+def test_filtrar_registros():
+    resultado = actividades_rust.filtrar_registros(REGISTROS, {"TIPO DE ACTIVIDAD": "soporte"})
+    assert [r["ID"] for r in resultado] == ["1", "3"]
+
+
+def test_buscar_registros_avanzado():
+    resultado = actividades_rust.buscar_registros_avanzado(REGISTROS, "CAPACIT", ["TIPO DE ACTIVIDAD", "FECHA"])
+    assert [r["ID"] for r in resultado] == ["2"]
+
+
+def test_calcular_estadisticas():
+    assert actividades_rust.calcular_estadisticas(REGISTROS, "FECHA") == {"2024-01-02": 1, "2024-01-01": 1}
+
+
+def test_ordenar_registros():
+    assert [r["ID"] for r in actividades_rust.ordenar_registros(REGISTROS, "FECHA", True)] == ["3", "2", "1"]
+    assert [r["ID"] for r in actividades_rust.ordenar_registros(REGISTROS, "FECHA", False)] == ["1", "2", "3"]
+
+
+def test_cache_manager():
+    cache = actividades_rust.CacheManager(60)
+    assert cache.get("registros") is None
+    cache.set("registros", REGISTROS)
+    assert cache.get("registros") == REGISTROS
+    cache.clear()
+    assert cache.get("registros") is None
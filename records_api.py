@@ -0,0 +1,92 @@
+"""
+API de registros en NDJSON (un objeto JSON por línea) para integraciones.
+Permite sincronización incremental con since_id / updated_since y filtros del
+lado del servidor; la respuesta se transmite por bloques desde un cursor de la BD.
+Con updated_since los borrados llegan en el mismo orden (updated_at, id) que las
+ediciones; para pedir la página siguiente se envían updated_since y since_id con
+el updated_at y el id de la última línea recibida.
+"""
+
+import json
+import hmac
+from datetime import datetime, timezone
+
+from config import API_TOKEN, API_LIMITE_MAXIMO
+from database import iterar_cambios
+
+MIMETYPE_NDJSON = 'application/x-ndjson'
+NDJSON_CHUNK_SIZE = 500
+
+
+def usuario_api(usuario_sesion, authorization):
+    """
+    Usuario efectivo de la solicitud: el de la sesión, o 'admin' (lectura de todo)
+    si trae el token de integración. None si no está autorizado.
+    """
+    if usuario_sesion:
+        return usuario_sesion
+    if API_TOKEN and authorization and authorization.startswith('Bearer '):
+        if hmac.compare_digest(authorization[len('Bearer '):].strip(), API_TOKEN):
+            return 'admin'
+    return None
+
+
+def _normalizar_fecha_hora(valor):
+    """ISO 8601 (con o sin zona) → 'YYYY-MM-DD HH:MM:SS' en UTC, el formato de updated_at"""
+    try:
+        fecha = datetime.fromisoformat(valor.strip())
+    except ValueError:
+        raise ValueError("updated_since debe tener formato ISO 8601 (ej. 2024-01-31T08:00:00Z)")
+    if fecha.tzinfo is not None:
+        fecha = fecha.astimezone(timezone.utc).replace(tzinfo=None)
+    return fecha.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def parametros_api(usuario, obtener):
+    """
+    Valida los parámetros de consulta. `obtener(nombre)` devuelve el valor o None.
+    Un usuario que no es admin solo puede consultar sus propios registros.
+    Lanza ValueError con un mensaje para el cliente si algún parámetro es inválido.
+    """
+    parametros = {
+        'usuario': obtener('usuario') or None,
+        'fecha_inicio': obtener('fecha_inicio') or None,
+        'fecha_fin': obtener('fecha_fin') or None,
+        'actividad': obtener('actividad') or None,
+        'texto': obtener('q') or None,
+        'since_id': None,
+        'updated_since': None,
+        'limite': API_LIMITE_MAXIMO
+    }
+    if usuario != 'admin':
+        parametros['usuario'] = usuario
+
+    if obtener('since_id'):
+        try:
+            parametros['since_id'] = int(obtener('since_id'))
+        except ValueError:
+            raise ValueError("since_id debe ser un número entero")
+    if obtener('updated_since'):
+        parametros['updated_since'] = _normalizar_fecha_hora(obtener('updated_since'))
+    if obtener('limit'):
+        try:
+            limite = int(obtener('limit'))
+        except ValueError:
+            raise ValueError("limit debe ser un número entero")
+        if limite < 1:
+            raise ValueError("limit debe ser mayor que cero")
+        parametros['limite'] = min(limite, API_LIMITE_MAXIMO)
+    return parametros
+
+
+def generar_ndjson_stream(parametros, chunk_size=NDJSON_CHUNK_SIZE):
+    """Iterador de bloques de bytes NDJSON con los registros que cumplen los parámetros"""
+    bloques = iterar_cambios(chunk_size=chunk_size, **parametros)
+    try:
+        for bloque in bloques:
+            yield "".join(
+                json.dumps(fila, ensure_ascii=False, default=str) + "\n" for fila in bloque
+            ).encode('utf-8')
+    finally:
+        # Libera el cursor si el cliente corta la conexión
+        bloques.close()
@@ -0,0 +1,203 @@
+"""
+Generación en lote de los informes institucionales de fin de mes.
+Genera el informe detallado y/o el final de cada contratista en paralelo
+(un proceso por núcleo) y los empaqueta en un zip que se transmite por bloques
+a medida que cada contratista termina.
+
+Uso por línea de comandos:
+    python report_batch.py --desde 2024-01-01 --hasta 2024-01-31 [-u usuario1 -u usuario2]
+"""
+
+import os
+import sys
+import zipfile
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from config import logger
+
+TIPOS_REPORTE = ('detallado', 'final')
+CHUNK_ZIP = 64 * 1024
+
+
+def usuarios_lote(usuarios=None):
+    """Contratistas a incluir: los indicados o todos menos admin"""
+    from database import cargar_usuarios
+    if usuarios:
+        return list(dict.fromkeys(usuarios))
+    return [u for u in cargar_usuarios().get("usuarios", []) if u != "admin"]
+
+
+def _generar_informes_usuario(usuario, fecha_inicio, fecha_fin, tipos):
+    """
+    Genera los informes de un contratista (se ejecuta en un proceso del pool).
+    Retorna (usuario, [(nombre_en_zip, ruta)], error).
+    """
+    from database import obtener_configuracion_usuario
+    from export_cache import obtener_informe
+
+    contrato_data = obtener_configuracion_usuario(usuario).get("datos_contrato", {})
+    filtros = {'fecha_inicio': fecha_inicio, 'fecha_fin': fecha_fin, 'usuario': usuario, 'actividad': None}
+    archivos = []
+    try:
+        for tipo in tipos:
+            ruta = obtener_informe(filtros, tipo, contrato_data)
+            archivos.append((f"{usuario}/Informe_{tipo}_{usuario}.xlsx", ruta))
+        return usuario, archivos, None
+    except Exception as e:
+        return usuario, archivos, str(e)
+
+
+class _SalidaZip:
+    """Destino no posicionable para zipfile: acumula lo escrito hasta que se retira"""
+
+    def __init__(self):
+        self.partes = []
+
+    def write(self, datos):
+        self.partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def retirar(self):
+        datos = b"".join(self.partes)
+        self.partes = []
+        return datos
+
+
+def empaquetar_zip(resultados):
+    """
+    Generador que arma el zip por bloques de bytes a partir de los resultados
+    (usuario, archivos, error) a medida que llegan; cada archivo es una ruta o
+    un archivo ya abierto en binario. Los contratistas sin datos o con errores
+    se listan en ERRORES.txt dentro del zip.
+    """
+    salida = _SalidaZip()
+    errores = []
+    with zipfile.ZipFile(salida, "w") as zf:
+        for usuario, archivos, error in resultados:
+            if error:
+                errores.append(f"{usuario}: {error}")
+            for nombre, ruta in archivos:
+                # Los .xlsx ya están comprimidos: se almacenan sin volver a comprimir
+                with _abrir(ruta) as origen, zf.open(nombre, "w") as destino:
+                    while True:
+                        bloque = origen.read(CHUNK_ZIP)
+                        if not bloque:
+                            break
+                        destino.write(bloque)
+                        yield salida.retirar()
+        if errores:
+            zf.writestr("ERRORES.txt", "\n".join(errores), compress_type=zipfile.ZIP_DEFLATED)
+    yield salida.retirar()
+    logger.info(f"Lote de informes empaquetado: {len(errores)} contratistas con errores")
+
+
+def _abrir(archivo):
+    return open(archivo, "rb") if isinstance(archivo, (str, os.PathLike)) else archivo
+
+
+class _InformesAbiertos:
+    """
+    Abre los informes de cada contratista apenas su proceso termina (callback del
+    futuro), no cuando el zip llega a él: mientras tanto el cache de informes podría
+    desalojarlos. Un archivo abierto sigue legible aunque se borre del directorio.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._abiertos = {}
+        self._tomados = set()
+
+    @staticmethod
+    def _abrir_resultado(resultado):
+        usuario, archivos, error = resultado
+        abiertos = []
+        for nombre, ruta in archivos:
+            try:
+                abiertos.append((nombre, _abrir(ruta)))
+            except OSError as e:
+                error = error or f"No se pudo leer {nombre}: {e}"
+        return usuario, abiertos, error
+
+    def al_terminar(self, futuro):
+        if futuro.cancelled() or futuro.exception() is not None:
+            return
+        resultado = self._abrir_resultado(futuro.result())
+        with self._lock:
+            if futuro not in self._tomados:
+                self._abiertos[futuro] = resultado
+                return
+        self._cerrar(resultado)         # el zip ya lo tomó y lo abrió por su cuenta
+
+    def tomar(self, futuro):
+        with self._lock:
+            self._tomados.add(futuro)
+            resultado = self._abiertos.pop(futuro, None)
+        return resultado or self._abrir_resultado(futuro.result())
+
+    @staticmethod
+    def _cerrar(resultado):
+        for _, archivo in resultado[1]:
+            archivo.close()
+
+    def cerrar(self):
+        with self._lock:
+            pendientes, self._abiertos = list(self._abiertos.values()), {}
+        for resultado in pendientes:
+            self._cerrar(resultado)
+
+
+def generar_lote_zip(usuarios=None, fecha_inicio=None, fecha_fin=None, tipos=TIPOS_REPORTE, max_workers=None):
+    """Genera los informes del lote en un pool de procesos y produce el zip por bloques"""
+    usuarios = usuarios_lote(usuarios)
+    tipos = [t for t in tipos if t in TIPOS_REPORTE]
+    max_workers = max(1, min(len(usuarios), max_workers or os.cpu_count() or 1))
+
+    # spawn: los procesos no heredan hilos ni conexiones del servidor web que lanza el lote
+    contexto = multiprocessing.get_context("spawn")
+    pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=contexto)
+    informes = _InformesAbiertos()
+    try:
+        futuros = [pool.submit(_generar_informes_usuario, u, fecha_inicio, fecha_fin, tipos) for u in usuarios]
+        for futuro in futuros:
+            futuro.add_done_callback(informes.al_terminar)
+        yield from empaquetar_zip(informes.tomar(f) for f in as_completed(futuros))
+    finally:
+        # Si el cliente se desconecta (GeneratorExit) no se espera a los contratistas
+        # que faltan: se cancelan los que no empezaron y el hilo de la petición queda libre
+        pool.shutdown(wait=False, cancel_futures=True)
+        informes.cerrar()
+
+
+def nombre_lote():
+    return f"Informes_lote_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera los informes de todos los contratistas en un zip")
+    parser.add_argument("--desde", dest="fecha_inicio", help="Fecha inicial (YYYY-MM-DD)")
+    parser.add_argument("--hasta", dest="fecha_fin", help="Fecha final (YYYY-MM-DD)")
+    parser.add_argument("-u", "--usuario", dest="usuarios", action="append", help="Contratista (repetible)")
+    parser.add_argument("-t", "--tipo", dest="tipos", action="append", choices=TIPOS_REPORTE,
+                        help="Tipo de reporte (repetible, por defecto ambos)")
+    parser.add_argument("-j", "--procesos", type=int, help="Número de procesos (por defecto, núcleos)")
+    parser.add_argument("-o", "--salida", help="Archivo zip de salida")
+    args = parser.parse_args(argv)
+
+    salida = args.salida or nombre_lote()
+    with open(salida, "wb") as f:
+        for bloque in generar_lote_zip(args.usuarios, args.fecha_inicio, args.fecha_fin,
+                                       args.tipos or TIPOS_REPORTE, args.procesos):
+            f.write(bloque)
+    print(f"✅ Lote generado: {salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""
+Motor de escritura de informes Excel en modo streaming (write-only).
+Reproduce el encabezado, anchos de columna y estilos de la plantilla institucional,
+pero escribe las filas de datos con estilos con nombre compartidos y sin mantener
+la hoja completa en memoria.
+"""
+
+import os
+import copy
+import threading
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import NamedStyle, Font, Alignment
+from openpyxl.utils import get_column_letter
+from config import logger
+
+# Estructura de la plantilla institucional
+FILAS_ENCABEZADO = 7      # Filas 1-7: título, datos del contrato y cabecera de tabla
+FILA_ESTILO = 8           # Fila de ejemplo de la que se toman los estilos de datos
+COLUMNAS_ESTILO = 9       # A-I
+COLUMNAS_PLANTILLA = 10   # A-J
+
+_ATRIBUTOS_ESTILO = ('font', 'border', 'fill', 'alignment', 'number_format')
+
+
+class PlantillaInforme:
+    """Instantánea del encabezado y estilos de una plantilla Excel (solo lectura)"""
+
+    def __init__(self, titulo, mtime, anchos, altos, celdas, combinadas):
+        self.titulo = titulo
+        self.mtime = mtime
+        self.anchos = anchos                # {letra_columna: ancho}
+        self.altos = altos                  # {fila: alto}
+        self.celdas = celdas                # {(fila, col): (valor, clave_estilo)}
+        self.combinadas = combinadas        # ["A1:J1", ...]
+        self.estilos_fila = []              # [clave_estilo] por columna de la fila de ejemplo
+        self.estilos = {}                   # {clave_estilo: (font, border, fill, alignment, number_format)}
+
+
+def _clave_estilo(plantilla, cell):
+    """Registra el estilo de una celda y devuelve su clave (se deduplican estilos iguales)"""
+    partes = tuple(getattr(cell, attr) for attr in _ATRIBUTOS_ESTILO)
+    for clave, existente in plantilla.estilos.items():
+        if existente == partes:
+            return clave
+    clave = f"plantilla_{len(plantilla.estilos)}"
+    plantilla.estilos[clave] = tuple(copy.copy(p) for p in partes)
+    return clave
+
+
+def leer_plantilla(ruta, filas_encabezado=FILAS_ENCABEZADO, fila_estilo=FILA_ESTILO,
+                   columnas_estilo=COLUMNAS_ESTILO, columnas=COLUMNAS_PLANTILLA):
+    """Lee de la plantilla solo lo necesario para reproducir su encabezado"""
+    mtime = os.path.getmtime(ruta)
+    wb = openpyxl.load_workbook(ruta)
+    ws = wb.active
+
+    plantilla = PlantillaInforme(
+        titulo=ws.title,
+        mtime=mtime,
+        anchos={k: d.width for k, d in ws.column_dimensions.items() if d.width},
+        altos={r: d.height for r, d in ws.row_dimensions.items() if r <= filas_encabezado and d.height},
+        celdas={},
+        combinadas=[str(r) for r in ws.merged_cells.ranges if r.max_row <= filas_encabezado]
+    )
+    for fila in range(1, filas_encabezado + 1):
+        for col in range(1, columnas + 1):
+            cell = ws.cell(row=fila, column=col)
+            plantilla.celdas[(fila, col)] = (cell.value, _clave_estilo(plantilla, cell))
+    for col in range(1, columnas_estilo + 1):
+        plantilla.estilos_fila.append(_clave_estilo(plantilla, ws.cell(row=fila_estilo, column=col)))
+
+    wb.close()
+    return plantilla
+
+
+# =============================================================================
+# CACHE DE PLANTILLAS (una lectura por proceso mientras el archivo no cambie)
+# =============================================================================
+
+_PLANTILLAS = {}
+_PLANTILLAS_LOCK = threading.Lock()
+
+
+def obtener_plantilla(ruta, **opciones):
+    """
+    Devuelve la plantilla ya procesada desde el cache del proceso.
+    Se vuelve a leer del disco solo si cambió la fecha de modificación del archivo.
+    """
+    mtime = os.path.getmtime(ruta)
+    clave = (ruta, tuple(sorted(opciones.items())))
+    with _PLANTILLAS_LOCK:
+        cacheada = _PLANTILLAS.get(clave)
+    if cacheada is not None and cacheada.mtime == mtime:
+        return cacheada
+
+    plantilla = leer_plantilla(ruta, **opciones)
+    with _PLANTILLAS_LOCK:
+        _PLANTILLAS[clave] = plantilla
+    logger.info(f"Plantilla procesada y cacheada: {os.path.basename(ruta)}")
+    return plantilla
+
+
+def limpiar_cache_plantillas():
+    """Descarta las plantillas cacheadas (útil en pruebas)"""
+    with _PLANTILLAS_LOCK:
+        _PLANTILLAS.clear()
+
+
+class InformeStreamWriter:
+    """
+    Escribe un informe fila por fila en un libro write-only creado a partir de la plantilla.
+    Las filas se numeran automáticamente a partir del encabezado.
+    `col_fin` es la última columna que abarcan las filas combinadas de subtotales y pie.
+    """
+
+    def __init__(self, plantilla, col_fin=COLUMNAS_ESTILO):
+        self.plantilla = plantilla
+        self.col_fin = col_fin
+        self.wb = openpyxl.Workbook(write_only=True)
+        self.ws = self.wb.create_sheet(plantilla.titulo)
+        self.fila_actual = 0
+        self._registrar_estilos()
+
+        # Dimensiones: deben definirse antes de escribir la primera fila
+        for letra, ancho in plantilla.anchos.items():
+            self.ws.column_dimensions[letra].width = ancho
+        for fila, alto in plantilla.altos.items():
+            self.ws.row_dimensions[fila].height = alto
+
+    def _registrar_estilos(self):
+        for clave, partes in self.plantilla.estilos.items():
+            self.registrar_estilo(clave, **dict(zip(_ATRIBUTOS_ESTILO, partes)))
+
+        # Estilos de filas de subtotal, total y pie derivados de los bordes de la fila de ejemplo
+        bordes = [self.plantilla.estilos[c][1] for c in self.plantilla.estilos_fila]
+        izquierda = Alignment(horizontal='left', vertical='center')
+        self.estilos_borde = [
+            self.registrar_estilo(f"informe_borde_{i}", border=borde)
+            for i, borde in enumerate(bordes, start=1)
+        ]
+        self.registrar_estilo("informe_conteo", font=Font(bold=True), alignment=izquierda, border=bordes[1])
+        self.registrar_estilo("informe_total_etiqueta", font=Font(bold=True, size=11), border=bordes[0])
+        self.registrar_estilo("informe_total", font=Font(bold=True, size=11), alignment=izquierda, border=bordes[1])
+        self.registrar_estilo("informe_pie_etiqueta", font=Font(bold=True))
+        self.registrar_estilo("informe_pie_valor", alignment=izquierda)
+
+    def registrar_estilo(self, nombre, base=None, **atributos):
+        """
+        Registra un estilo con nombre compartido por todas las celdas que lo usen.
+        `base` es una clave de estilo de la plantilla cuyos atributos se toman por defecto.
+        """
+        if base is not None:
+            atributos = {**dict(zip(_ATRIBUTOS_ESTILO, self.plantilla.estilos[base])), **atributos}
+        atributos = {k: v if isinstance(v, str) else copy.copy(v) for k, v in atributos.items()}
+        self.wb.add_named_style(NamedStyle(name=nombre, **atributos))
+        return nombre
+
+    def _celda(self, valor, estilo):
+        cell = WriteOnlyCell(self.ws, value=valor)
+        if estilo:
+            cell.style = estilo
+        return cell
+
+    def fila(self, celdas, combinar=()):
+        """
+        Escribe una fila genérica.
+        `celdas` es una lista de (valor, estilo) y `combinar` una lista de (col_inicio, col_fin).
+        """
+        self.ws.append([self._celda(valor, estilo) for valor, estilo in celdas])
+        self.fila_actual += 1
+        for inicio, fin in combinar:
+            self.ws.merged_cells.add(
+                f"{get_column_letter(inicio)}{self.fila_actual}:{get_column_letter(fin)}{self.fila_actual}"
+            )
+
+    def escribir_encabezado(self, valores=None):
+        """Escribe las filas del encabezado; `valores` sobreescribe celdas {(fila, col): valor}"""
+        valores = valores or {}
+        filas = max(f for f, _ in self.plantilla.celdas)
+        columnas = max(c for _, c in self.plantilla.celdas)
+        for fila in range(1, filas + 1):
+            celdas = []
+            for col in range(1, columnas + 1):
+                valor, estilo = self.plantilla.celdas[(fila, col)]
+                celdas.append((valores.get((fila, col), valor), estilo))
+            self.fila(celdas)
+        for rango in self.plantilla.combinadas:
+            self.ws.merged_cells.add(rango)
+
+    def fila_datos(self, valores):
+        """Escribe una fila de datos con los estilos de la fila de ejemplo de la plantilla"""
+        estilos = self.plantilla.estilos_fila
+        self.fila([(v, estilos[i] if i < len(estilos) else None) for i, v in enumerate(valores)])
+
+    def fila_subtotal(self, etiqueta, conteo, total=False):
+        """Escribe una fila de subtotal ("ACTIVIDADES:") o de total general"""
+        estilo_etiqueta = "informe_total_etiqueta" if total else self.estilos_borde[0]
+        estilo_conteo = "informe_total" if total else "informe_conteo"
+        celdas = [(etiqueta, estilo_etiqueta), (conteo, estilo_conteo)]
+        celdas += [(None, estilo) for estilo in self.estilos_borde[2:]]
+        self.fila(celdas, combinar=[(2, self.col_fin)])
+
+    def fila_pie(self, etiqueta, valor=None, estilo_valor="informe_pie_valor"):
+        """Escribe una fila del pie (fecha de informe y firmas)"""
+        self.fila(
+            [(etiqueta, "informe_pie_etiqueta"), (valor, estilo_valor)],
+            combinar=[(2, self.col_fin)]
+        )
+
+    def guardar(self, output_path):
+        self.wb.save(output_path)
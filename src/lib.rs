@@ -56,8 +56,6 @@ fn filtrar_registros(
     registros: Vec<HashMap<String, String>>,
     filtros: HashMap<String, String>,
 ) -> PyResult<Vec<HashMap<String, String>>> {
-    let start_time = Instant::now();
-    
     let mut resultados = Vec::new();
     
     for registro in registros {
@@ -80,9 +78,6 @@ fn filtrar_registros(
         }
     }
     
-    let duration = start_time.elapsed();
-    println!("Filtrado completado en {:?} - {} resultados", duration, resultados.len());
-    
     Ok(resultados)
 }
 
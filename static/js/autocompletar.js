@@ -0,0 +1,36 @@
+/* Sugerencias de /api/autocompletar para los campos con data-autocompletar="<campo>" */
+(function () {
+    var ESPERA_MS = 150;
+
+    document.querySelectorAll('input[data-autocompletar]').forEach(function (campo) {
+        var lista = document.getElementById(campo.getAttribute('list'));
+        var temporizador = null;
+        var solicitud = null;
+
+        campo.addEventListener('input', function () {
+            clearTimeout(temporizador);
+            var texto = campo.value.trim();
+            if (!lista || texto.length < 2) {
+                return;
+            }
+            temporizador = setTimeout(function () {
+                if (solicitud) {
+                    solicitud.abort();
+                }
+                solicitud = new AbortController();
+                var url = '/api/autocompletar?campo=' + encodeURIComponent(campo.dataset.autocompletar) +
+                          '&q=' + encodeURIComponent(texto);
+                fetch(url, { signal: solicitud.signal, credentials: 'same-origin' })
+                    .then(function (respuesta) { return respuesta.ok ? respuesta.json() : { sugerencias: [] }; })
+                    .then(function (datos) {
+                        lista.replaceChildren.apply(lista, datos.sugerencias.map(function (s) {
+                            var opcion = document.createElement('option');
+                            opcion.value = s.valor;
+                            return opcion;
+                        }));
+                    })
+                    .catch(function () { /* abortada o sin conexión: se mantiene la lista anterior */ });
+            }, ESPERA_MS);
+        });
+    });
+})();
@@ -0,0 +1,149 @@
+"""
+Recursos estáticos servidos por la propia aplicación (CSS, JS y fuentes).
+Cada archivo de static/ se publica con su huella de contenido en el nombre
+(app.3f9a1c2b.css), por lo que puede enviarse con Cache-Control: immutable:
+el navegador lo guarda una vez y cualquier cambio genera una URL nueva.
+
+Las librerías de terceros (Bootstrap, Font Awesome, Chart.js) se copian a
+static/vendor con:
+    python static_assets.py descargar
+Mientras no estén descargadas, las plantillas siguen usando el CDN.
+"""
+
+import os
+import re
+import sys
+import hashlib
+import mimetypes
+import urllib.request
+
+from config import BASE_DIR, logger
+
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+STATIC_URL = "/static/"
+
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+CACHE_SIN_HUELLA = "public, max-age=3600"
+
+_BOOTSTRAP = "https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist"
+_FONTAWESOME = "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0"
+
+# Copias locales de librerías: ruta dentro de static/ → origen en el CDN
+VENDOR = {
+    "vendor/bootstrap/bootstrap.min.css": f"{_BOOTSTRAP}/css/bootstrap.min.css",
+    "vendor/bootstrap/bootstrap.bundle.min.js": f"{_BOOTSTRAP}/js/bootstrap.bundle.min.js",
+    "vendor/fontawesome/css/all.min.css": f"{_FONTAWESOME}/css/all.min.css",
+    # all.min.css referencia las fuentes con rutas relativas (../webfonts/)
+    "vendor/fontawesome/webfonts/fa-solid-900.woff2": f"{_FONTAWESOME}/webfonts/fa-solid-900.woff2",
+    "vendor/fontawesome/webfonts/fa-regular-400.woff2": f"{_FONTAWESOME}/webfonts/fa-regular-400.woff2",
+    "vendor/fontawesome/webfonts/fa-brands-400.woff2": f"{_FONTAWESOME}/webfonts/fa-brands-400.woff2",
+    "vendor/chartjs/chart.umd.min.js": "https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js",
+}
+
+mimetypes.add_type("font/woff2", ".woff2")
+mimetypes.add_type("text/javascript", ".js")
+
+_PATRON_HUELLA = re.compile(r"^(?P<base>.+)\.(?P<huella>[0-9a-f]{8})(?P<ext>\.[A-Za-z0-9]+)$")
+
+_huellas = None
+
+
+def _calcular_huellas():
+    """{ruta relativa: huella de 8 caracteres} de todos los archivos de static/"""
+    huellas = {}
+    for raiz, _, archivos in os.walk(STATIC_DIR):
+        for nombre in archivos:
+            ruta = os.path.join(raiz, nombre)
+            relativa = os.path.relpath(ruta, STATIC_DIR).replace(os.sep, "/")
+            with open(ruta, "rb") as f:
+                huellas[relativa] = hashlib.sha256(f.read()).hexdigest()[:8]
+    return huellas
+
+
+def obtener_huellas(recargar=False):
+    global _huellas
+    if _huellas is None or recargar:
+        _huellas = _calcular_huellas()
+    return _huellas
+
+
+def nombre_con_huella(relativa, huella):
+    base, ext = os.path.splitext(relativa)
+    return f"{base}.{huella}{ext}"
+
+
+def url_activo(relativa):
+    """
+    URL pública de un recurso: con huella si existe en static/,
+    o la del CDN si es una librería que aún no se ha descargado.
+    """
+    huella = obtener_huellas().get(relativa)
+    if huella:
+        return STATIC_URL + nombre_con_huella(relativa, huella)
+    if relativa in VENDOR:
+        return VENDOR[relativa]
+    logger.warning(f"Recurso estático no encontrado: {relativa}")
+    return STATIC_URL + relativa
+
+
+def resolver(ruta):
+    """
+    Traduce la ruta pedida (lo que sigue a /static/) a (archivo, content_type, cache_control).
+    Retorna None si no existe o si la huella no corresponde al contenido actual.
+    """
+    ruta = ruta.lstrip("/")
+    huellas = obtener_huellas()
+
+    coincidencia = _PATRON_HUELLA.match(ruta)
+    if coincidencia:
+        relativa = coincidencia.group("base") + coincidencia.group("ext")
+        if huellas.get(relativa) != coincidencia.group("huella"):
+            return None
+        cache_control = CACHE_INMUTABLE
+    else:
+        relativa = ruta
+        cache_control = CACHE_SIN_HUELLA
+
+    # Solo se sirven archivos inventariados: evita recorrer fuera de static/
+    if relativa not in huellas:
+        return None
+    archivo = os.path.join(STATIC_DIR, *relativa.split("/"))
+    content_type = mimetypes.guess_type(archivo)[0] or "application/octet-stream"
+    if content_type.startswith("text/"):
+        content_type += "; charset=utf-8"
+    return archivo, content_type, cache_control
+
+
+def descargar_vendor(forzar=False):
+    """
+    Copia a static/vendor las librerías del CDN (paso de despliegue).
+    Si alguna falla se registra y se sigue: esa librería se seguirá cargando del CDN.
+    """
+    descargados = 0
+    for relativa, url in VENDOR.items():
+        destino = os.path.join(STATIC_DIR, *relativa.split("/"))
+        if os.path.exists(destino) and not forzar:
+            continue
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        try:
+            with urllib.request.urlopen(url, timeout=30) as respuesta:
+                datos = respuesta.read()
+        except Exception as e:
+            logger.warning(f"No se pudo descargar {url}: {e}")
+            continue
+        with open(destino + ".tmp", "wb") as f:
+            f.write(datos)
+        os.replace(destino + ".tmp", destino)
+        descargados += 1
+        print(f"⬇️  {relativa} ({len(datos) // 1024} KB)")
+    obtener_huellas(recargar=True)
+    return descargados
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["descargar"]:
+        total = descargar_vendor(forzar="--forzar" in sys.argv)
+        print(f"✅ Librerías descargadas: {total}")
+    else:
+        for relativa, huella in sorted(obtener_huellas().items()):
+            print(f"{relativa:55} → {nombre_con_huella(relativa, huella)}")
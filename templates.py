@@ -3,6 +3,20 @@ Plantillas HTML para la aplicación web.
 Separadas de config.py para mantener responsabilidad única.
 """
 
+from config import ESTADISTICAS_SONDEO
+from static_assets import url_activo
+
+# =============================================================================
+# RECURSOS ESTÁTICOS (servidos localmente con huella, ver static_assets.py)
+# =============================================================================
+
+_CSS_BOOTSTRAP = f'<link href="{url_activo("vendor/bootstrap/bootstrap.min.css")}" rel="stylesheet">\n    '
+_CSS_ICONOS = f'<link href="{url_activo("vendor/fontawesome/css/all.min.css")}" rel="stylesheet">\n    '
+_CSS_APP = f'<link href="{url_activo("css/app.css")}" rel="stylesheet">'
+_JS_BOOTSTRAP = f'<script src="{url_activo("vendor/bootstrap/bootstrap.bundle.min.js")}"></script>'
+_JS_AUTOCOMPLETAR = f'<script src="{url_activo("js/autocompletar.js")}" defer></script>'
+_JS_CHART = f'<script src="{url_activo("vendor/chartjs/chart.umd.min.js")}"></script>'
+
 # =============================================================================
 # PLANTILLA: LOGIN
 # =============================================================================
@@ -14,13 +28,9 @@ LOGIN_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Login - Sistema de Actividades</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-    <style>
-        body {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); height: 100vh; }}
-        .login-container {{ max-width: 400px; margin: 100px auto; background: white; padding: 30px; border-radius: 10px; box-shadow: 0 10px 25px rgba(0,0,0,0.1); }}
-    </style>
+    """ + _CSS_BOOTSTRAP + _CSS_APP + """
 </head>
-<body>
+<body class="pagina-login">
     <div class="container">
         <div class="login-container">
             <h2 class="text-center mb-4">🔐 Iniciar Sesión</h2>
@@ -41,22 +51,6 @@ LOGIN_TEMPLATE = """
 </html>
 """
 
-# =============================================================================
-# ESTILOS COMPARTIDOS (usados en varias plantillas)
-# =============================================================================
-
-_SHARED_STYLES = """
-    .navbar-custom {{ background: linear-gradient(90deg, #667eea 0%, #764ba2 100%); box-shadow: 0 2px 10px rgba(0,0,0,0.1); }}
-    .sidebar {{ background: #f8f9fa; border-right: 1px solid #dee2e6; height: 100vh; position: fixed; width: 250px; z-index: 1000; }}
-    .main-content {{ margin-left: 250px; padding: 30px; background: #f0f2f5; min-height: calc(100vh - 56px); }}
-    .card {{ border: none; border-radius: 15px; box-shadow: 0 5px 15px rgba(0,0,0,0.05); margin-bottom: 25px; transition: transform 0.3s; }}
-    .card-header {{ background: white; border-bottom: 1px solid #f0f0f0; border-radius: 15px 15px 0 0 !important; padding: 15px 20px; }}
-    .card-header h5 {{ margin: 0; color: #4a5568; font-weight: 700; }}
-    .btn-action {{ border-radius: 8px; padding: 8px 16px; font-weight: 600; }}
-    .form-control {{ border-radius: 10px; padding: 12px; border: 1px solid #e2e8f0; }}
-    .form-control:focus {{ box-shadow: 0 0 0 3px rgba(102, 126, 234, 0.1); border-color: #667eea; }}
-"""
-
 _SIDEBAR_TEMPLATE = """
     <div class="col-md-2 sidebar d-none d-md-block">
         <div class="pt-4">
@@ -110,15 +104,9 @@ MAIN_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Sistema de Actividades</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-    <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" rel="stylesheet">
-    <style>
-        """ + _SHARED_STYLES + """
-        .btn-small {{ padding: 0.25rem 0.5rem; font-size: 0.875rem; }}
-        .stat-card {{ background: white; border-radius: 10px; padding: 20px; margin: 10px 0; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }}
-    </style>
+    """ + _CSS_BOOTSTRAP + _CSS_ICONOS + _CSS_APP + """
 </head>
-<body>
+<body class="pagina-inicio">
     """ + _NAVBAR_TEMPLATE.replace("{icono}", "tasks").replace("{titulo}", "Sistema de Actividades") + """
 
     <div class="container-fluid p-0">
@@ -157,7 +145,9 @@ MAIN_TEMPLATE = """
                                 </div>
                                 <div class="mb-3">
                                     <label class="form-label">👤 Solicitante:</label>
-                                    <input type="text" name="solicitante" class="form-control" placeholder="Nombre de quien solicita" required>
+                                    <input type="text" name="solicitante" class="form-control" placeholder="Nombre de quien solicita" required
+                                           autocomplete="off" list="sugerencias-solicitante" data-autocompletar="solicitante">
+                                    <datalist id="sugerencias-solicitante"></datalist>
                                 </div>
                             </div>
                             <div class="col-md-6">
@@ -222,7 +212,7 @@ MAIN_TEMPLATE = """
         </div>
     </div>
 
-    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
+    """ + _JS_BOOTSTRAP + _JS_AUTOCOMPLETAR + """
 </body>
 </html>
 """
@@ -238,17 +228,9 @@ GESTION_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Gestión - Sistema de Actividades</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-    <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" rel="stylesheet">
-    <style>
-        """ + _SHARED_STYLES + """
-        .list-group-item {{ border: none; border-bottom: 1px solid #f8f9fa; padding: 15px 20px; transition: background 0.2s; }}
-        .list-group-item:hover {{ background: #f8fafc; }}
-        .list-group-item:last-child {{ border-bottom: none; }}
-        .badge-user {{ background: #ebf4ff; color: #3182ce; padding: 8px 12px; border-radius: 8px; font-weight: 600; }}
-    </style>
+    """ + _CSS_BOOTSTRAP + _CSS_ICONOS + _CSS_APP + """
 </head>
-<body>
+<body class="pagina-gestion">
     """ + _NAVBAR_TEMPLATE.replace("{icono}", "cog").replace("{titulo}", "Panel de Configuración") + """
 
     <div class="container-fluid p-0">
@@ -298,7 +280,7 @@ GESTION_TEMPLATE = """
         </div>
     </div>
 
-    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
+    """ + _JS_BOOTSTRAP + """
 </body>
 </html>
 """
@@ -314,25 +296,10 @@ ESTADISTICAS_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Estadísticas - Sistema de Actividades</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-    <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" rel="stylesheet">
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-    <style>
-        """ + _SHARED_STYLES + """
-        .stat-card {{ border: none; border-radius: 15px; background: white; padding: 25px; box-shadow: 0 4px 20px rgba(0,0,0,0.05); transition: transform 0.3s; height: 100%; }}
-        .stat-card:hover {{ transform: translateY(-5px); }}
-        .stat-icon {{ width: 50px; height: 50px; border-radius: 12px; display: flex; align-items: center; justify-content: center; margin-bottom: 15px; font-size: 20px; }}
-        .icon-blue {{ background: #ebf4ff; color: #3182ce; }}
-        .icon-green {{ background: #f0fff4; color: #38a169; }}
-        .icon-orange {{ background: #fffaf0; color: #dd6b20; }}
-        .icon-purple {{ background: #faf5ff; color: #805ad5; }}
-        .stat-value {{ font-size: 1.8rem; font-weight: 800; color: #2d3748; }}
-        .stat-label {{ color: #718096; font-weight: 600; text-transform: uppercase; letter-spacing: 1px; font-size: 0.75rem; }}
-        .chart-container {{ background: white; border-radius: 15px; padding: 25px; box-shadow: 0 4px 20px rgba(0,0,0,0.05); margin-bottom: 30px; }}
-        .chart-title {{ font-weight: 700; color: #1a202c; margin-bottom: 20px; border-left: 4px solid #667eea; padding-left: 15px; }}
-    </style>
+    """ + _CSS_BOOTSTRAP + _CSS_ICONOS + _CSS_APP + """
+    """ + _JS_CHART + """
 </head>
-<body>
+<body class="pagina-estadisticas">
     """ + _NAVBAR_TEMPLATE.replace("{icono}", "chart-bar").replace("{titulo}", "Dashboard de Rendimiento") + """
 
     <div class="container-fluid p-0">
@@ -373,14 +340,14 @@ ESTADISTICAS_TEMPLATE = """
                     <div class="col-md-3">
                         <div class="stat-card">
                             <div class="stat-icon icon-blue"><i class="fas fa-database"></i></div>
-                            <div class="stat-value">{total_registros}</div>
+                            <div class="stat-value" id="statTotalRegistros">{total_registros}</div>
                             <div class="stat-label">Registros</div>
                         </div>
                     </div>
                     <div class="col-md-3">
                         <div class="stat-card">
                             <div class="stat-icon icon-green"><i class="fas fa-check-double"></i></div>
-                            <div class="stat-value">{total_tipos_actividad}</div>
+                            <div class="stat-value" id="statTiposActividad">{total_tipos_actividad}</div>
                             <div class="stat-label">Tipo Actividades</div>
                         </div>
                     </div>
@@ -456,24 +423,201 @@ ESTADISTICAS_TEMPLATE = """
         const dataCumplimiento = {data_cumplimiento};
         const dataLinea = {data_linea};
         const colors = ['#667eea', '#764ba2', '#38a169', '#3182ce', '#dd6b20', '#805ad5', '#e53e3e', '#319795', '#d69e2e', '#4a5568'];
-
-        new Chart(document.getElementById('actividadesChart'), {{
-            type: 'bar',
-            data: {{ labels: dataActividades.labels, datasets: [{{ label: 'Registros', data: dataActividades.data, backgroundColor: colors[0], borderRadius: 8 }}] }},
-            options: {{ indexAxis: 'y', responsive: true, maintainAspectRatio: false, plugins: {{ legend: {{ display: false }} }} }}
-        }});
-
-        new Chart(document.getElementById('cumplimientoChart'), {{
+        const graficos = {{}};
+
+        const canvasActividades = document.getElementById('actividadesChart');
+        if (canvasActividades) {{
+            graficos.actividades = new Chart(canvasActividades, {{
+                type: 'bar',
+                data: {{ labels: dataActividades.labels, datasets: [{{ label: 'Registros', data: dataActividades.data, backgroundColor: colors[0], borderRadius: 8 }}] }},
+                options: {{ indexAxis: 'y', responsive: true, maintainAspectRatio: false, plugins: {{ legend: {{ display: false }} }} }}
+            }});
+        }}
+
+        graficos.cumplimiento = new Chart(document.getElementById('cumplimientoChart'), {{
             type: 'doughnut',
             data: {{ labels: dataCumplimiento.labels, datasets: [{{ data: dataCumplimiento.data, backgroundColor: ['#38a169', '#e53e3e', '#dd6b20'] }}] }},
             options: {{ responsive: true, cutout: '70%', plugins: {{ legend: {{ position: 'bottom' }} }} }}
         }});
 
-        new Chart(document.getElementById('lineaChart'), {{
+        graficos.linea = new Chart(document.getElementById('lineaChart'), {{
             type: 'line',
             data: {{ labels: dataLinea.labels, datasets: [{{ label: 'Registros', data: dataLinea.data, borderColor: colors[1], backgroundColor: colors[1] + '20', fill: true, tension: 0.4, pointRadius: 4, pointBackgroundColor: colors[1] }}] }},
             options: {{ responsive: true, maintainAspectRatio: false, scales: {{ y: {{ beginAtZero: true, ticks: {{ stepSize: 1 }} }} }} }}
         }});
+
+        // ---- Actualización en vivo ----------------------------------------
+        // Mecanismo principal: cada SONDEO_MS se pide /estadisticas/datos con la versión
+        // conocida (204 si no cambió), así llegan los cambios escritos en cualquier proceso.
+        // Atajo: /eventos entrega al instante como delta lo escrito en el proceso que atiende
+        // el stream. El bus es por proceso y los streams tienen cupo: sin él solo queda el sondeo.
+        const SONDEO_MS = """ + str(ESTADISTICAS_SONDEO * 1000) + """;
+        const filtro = {filtro};
+        const fechasLinea = (dataLinea.fechas || []).slice();
+        let usuariosStats = {data_usuarios};
+        let versiones = {data_versiones};
+        const MAX_PUNTOS_LINEA = 90;
+        let conteoActividades = {{}};
+        dataActividades.labels.forEach((a, i) => {{ conteoActividades[a] = dataActividades.data[i]; }});
+
+        function enFiltro(fecha) {{
+            // Igual que el filtro del servidor: fecha >= inicio y fecha <= fin (comparación de texto ISO)
+            if (!fecha) return false;
+            fecha = fecha.replace('T', ' ');
+            if (filtro.inicio && fecha < filtro.inicio) return false;
+            if (filtro.fin && fecha > filtro.fin) return false;
+            return true;
+        }}
+
+        function sumarEnGrafico(grafico, etiqueta, signo) {{
+            if (!grafico || !etiqueta) return;
+            const labels = grafico.data.labels, datos = grafico.data.datasets[0].data;
+            let i = labels.indexOf(etiqueta);
+            if (i < 0) {{
+                if (signo < 0) return;
+                labels.push(etiqueta);
+                datos.push(0);
+                i = labels.length - 1;
+            }}
+            datos[i] = Math.max(0, datos[i] + signo);
+            if (datos[i] === 0) {{
+                labels.splice(i, 1);
+                datos.splice(i, 1);
+            }}
+        }}
+
+        function sumarEnLinea(fecha, signo) {{
+            const dia = fecha.slice(0, 10);
+            const labels = graficos.linea.data.labels, datos = graficos.linea.data.datasets[0].data;
+            let i = fechasLinea.indexOf(dia);
+            if (i < 0) {{
+                if (signo < 0) return;
+                // Insertar el día en orden cronológico
+                i = fechasLinea.findIndex(f => f > dia);
+                if (i < 0) i = fechasLinea.length;
+                fechasLinea.splice(i, 0, dia);
+                labels.splice(i, 0, dia.slice(8, 10) + '/' + dia.slice(5, 7));
+                datos.splice(i, 0, 0);
+            }}
+            datos[i] = Math.max(0, datos[i] + signo);
+            if (datos[i] === 0) {{
+                fechasLinea.splice(i, 1);
+                labels.splice(i, 1);
+                datos.splice(i, 1);
+            }}
+            while (fechasLinea.length > MAX_PUNTOS_LINEA) {{
+                fechasLinea.shift();
+                labels.shift();
+                datos.shift();
+            }}
+        }}
+
+        function sumarEnUsuario(cambio) {{
+            let fila = usuariosStats.find(u => u.usuario === cambio.usuario);
+            if (!fila) {{
+                if (cambio.signo < 0) return;
+                fila = {{ usuario: cambio.usuario, total: 0, cumplidos: 0, ultima: '' }};
+                usuariosStats.push(fila);
+            }}
+            fila.total = Math.max(0, fila.total + cambio.signo);
+            if (cambio.cumplido === 'Sí') fila.cumplidos = Math.max(0, fila.cumplidos + cambio.signo);
+            fila.cumplimiento = fila.total ? (fila.cumplidos / fila.total * 100).toFixed(1) + '%' : '0%';
+            const fecha = cambio.fecha.replace('T', ' ').slice(0, 16);
+            if (cambio.signo > 0 && fecha > (fila.ultima || '')) fila.ultima = fecha;
+        }}
+
+        function pintarTablaUsuarios() {{
+            const cuerpo = document.querySelector('tr[data-usuario], tr.sin-datos')?.parentElement;
+            if (!cuerpo) return;
+            for (const u of usuariosStats) {{
+                let tr = cuerpo.querySelector(`tr[data-usuario="${{CSS.escape(u.usuario)}}"]`);
+                if (!tr) {{
+                    cuerpo.querySelector('tr.sin-datos')?.remove();
+                    tr = document.createElement('tr');
+                    tr.dataset.usuario = u.usuario;
+                    tr.innerHTML = '<td><span class="fw-bold"></span></td>'
+                        + '<td class="text-center"><span class="badge bg-light text-dark stat-total"></span></td>'
+                        + '<td class="text-center stat-cumplimiento"></td><td class="small text-muted stat-ultima"></td>';
+                    tr.querySelector('.fw-bold').textContent = u.usuario;
+                    cuerpo.appendChild(tr);
+                }}
+                tr.querySelector('.stat-total').textContent = u.total;
+                tr.querySelector('.stat-cumplimiento').textContent = u.cumplimiento;
+                tr.querySelector('.stat-ultima').textContent = u.ultima || 'N/A';
+            }}
+        }}
+
+        function pintarTotales() {{
+            document.getElementById('statTotalRegistros').textContent = usuariosStats.reduce((s, u) => s + u.total, 0);
+            document.getElementById('statTiposActividad').textContent = Object.keys(conteoActividades).length;
+        }}
+
+        function aplicarDelta(datos) {{
+            for (const c of datos.cambios) {{
+                if (!enFiltro(c.fecha)) continue;
+                sumarEnGrafico(graficos.actividades, c.actividad, c.signo);
+                sumarEnGrafico(graficos.cumplimiento, c.cumplido, c.signo);
+                sumarEnLinea(c.fecha, c.signo);
+                sumarEnUsuario(c);
+                conteoActividades[c.actividad] = (conteoActividades[c.actividad] || 0) + c.signo;
+                if (conteoActividades[c.actividad] <= 0) delete conteoActividades[c.actividad];
+            }}
+            Object.values(graficos).forEach(g => g.update('none'));
+            pintarTablaUsuarios();
+            pintarTotales();
+        }}
+
+        function sumaVersiones() {{
+            return Object.values(versiones).reduce((s, v) => s + v, 0);
+        }}
+
+        function resincronizar() {{
+            const params = new URLSearchParams({{ fecha_inicio: filtro.inicio, fecha_fin: filtro.fin, version: sumaVersiones() }});
+            fetch('/estadisticas/datos?' + params, {{ credentials: 'same-origin' }})
+                .then(r => r.status === 200 ? r.json() : null)
+                .then(stats => {{
+                    if (!stats) return;
+                    versiones = stats.versiones;
+                    usuariosStats = stats.usuarios;
+                    fechasLinea.splice(0, fechasLinea.length, ...(stats.chart_linea.fechas || []));
+                    for (const [grafico, datos] of [[graficos.actividades, stats.chart_actividades],
+                                                     [graficos.cumplimiento, stats.chart_cumplimiento],
+                                                     [graficos.linea, stats.chart_linea]]) {{
+                        if (!grafico) continue;
+                        grafico.data.labels = datos.labels;
+                        grafico.data.datasets[0].data = datos.data;
+                        grafico.update('none');
+                    }}
+                    conteoActividades = {{}};
+                    stats.chart_actividades.labels.forEach((a, i) => {{ conteoActividades[a] = stats.chart_actividades.data[i]; }});
+                    pintarTablaUsuarios();
+                    pintarTotales();
+                }})
+                .catch(() => {{}});
+        }}
+
+        function recibirEstadisticas(evento) {{
+            const datos = JSON.parse(evento.data);
+            // Solo se aplica si cada versión es la siguiente a la conocida; si no, faltó algo
+            const completo = Object.entries(datos.versiones).every(([u, v]) => v === (versiones[u] || 0) + 1);
+            if (!completo) {{
+                resincronizar();
+                return;
+            }}
+            Object.assign(versiones, datos.versiones);
+            aplicarDelta(datos);
+        }}
+
+        function consultarPeriodicamente() {{
+            if (!document.hidden) resincronizar();
+            setTimeout(consultarPeriodicamente, SONDEO_MS);
+        }}
+        setTimeout(consultarPeriodicamente, SONDEO_MS);
+
+        if (window.EventSource) {{
+            // Un 503 (sin cupo) cierra el stream y el navegador no reintenta: sigue el sondeo
+            new EventSource('/eventos').addEventListener('estadisticas', recibirEstadisticas);
+        }}
     </script>
 </body>
 </html>
@@ -490,17 +634,9 @@ EXPORTAR_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Exportar - Sistema de Actividades</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-    <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" rel="stylesheet">
-    <style>
-        """ + _SHARED_STYLES + """
-        .stats-card {{ border-left: 4px solid #007bff; }}
-        .stats-card.success {{ border-left-color: #28a745; }}
-        .stats-card.warning {{ border-left-color: #ffc107; }}
-        .stats-card.info {{ border-left-color: #17a2b8; }}
-    </style>
+    """ + _CSS_BOOTSTRAP + _CSS_ICONOS + _CSS_APP + """
 </head>
-<body>
+<body class="pagina-exportar">
     """ + _NAVBAR_TEMPLATE.replace("{icono}", "download").replace("{titulo}", "Exportar Datos") + """
 
     <div class="container-fluid p-0">
@@ -547,6 +683,8 @@ EXPORTAR_TEMPLATE = """
                                         <select class="form-select" name="formato">
                                             <option value="excel">Excel (.xlsx)</option>
                                             <option value="csv">CSV (.csv)</option>
+                                            <option value="pdf">PDF (.pdf, informe detallado)</option>
+                                            <option value="parquet">Parquet (.parquet, para análisis)</option>
                                         </select>
                                     </div>
                                 </div>
@@ -600,11 +738,22 @@ EXPORTAR_TEMPLATE = """
                                 <button type="submit" class="btn btn-primary">
                                     <i class="fas fa-file-excel"></i> 🚀 Generar Informe (V2 ACTUALIZADO)
                                 </button>
+                                <button type="button" class="btn btn-outline-primary" id="btnSegundoPlano">
+                                    <i class="fas fa-clock"></i> Generar en segundo plano
+                                </button>
                             </div>
                         </form>
+                        <div id="trabajoExportacion" class="mt-3" style="display: none;">
+                            <div class="progress mb-2">
+                                <div class="progress-bar progress-bar-striped progress-bar-animated" id="trabajoProgreso" style="width: 0%;">0%</div>
+                            </div>
+                            <p class="text-muted mb-0" id="trabajoMensaje"></p>
+                        </div>
                     </div>
                 </div>
 
+                {lote_html}
+
                 <div class="row mb-4">
                     <div class="col-md-3">
                         <div class="card stats-card">
@@ -652,14 +801,46 @@ EXPORTAR_TEMPLATE = """
                         <li>Organización por actividad y fecha</li>
                         <li>Conteo de actividades por tipo</li>
                         <li>Estadísticas detalladas incluidas</li>
-                        <li>Formatos disponibles: Excel y CSV</li>
+                        <li>Formatos disponibles: Excel, CSV, PDF y Parquet</li>
                     </ul>
                 </div>
             </div>
         </div>
     </div>
 
-    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
+    """ + _JS_BOOTSTRAP + """
+    <script>
+        // Exportación en segundo plano: se envía el formulario y se consulta el progreso
+        document.getElementById('btnSegundoPlano').addEventListener('click', function() {{
+            const form = this.closest('form');
+            const panel = document.getElementById('trabajoExportacion');
+            const barra = document.getElementById('trabajoProgreso');
+            const mensaje = document.getElementById('trabajoMensaje');
+            panel.style.display = 'block';
+
+            function mostrar(trabajo) {{
+                barra.style.width = trabajo.progreso + '%';
+                barra.textContent = trabajo.progreso + '%';
+                mensaje.textContent = trabajo.mensaje || '';
+                if (trabajo.estado === 'listo') {{
+                    barra.classList.remove('progress-bar-animated');
+                    mensaje.innerHTML = '<a class="btn btn-success btn-sm" href="' + trabajo.descarga_url + '">' +
+                        '<i class="fas fa-download"></i> Descargar</a> <small>Disponible hasta ' + trabajo.expira + '</small>';
+                }} else if (trabajo.estado === 'error') {{
+                    barra.classList.add('bg-danger');
+                }} else {{
+                    setTimeout(function() {{
+                        fetch(trabajo.estado_url).then(r => r.json()).then(mostrar);
+                    }}, 1500);
+                }}
+            }}
+
+            fetch('/exportar/trabajos', {{
+                method: 'POST',
+                body: new URLSearchParams(new FormData(form))
+            }}).then(r => r.json()).then(mostrar);
+        }});
+    </script>
 </body>
 </html>
 """
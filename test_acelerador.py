@@ -0,0 +1,100 @@
+"""
+Prueba del despacho de acelerador.py: la ruta de pandas siempre y, cuando la
+extensión actividades_rust está instalada, que ambas rutas den lo mismo.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import acelerador
+
+
+@pytest.fixture
+def registros():
+    return pd.DataFrame({
+        "USUARIO": pd.Categorical(["ana", "luis", "ana", None, "marta", "luis"]),
+        "TIPO DE ACTIVIDAD": pd.Categorical(["Soporte técnico", "Reunión", "Capacitación",
+                                             "Soporte técnico", None, "Reunión"]),
+        "FECHA": pd.to_datetime(["2024-03-01 08:00", "2024-01-15 09:30", None,
+                                 "2024-03-01 08:00", "2023-12-31 17:00", "2024-02-10 10:00"]),
+        "DEPENDENCIA": ["ALCALDÍA", "Secretaría de Hacienda", np.nan, "alcaldía", "Hacienda", "ALCALDÍA"],
+    }, index=[10, 11, 12, 13, 14, 15])
+
+
+@pytest.fixture
+def solo_pandas(monkeypatch):
+    monkeypatch.setattr(acelerador, "RUST_DISPONIBLE", False)
+
+
+def test_filtrar_todos_los_filtros_sin_mayusculas(registros, solo_pandas):
+    filtrado = acelerador.filtrar_registros(registros, {"DEPENDENCIA": "ALCALDÍA", "USUARIO": "AN"})
+    assert list(filtrado.index) == [10]
+    assert filtrado["USUARIO"].dtype == registros["USUARIO"].dtype
+
+
+def test_filtrar_columna_inexistente_o_vacia_no_coincide(registros, solo_pandas):
+    assert acelerador.filtrar_registros(registros, {"NO EXISTE": "a"}).empty
+    assert 12 not in acelerador.filtrar_registros(registros, {"DEPENDENCIA": "a"}).index
+
+
+def test_filtrar_fecha_como_texto(registros, solo_pandas):
+    assert list(acelerador.filtrar_registros(registros, {"FECHA": "2024-03-01"}).index) == [10, 13]
+
+
+def test_buscar_en_cualquier_campo(registros, solo_pandas):
+    encontrados = acelerador.buscar_registros_avanzado(registros, "hacienda", ["USUARIO", "DEPENDENCIA"])
+    assert list(encontrados.index) == [11, 14]
+
+
+def test_estadisticas_sin_vacios_ni_categorias_ausentes(registros, solo_pandas):
+    conteo = acelerador.calcular_estadisticas(registros["TIPO DE ACTIVIDAD"].iloc[:2])
+    assert conteo == {"Reunión": 1, "Soporte técnico": 1}
+    assert acelerador.calcular_estadisticas(registros["USUARIO"]) == {"ana": 2, "luis": 2, "marta": 1}
+
+
+def test_ordenar_varias_columnas_vacios_al_final(registros, solo_pandas):
+    ordenado = acelerador.ordenar_registros(registros, ["TIPO DE ACTIVIDAD", "FECHA"])
+    assert list(ordenado.index) == [12, 11, 15, 10, 13, 14]
+    assert list(acelerador.ordenar_registros(registros, "FECHA", False).index) == [10, 13, 15, 11, 14, 12]
+
+
+def test_frame_vacio(registros):
+    vacio = registros.iloc[:0]
+    assert acelerador.filtrar_registros(vacio, {"USUARIO": "ana"}).empty
+    assert acelerador.ordenar_registros(vacio, "FECHA").empty
+    assert acelerador.calcular_estadisticas(vacio["USUARIO"]) == {}
+
+
+# =============================================================================
+# PARIDAD PANDAS / RUST
+# =============================================================================
+
+CASOS = [
+    ("filtrar", ({"DEPENDENCIA": "alcaldía"},)),
+    ("filtrar", ({"DEPENDENCIA": "a", "TIPO DE ACTIVIDAD": "SOPORTE"},)),
+    ("filtrar", ({"FECHA": "2024-03"},)),
+    ("filtrar", ({"NO EXISTE": "a"},)),
+    ("buscar", ("hacienda", ["USUARIO", "DEPENDENCIA"])),
+    ("buscar", ("ó", ["TIPO DE ACTIVIDAD", "NO EXISTE"])),
+    ("ordenar", (["TIPO DE ACTIVIDAD", "FECHA"], True)),
+    ("ordenar", (["USUARIO"], False)),
+    ("ordenar", (["DEPENDENCIA", "FECHA"], [True, False])),
+]
+
+
+@pytest.mark.skipif(acelerador.actividades_rust is None, reason="extensión actividades_rust no instalada")
+@pytest.mark.parametrize("operacion, argumentos", CASOS)
+def test_paridad_filas(registros, operacion, argumentos):
+    pandas = getattr(acelerador, f"_{operacion}_pandas")(registros, *argumentos)
+    rust = getattr(acelerador, f"_{operacion}_rust")(registros, *argumentos)
+    assert list(rust.index) == list(pandas.index)
+    pd.testing.assert_frame_equal(rust, pandas)
+
+
+@pytest.mark.skipif(acelerador.actividades_rust is None, reason="extensión actividades_rust no instalada")
+@pytest.mark.parametrize("columna", ["USUARIO", "TIPO DE ACTIVIDAD", "DEPENDENCIA", "FECHA"])
+def test_paridad_estadisticas(registros, columna):
+    pandas = acelerador._contar_pandas(registros[columna])
+    rust = acelerador._contar_rust(registros[columna])
+    assert rust == pandas
@@ -0,0 +1,79 @@
+"""
+Prueba del servidor asyncio: handlers de ROUTE_MAP en el pool, SSE y long-polling.
+"""
+
+import asyncio
+import http.client
+import json
+import threading
+
+import eventos
+from app_async import ServidorAsync
+
+
+def _en_servidor(prueba):
+    async def _correr():
+        servidor = ServidorAsync(hilos=2)
+        await servidor.iniciar('127.0.0.1', 0)
+        try:
+            return await asyncio.to_thread(prueba, servidor.puerto)
+        finally:
+            await servidor.apagar(timeout=5)
+    return asyncio.run(_correr())
+
+
+def test_handlers_keep_alive_y_exportacion(bd_prueba):
+    bd_prueba(10)
+
+    def _prueba(puerto):
+        conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=10)
+        conexion.request('GET', '/')
+        respuesta = conexion.getresponse()
+        assert respuesta.status == 200 and b'<html' in respuesta.read().lower()
+        socket_inicial = conexion.sock
+
+        conexion.request('POST', '/exportar', body='formato=csv',
+                         headers={'Cookie': 'usuario=admin', 'Content-Type': 'application/x-www-form-urlencoded'})
+        respuesta = conexion.getresponse()
+        assert respuesta.getheader('Transfer-Encoding') == 'chunked'
+        assert respuesta.read().decode('utf-8-sig').count('\n') == 11
+        assert conexion.sock is socket_inicial
+
+        conexion.request('GET', '/no-existe')
+        respuesta = conexion.getresponse()
+        respuesta.read()
+        assert respuesta.status == 404
+
+    _en_servidor(_prueba)
+
+
+def _publicar():
+    eventos.publicar('privado', {'a': 1}, usuarios=['otro'])
+    eventos.publicar('mio', {'b': 2}, usuarios=['usuario1'])
+
+
+def test_long_polling_y_sse_filtran_por_usuario():
+    def _prueba(puerto):
+        ultimo = eventos.bus.ultimo_id()
+
+        sse = http.client.HTTPConnection('127.0.0.1', puerto, timeout=10)
+        sse.request('GET', '/eventos', headers={'Cookie': 'usuario=usuario1'})
+        respuesta_sse = sse.getresponse()
+        assert respuesta_sse.getheader('Content-Type').startswith('text/event-stream')
+
+        threading.Timer(0.2, _publicar).start()
+        conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=10)
+        conexion.request('GET', f'/eventos/espera?desde={ultimo}&timeout=5', headers={'Cookie': 'usuario=usuario1'})
+        datos = json.loads(conexion.getresponse().read())
+        assert [e['tipo'] for e in datos['eventos']] == ['mio']
+
+        recibido = b''
+        while b'event: mio' not in recibido:
+            recibido += respuesta_sse.fp.read1(1024)
+        assert b'privado' not in recibido
+        assert b'data: {"b": 2}' in recibido
+
+        conexion.request('GET', '/eventos/espera?timeout=1')
+        assert conexion.getresponse().status == 401
+
+    _en_servidor(_prueba)
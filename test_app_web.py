@@ -0,0 +1,122 @@
+"""
+Prueba del servidor HTTP autónomo: keep-alive, límite del cuerpo y apagado ordenado.
+"""
+
+import http.client
+import socket
+import threading
+import time
+
+import app_web
+import web_handlers
+
+
+class _LentoHandler(web_handlers.BaseRoute):
+    def get(self, params):
+        time.sleep(0.5)
+        self.send_json({'ok': True})
+
+
+class _RapidoHandler(web_handlers.BaseRoute):
+    def get(self, params):
+        self.send_json({'ok': True})
+
+
+def _iniciar(monkeypatch, **opciones):
+    monkeypatch.setitem(web_handlers.ROUTE_MAP, '/lento', _LentoHandler)
+    monkeypatch.setitem(web_handlers.ROUTE_MAP, '/rapido', _RapidoHandler)
+    servidor = app_web.ServidorConcurrente(('127.0.0.1', 0), **opciones)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    return servidor, hilo
+
+
+def test_keep_alive_y_limite_de_cuerpo(monkeypatch, bd_prueba):
+    bd_prueba(3)
+    servidor, _ = _iniciar(monkeypatch)
+    try:
+        conexion = http.client.HTTPConnection('127.0.0.1', servidor.server_port, timeout=5)
+        conexion.request('GET', '/')
+        respuesta = conexion.getresponse()
+        respuesta.read()
+        socket_inicial = conexion.sock
+        conexion.request('POST', '/login', body='usuario=admin',
+                         headers={'Content-Type': 'application/x-www-form-urlencoded'})
+        respuesta = conexion.getresponse()
+        respuesta.read()
+        assert respuesta.status == 303
+        assert conexion.sock is socket_inicial  # misma conexión TCP
+
+        grande = http.client.HTTPConnection('127.0.0.1', servidor.server_port, timeout=5)
+        grande.putrequest('POST', '/login')
+        grande.putheader('Content-Length', str(app_web.RequestHandler.max_cuerpo + 1))
+        grande.endheaders()
+        assert grande.getresponse().status == 413
+    finally:
+        servidor.apagar(timeout=5)
+
+
+def test_conexiones_ociosas_no_bloquean_nuevas(monkeypatch):
+    servidor, _ = _iniciar(monkeypatch, hilos=2)
+    try:
+        ociosas = []
+        for _ in range(2):
+            conexion = http.client.HTTPConnection('127.0.0.1', servidor.server_port, timeout=5)
+            conexion.request('GET', '/rapido')
+            conexion.getresponse().read()
+            ociosas.append(conexion)   # keep-alive abierto: cada una retiene un hilo
+        time.sleep(0.1)                # el servidor la marca ociosa tras enviar la respuesta
+
+        inicio = time.monotonic()
+        nueva = http.client.HTTPConnection('127.0.0.1', servidor.server_port, timeout=5)
+        nueva.request('GET', '/rapido')
+        respuesta = nueva.getresponse()
+        assert respuesta.status == 200 and respuesta.read() == b'{"ok": true}'
+        assert time.monotonic() - inicio < app_web.RequestHandler.timeout / 2
+    finally:
+        servidor.apagar(timeout=5)
+
+
+def test_se_cierra_la_ociosa_y_no_la_recien_aceptada(monkeypatch):
+    servidor, _ = _iniciar(monkeypatch, hilos=2)
+    try:
+        # La conexión nueva llega antes de que la otra quede ociosa: aun así no se cierra
+        recien = socket.create_connection(('127.0.0.1', servidor.server_port), timeout=5)
+        time.sleep(0.1)
+        ociosa = http.client.HTTPConnection('127.0.0.1', servidor.server_port, timeout=5)
+        ociosa.request('GET', '/rapido')
+        ociosa.getresponse().read()
+        time.sleep(0.1)
+
+        tercera = http.client.HTTPConnection('127.0.0.1', servidor.server_port, timeout=5)
+        tercera.request('GET', '/rapido')
+        assert tercera.getresponse().status == 200
+        assert ociosa.sock.recv(1) == b''   # el servidor la cerró para liberar su hilo
+
+        recien.sendall(b"GET /rapido HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n")
+        assert recien.makefile('rb').readline().startswith(b"HTTP/1.1 200")
+        recien.close()
+    finally:
+        servidor.apagar(timeout=5)
+
+
+def test_apagado_drena_solicitudes_en_curso(monkeypatch):
+    servidor, hilo = _iniciar(monkeypatch, hilos=2)
+    resultado = {}
+
+    def _pedir():
+        conexion = http.client.HTTPConnection('127.0.0.1', servidor.server_port, timeout=5)
+        conexion.request('GET', '/lento')
+        respuesta = conexion.getresponse()
+        resultado['estado'] = respuesta.status
+        resultado['cuerpo'] = respuesta.read()
+
+    cliente = threading.Thread(target=_pedir)
+    cliente.start()
+    time.sleep(0.2)
+    servidor.apagar(timeout=5)
+    cliente.join(5)
+    hilo.join(5)
+
+    assert resultado == {'estado': 200, 'cuerpo': b'{"ok": true}'}
+    assert not hilo.is_alive()
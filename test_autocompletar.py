@@ -0,0 +1,80 @@
+"""
+Prueba del autocompletado: índice de trigramas sobre los valores históricos
+(errores de tipeo, tildes, grafías duplicadas), reconstrucción al cambiar los
+datos, latencia por consulta y endpoint /api/autocompletar.
+"""
+
+import random
+import time
+
+import pytest
+
+import autocompletar
+import database
+from autocompletar import IndiceTrigramas, parametros_autocompletar
+
+
+def _valores(indice, texto, limite=5):
+    return [s['valor'] for s in indice.buscar(texto, limite)]
+
+
+def test_indice_tolera_errores_y_agrupa_grafias():
+    indice = IndiceTrigramas({"José Núñez": 3, "JOSE NUÑEZ": 1, "jose  nunez": 1, "Josefina Ruiz": 4,
+                              "María Gómez": 2, "Secretaría de Hacienda": 6, "Hacienda Municipal": 1})
+    assert len(indice) == 5
+    assert indice.buscar("jose nu") == [{'valor': "José Núñez", 'frecuencia': 5}]
+    assert _valores(indice, "jos") == ["José Núñez", "Josefina Ruiz"]            # prefijos, por frecuencia
+    assert _valores(indice, "Jose Nuñes")[0] == "José Núñez"                     # error de tipeo
+    assert _valores(indice, "haciend") == ["Hacienda Municipal", "Secretaría de Hacienda"]  # inicio primero
+    assert _valores(indice, "MARIA gomes") == ["María Gómez"]
+    assert _valores(indice, "xyz") == []
+    assert _valores(indice, " ¿? ") == []
+    assert _valores(indice, "m", 1) == ["María Gómez"]                          # inicial de cualquier palabra
+
+
+def test_latencia_por_consulta():
+    azar = random.Random(7)
+    nombres = ["Ana", "Luis", "María", "José", "Carlos", "Lucía", "Jorge", "Sofía", "Andrés", "Paula"]
+    apellidos = ["Pérez", "Gómez", "Rodríguez", "Martínez", "López", "Hernández", "Díaz", "Moreno", "Álvarez"]
+    frecuencias = {f"{azar.choice(nombres)} {azar.choice(apellidos)} {azar.choice(apellidos)} {i}": azar.randint(1, 50)
+                   for i in range(20000)}
+    indice = IndiceTrigramas(frecuencias)
+
+    consultas = ["ma", "mar", "maria go", "jose rodrigez", "lucia diaz mor", "andres alvarez 19"]
+    inicio = time.perf_counter()
+    for consulta in consultas:
+        assert indice.buscar(consulta, 8)
+    assert (time.perf_counter() - inicio) / len(consultas) < 0.05
+
+
+def test_endpoint_y_reconstruccion(bd_prueba):
+    bd_prueba(3)
+    autocompletar.reiniciar()
+    from app import app
+
+    cliente = app.test_client()
+    assert cliente.get('/api/autocompletar?campo=solicitante&q=sol').status_code == 401
+    with cliente.session_transaction() as sesion:
+        sesion['usuario'] = 'usuario1'
+    assert cliente.get('/api/autocompletar?campo=usuario&q=a').status_code == 400
+    assert cliente.get('/api/autocompletar?campo=solicitante&q=a&k=0').status_code == 400
+
+    datos = cliente.get('/api/autocompletar?campo=solicitante&q=solicitnte&k=2').get_json()
+    assert datos['campo'] == 'solicitante'
+    assert len(datos['sugerencias']) == 2
+
+    # Una escritura nueva invalida el índice
+    assert database.guardar_registro({"USUARIO": "usuario1", "FECHA": "2024-02-01", "SOLICITANTE": "Rectoría"})
+    datos = cliente.get('/api/autocompletar?campo=solicitante&q=rector').get_json()
+    assert datos['sugerencias'] == [{'valor': "Rectoría", 'frecuencia': 1}]
+
+    # Dependencia: valores usados y ubicaciones configuradas, las usadas primero
+    sugerencias = cliente.get('/api/autocompletar?campo=dependencia&q=alcaldia').get_json()['sugerencias']
+    assert sugerencias[0] == {'valor': "ALCALDÍA", 'frecuencia': 3}
+
+
+def test_parametros():
+    obtener = lambda consulta: lambda nombre: consulta.get(nombre)
+    assert parametros_autocompletar(obtener({'campo': 'dependencia', 'k': '500'}))['limite'] == 20
+    with pytest.raises(ValueError):
+        parametros_autocompletar(obtener({'campo': 'dependencia', 'k': 'x'}))
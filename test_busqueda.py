@@ -0,0 +1,99 @@
+"""
+Prueba de la búsqueda por texto: índice FTS5 sincronizado con altas, ediciones y
+borrados, relevancia, resaltado escapado, paginación y endpoint /api/buscar.
+"""
+
+import sqlite3
+
+import pytest
+
+import database
+import database_setup
+from busqueda import buscar, parametros_busqueda
+
+
+def _registro(usuario, descripcion, solicitante="", dependencia="ALCALDÍA", observaciones=""):
+    return database.guardar_registro({
+        "USUARIO": usuario, "TIPO DE ACTIVIDAD": "Soporte", "FECHA": "2024-02-01 08:00:00",
+        "DEPENDENCIA": dependencia, "SOLICITANTE": solicitante, "DESCRIPCIÓN": descripcion,
+        "OBSERVACIONES": observaciones, "CUMPLIDO": "Sí"
+    })
+
+
+def _buscar(usuario, **query):
+    return buscar(usuario, parametros_busqueda(lambda nombre: query.get(nombre)))
+
+
+def test_relevancia_y_resaltado(bd_prueba):
+    bd_prueba(0)
+    _registro("usuario1", "Revisión de impresora <b>láser</b>", solicitante="Ana Pérez")
+    _registro("usuario1", "Cambio de tóner", solicitante="Impresiones Ltda")
+    _registro("usuario2", "Impresora atascada", dependencia="GESTIÓN PREDIAL")
+    _registro("usuario1", "Instalación de red", observaciones="pendiente impresora")
+
+    resultado = _buscar('admin', q='impresora')
+    assert resultado['total'] == 3
+    # El solicitante pesa más que la descripción y ésta más que las observaciones
+    assert [r['descripcion'] for r in resultado['resultados']][-1] == "Instalación de red"
+    primero = next(r for r in resultado['resultados'] if r['solicitante'] == "Ana Pérez")
+    assert primero['resaltado'] == {'descripcion': "Revisión de <mark>impresora</mark> &lt;b&gt;láser&lt;/b&gt;"}
+
+    # Prefijos, sin tildes ni mayúsculas, todos los términos
+    assert _buscar('admin', q='IMPRES')['total'] == 4
+    assert _buscar('admin', q='gestion predial')['resultados'][0]['resaltado'] == {
+        'dependencia': "<mark>GESTIÓN</mark> <mark>PREDIAL</mark>"
+    }
+    assert _buscar('admin', q='"impresora" -red')['total'] == 1       # comillas y operadores se ignoran
+    assert _buscar('usuario2', q='impresora')['total'] == 1
+
+
+def test_paginacion(bd_prueba):
+    bd_prueba(0)
+    for i in range(7):
+        _registro("usuario1", f"Soporte equipo {i}")
+    paginas = [_buscar('usuario1', q='equipo', pagina=str(p), por_pagina='3') for p in (1, 2, 3, 4)]
+    assert [len(p['resultados']) for p in paginas] == [3, 3, 1, 0]
+    assert {p['paginas'] for p in paginas} == {3}
+    ids = [r['id'] for p in paginas for r in p['resultados']]
+    assert len(set(ids)) == 7
+
+    with pytest.raises(ValueError):
+        parametros_busqueda(lambda nombre: {'q': '  ¿? '}.get(nombre))
+    with pytest.raises(ValueError):
+        parametros_busqueda(lambda nombre: {'q': 'x', 'pagina': '0'}.get(nombre))
+
+
+def test_indice_sincronizado(bd_prueba):
+    bd_prueba(0)
+    nuevo_id = _registro("usuario1", "Configurar correo")
+    assert database.actualizar_registro(nuevo_id, {"DESCRIPCIÓN": "Configurar escáner", "DEPENDENCIA": "BIBLIOTECA"},
+                                        'usuario1')
+    assert _buscar('admin', q='correo')['total'] == 0
+    assert _buscar('admin', q='escaner biblioteca')['total'] == 1
+    assert database.eliminar_registro(nuevo_id, 'usuario1')
+    assert _buscar('admin', q='escaner')['total'] == 0
+
+    conn = sqlite3.connect(database.DB_FILE)
+    conn.execute("INSERT INTO registros_fts (registros_fts) VALUES ('integrity-check')")
+    conn.close()
+
+
+def test_migracion_indexa_lo_existente(bd_antigua):
+    bd_antigua(8)
+    database_setup.init_db()
+    assert _buscar('admin', q='solicitante 3')['resultados'][0]['solicitante'] == "Solicitante 3"
+
+
+def test_endpoint_buscar(bd_prueba):
+    bd_prueba(0)
+    _registro("usuario1", "Mantenimiento de servidor")
+    from app import app
+
+    cliente = app.test_client()
+    assert cliente.get('/api/buscar?q=servidor').status_code == 401
+    with cliente.session_transaction() as sesion:
+        sesion['usuario'] = 'usuario1'
+    assert cliente.get('/api/buscar?q=servidor&pagina=x').status_code == 400
+    datos = cliente.get('/api/buscar?q=servidor').get_json()
+    assert datos['total'] == 1
+    assert datos['resultados'][0]['resaltado']['descripcion'] == "Mantenimiento de <mark>servidor</mark>"
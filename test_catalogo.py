@@ -0,0 +1,63 @@
+"""
+Prueba del esquema normalizado: migración de la tabla registros con textos repetidos
+a registros_datos + catálogo, sin cambios en lo que leen cargar_registros y compañía.
+"""
+
+import sqlite3
+
+import pandas as pd
+
+import database
+import database_setup
+
+
+def test_migracion_conserva_lecturas(bd_antigua):
+    db_file = bd_antigua(40)
+    antes = database.cargar_registros()
+    filtrados_antes = list(database.iterar_registros(actividad='Actividad 1', orden=('fecha', 'id')))
+
+    database_setup.init_db()
+    database_setup.init_db()        # idempotente: ya es vista
+
+    pd.testing.assert_frame_equal(database.cargar_registros(), antes)
+    assert list(database.iterar_registros(actividad='Actividad 1', orden=('fecha', 'id'))) == filtrados_antes
+
+    conn = sqlite3.connect(db_file)
+    assert conn.execute("SELECT type FROM sqlite_master WHERE name = 'registros'").fetchone()[0] == 'view'
+    # Cada texto una sola vez: 3 actividades, ALCALDÍA + BIBLIOTECA (de listas_globales), tipo y medio
+    catalogo = conn.execute("SELECT tipo, COUNT(*) FROM catalogo GROUP BY tipo ORDER BY tipo").fetchall()
+    assert catalogo == [('actividad', 3), ('medio_solicitud', 1), ('tipo_solicitud', 1), ('ubicacion', 2)]
+    assert conn.execute("SELECT COUNT(*) FROM registros_datos WHERE dependencia_id IS NULL").fetchone()[0] == 10
+    conn.close()
+
+    nuevo_id = database.guardar_registro({"USUARIO": "usuario1", "TIPO DE ACTIVIDAD": "Actividad 1",
+                                          "FECHA": "2024-03-01", "DEPENDENCIA": "BIBLIOTECA"})
+    assert nuevo_id == 41
+
+
+def test_escrituras_usan_el_catalogo(bd_prueba):
+    bd_prueba(6)
+    nuevo_id = database.guardar_registro({"USUARIO": "usuario1", "TIPO DE ACTIVIDAD": "Nueva",
+                                          "FECHA": "2024-02-01", "CUMPLIDO": "No"})
+    assert database.actualizar_registro(nuevo_id, {"TIPO DE ACTIVIDAD": "Actividad 0", "CUMPLIDO": "Sí"}, 'usuario1')
+
+    df = database.cargar_registros()
+    fila = df[df['ID'] == nuevo_id].iloc[0]
+    assert (fila['TIPO DE ACTIVIDAD'], fila['CUMPLIDO'], fila['DEPENDENCIA']) == ("Actividad 0", "Sí", "")
+
+    conn = sqlite3.connect(database.DB_FILE)
+    valores = [v for (v,) in conn.execute("SELECT valor FROM catalogo WHERE tipo = 'actividad' ORDER BY valor")]
+    assert valores == ["Actividad 0", "Actividad 1", "Actividad 2", "Nueva"]
+
+    # SQL directo sobre la vista (scripts antiguos) pasa por los triggers
+    conn.execute("INSERT INTO registros (usuario, tipo_actividad, dependencia) VALUES ('usuario2', 'Script', 'ALCALDÍA')")
+    conn.execute("UPDATE registros SET tipo_actividad = 'Actividad 2' WHERE tipo_actividad = 'Script'")
+    conn.commit()
+    assert conn.execute("SELECT COUNT(*) FROM registros WHERE tipo_actividad = 'Actividad 2'").fetchone()[0] == 3
+    conn.execute("DELETE FROM registros WHERE usuario = 'usuario2' AND solicitante IS NULL")
+    conn.commit()
+    assert conn.execute("SELECT COUNT(*) FROM registros_datos").fetchone()[0] == 7
+    conn.close()
+
+    assert database.eliminar_registro(nuevo_id, 'usuario1')
+    assert len(database.cargar_registros()) == 6
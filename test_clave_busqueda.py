@@ -0,0 +1,104 @@
+"""
+Prueba de la clave de búsqueda plegada: calculada al escribir, completada al migrar,
+usada por los filtros de texto (sin tildes ni mayúsculas) a través del índice trigram.
+"""
+
+import sqlite3
+
+import database
+import database_setup
+from records_api import generar_ndjson_stream, parametros_api
+from utils import plegar_texto
+
+
+def _guardar(actividad, dependencia, solicitante="", descripcion=""):
+    return database.guardar_registro({
+        "USUARIO": "usuario1", "TIPO DE ACTIVIDAD": actividad, "FECHA": "2024-02-01 08:00:00",
+        "DEPENDENCIA": dependencia, "SOLICITANTE": solicitante, "DESCRIPCIÓN": descripcion
+    })
+
+
+def _clave(id_registro):
+    conn = sqlite3.connect(database.DB_FILE)
+    clave = conn.execute("SELECT clave_busqueda FROM registros_datos WHERE id = ?", (id_registro,)).fetchone()[0]
+    conn.close()
+    return clave
+
+
+def test_plegar_texto():
+    assert plegar_texto("  GESTIÓN \t Predial ") == "gestion predial"
+    assert plegar_texto("Alcaldía / Pingüino / AÑO") == "alcaldia / pinguino / ano"
+    assert plegar_texto(None) == ""
+
+
+def test_clave_al_escribir_y_filtros(bd_prueba):
+    bd_prueba(0)
+    primero = _guardar("GESTIÓN PREDIAL", "ALCALDÍA", "José Núñez", "Avalúo   catastral")
+    _guardar("GESTION PREDIAL", "Secretaría de Hacienda", "Maria")
+    _guardar("Soporte", "Biblioteca", "Ana", "Impresora")
+    assert _clave(primero) == "gestion predial | alcaldia | jose nunez | avaluo catastral"
+
+    assert len(database.cargar_registros(texto="gestión predial")) == 2
+    assert len(database.cargar_registros(texto="PREDIAL alcaldia")) == 1
+    assert len(database.cargar_registros(texto="nuñez")) == 1
+    assert len(database.cargar_registros(texto="hacien")) == 1          # subcadena
+    assert database.resumir_registros(texto="impresora biblioteca")['total'] == 1
+    assert len(database.cargar_registros(texto="100%")) == 0            # comodines de LIKE no aplican
+
+    # Editar recalcula la clave (también si cambia un valor de catálogo)
+    assert database.actualizar_registro(primero, {"DEPENDENCIA": "Biblioteca", "DESCRIPCIÓN": "Visita"}, 'usuario1')
+    assert _clave(primero) == "gestion predial | biblioteca | jose nunez | visita"
+    assert len(database.cargar_registros(texto="avaluo")) == 0
+
+    conn = sqlite3.connect(database.DB_FILE)
+    plan = " ".join(fila[3] for fila in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT rowid FROM registros_clave WHERE clave_busqueda LIKE '%predial%'"
+    ))
+    assert "VIRTUAL TABLE INDEX" in plan
+    conn.close()
+
+    parametros = parametros_api('usuario1', lambda nombre: {'q': 'Biblióteca'}.get(nombre))
+    lineas = b"".join(generar_ndjson_stream(parametros)).splitlines()
+    assert len(lineas) == 2
+
+
+def test_migracion_completa_claves(bd_antigua):
+    db_file = bd_antigua(6)
+    database_setup.init_db()
+
+    conn = sqlite3.connect(db_file)
+    assert conn.execute("SELECT COUNT(*) FROM registros_datos WHERE clave_busqueda IS NULL").fetchone()[0] == 0
+    # SQL directo sobre la vista deja la clave pendiente; el siguiente inicio la completa
+    conn.execute("INSERT INTO registros (usuario, tipo_actividad, dependencia) VALUES ('u', 'Capacitación', 'ALCALDÍA')")
+    conn.commit()
+    conn.close()
+    database_setup.init_db()
+    assert len(database.cargar_registros(texto="capacitacion")) == 1
+    assert len(database.cargar_registros(texto="alcaldia")) == 4
+
+
+def test_escrituras_directas_completan_clave_y_version(bd_prueba, tmp_path, monkeypatch):
+    import database_sqlite
+    import migrate_excel_to_sqlite
+    import pandas as pd
+
+    db_file = bd_prueba(0)
+    excel = tmp_path / "actividades.xlsx"
+    pd.DataFrame({"USUARIO": ["usuario1", "usuario2"], "TIPO DE ACTIVIDAD": ["Capacitación", "Soporte"],
+                  "FECHA": ["2024-01-02", "2024-01-03"], "DEPENDENCIA": ["ALCALDÍA", "Biblioteca"]}
+                 ).to_excel(excel, index=False)
+    monkeypatch.setattr(migrate_excel_to_sqlite, "DB_FILE", db_file)
+    monkeypatch.setattr(migrate_excel_to_sqlite, "EXCEL_FILE", str(excel))
+    monkeypatch.setattr(migrate_excel_to_sqlite, "USERS_FILE", str(tmp_path / "no_existe.json"))
+    monkeypatch.setattr(migrate_excel_to_sqlite, "CONFIG_FILE", str(tmp_path / "no_existe.json"))
+    migrate_excel_to_sqlite.migrate_data()
+
+    assert _clave(1) == "capacitacion | alcaldia"
+    assert len(database.cargar_registros(texto="capacitacion")) == 1
+    assert database.obtener_versiones_datos() == {"usuario1": 1, "usuario2": 1}
+
+    monkeypatch.setattr(database_sqlite, "DB_NAME", db_file)
+    nuevo = database_sqlite.guardar_registro({"USUARIO": "usuario1", "TIPO DE ACTIVIDAD": "Reunión",
+                                              "FECHA": "2024-01-04", "DEPENDENCIA": "Hacienda"})
+    assert _clave(nuevo) == "reunion | hacienda"
+    assert database.obtener_versiones_datos()["usuario1"] == 2
@@ -0,0 +1,53 @@
+"""
+Prueba de la compresión de respuestas (negociación, umbral y streaming).
+"""
+
+import gzip
+
+import compression
+from compression import codificacion_para, comprimir, comprimir_stream, elegir_codificacion
+
+
+def test_negociacion_y_umbral():
+    assert elegir_codificacion('gzip, deflate') == 'gzip'
+    assert elegir_codificacion('gzip;q=0, identity') is None
+    assert elegir_codificacion('') is None
+    assert elegir_codificacion('*') in ('br', 'gzip')
+    if compression.brotli is None:
+        assert elegir_codificacion('br') is None
+
+    assert codificacion_para('gzip', 'text/html; charset=utf-8', 5000) == 'gzip'
+    assert codificacion_para('gzip', 'text/html; charset=utf-8', 10) is None
+    assert codificacion_para('gzip', 'application/pdf', 5000) is None
+    assert codificacion_para('gzip', 'text/csv') == 'gzip'  # stream: tamaño desconocido
+
+
+def test_cuerpo_y_stream_gzip():
+    cuerpo = b"<option>actividad</option>" * 500
+    comprimido = comprimir(cuerpo, 'gzip')
+    assert gzip.decompress(comprimido) == cuerpo
+    assert comprimir(cuerpo, 'gzip') is comprimido  # servido desde el cache
+
+    bloques = list(comprimir_stream(iter([b"a;b\n" * 100, "", "c;d\n" * 100]), 'gzip'))
+    assert len(bloques) >= 2
+    assert gzip.decompress(b"".join(bloques)) == b"a;b\n" * 100 + b"c;d\n" * 100
+
+
+def test_flask_html_y_exportacion_csv(bd_prueba):
+    bd_prueba(50)
+    from app import app
+
+    cliente = app.test_client()
+    respuesta = cliente.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert respuesta.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in respuesta.headers['Vary']
+    assert b"<html" in gzip.decompress(respuesta.data).lower()
+
+    assert 'Content-Encoding' not in cliente.get('/').headers
+
+    with cliente.session_transaction() as sesion:
+        sesion['usuario'] = 'admin'
+    respuesta = cliente.post('/exportar', data={'formato': 'csv'}, headers={'Accept-Encoding': 'gzip'})
+    assert respuesta.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in respuesta.headers
+    assert gzip.decompress(respuesta.data).decode('utf-8-sig').count('\n') == 51
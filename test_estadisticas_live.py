@@ -0,0 +1,162 @@
+"""
+Prueba de las actualizaciones en vivo del dashboard: deltas publicados al escribir,
+resincronización por versión y stream SSE del servidor con hilos.
+"""
+
+import http.client
+import json
+import multiprocessing
+import threading
+
+import app_web
+import html_utils
+import database
+import eventos
+import templates
+from export_service import obtener_estadisticas_versionadas
+
+
+def _siguiente_estadisticas(suscripcion):
+    evento = suscripcion.siguiente(2)
+    while evento is not None and evento.tipo != 'estadisticas':
+        evento = suscripcion.siguiente(2)
+    assert evento is not None
+    return evento.datos
+
+
+def test_escrituras_publican_deltas_con_version(bd_prueba):
+    bd_prueba(0)
+    suscripcion = eventos.bus.suscribir_hilo('usuario1')
+    try:
+        nuevo_id = database.guardar_registro({
+            "USUARIO": "usuario1", "TIPO DE ACTIVIDAD": "Soporte", "FECHA": "2024-02-01 09:00:00",
+            "CUMPLIDO": "No"
+        })
+        datos = _siguiente_estadisticas(suscripcion)
+        assert datos['versiones'] == {'usuario1': 1}
+        assert datos['cambios'] == [{'signo': 1, 'usuario': 'usuario1', 'actividad': 'Soporte',
+                                     'cumplido': 'No', 'fecha': '2024-02-01 09:00:00'}]
+
+        assert database.actualizar_registro(nuevo_id, {"CUMPLIDO": "Sí"}, 'usuario1')
+        datos = _siguiente_estadisticas(suscripcion)
+        assert datos['versiones'] == {'usuario1': 2}
+        assert [(c['signo'], c['cumplido']) for c in datos['cambios']] == [(-1, 'No'), (1, 'Sí')]
+
+        # Una edición que no toca las estadísticas solo avanza la versión
+        assert database.actualizar_registro(nuevo_id, {"OBSERVACIONES": "ok"}, 'usuario1')
+        datos = _siguiente_estadisticas(suscripcion)
+        assert datos == {'versiones': {'usuario1': 3}, 'cambios': []}
+
+        assert database.eliminar_registro(nuevo_id, 'usuario1')
+        datos = _siguiente_estadisticas(suscripcion)
+        assert datos['versiones'] == {'usuario1': 4}
+        assert [(c['signo'], c['cumplido']) for c in datos['cambios']] == [(-1, 'Sí')]
+    finally:
+        suscripcion.cerrar()
+
+
+def test_deltas_solo_para_el_usuario_y_admin(monkeypatch, bd_prueba):
+    bd_prueba(0)
+    monkeypatch.setattr(eventos.bus, '_cupos_hilos', threading.BoundedSemaphore(2))
+    ajena = eventos.bus.suscribir_hilo('usuario2')
+    admin = eventos.bus.suscribir_hilo('admin')
+    try:
+        database.guardar_registro({"USUARIO": "usuario1", "TIPO DE ACTIVIDAD": "Soporte",
+                                   "FECHA": "2024-02-01", "CUMPLIDO": "Sí"})
+        assert _siguiente_estadisticas(admin)['versiones'] == {'usuario1': 1}
+        assert ajena.siguiente(0.2) is None
+    finally:
+        ajena.cerrar()
+        admin.cerrar()
+
+
+def test_estadisticas_versionadas(bd_prueba):
+    bd_prueba(6)
+
+    stats = obtener_estadisticas_versionadas('admin')
+    version = sum(stats['versiones'].values())
+    assert stats['total_registros'] == 6
+    assert stats['chart_linea']['fechas'][0] == '2024-01-01'
+    assert sum(u['cumplidos'] for u in stats['usuarios']) == 6
+
+    # Sin cambios no se recalcula
+    assert obtener_estadisticas_versionadas('admin', version=version) is None
+    database.guardar_registro({"USUARIO": "usuario1", "TIPO DE ACTIVIDAD": "Soporte",
+                               "FECHA": "2024-02-01 08:00:00", "CUMPLIDO": "Sí"})
+    assert obtener_estadisticas_versionadas('admin', version=version)['total_registros'] == 7
+
+
+def test_sse_en_servidor_con_hilos(monkeypatch, bd_prueba):
+    bd_prueba(0)
+    monkeypatch.setattr(eventos.bus, '_cupos_hilos', threading.BoundedSemaphore(1))
+    servidor = app_web.ServidorConcurrente(('127.0.0.1', 0))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    try:
+        conexion = http.client.HTTPConnection('127.0.0.1', servidor.server_port, timeout=5)
+        conexion.request('GET', '/eventos', headers={'Cookie': 'usuario=usuario1'})
+        respuesta = conexion.getresponse()
+        assert respuesta.status == 200
+        assert respuesta.getheader('Content-Type').startswith('text/event-stream')
+        assert respuesta.fp.readline() == b'D\r\n'          # bloque "retry: 3000\n\n"
+
+        # El único cupo está ocupado: el segundo stream se rechaza
+        otra = http.client.HTTPConnection('127.0.0.1', servidor.server_port, timeout=5)
+        otra.request('GET', '/eventos', headers={'Cookie': 'usuario=usuario1'})
+        assert otra.getresponse().status == 503
+        otra.close()
+
+        database.guardar_registro({"USUARIO": "usuario1", "TIPO DE ACTIVIDAD": "Soporte",
+                                   "FECHA": "2024-02-01", "CUMPLIDO": "Sí"})
+        recibido = b''
+        while b'event: estadisticas' not in recibido:
+            recibido += respuesta.fp.readline()
+        linea_datos = respuesta.fp.readline()
+        assert json.loads(linea_datos.split(b'data: ', 1)[1])['versiones'] == {'usuario1': 1}
+        conexion.close()
+    finally:
+        servidor.apagar(timeout=1)
+
+
+def test_filtro_de_fechas_no_inyecta_script(bd_prueba):
+    bd_prueba(3)
+    servidor = app_web.ServidorConcurrente(('127.0.0.1', 0))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    try:
+        conexion = http.client.HTTPConnection('127.0.0.1', servidor.server_port, timeout=5)
+        conexion.request('GET', "/estadisticas?fecha_inicio=%27%3Balert(1)%2F%2F&fecha_fin=2024-01-31",
+                         headers={'Cookie': 'usuario=admin'})
+        respuesta = conexion.getresponse()
+        html = respuesta.read().decode('utf-8')
+        assert respuesta.status == 200
+        assert 'alert(1)' not in html
+        assert 'const filtro = {"inicio": "", "fin": "2024-01-31"};' in html
+        conexion.close()
+    finally:
+        servidor.apagar(timeout=1)
+
+    assert html_utils.json_script({'u': '</script><script>x'}) == '{"u": "\\u003c/script>\\u003cscript>x"}'
+
+
+def _guardar_en_otro_proceso():
+    database.guardar_registro({"USUARIO": "usuario1", "TIPO DE ACTIVIDAD": "Soporte",
+                               "FECHA": "2024-02-01", "CUMPLIDO": "Sí"})
+
+
+def test_sondeo_trae_cambios_de_otro_proceso(bd_prueba):
+    bd_prueba(0)
+    suscripcion = eventos.bus.suscribir_hilo('usuario1')
+    try:
+        version = sum(obtener_estadisticas_versionadas('usuario1')['versiones'].values())
+        # Otro worker: su bus no es el de este proceso
+        proceso = multiprocessing.get_context('fork').Process(target=_guardar_en_otro_proceso)
+        proceso.start()
+        proceso.join(10)
+        assert proceso.exitcode == 0
+        assert suscripcion.siguiente(0.2) is None
+
+        stats = obtener_estadisticas_versionadas('usuario1', version=version)
+        assert stats['versiones'] == {'usuario1': 1} and stats['total_registros'] == 1
+        assert obtener_estadisticas_versionadas('usuario1', version=1) is None
+    finally:
+        suscripcion.cerrar()
+    assert 'const SONDEO_MS = 10000;' in templates.ESTADISTICAS_TEMPLATE
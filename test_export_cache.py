@@ -0,0 +1,69 @@
+"""
+Prueba del cache de informes direccionado por contenido.
+Usa una base de datos SQLite y un directorio de cache temporales.
+"""
+
+import os
+
+import database
+import export_cache
+
+FILTROS = {'fecha_inicio': None, 'fecha_fin': None, 'usuario': 'usuario1', 'actividad': None}
+
+
+def test_cache_reutiliza_e_invalida_por_version(tmp_path, monkeypatch, bd_prueba):
+    bd_prueba(10)
+    monkeypatch.setattr(export_cache, "EXPORT_CACHE_DIR", str(tmp_path / "cache"))
+
+    primera = export_cache.obtener_informe(FILTROS, 'detallado', {'nro': '1'})
+    assert export_cache.obtener_informe(FILTROS, 'detallado', {'nro': '1'}) == primera
+    # Otros datos del contrato → otro informe
+    assert export_cache.obtener_informe(FILTROS, 'detallado', {'nro': '2'}) != primera
+
+    # Un registro nuevo del usuario cambia la versión de sus datos
+    version = database.obtener_version_datos('usuario1')
+    database.guardar_registro({"USUARIO": "usuario1", "TIPO DE ACTIVIDAD": "Nueva", "FECHA": "2024-02-01 08:00:00"})
+    assert database.obtener_version_datos('usuario1') == version + 1
+    assert export_cache.obtener_informe(FILTROS, 'detallado', {'nro': '1'}) != primera
+
+    # Los datos de otro usuario no invalidan sus informes
+    clave = export_cache.clave_informe(FILTROS, 'detallado', {'nro': '1'})
+    database.guardar_registro({"USUARIO": "usuario2", "TIPO DE ACTIVIDAD": "Nueva", "FECHA": "2024-02-01 08:00:00"})
+    assert export_cache.clave_informe(FILTROS, 'detallado', {'nro': '1'}) == clave
+
+
+def test_desalojo_lru(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_cache, "EXPORT_CACHE_DIR", str(tmp_path))
+    for i, nombre in enumerate(['a', 'b', 'c']):
+        ruta = tmp_path / f"{nombre}.xlsx"
+        ruta.write_bytes(b"x" * 100)
+        os.utime(ruta, (1000 + i, 1000 + i))
+
+    # 'a' es la más antigua, pero se usa de nuevo y pasa a ser la más reciente
+    assert export_cache.buscar('a')
+    export_cache.desalojar(max_bytes=200)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['a.xlsx', 'c.xlsx']
+    assert export_cache.buscar('b') is None
+
+
+def test_desalojo_respeta_informes_en_uso(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_cache, "EXPORT_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(export_cache, "EXPORT_CACHE_MAX_MB", 0)
+    for nombre in ('a', 'b'):
+        (tmp_path / f"{nombre}.xlsx").write_bytes(b"x" * 100)
+    os.utime(tmp_path / "a.xlsx", (1000, 1000))
+
+    # 'b' acaba de entregarse a una descarga: el cache se excede antes que borrarla
+    ruta = export_cache.buscar('b')
+    export_cache.guardar('c', _generado(tmp_path))
+    assert os.path.exists(ruta)
+    assert sorted(p.name for p in tmp_path.iterdir() if p.suffix == '.xlsx') == ['b.xlsx', 'c.xlsx']
+    export_cache.desalojar(max_bytes=0)
+    assert os.path.exists(ruta)
+
+
+def _generado(tmp_path):
+    ruta = tmp_path / ".generando_c.xlsx"
+    ruta.write_bytes(b"x" * 100)
+    return str(ruta)
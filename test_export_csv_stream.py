@@ -0,0 +1,36 @@
+"""
+Prueba de la exportación CSV por bloques (sin archivos temporales).
+Usa una base de datos SQLite temporal para no tocar actividades.db.
+"""
+
+import csv
+import io
+
+from config import COLUMNAS
+from export_service import generar_csv_stream
+
+
+def test_csv_stream_por_bloques(bd_prueba):
+    bd_prueba(25)
+
+    stream = generar_csv_stream(chunk_size=10)
+    bloques = list(stream)
+    # Encabezado + 25 filas en bloques de 10 → 3 bloques
+    assert len(bloques) == 3
+
+    filas = list(csv.reader(io.StringIO(b"".join(bloques).decode("utf-8"))))
+    assert filas[0] == COLUMNAS
+    assert len(filas) == 26
+    actividades = [f[2] for f in filas[1:]]
+    assert actividades == sorted(actividades)
+
+
+def test_csv_stream_filtros_y_vacio(bd_prueba):
+    bd_prueba(10)
+
+    stream = generar_csv_stream(usuario="usuario1", fecha_inicio="2024-01-05")
+    filas = list(csv.reader(io.StringIO(b"".join(stream).decode("utf-8"))))[1:]
+    assert filas
+    assert all(f[1] == "usuario1" and f[3] >= "2024-01-05" for f in filas)
+
+    assert generar_csv_stream(usuario="nadie") is None
@@ -0,0 +1,132 @@
+"""
+Prueba de las exportaciones en segundo plano.
+Usa una base de datos SQLite y un directorio de trabajos temporales.
+"""
+
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import app_web
+import export_cache
+import export_jobs
+
+
+def _esperar(job_id, timeout=30):
+    limite = time.time() + timeout
+    while time.time() < limite:
+        trabajo = export_jobs.obtener_trabajo(job_id)
+        if trabajo['estado'] not in export_jobs.ESTADOS_ACTIVOS:
+            return trabajo
+        time.sleep(0.1)
+    raise AssertionError("El trabajo no terminó a tiempo")
+
+
+def test_trabajo_excel_y_descarga(tmp_path, monkeypatch, bd_prueba):
+    bd_prueba(20)
+    monkeypatch.setattr(export_jobs, "EXPORT_JOBS_DIR", str(tmp_path / "exportaciones"))
+    monkeypatch.setattr(export_cache, "EXPORT_CACHE_DIR", str(tmp_path / "cache"))
+
+    filtros = {'fecha_inicio': None, 'fecha_fin': None, 'usuario': 'usuario1', 'actividad': None}
+    trabajo = export_jobs.enviar_exportacion('usuario1', filtros, 'excel', 'detallado', {'nro': '1'})
+    trabajo = _esperar(trabajo['id'])
+
+    assert trabajo['estado'] == export_jobs.ESTADO_LISTO
+    assert trabajo['filename'].endswith('.xlsx')
+    with open(trabajo['ruta'], 'rb') as f:
+        assert f.read(2) == b'PK'
+
+    publico = export_jobs.estado_publico(trabajo)
+    assert publico['descarga_url'] == f"/exportar/descargar?id={trabajo['id']}"
+    assert export_jobs.puede_ver(trabajo, 'usuario1')
+    assert export_jobs.puede_ver(trabajo, 'admin')
+    assert not export_jobs.puede_ver(trabajo, 'usuario2')
+
+
+def test_trabajo_sin_datos_y_expiracion(tmp_path, monkeypatch, bd_prueba):
+    bd_prueba(5)
+    monkeypatch.setattr(export_jobs, "EXPORT_JOBS_DIR", str(tmp_path / "exportaciones"))
+
+    filtros = {'fecha_inicio': None, 'fecha_fin': None, 'usuario': 'nadie', 'actividad': None}
+    trabajo = _esperar(export_jobs.enviar_exportacion('nadie', filtros, 'csv')['id'])
+    assert trabajo['estado'] == export_jobs.ESTADO_ERROR
+    assert trabajo['mensaje'] == 'No hay datos para exportar'
+
+    monkeypatch.setattr(export_jobs, "EXPORT_JOB_TTL", -1)
+    assert export_jobs.obtener_trabajo(trabajo['id']) is None
+    assert not list((tmp_path / "exportaciones").iterdir())
+
+
+def _trabajo_ajeno(tmp_path, pid, latido, clave):
+    """Estado de un trabajo activo escrito por otro worker"""
+    trabajo = {'id': 'a' * 32, 'clave': clave, 'estado': export_jobs.ESTADO_EN_PROCESO, 'progreso': 10,
+               'mensaje': 'Consultando registros', 'solicitantes': ['usuario2'], 'creado': time.time() - 60,
+               'pid': pid, 'latido': latido, 'terminado': None, 'ruta': None}
+    export_jobs._guardar_trabajo(trabajo)
+    return trabajo
+
+
+def test_deduplicacion_entre_workers_y_trabajos_abandonados(tmp_path, monkeypatch, bd_prueba):
+    bd_prueba(5)
+    monkeypatch.setattr(export_jobs, "EXPORT_JOBS_DIR", str(tmp_path / "exportaciones"))
+    filtros = {'fecha_inicio': None, 'fecha_fin': None, 'usuario': None, 'actividad': None}
+    clave = export_jobs.clave_exportacion(filtros, 'csv', 'detallado', None)
+
+    # Otro worker vivo (el proceso padre sirve de ejemplo) con el mismo trabajo en curso: se reutiliza
+    _trabajo_ajeno(tmp_path, os.getppid(), time.time(), clave)
+    trabajo = export_jobs.enviar_exportacion('usuario1', filtros, 'csv')
+    assert trabajo['id'] == 'a' * 32
+    assert export_jobs.obtener_trabajo(trabajo['id'])['solicitantes'] == ['usuario2', 'usuario1']
+
+    # Su worker murió: el trabajo queda fallido y la solicitud idéntica genera uno nuevo
+    muerto = subprocess.Popen([sys.executable, "-c", "pass"])
+    muerto.wait()
+    _trabajo_ajeno(tmp_path, muerto.pid, time.time(), clave)
+    nuevo = export_jobs.enviar_exportacion('usuario1', filtros, 'csv')
+    assert nuevo['id'] != 'a' * 32
+    assert export_jobs.obtener_trabajo('a' * 32)['estado'] == export_jobs.ESTADO_ERROR
+    assert _esperar(nuevo['id'])['estado'] == export_jobs.ESTADO_LISTO
+
+    # Worker vivo pero sin latidos recientes (colgado o en otra máquina)
+    _trabajo_ajeno(tmp_path, os.getppid(), time.time() - export_jobs.LATIDO_VENCIDO - 1, clave)
+    assert export_jobs.obtener_trabajo('a' * 32)['estado'] == export_jobs.ESTADO_ERROR
+
+
+def test_rutas_de_trabajos_en_servidor_con_hilos(tmp_path, monkeypatch, bd_prueba):
+    bd_prueba(5)
+    monkeypatch.setattr(export_jobs, "EXPORT_JOBS_DIR", str(tmp_path / "exportaciones"))
+    servidor = app_web.ServidorConcurrente(('127.0.0.1', 0))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    cookie = {'Cookie': 'usuario=usuario1'}
+    try:
+        conexion = http.client.HTTPConnection('127.0.0.1', servidor.server_port, timeout=5)
+        conexion.request('GET', '/exportar/trabajos', headers=cookie)
+        respuesta = conexion.getresponse()
+        respuesta.read()
+        assert respuesta.status == 405 and respuesta.getheader('Allow') == 'POST'
+
+        conexion.request('POST', '/exportar/trabajos', body='formato=csv', headers={
+            **cookie, 'Content-Type': 'application/x-www-form-urlencoded'})
+        respuesta = conexion.getresponse()
+        assert respuesta.status == 202
+        job_id = json.loads(respuesta.read())['id']
+        assert _esperar(job_id)['estado'] == export_jobs.ESTADO_LISTO
+
+        conexion.request('GET', f'/exportar/trabajo?id={job_id}', headers=cookie)
+        respuesta = conexion.getresponse()
+        assert json.loads(respuesta.read())['estado'] == export_jobs.ESTADO_LISTO
+
+        conexion.request('GET', '/exportar/trabajo?id=inexistente', headers=cookie)
+        respuesta = conexion.getresponse()
+        respuesta.read()
+        assert respuesta.status == 404
+
+        conexion.request('GET', f'/exportar/descargar?id={job_id}', headers=cookie)
+        respuesta = conexion.getresponse()
+        assert respuesta.status == 200 and respuesta.read().startswith(b'ID,USUARIO')
+    finally:
+        servidor.apagar(timeout=1)
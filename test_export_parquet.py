@@ -0,0 +1,40 @@
+"""
+Prueba de la exportación Parquet (tipos, categóricas y un row group por mes).
+"""
+
+import io
+
+import pandas as pd
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+import database
+from export_parquet import generar_parquet_stream
+
+
+def test_parquet_tipado_y_por_mes(bd_prueba):
+    # 30 registros en enero (ver bd_prueba en conftest.py) y 2 en febrero
+    bd_prueba(30)
+    for dia in (1, 2):
+        database.guardar_registro({"USUARIO": "usuario1", "TIPO DE ACTIVIDAD": "Actividad 0",
+                                   "FECHA": f"2024-02-{dia:02d} 09:30:00", "DEPENDENCIA": "PERSONERÍA"})
+
+    archivo = pq.ParquetFile(io.BytesIO(b"".join(generar_parquet_stream(chunk_size=7))))
+    assert archivo.metadata.num_rows == 32
+    assert archivo.metadata.num_row_groups == 2
+    assert archivo.metadata.row_group(1).num_rows == 2
+
+    esquema = archivo.schema_arrow
+    assert str(esquema.field('FECHA').type) == 'timestamp[ms]'
+    assert str(esquema.field('DEPENDENCIA').type).startswith('dictionary')
+
+    df = archivo.read().to_pandas()
+    assert df['FECHA'].is_monotonic_increasing
+    assert df['FECHA'].iloc[-1] == pd.Timestamp('2024-02-02 09:30:00')
+    assert set(df['DEPENDENCIA'].cat.categories) == {'ALCALDÍA', 'PERSONERÍA'}
+
+
+def test_parquet_sin_datos(bd_prueba):
+    bd_prueba(3)
+    assert generar_parquet_stream(usuario="nadie") is None
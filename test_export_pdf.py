@@ -0,0 +1,40 @@
+"""
+Prueba de la exportación PDF por páginas (estructura válida y salida incremental).
+"""
+
+import re
+import zlib
+
+import pytest
+
+pytest.importorskip("fpdf")
+
+from export_pdf import generar_pdf_stream
+
+
+def test_pdf_por_paginas_con_xref_valido(bd_prueba):
+    bd_prueba(120)
+
+    bloques = list(generar_pdf_stream(contrato_data={'nro': '123', 'nombre': 'Ana Pérez', 'supervisor': 'Luis'},
+                                      chunk_size=17))
+    pdf = b"".join(bloques)
+    assert len(bloques) > 2
+    assert pdf.startswith(b"%PDF")
+    assert pdf.rstrip().endswith(b"%%EOF")
+
+    # Cada entrada del xref apunta al inicio de su objeto
+    inicio_xref = int(re.search(rb"startxref\n(\d+)", pdf).group(1))
+    assert pdf[inicio_xref:inicio_xref + 4] == b"xref"
+    desplazamientos = re.findall(rb"(\d{10}) 00000 n", pdf[inicio_xref:])
+    for numero, desplazamiento in enumerate(desplazamientos, start=1):
+        assert pdf[int(desplazamiento):].startswith(f"{numero} 0 obj".encode())
+
+    contenido = b"".join(zlib.decompress(m) for m in re.findall(rb"stream\n(.*?)\nendstream", pdf, re.S))
+    assert b"TOTAL GENERAL" in contenido
+    assert b"(120)" in contenido
+    assert "SUPERVISOR:".encode("latin-1") in contenido
+
+
+def test_pdf_sin_datos(bd_prueba):
+    bd_prueba(3)
+    assert generar_pdf_stream(usuario="nadie") is None
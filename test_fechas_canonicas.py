@@ -0,0 +1,66 @@
+"""
+Prueba de las fechas canónicas: normalización al migrar (con reporte de rechazadas),
+al escribir, y filtros por rango resueltos en SQL con índice.
+"""
+
+import sqlite3
+
+import pandas as pd
+
+import database
+import database_setup
+
+
+def test_migracion_normaliza_y_reporta(bd_antigua):
+    db_file = bd_antigua(0)
+    conn = sqlite3.connect(db_file)
+    fechas = [("2024-01-05 00:00:00", "nan"), ("05/01/2024", ""), ("2024-01-06T08:30:00.5", "2024-01-07"),
+              ("ayer", None)]
+    conn.executemany("INSERT INTO registros (usuario, fecha, fecha_atencion) VALUES ('u', ?, ?)", fechas)
+    conn.commit()
+    conn.close()
+
+    database_setup.init_db()
+
+    conn = sqlite3.connect(db_file)
+    assert conn.execute("SELECT fecha, fecha_atencion FROM registros ORDER BY id").fetchall() == [
+        ("2024-01-05 00:00:00", None), ("2024-01-05", None), ("2024-01-06 08:30:00", "2024-01-07"), (None, None)
+    ]
+    assert conn.execute("SELECT registro_id, columna, valor FROM fechas_rechazadas").fetchall() == [(4, "fecha", "ayer")]
+    plan = " ".join(fila[3] for fila in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM registros WHERE fecha >= '2024-01-01' AND fecha <= '2024-01-31'"
+    ))
+    assert "idx_registros_fecha" in plan
+    conn.close()
+
+    df = database.cargar_registros()
+    assert pd.api.types.is_datetime64_any_dtype(df['FECHA'])
+    assert pd.api.types.is_datetime64_any_dtype(df['FECHA ATENCIÓN'])
+
+
+def test_filtros_por_rango_como_fechas(bd_prueba):
+    bd_prueba(0)
+    for fecha in ("2024-01-30 23:59:59", "2024-01-31", "2024-01-31 00:00:00", "2024-01-31 08:00:00", "2024-02-01"):
+        assert database.guardar_registro({"USUARIO": "usuario1", "TIPO DE ACTIVIDAD": "A", "FECHA": fecha})
+
+    todas = database.cargar_registros()['FECHA']
+    for inicio, fin in (("2024-01-31", "2024-01-31"), ("2024-01-31 00:00:00", None), (None, "2024-01-31 08:00")):
+        df = database.cargar_registros(fecha_inicio=inicio, fecha_fin=fin)
+        esperado = todas[(todas >= pd.Timestamp(inicio or "1900-01-01")) & (todas <= pd.Timestamp(fin or "2100-01-01"))]
+        assert sorted(df['FECHA']) == sorted(esperado)
+    assert len(database.cargar_registros(fecha_inicio="31/01/2024", fecha_fin="31/01/2024")) == 2
+
+
+def test_escrituras_normalizan_fechas(bd_prueba):
+    bd_prueba(0)
+    nuevo_id = database.guardar_registro({"USUARIO": "usuario1", "FECHA": "31/01/2024 08:05",
+                                          "FECHA ATENCIÓN": ""})
+    assert database.guardar_registro({"USUARIO": "usuario1", "FECHA": "no es fecha"}) is None
+    assert not database.actualizar_registro(nuevo_id, {"FECHA ATENCIÓN": "mañana"}, 'usuario1')
+    assert database.actualizar_registro(nuevo_id, {"FECHA ATENCIÓN": "2024-02-01T10:00"}, 'usuario1')
+
+    conn = sqlite3.connect(database.DB_FILE)
+    assert conn.execute("SELECT fecha, fecha_atencion FROM registros").fetchall() == [
+        ("2024-01-31 08:05:00", "2024-02-01 10:00:00")
+    ]
+    conn.close()
@@ -0,0 +1,56 @@
+"""
+Presupuesto de tiempo de importación: los puntos de entrada (workers de gunicorn,
+servidores y scripts de mantenimiento) no deben cargar pandas, openpyxl, fpdf ni
+pyarrow hasta que una ruta los necesite.
+Se mide en un intérprete nuevo para no contar módulos ya cargados por otras pruebas.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Segundos por punto de entrada; holgado para máquinas de CI lentas
+PRESUPUESTO_IMPORTACION = float(os.environ.get("PRESUPUESTO_IMPORTACION_S", 1.5))
+
+MODULOS_PESADOS = ("pandas", "numpy", "openpyxl", "fpdf", "pyarrow")
+
+_MEDIR = """
+import json, sys, time
+inicio = time.perf_counter()
+import {modulo}
+duracion = time.perf_counter() - inicio
+print(json.dumps({{"duracion": duracion, "cargados": [m for m in {pesados!r} if m in sys.modules]}}))
+"""
+
+
+def _medir_importacion(modulo):
+    entorno = dict(os.environ)
+    entorno.pop("DATABASE_URL", None)
+    salida = subprocess.run(
+        [sys.executable, "-c", _MEDIR.format(modulo=modulo, pesados=MODULOS_PESADOS)],
+        cwd=BASE_DIR, env=entorno, capture_output=True, text=True, timeout=60, check=True
+    )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("modulo", ["app", "app_web", "app_async", "backup_db", "database_setup"])
+def test_importacion_sin_librerias_pesadas(modulo):
+    resultado = _medir_importacion(modulo)
+    assert resultado["cargados"] == []
+    assert resultado["duracion"] < PRESUPUESTO_IMPORTACION, (
+        f"importar {modulo} tomó {resultado['duracion']:.2f}s (presupuesto {PRESUPUESTO_IMPORTACION}s)"
+    )
+
+
+def test_pandas_se_carga_al_usarse(bd_prueba):
+    import database
+
+    bd_prueba(2)
+    df = database.cargar_registros()
+    assert type(df).__module__.startswith("pandas")
+    assert len(df) == 2
@@ -0,0 +1,54 @@
+"""
+Prueba del arranque con preload_app: precalentamiento en el master y
+reinicio del estado por proceso en cada worker (fork).
+"""
+
+import os
+import sys
+
+import pytest
+
+import app
+import eventos
+import export_jobs
+
+
+def test_precalentar_carga_librerias_y_plantillas(bd_prueba):
+    import report_writer
+
+    bd_prueba(2)
+    report_writer.limpiar_cache_plantillas()
+    app.precalentar()
+    assert 'pandas' in sys.modules and 'openpyxl' in sys.modules
+    assert report_writer._PLANTILLAS
+
+
+def test_reiniciar_tras_fork_descarta_estado_heredado():
+    eventos.bus.publicar('prueba', {})
+    instancia = eventos.bus.instancia
+    export_jobs._get_executor()
+
+    app.reiniciar_tras_fork()
+    assert eventos.bus.instancia != instancia
+    assert eventos.bus.pendientes('admin', f"{eventos.bus.instancia}-0") == []
+    assert export_jobs._executor is None
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="requiere fork")
+def test_worker_bifurcado_atiende_solicitudes(bd_prueba):
+    bd_prueba(3)
+    app.precalentar()
+    pid = os.fork()
+    if pid == 0:
+        # Proceso hijo: igual que un worker de gunicorn tras post_fork
+        codigo = 1
+        try:
+            app.reiniciar_tras_fork()
+            cliente = app.app.test_client()
+            with cliente.session_transaction() as sesion:
+                sesion['usuario'] = 'admin'
+            codigo = 0 if cliente.get('/estadisticas/datos').json['total_registros'] == 3 else 1
+        finally:
+            os._exit(codigo)
+    _, estado = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(estado) == 0
@@ -0,0 +1,114 @@
+"""
+Prueba de la API NDJSON de registros y su sincronización incremental.
+"""
+
+import json
+import sqlite3
+
+import pytest
+
+import database
+import database_setup
+import records_api
+from records_api import generar_ndjson_stream, parametros_api, usuario_api
+
+
+def _consultar(usuario_sesion, **query):
+    parametros = parametros_api(usuario_sesion, lambda nombre: query.get(nombre))
+    datos = b"".join(generar_ndjson_stream(parametros, chunk_size=4)).decode('utf-8')
+    return [json.loads(linea) for linea in datos.splitlines()]
+
+
+def test_since_id_filtros_y_limite(bd_prueba):
+    bd_prueba(10)
+
+    todos = _consultar('admin')
+    assert [r['id'] for r in todos] == list(range(1, 11))
+    assert {'id', 'usuario', 'fecha', 'updated_at'} <= set(todos[0])
+
+    assert [r['id'] for r in _consultar('admin', since_id='7')] == [8, 9, 10]
+    assert [r['id'] for r in _consultar('admin', since_id='2', limit='3')] == [3, 4, 5]
+    # Un usuario normal solo ve sus registros aunque pida otro usuario
+    assert {r['usuario'] for r in _consultar('usuario1', usuario='usuario2')} == {'usuario1'}
+
+    with pytest.raises(ValueError):
+        parametros_api('admin', {'since_id': 'x'}.get)
+
+
+def test_updated_since_incluye_ediciones_y_borrados(monkeypatch, bd_prueba):
+    bd_prueba(5)
+    marcas = iter(['2099-03-01 10:00:00', '2099-03-01 10:00:05'])
+    monkeypatch.setattr(database, "_marca_tiempo", lambda: next(marcas))
+
+    database.actualizar_registro(2, {"OBSERVACIONES": "editado"}, "admin")
+    database.eliminar_registro(3, "admin")
+
+    cambios = _consultar('admin', updated_since='2099-03-01T10:00:00Z')
+    assert cambios[0]['id'] == 2 and cambios[0]['observaciones'] == 'editado'
+    assert cambios[1] == {'id': 3, 'eliminado': True, 'updated_at': '2099-03-01 10:00:05'}
+    assert _consultar('admin', updated_since='2099-03-01T10:00:06') == []
+
+
+def _paginar(limite, **query):
+    """Recorre los cambios página a página con el cursor (updated_at, id) de la última línea"""
+    vistos = []
+    for _ in range(20):
+        pagina = _consultar('admin', limit=str(limite), **query)
+        vistos += pagina
+        if len(pagina) < limite:
+            return vistos
+        query = {'updated_since': pagina[-1]['updated_at'], 'since_id': str(pagina[-1]['id'])}
+    raise AssertionError("El cursor no avanza")
+
+
+def test_pagina_llena_no_pierde_borrados(monkeypatch, bd_prueba):
+    bd_prueba(5)
+    marcas = iter(['2099-03-01 10:00:01', '2099-03-01 10:00:02', '2099-03-01 10:00:03'])
+    monkeypatch.setattr(database, "_marca_tiempo", lambda: next(marcas))
+    database.actualizar_registro(1, {"OBSERVACIONES": "t1"}, "admin")
+    database.actualizar_registro(2, {"OBSERVACIONES": "t2"}, "admin")
+    database.eliminar_registro(3, "admin")
+
+    primera = _consultar('admin', updated_since='2099-03-01T10:00:00', limit='2')
+    assert [r['id'] for r in primera] == [1, 2]
+    assert _consultar('admin', updated_since=primera[-1]['updated_at'], since_id=str(primera[-1]['id'])) == [
+        {'id': 3, 'eliminado': True, 'updated_at': '2099-03-01 10:00:03'}
+    ]
+
+
+def test_cursor_avanza_con_marcas_repetidas(monkeypatch, bd_prueba):
+    bd_prueba(0)
+    monkeypatch.setattr(database, "_marca_tiempo", lambda: '2099-03-01 10:00:00')
+    for i in range(7):
+        database.guardar_registro({"USUARIO": "usuario1", "FECHA": "2024-01-01", "SOLICITANTE": f"S{i}"})
+    database.eliminar_registro(4, "admin")
+
+    cambios = _paginar(2, updated_since='2099-03-01T10:00:00')
+    assert [(r['id'], r.get('eliminado', False)) for r in cambios] == [
+        (1, False), (2, False), (3, False), (4, True), (5, False), (6, False), (7, False)
+    ]
+
+
+def test_token_de_integracion(monkeypatch):
+    monkeypatch.setattr(records_api, "API_TOKEN", "secreto")
+    assert usuario_api(None, "Bearer secreto") == 'admin'
+    assert usuario_api(None, "Bearer otro") is None
+    assert usuario_api(None, None) is None
+    assert usuario_api('usuario1', None) == 'usuario1'
+
+
+def test_migracion_agrega_updated_at(tmp_path, monkeypatch):
+    db_file = str(tmp_path / "antigua.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE registros (id INTEGER PRIMARY KEY AUTOINCREMENT, usuario TEXT, "
+                 "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+    conn.execute("INSERT INTO registros (usuario, created_at) VALUES ('u', '2023-05-01 08:00:00')")
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(database_setup, "DB_FILE", db_file)
+    database_setup.init_db()
+
+    conn = sqlite3.connect(db_file)
+    assert conn.execute("SELECT updated_at FROM registros").fetchone()[0] == '2023-05-01 08:00:00'
+    conn.close()
@@ -0,0 +1,67 @@
+"""
+Prueba de la representación liviana de registros (Registro / iterar_filas)
+frente a cargar_registros, que construye un DataFrame.
+"""
+
+import pandas as pd
+
+import database
+from config import COLUMNAS
+from html_utils import generar_tabla_registros_recientes
+
+
+def test_iterar_filas_coincide_con_cargar_registros(bd_prueba):
+    bd_prueba(12)
+    database.guardar_registro({"USUARIO": "usuario1", "TIPO DE ACTIVIDAD": "Sin detalle",
+                               "FECHA": "2024-02-01 08:00:00"})
+
+    filas = list(database.iterar_filas(usuario="usuario1", chunk_size=4))
+    df = database.cargar_registros("usuario1")
+    assert len(filas) == len(df) == 7
+    for registro, (_, fila_df) in zip(filas, df.iterrows()):
+        assert isinstance(registro, tuple)
+        for col in COLUMNAS:
+            if col in database.COLUMNAS_FECHA:
+                # cargar_registros tipa las fechas (datetime64); Registro conserva el texto de la BD
+                assert registro.get(col) == '' or pd.Timestamp(registro.get(col)) == fila_df[col]
+            else:
+                assert registro.get(col) == fila_df[col]
+    # NULL en la BD → '' como en el DataFrame (fillna)
+    assert filas[-1].observaciones == '' and filas[-1].cumplido == ''
+    assert filas[0].get("TIPO DE ACTIVIDAD") == filas[0].tipo_actividad
+    assert filas[0].get("NO EXISTE", None) is None
+
+
+def test_registros_recientes(bd_prueba):
+    bd_prueba(15)
+
+    recientes = database.obtener_registros_recientes("admin", limite=10)
+    assert [r.id for r in recientes] == list(range(15, 5, -1))
+
+    html = generar_tabla_registros_recientes(recientes[:2], "usuario2")
+    assert html.count("<tr>") == 2
+    # Solo el propietario puede eliminar (id 15 es de usuario2, id 14 de usuario1)
+    assert html.count("eliminar_registro_accion") == 1
+    assert "No hay registros" in generar_tabla_registros_recientes([], "admin")
+
+
+def test_cargar_registros_categorico(bd_prueba):
+    from export_service import obtener_estadisticas_exportacion, _preparar_filas_informe
+
+    bd_prueba(30)
+    df = database.cargar_registros()
+    for col in ('USUARIO', 'TIPO DE ACTIVIDAD', 'DEPENDENCIA', 'CUMPLIDO'):
+        assert df[col].dtype == 'category'
+    assert str(df['FECHA'].dtype).startswith('datetime64')
+    # Sembradas con las listas globales aunque no aparezcan en los registros
+    assert set(database.cargar_ubicaciones()) <= set(df['DEPENDENCIA'].cat.categories)
+
+    texto = df.astype({col: object for col in df.columns})
+    assert df.memory_usage(deep=True).sum() < texto.memory_usage(deep=True).sum()
+
+    # Las categorías sin registros no aparecen en las estadísticas ni en los subtotales
+    stats = obtener_estadisticas_exportacion('admin')
+    assert sorted(stats['chart_actividades']['labels']) == ['Actividad 0', 'Actividad 1', 'Actividad 2']
+    assert [u['usuario'] for u in stats['usuarios']] == ['usuario1', 'usuario2']
+    _, tamanos = _preparar_filas_informe(df)
+    assert tamanos == [10, 10, 10]
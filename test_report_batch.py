@@ -0,0 +1,72 @@
+"""
+Prueba del lote de informes por contratista empaquetado en zip.
+Los informes se generan en el mismo proceso (el pool no hereda la BD temporal).
+"""
+
+import io
+import os
+import time
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import export_cache
+import report_batch
+from report_batch import _generar_informes_usuario, empaquetar_zip
+
+
+def test_lote_zip_por_contratista(tmp_path, monkeypatch, bd_prueba):
+    bd_prueba(12)
+    monkeypatch.setattr(export_cache, "EXPORT_CACHE_DIR", str(tmp_path / "cache"))
+
+    resultados = [
+        _generar_informes_usuario(u, None, None, ('detallado', 'final'))
+        for u in ('usuario1', 'usuario2', 'nadie')
+    ]
+    bloques = list(empaquetar_zip(resultados))
+    assert len(bloques) > 1
+
+    zf = zipfile.ZipFile(io.BytesIO(b"".join(bloques)))
+    assert zf.testzip() is None
+    assert sorted(zf.namelist()) == [
+        'ERRORES.txt',
+        'usuario1/Informe_detallado_usuario1.xlsx', 'usuario1/Informe_final_usuario1.xlsx',
+        'usuario2/Informe_detallado_usuario2.xlsx', 'usuario2/Informe_final_usuario2.xlsx'
+    ]
+    assert zf.read('ERRORES.txt').decode('utf-8') == 'nadie: No hay datos para exportar'
+
+
+def test_informes_se_abren_al_terminar(tmp_path):
+    ruta = tmp_path / "informe.xlsx"
+    ruta.write_bytes(b"contenido")
+    informes = report_batch._InformesAbiertos()
+    futuro = Future()
+    futuro.add_done_callback(informes.al_terminar)
+    futuro.set_result(('usuario1', [('usuario1/informe.xlsx', str(ruta))], None))
+
+    # El cache lo desaloja antes de que el zip llegue a este contratista
+    os.remove(ruta)
+    usuario, archivos, error = informes.tomar(futuro)
+    assert (usuario, error) == ('usuario1', None)
+    bloques = list(report_batch.empaquetar_zip([(usuario, archivos, error)]))
+    assert zipfile.ZipFile(io.BytesIO(b"".join(bloques))).read('usuario1/informe.xlsx') == b"contenido"
+
+
+def test_desconexion_no_espera_al_resto_del_lote(tmp_path, monkeypatch):
+    ruta = tmp_path / "informe.xlsx"
+    ruta.write_bytes(b"x" * 10)
+
+    def informes_usuario(usuario, fecha_inicio, fecha_fin, tipos):
+        if usuario != 'usuario1':
+            time.sleep(2)
+        return usuario, [(f"{usuario}/informe.xlsx", str(ruta))], None
+
+    # Hilos en lugar de procesos: la función de prueba no se puede importar desde un proceso spawn
+    monkeypatch.setattr(report_batch, "_generar_informes_usuario", informes_usuario)
+    monkeypatch.setattr(report_batch, "ProcessPoolExecutor",
+                        lambda max_workers, mp_context: ThreadPoolExecutor(max_workers=max_workers))
+
+    lote = report_batch.generar_lote_zip(['usuario1', 'usuario2', 'usuario3', 'usuario4'], max_workers=1)
+    next(lote)
+    inicio = time.perf_counter()
+    lote.close()
+    assert time.perf_counter() - inicio < 1
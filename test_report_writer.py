@@ -0,0 +1,74 @@
+"""
+Prueba del informe detallado escrito en modo streaming (write-only).
+Verifica que no haya límite de filas, que se conserven encabezado y subtotales
+y que la plantilla procesada se reutilice mientras el archivo no cambie.
+"""
+
+import os
+import shutil
+
+import openpyxl
+import pandas as pd
+
+from config import TEMPLATE_EXCEL
+from export_service import generar_informe_template, _preparar_filas_informe
+from report_writer import obtener_plantilla
+
+
+def test_informe_sin_limite_de_filas(tmp_path):
+    n = 2500
+    df = pd.DataFrame({
+        'USUARIO': ['admin'] * n,
+        'TIPO DE ACTIVIDAD': [f'Actividad {i % 3}' for i in range(n)],
+        'FECHA': pd.date_range('2024-01-01', periods=n, freq='h'),
+        'DEPENDENCIA': ['ALCALDÍA'] * n,
+        'SOLICITANTE': ['Juan Perez'] * n,
+        'TIPO DE SOLICITUD': ['APOYO TECNOLÓGICO'] * n,
+        'MEDIO DE SOLICITUD': ['E-MAIL'] * n,
+        'CUMPLIDO': ['Sí'] * n,
+        'FECHA ATENCIÓN': ['2024-01-31'] * n,
+        'OBSERVACIONES': [''] * n
+    })
+    salida = str(tmp_path / "informe.xlsx")
+    contrato = {'nro': 'c-001', 'nombre': 'Juan Prueba', 'supervisor': 'Supervisor'}
+
+    assert generar_informe_template(df, salida, contrato_data=contrato)
+
+    ws = openpyxl.load_workbook(salida).active
+    assert ws.cell(row=2, column=3).value == 'C-001'
+    assert ws.cell(row=7, column=1).value == 'TIPO DE ACTIVIDAD'
+
+    col_a = [ws.cell(row=r, column=1).value for r in range(8, ws.max_row + 1)]
+    subtotales = [ws.cell(row=8 + i, column=2).value for i, v in enumerate(col_a) if v == 'ACTIVIDADES: ']
+    assert sum(subtotales) == n
+    assert len(subtotales) == 3
+    assert 'TOTAL GENERAL' in col_a
+    assert col_a[-1] == 'SUPERVISOR:'
+    # Filas de datos + 3 subtotales + total + pie (fecha, 2 firmas x 2 filas)
+    assert len(col_a) == n + 3 + 1 + 5
+
+
+def test_cache_de_plantilla_invalidado_por_mtime(tmp_path):
+    ruta = str(tmp_path / "plantilla.xlsx")
+    shutil.copy(TEMPLATE_EXCEL, ruta)
+
+    primera = obtener_plantilla(ruta)
+    assert obtener_plantilla(ruta) is primera
+
+    os.utime(ruta, (primera.mtime + 10, primera.mtime + 10))
+    assert obtener_plantilla(ruta) is not primera
+
+
+def test_filas_y_cortes_precalculados():
+    df = pd.DataFrame({
+        'TIPO DE ACTIVIDAD': ['B', 'A', 'B', 'A', 'A'],
+        'FECHA': pd.to_datetime(['2024-01-05', '2024-01-03', '2024-01-01', '2024-01-02', '2024-01-04']),
+        'SOLICITANTE': ['s1', 's2', 's3', 's4', 's5'],
+        'FECHA ATENCIÓN': ['2024-02-01'] * 5
+    })
+    filas, tamanos = _preparar_filas_informe(df)
+
+    assert tamanos == [3, 2]
+    assert [f[1] for f in filas] == ['2024-01-02', '2024-01-03', '2024-01-04', '2024-01-01', '2024-01-05']
+    # Columnas ausentes con su valor por defecto
+    assert filas[0] == ['A', '2024-01-02', '', 's4', '', '', 'Sí', '2024-02-01', '']
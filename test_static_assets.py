@@ -0,0 +1,44 @@
+"""
+Prueba de los recursos estáticos con huella de contenido.
+"""
+
+import static_assets
+
+
+def _preparar_static(tmp_path, monkeypatch):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "app.css").write_text("body { color: red; }\n" * 100)
+    monkeypatch.setattr(static_assets, "STATIC_DIR", str(tmp_path))
+    monkeypatch.setattr(static_assets, "_huellas", None)
+
+
+def test_url_con_huella_y_resolucion(tmp_path, monkeypatch):
+    _preparar_static(tmp_path, monkeypatch)
+
+    url = static_assets.url_activo("css/app.css")
+    assert url.startswith("/static/css/app.") and url.endswith(".css") and len(url) == len("/static/css/app.css") + 9
+
+    archivo, content_type, cache_control = static_assets.resolver(url[len("/static/"):])
+    assert archivo.endswith("app.css")
+    assert content_type == "text/css; charset=utf-8"
+    assert "immutable" in cache_control
+    assert "immutable" not in static_assets.resolver("css/app.css")[2]
+
+    assert static_assets.resolver("css/app.00000000.css") is None
+    assert static_assets.resolver("../config.py") is None
+    # Librería no descargada: se usa el CDN
+    assert static_assets.url_activo("vendor/chartjs/chart.umd.min.js").startswith("https://")
+
+
+def test_flask_sirve_hoja_de_estilos_de_la_plantilla():
+    from app import app
+    from templates import LOGIN_TEMPLATE
+
+    url = static_assets.url_activo("css/app.css")
+    assert url in LOGIN_TEMPLATE
+    assert "<style>" not in LOGIN_TEMPLATE
+
+    respuesta = app.test_client().get(url)
+    assert respuesta.status_code == 200
+    assert respuesta.headers["Cache-Control"] == static_assets.CACHE_INMUTABLE
+    assert b".login-container" in respuesta.data
@@ -1,10 +1,16 @@
 """
 Módulo de utilidades y decoradores para la aplicación.
-Solo contiene decoradores de cache y medición de rendimiento.
+Contiene decoradores de cache y medición de rendimiento, y la importación
+diferida de librerías pesadas y la normalización de fechas y textos de búsqueda.
 """
 
 import functools
+import importlib
+import threading
+import re
 import time
+import unicodedata
+from datetime import date, datetime
 from config import logger, _CACHE, _CACHE_TIMEOUT
 
 
@@ -48,4 +54,106 @@ def medir_tiempo(func):
             logger.warning(f"FUNCIÓN LENTA: {func.__name__} tomó {tiempo_ms:.2f}ms")
         
         return resultado
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+class ModuloDiferido:
+    """
+    Módulo que se importa en el primer acceso a uno de sus atributos.
+    pandas tarda cientos de ms y decenas de MB en cargarse: así los procesos
+    que no lo usan (workers recién iniciados, scripts de mantenimiento) no lo pagan.
+
+        pd = ModuloDiferido("pandas")
+        pd.DataFrame(...)      # aquí se importa pandas
+    """
+
+    def __init__(self, nombre):
+        self._nombre = nombre
+        self._modulo = None
+        self._lock = threading.Lock()
+
+    def _cargar(self):
+        if self._modulo is None:
+            with self._lock:
+                if self._modulo is None:
+                    self._modulo = importlib.import_module(self._nombre)
+        return self._modulo
+
+    def __getattr__(self, atributo):
+        return getattr(self._cargar(), atributo)
+
+    def __repr__(self):
+        estado = "cargado" if self._modulo is not None else "sin cargar"
+        return f"<módulo diferido {self._nombre} ({estado})>"
+
+
+# =============================================================================
+# FECHAS
+# =============================================================================
+# Formato canónico de FECHA y FECHA ATENCIÓN en la base: ISO 8601, que ordena y se
+# compara como texto ('YYYY-MM-DD HH:MM:SS', o 'YYYY-MM-DD' si es solo una fecha)
+FORMATO_FECHA_HORA = "%Y-%m-%d %H:%M:%S"
+FORMATO_FECHA = "%Y-%m-%d"
+_FORMATOS_LOCALES = ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y", "%d-%m-%Y")
+_FECHAS_VACIAS = {'', 'nan', 'nat', 'none', 'null'}
+
+
+def normalizar_fecha(valor):
+    """
+    Fecha en formato canónico, o None si está vacía ('', 'nan', 'NaT'...).
+    Acepta datetime/date (incluido Timestamp de pandas), ISO 8601 con 'T', fracciones
+    de segundo o zona horaria (se conserva la hora local) y dd/mm/aaaa.
+    Lanza ValueError si el valor no es una fecha.
+    """
+    if valor is None:
+        return None
+    if isinstance(valor, datetime):
+        if str(valor) == 'NaT':
+            return None
+        return valor.strftime(FORMATO_FECHA_HORA)
+    if isinstance(valor, date):
+        return valor.strftime(FORMATO_FECHA)
+
+    texto = str(valor).strip()
+    if texto.lower() in _FECHAS_VACIAS:
+        return None
+    try:
+        fecha = datetime.fromisoformat(texto)
+    except ValueError:
+        for formato in _FORMATOS_LOCALES:
+            try:
+                fecha = datetime.strptime(texto, formato)
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f"Fecha no reconocida: {texto!r}")
+    return fecha.strftime(FORMATO_FECHA_HORA if ':' in texto else FORMATO_FECHA)
+
+
+def fecha_de_filtro(valor):
+    """Fecha 'YYYY-MM-DD' de un parámetro de filtro; None si está vacía o no es una fecha ISO"""
+    try:
+        return date.fromisoformat((valor or '').strip()).strftime(FORMATO_FECHA)
+    except ValueError:
+        return None
+
+
+# =============================================================================
+# TEXTOS DE BÚSQUEDA
+# =============================================================================
+
+def plegar_texto(texto):
+    """
+    Forma de búsqueda de un texto: minúsculas, sin tildes ni diéresis (también ñ → n)
+    y espacios colapsados. "  GESTIÓN   Predial" → "gestion predial".
+    """
+    if texto is None:
+        return ''
+    descompuesto = unicodedata.normalize('NFKD', str(texto).casefold())
+    sin_marcas = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return ' '.join(sin_marcas.split())
+
+
+def palabras_plegadas(texto):
+    """Palabras de una consulta ya plegadas, sin signos ni comodines de LIKE"""
+    return re.findall(r"[^\W_]+", plegar_texto(texto))
@@ -5,9 +5,9 @@ Cada clase maneja una sola ruta o responsabilidad.
 
 import json
 import os
-import tempfile
+import shutil
 from datetime import datetime
-from urllib.parse import parse_qs, unquote
+from urllib.parse import parse_qs, unquote, urlparse
 
 from templates import (
     LOGIN_TEMPLATE, MAIN_TEMPLATE, GESTION_TEMPLATE,
@@ -20,12 +20,22 @@ from database import (
     cargar_medios_solicitud, guardar_medios_solicitud,
     cargar_usuarios, guardar_usuarios,
     guardar_actividades, guardar_registro,
-    eliminar_registro, EXCEL_FILE, cargar_registros
+    eliminar_registro, EXCEL_FILE, obtener_registros_recientes, obtener_versiones_datos
 )
 from activity_service import agregar_actividad_personal, eliminar_actividad_personal
 from export_service import (
-    exportar_registros_filtrados, obtener_estadisticas_exportacion,
-    generar_informe_template
+    obtener_estadisticas_exportacion, obtener_estadisticas_versionadas, generar_csv_stream
+)
+from export_cache import obtener_informe
+from compression import es_comprimible, codificacion_para, comprimir, comprimir_stream
+from static_assets import STATIC_URL, resolver
+from eventos import bus, generar_sse
+from records_api import usuario_api, parametros_api, generar_ndjson_stream, MIMETYPE_NDJSON
+from busqueda import parametros_busqueda, buscar
+from autocompletar import parametros_autocompletar, autocompletar
+from report_batch import generar_lote_zip, nombre_lote, TIPOS_REPORTE
+from export_jobs import (
+    enviar_exportacion, obtener_trabajo, purgar_expirados, puede_ver, estado_publico, ESTADO_LISTO
 )
 from html_utils import (
     generar_opciones_actividades, generar_opciones_ubicaciones,
@@ -33,13 +43,28 @@ from html_utils import (
     generar_opciones_usuarios, generar_gestion_usuarios,
     generar_gestion_actividades_globales, generar_gestion_actividades_personales,
     generar_gestion_ubicaciones, generar_gestion_tipos_solicitud,
-    generar_gestion_medios_solicitud, generar_tabla_registros_recientes
+    generar_gestion_medios_solicitud, generar_tabla_registros_recientes,
+    generar_formulario_lote, generar_tabla_usuarios_stats, json_script
 )
+from utils import fecha_de_filtro
 
 # =============================================================================
 # CLASE BASE
 # =============================================================================
 
+def usuario_de_cookies(cookies):
+    """Usuario de la cookie de sesión (encabezado Cookie) o None"""
+    cookies = cookies or ''
+    if 'usuario=' in cookies:
+        for cookie in cookies.split(';'):
+            if 'usuario=' in cookie.strip():
+                try:
+                    return unquote(cookie.strip().split('=')[1])
+                except Exception:
+                    return None
+    return None
+
+
 class BaseRoute:
     """Clase base con utilidades compartidas para todos los handlers"""
     
@@ -48,15 +73,7 @@ class BaseRoute:
         self.usuario_actual = self._obtener_usuario()
 
     def _obtener_usuario(self):
-        cookies = self.request.headers.get('Cookie', '')
-        if 'usuario=' in cookies:
-            for cookie in cookies.split(';'):
-                if 'usuario=' in cookie.strip():
-                    try:
-                        return unquote(cookie.strip().split('=')[1])
-                    except Exception:
-                        return None
-        return None
+        return usuario_de_cookies(self.request.headers.get('Cookie', ''))
 
     def get(self, params):
         self.request.send_error(405, "Método no permitido")
@@ -64,22 +81,90 @@ class BaseRoute:
     def post(self, params, post_data):
         self.request.send_error(405, "Método no permitido")
 
-    def redirect(self, path):
+    def redirect(self, path, cookie=None):
         self.request.send_response(303)
         self.request.send_header('Location', path)
+        if cookie:
+            self.request.send_header('Set-Cookie', cookie)
+        self.request.send_header('Content-Length', '0')
         self.request.end_headers()
 
-    def render_html(self, html, status=200):
+    def _codificacion(self, content_type, tamano=None):
+        return codificacion_para(self.request.headers.get('Accept-Encoding'), content_type, tamano)
+
+    def send_body(self, body, content_type, status=200, encabezados=None):
+        """Envía un cuerpo completo, comprimido si el cliente lo acepta y supera el umbral"""
+        codificacion = self._codificacion(content_type, len(body))
+        if codificacion:
+            body = comprimir(body, codificacion)
         self.request.send_response(status)
-        self.request.send_header('Content-type', 'text/html; charset=utf-8')
+        self.request.send_header('Content-type', content_type)
+        if es_comprimible(content_type):
+            self.request.send_header('Vary', 'Accept-Encoding')
+        if codificacion:
+            self.request.send_header('Content-Encoding', codificacion)
+        for nombre, valor in (encabezados or {}).items():
+            self.request.send_header(nombre, valor)
+        self.request.send_header('Content-Length', str(len(body)))
         self.request.end_headers()
-        self.request.wfile.write(html.encode('utf-8'))
+        self.request.wfile.write(body)
+
+    def render_html(self, html, status=200):
+        self.send_body(html.encode('utf-8'), 'text/html; charset=utf-8', status)
 
     def send_json(self, data, status=200):
-        self.request.send_response(status)
-        self.request.send_header('Content-type', 'application/json')
+        self.send_body(json.dumps(data).encode('utf-8'), 'application/json', status)
+
+    def send_stream(self, chunks, content_type, filename=None, encabezados=None):
+        """
+        Envía una respuesta por bloques sin conocer su tamaño total.
+        Usa Transfer-Encoding: chunked en HTTP/1.1; en HTTP/1.0 cierra la conexión al terminar.
+        """
+        chunked = self.request.protocol_version >= 'HTTP/1.1'
+        codificacion = self._codificacion(content_type)
+        if codificacion:
+            chunks = comprimir_stream(chunks, codificacion)
+        self.request.send_response(200)
+        self.request.send_header('Content-Type', content_type)
+        if filename:
+            self.request.send_header('Content-Disposition', f'attachment; filename="{filename}"')
+        if es_comprimible(content_type):
+            self.request.send_header('Vary', 'Accept-Encoding')
+        if codificacion:
+            self.request.send_header('Content-Encoding', codificacion)
+        for nombre, valor in (encabezados or {}).items():
+            self.request.send_header(nombre, valor)
+        if chunked:
+            self.request.send_header('Transfer-Encoding', 'chunked')
+        else:
+            self.request.send_header('Connection', 'close')
+            self.request.close_connection = True
         self.request.end_headers()
-        self.request.wfile.write(json.dumps(data).encode('utf-8'))
+        try:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                if chunked:
+                    self.request.wfile.write(f"{len(chunk):X}\r\n".encode('ascii') + chunk + b"\r\n")
+                else:
+                    self.request.wfile.write(chunk)
+        finally:
+            # Si el cliente se desconecta el generador libera sus recursos de inmediato
+            cerrar = getattr(chunks, 'close', None)
+            if cerrar:
+                cerrar()
+        if chunked:
+            self.request.wfile.write(b"0\r\n\r\n")
+
+    def send_file(self, path, content_type, filename):
+        """Envía un archivo del disco como descarga sin cargarlo completo en memoria"""
+        with open(path, 'rb') as f:
+            self.request.send_response(200)
+            self.request.send_header('Content-Type', content_type)
+            self.request.send_header('Content-Disposition', f'attachment; filename="{filename}"')
+            self.request.send_header('Content-Length', str(os.fstat(f.fileno()).st_size))
+            self.request.end_headers()
+            shutil.copyfileobj(f, self.request.wfile)
 
     def _require_auth(self):
         """Verifica autenticación, redirige si no está logueado"""
@@ -117,8 +202,8 @@ class IndexHandler(BaseRoute):
             alertas = '<div class="alert alert-info alert-dismissible fade show">🗑️ Registro eliminado<button type="button" class="btn-close" data-bs-dismiss="alert"></button></div>'
         
         # Cargar registros para la tabla
-        df = cargar_registros(self.usuario_actual)
-        tabla_html = generar_tabla_registros_recientes(df, self.usuario_actual)
+        registros = obtener_registros_recientes(self.usuario_actual)
+        tabla_html = generar_tabla_registros_recientes(registros, self.usuario_actual)
 
         html = MAIN_TEMPLATE.format(
             usuario_actual=self.usuario_actual,
@@ -146,10 +231,7 @@ class LoginHandler(BaseRoute):
             encontrado = next((u for u in usuarios if u.lower() == usuario.lower()), None)
             
             if encontrado:
-                self.request.send_response(303)
-                self.request.send_header('Location', '/')
-                self.request.send_header('Set-Cookie', f'usuario={encontrado}; Path=/; Max-Age=3600')
-                self.request.end_headers()
+                self.redirect('/', cookie=f'usuario={encontrado}; Path=/; Max-Age=3600')
                 return
         
         self.redirect('/?error=1')
@@ -158,10 +240,7 @@ class LoginHandler(BaseRoute):
 class LogoutHandler(BaseRoute):
     """Cierra sesión eliminando la cookie"""
     def get(self, params):
-        self.request.send_response(303)
-        self.request.send_header('Location', '/')
-        self.request.send_header('Set-Cookie', 'usuario=; Path=/; Expires=Thu, 01 Jan 1970 00:00:00 GMT')
-        self.request.end_headers()
+        self.redirect('/', cookie='usuario=; Path=/; Expires=Thu, 01 Jan 1970 00:00:00 GMT')
 
     def post(self, params, post_data):
         self.get(params)
@@ -206,9 +285,11 @@ class EstadisticasHandler(BaseRoute):
         if not self._require_auth():
             return
         
-        fecha_inicio = params.get('fecha_inicio', [''])[0].strip() or None
-        fecha_fin = params.get('fecha_fin', [''])[0].strip() or None
+        fecha_inicio = fecha_de_filtro(params.get('fecha_inicio', [''])[0])
+        fecha_fin = fecha_de_filtro(params.get('fecha_fin', [''])[0])
 
+        # Versiones antes de calcular: un cambio concurrente llega luego como delta, no se pierde
+        versiones = obtener_versiones_datos(self.usuario_actual)
         stats = obtener_estadisticas_exportacion(self.usuario_actual, fecha_inicio, fecha_fin)
         
         # Calcular promedio diario
@@ -226,19 +307,7 @@ class EstadisticasHandler(BaseRoute):
         
         # Generar tabla de usuarios stats
         user_list = stats.get('usuarios', [])
-        tabla_stats = ""
-        for u in user_list:
-            admin_badge = '<span class="badge bg-soft-primary text-primary">Admin</span>' if u['usuario'] == 'admin' else ""
-            tabla_stats += f"""
-            <tr>
-                <td><span class="fw-bold">{u['usuario']}</span> {admin_badge}</td>
-                <td class="text-center"><span class="badge bg-light text-dark">{u['total']}</span></td>
-                <td class="text-center">{u['cumplimiento']}</td>
-                <td class="small text-muted">{u['ultima']}</td>
-            </tr>
-            """
-        if not tabla_stats:
-            tabla_stats = "<tr><td colspan='4' class='text-center text-muted'>No hay datos disponibles</td></tr>"
+        tabla_stats = generar_tabla_usuarios_stats(user_list)
 
         html = ESTADISTICAS_TEMPLATE.format(
             usuario_actual=self.usuario_actual,
@@ -247,16 +316,54 @@ class EstadisticasHandler(BaseRoute):
             fecha_min=fecha_inicio if fecha_inicio else fecha_min,
             fecha_max=fecha_fin if fecha_fin else stats.get('fecha_max', 'N/A'),
             promedio_diario=promedio,
-            data_actividades=json.dumps(stats.get('chart_actividades', {'labels': [], 'data': []})),
-            data_cumplimiento=json.dumps(stats.get('chart_cumplimiento', {'labels': [], 'data': []})),
-            data_linea=json.dumps(stats.get('chart_linea', {'labels': [], 'data': []})),
+            data_actividades=json_script(stats.get('chart_actividades', {'labels': [], 'data': []})),
+            data_cumplimiento=json_script(stats.get('chart_cumplimiento', {'labels': [], 'data': []})),
+            data_linea=json_script(stats.get('chart_linea', {'labels': [], 'data': []})),
             tabla_usuarios_stats=tabla_stats,
+            data_usuarios=json_script(user_list),
+            data_versiones=json_script(versiones),
             val_fecha_inicio=fecha_inicio or "",
-            val_fecha_fin=fecha_fin or ""
+            val_fecha_fin=fecha_fin or "",
+            filtro=json_script({'inicio': fecha_inicio or '', 'fin': fecha_fin or ''})
         )
         self.render_html(html)
 
 
+class EstadisticasDatosHandler(BaseRoute):
+    """Estadísticas en JSON para resincronizar el dashboard (204 si la versión no cambió)"""
+    def get(self, params):
+        if not self.usuario_actual:
+            self.send_json({'error': 'No autorizado'}, status=401)
+            return
+        stats = obtener_estadisticas_versionadas(
+            self.usuario_actual,
+            fecha_de_filtro(params.get('fecha_inicio', [''])[0]),
+            fecha_de_filtro(params.get('fecha_fin', [''])[0]),
+            params.get('version', [None])[0]
+        )
+        if stats is None:
+            self.request.send_response(204)
+            self.request.end_headers()
+            return
+        self.send_json(stats)
+
+
+class EventosHandler(BaseRoute):
+    """Server-Sent Events del bus (deltas del dashboard). Cada stream ocupa un hilo del pool"""
+    def get(self, params):
+        if not self.usuario_actual:
+            self.send_json({'error': 'No autorizado'}, status=401)
+            return
+        ultimo_id = self.request.headers.get('Last-Event-ID') or params.get('ultimo', [None])[0]
+        suscripcion = bus.suscribir_hilo(self.usuario_actual, ultimo_id)
+        if suscripcion is None:
+            # Sin cupo: el dashboard sigue solo con el sondeo de /estadisticas/datos
+            self.send_body(b'', 'text/plain', status=503, encabezados={'Retry-After': '30'})
+            return
+        self.send_stream(generar_sse(suscripcion), 'text/event-stream; charset=utf-8',
+                         encabezados={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 class ExportarHandler(BaseRoute):
     """Página y procesamiento de exportación de datos"""
     def get(self, params):
@@ -306,6 +413,7 @@ class ExportarHandler(BaseRoute):
             total_tipos_actividad=stats.get('total_tipos_actividad', 0),
             ultima_exportacion=stats.get('ultima_exportacion', 'Nunca'),
             filtro_usuario_html=filtro_usuario_html,
+            lote_html=generar_formulario_lote() if self.usuario_actual == "admin" else "",
             val_contrato_objeto=dc.get('objeto', ''),
             val_contrato_nro=dc.get('nro', ''),
             val_contrato_nombre=dc.get('nombre', ''),
@@ -314,14 +422,9 @@ class ExportarHandler(BaseRoute):
         )
         self.render_html(html)
 
-    def post(self, params, post_data):
-        if not self._require_auth():
-            return
-        
+    def _parametros(self, post_data):
+        """Lee el formulario, guarda los datos del contrato y resuelve los filtros"""
         data = parse_qs(post_data)
-        fecha_inicio = data.get('fecha_inicio', [''])[0].strip() or None
-        fecha_fin = data.get('fecha_fin', [''])[0].strip() or None
-        actividad = data.get('actividad', [''])[0].strip() or None
         formato = data.get('formato', ['excel'])[0].strip()
         tipo_reporte = data.get('tipo_reporte', ['detallado'])[0].strip()
         from config import logger
@@ -349,62 +452,130 @@ class ExportarHandler(BaseRoute):
         elif usuario_filtro == "Todos":
             usuario_filtro = None
 
-        df, _ = exportar_registros_filtrados(
-            fecha_inicio=fecha_inicio, fecha_fin=fecha_fin,
-            usuario=usuario_filtro, actividad=actividad
-        )
-        
-        if df.empty:
-            self.redirect('/exportar?error=No hay datos para exportar')
+        filtros = {
+            'fecha_inicio': data.get('fecha_inicio', [''])[0].strip() or None,
+            'fecha_fin': data.get('fecha_fin', [''])[0].strip() or None,
+            'usuario': usuario_filtro,
+            'actividad': data.get('actividad', [''])[0].strip() or None
+        }
+        return filtros, formato, tipo_reporte, contrato_data
+
+    def post(self, params, post_data):
+        if not self._require_auth():
             return
         
-        tmp_path = None
+        filtros, formato, tipo_reporte, contrato_data = self._parametros(post_data)
+
+        # PDF: informe detallado con el formato de la plantilla, página por página
+        if formato == 'pdf':
+            from export_pdf import generar_pdf_stream    # fpdf solo se carga al exportar PDF
+            try:
+                stream = generar_pdf_stream(contrato_data=contrato_data, **filtros)
+            except RuntimeError as e:
+                self.redirect(f'/exportar?error={e}')
+                return
+            if stream is None:
+                self.redirect('/exportar?error=No hay datos para exportar')
+                return
+            filename = f"Informe_detallado_{self.usuario_actual}_{datetime.now().strftime('%Y%m%d')}.pdf"
+            self.send_stream(stream, 'application/pdf', filename)
+            return
+
+        # Parquet: formato columnar para análisis, también por bloques
+        if formato == 'parquet':
+            from export_parquet import generar_parquet_stream, MIMETYPE_PARQUET
+            try:
+                stream = generar_parquet_stream(**filtros)
+            except RuntimeError as e:
+                self.redirect(f'/exportar?error={e}')
+                return
+            if stream is None:
+                self.redirect('/exportar?error=No hay datos para exportar')
+                return
+            filename = f"exportacion_{self.usuario_actual}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.parquet"
+            self.send_stream(stream, MIMETYPE_PARQUET, filename)
+            return
+
+        # CSV: se transmite por bloques directamente desde la BD
+        if formato != 'excel':
+            stream = generar_csv_stream(**filtros)
+            if stream is None:
+                self.redirect('/exportar?error=No hay datos para exportar')
+                return
+            filename = f"exportacion_{self.usuario_actual}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            self.send_stream(stream, 'text/csv', filename)
+            return
+
+        # Excel: se sirve desde el cache de informes si ya se generó con los mismos datos
         try:
-            suffix = '.xlsx' if formato == 'excel' else '.csv'
-            # En Windows, NamedTemporaryFile mantiene el archivo abierto y bloqueado.
-            # mkstemp nos da la ruta y cerramos el descriptor inmediatamente para liberar el bloqueo.
-            fd, tmp_path = tempfile.mkstemp(suffix=suffix)
-            os.close(fd)
-            
-            if formato == 'excel':
-                generado = False
-                if tipo_reporte == 'final':
-                    from export_final_service import generar_informe_final_resumen
-                    generado = generar_informe_final_resumen(df, tmp_path, contrato_data=contrato_data)
-                else:
-                    generado = generar_informe_template(df, tmp_path, contrato_data=contrato_data)
-                
-                if not generado:
-                    self.redirect('/exportar?error=No se pudo generar el archivo Excel')
-                    return
-                content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-                filename = f"Informe_{tipo_reporte}_{self.usuario_actual}_{datetime.now().strftime('%Y%m%d')}.xlsx"
-            else:
-                df.to_csv(tmp_path, index=False, encoding='utf-8')
-                content_type = 'text/csv'
-                filename = f"exportacion_{self.usuario_actual}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            
-            with open(tmp_path, 'rb') as f:
-                file_data = f.read()
+            ruta = obtener_informe(filtros, tipo_reporte, contrato_data)
+        except (ValueError, RuntimeError) as e:
+            self.redirect(f'/exportar?error={e}')
+            return
         except Exception as e:
             from config import logger
             logger.exception(f"Error crítico en ExportarHandler.post: {e}")
             self.redirect('/exportar?error=Error al procesar la exportación')
             return
-        finally:
-            if tmp_path and os.path.exists(tmp_path):
-                try:
-                    os.remove(tmp_path)
-                except Exception as e:
-                    from config import logger
-                    logger.error(f"No se pudo eliminar el archivo temporal {tmp_path}: {e}")
-        
-        self.request.send_response(200)
-        self.request.send_header('Content-Type', content_type)
-        self.request.send_header('Content-Disposition', f'attachment; filename="{filename}"')
-        self.request.send_header('Content-Length', str(len(file_data)))
-        self.request.end_headers()
-        self.request.wfile.write(file_data)
+
+        filename = f"Informe_{tipo_reporte}_{self.usuario_actual}_{datetime.now().strftime('%Y%m%d')}.xlsx"
+        self.send_file(ruta, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', filename)
+
+class ExportarTrabajosHandler(ExportarHandler):
+    """Colección de exportaciones en segundo plano: solo admite POST (envío)"""
+    def post(self, params, post_data):
+        if not self._require_auth():
+            return
+        filtros, formato, tipo_reporte, contrato_data = self._parametros(post_data)
+        purgar_expirados()
+        trabajo = enviar_exportacion(self.usuario_actual, filtros, formato, tipo_reporte, contrato_data)
+        self.send_json(estado_publico(trabajo), status=202)
+
+    def get(self, params):
+        self.send_body(b'', 'text/plain', status=405, encabezados={'Allow': 'POST'})
+
+
+class ExportarTrabajoHandler(BaseRoute):
+    """Progreso de una exportación en segundo plano (?id=)"""
+    def get(self, params):
+        if not self.usuario_actual:
+            self.send_json({'error': 'No autorizado'}, status=401)
+            return
+        trabajo = obtener_trabajo(params.get('id', [''])[0])
+        if not trabajo or not puede_ver(trabajo, self.usuario_actual):
+            self.send_json({'error': 'Trabajo no encontrado'}, status=404)
+            return
+        self.send_json(estado_publico(trabajo))
+
+
+class ExportarDescargaHandler(BaseRoute):
+    """Descarga de una exportación en segundo plano ya terminada (?id=)"""
+    def get(self, params):
+        if not self._require_auth():
+            return
+        trabajo = obtener_trabajo(params.get('id', [''])[0])
+        if not trabajo or not puede_ver(trabajo, self.usuario_actual):
+            self.redirect('/exportar?error=La exportación no existe o ya expiró')
+            return
+        if trabajo['estado'] != ESTADO_LISTO:
+            self.redirect('/exportar?error=La exportación aún no está lista')
+            return
+        self.send_file(trabajo['ruta'], trabajo['mimetype'], trabajo['filename'])
+
+class ExportarLoteHandler(BaseRoute):
+    """Informes de fin de mes de todos los contratistas en un zip (solo admin)"""
+    def post(self, params, post_data):
+        if not self._require_admin():
+            return
+        data = parse_qs(post_data)
+        tipo_reporte = data.get('tipo_reporte', ['ambos'])[0].strip()
+        stream = generar_lote_zip(
+            usuarios=data.get('usuarios', []),
+            fecha_inicio=data.get('fecha_inicio', [''])[0].strip() or None,
+            fecha_fin=data.get('fecha_fin', [''])[0].strip() or None,
+            tipos=TIPOS_REPORTE if tipo_reporte == 'ambos' else (tipo_reporte,)
+        )
+        self.send_stream(stream, 'application/zip', nombre_lote())
 
 # =============================================================================
 # HANDLERS DE ACCIONES (POST)
@@ -639,9 +810,54 @@ class APIHandler(BaseRoute):
             self.send_json(cargar_actividades(self.usuario_actual))
         elif path == '/api/estadisticas_exportacion':
             self.send_json(obtener_estadisticas_exportacion(self.usuario_actual))
+        elif path == '/api/registros':
+            self._registros_ndjson(params)
+        elif path == '/api/buscar':
+            self._buscar(params)
+        elif path == '/api/autocompletar':
+            self._autocompletar(params)
         else:
             self.request.send_error(404)
 
+    def _registros_ndjson(self, params):
+        """Registros en NDJSON con sincronización incremental (since_id / updated_since)"""
+        usuario = usuario_api(self.usuario_actual, self.request.headers.get('Authorization'))
+        if not usuario:
+            self.send_json({'error': 'No autorizado'}, status=401)
+            return
+        try:
+            parametros = parametros_api(usuario, lambda nombre: params.get(nombre, [None])[0])
+        except ValueError as e:
+            self.send_json({'error': str(e)}, status=400)
+            return
+        self.send_stream(generar_ndjson_stream(parametros), MIMETYPE_NDJSON)
+
+    def _buscar(self, params):
+        """Búsqueda por texto con relevancia, resaltado y paginación (?q=&pagina=&por_pagina=)"""
+        usuario = usuario_api(self.usuario_actual, self.request.headers.get('Authorization'))
+        if not usuario:
+            self.send_json({'error': 'No autorizado'}, status=401)
+            return
+        try:
+            parametros = parametros_busqueda(lambda nombre: params.get(nombre, [None])[0])
+        except ValueError as e:
+            self.send_json({'error': str(e)}, status=400)
+            return
+        self.send_json(buscar(usuario, parametros))
+
+    def _autocompletar(self, params):
+        """Sugerencias de solicitante o dependencia por similitud (?campo=&q=&k=)"""
+        usuario = usuario_api(self.usuario_actual, self.request.headers.get('Authorization'))
+        if not usuario:
+            self.send_json({'error': 'No autorizado'}, status=401)
+            return
+        try:
+            parametros = parametros_autocompletar(lambda nombre: params.get(nombre, [None])[0])
+        except ValueError as e:
+            self.send_json({'error': str(e)}, status=400)
+            return
+        self.send_json(autocompletar(parametros))
+
 
 class StaticHandler(BaseRoute):
     """Descarga de archivos estáticos"""
@@ -660,6 +876,18 @@ class StaticHandler(BaseRoute):
         self.request.end_headers()
         self.request.wfile.write(content)
 
+class RecursoEstaticoHandler(BaseRoute):
+    """CSS, JS y fuentes de static/ (con huella de contenido → cache inmutable)"""
+    def get(self, params):
+        recurso = resolver(urlparse(self.request.path).path[len(STATIC_URL):])
+        if not recurso:
+            self.request.send_error(404, "Recurso no encontrado")
+            return
+        archivo, content_type, cache_control = recurso
+        with open(archivo, 'rb') as f:
+            contenido = f.read()
+        self.send_body(contenido, content_type, encabezados={'Cache-Control': cache_control})
+
 # =============================================================================
 # MAPA DE RUTAS
 # =============================================================================
@@ -670,7 +898,13 @@ ROUTE_MAP = {
     '/logout': LogoutHandler,
     '/gestion': GestionHandler,
     '/estadisticas': EstadisticasHandler,
+    '/estadisticas/datos': EstadisticasDatosHandler,
+    '/eventos': EventosHandler,
     '/exportar': ExportarHandler,
+    '/exportar/trabajos': ExportarTrabajosHandler,
+    '/exportar/trabajo': ExportarTrabajoHandler,
+    '/exportar/descargar': ExportarDescargaHandler,
+    '/exportar/lote': ExportarLoteHandler,
     '/guardar': GuardarRegistroHandler,
     '/agregar_registro': GuardarRegistroHandler,
     '/eliminar_registro_accion': EliminarRegistroAccionHandler,
@@ -688,5 +922,13 @@ ROUTE_MAP = {
     '/eliminar_medio_solicitud': ConfigAdminHandler,
     '/api/actividades': APIHandler,
     '/api/estadisticas_exportacion': APIHandler,
+    '/api/registros': APIHandler,
+    '/api/buscar': APIHandler,
+    '/api/autocompletar': APIHandler,
     '/descargar_excel': StaticHandler,
 }
+
+# Rutas resueltas por prefijo (el resto de la ruta la interpreta el handler)
+ROUTE_PREFIXES = {
+    STATIC_URL: RecursoEstaticoHandler,
+}